@@ -0,0 +1,63 @@
+# Copyright (c) 2010-2025 Evolveum and contributors
+#
+# Licensed under the EUPL-1.2 or later.
+
+"""
+Micro-benchmark of the per-request chain construction overhead.
+
+Compares building the LLM client and chain for every request (previous behaviour) with drawing
+the prebuilt chain from the registry. No LLM calls are made.
+
+Usage: uv run python -m benchmark.chain_construction
+"""
+
+import timeit
+
+from langchain_openai import ChatOpenAI
+
+import src.router  # noqa: F401 - importing routers registers module chains
+from src.common.llm import chains, get_default_llm, make_basic_chain
+from src.config import config
+from src.modules.matching.prompts import parser, prompt
+
+ITERATIONS = 500
+
+
+def per_request_construction() -> None:
+    llm = ChatOpenAI(
+        openai_api_key=config.llm.openai_api_key or "benchmark",
+        openai_api_base=config.llm.openai_api_base,
+        model_name=config.llm.model_name,
+        request_timeout=config.llm.request_timeout,
+        temperature=1.0,
+        reasoning_effort="high",
+        extra_body=config.llm.extra_body,
+    )
+    make_basic_chain(prompt, llm, parser)
+
+
+def per_request_chain_with_pooled_client() -> None:
+    make_basic_chain(prompt, get_default_llm(), parser)
+
+
+def registry_lookup() -> None:
+    chains.get("matching", get_default_llm())
+
+
+def main() -> None:
+    config.llm.openai_api_key = config.llm.openai_api_key or "benchmark"
+    chains.build_all(get_default_llm())
+
+    cases = [
+        ("new client + new chain per request", per_request_construction),
+        ("pooled client + new chain per request", per_request_chain_with_pooled_client),
+        ("pooled client + cached chain", registry_lookup),
+    ]
+    print(f"{'case':<40} {'per call':>12}")
+    for name, fn in cases:
+        seconds = min(timeit.repeat(fn, number=ITERATIONS, repeat=3)) / ITERATIONS
+        print(f"{name:<40} {seconds * 1e6:>9.1f} µs")
+
+
+if __name__ == "__main__":
+    main()
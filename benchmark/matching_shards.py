@@ -0,0 +1,106 @@
+# Copyright (c) 2010-2025 Evolveum and contributors
+#
+# Licensed under the EUPL-1.2 or later.
+
+"""
+Benchmark of sharded schema matching on a 1,000-attribute resource schema.
+
+The LLM is simulated with a latency model proportional to the prompt and output size, so the benchmark
+shows the effect of shard size and concurrency without LLM calls.
+
+Usage: uv run python -m benchmark.matching_shards
+"""
+
+import asyncio
+import json
+import re
+import time
+from unittest.mock import patch
+
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableLambda
+
+from src.common.budget import token_estimator
+from src.config import config
+from src.modules.matching.schema import MatchSchemaRequest
+from src.modules.matching.service import match_midpoint_schema
+
+RESOURCE_ATTRIBUTES = 1000
+MIDPOINT_ATTRIBUTES = 60
+
+# simulated latency: time to first token, prompt processing and output generation (scaled down)
+FIRST_TOKEN_SECONDS = 0.05
+SECONDS_PER_PROMPT_TOKEN = 2e-6
+SECONDS_PER_OUTPUT_TOKEN = 1e-4
+
+OCCURS = {"minOccurs": 0, "maxOccurs": 1}
+
+REQUEST = MatchSchemaRequest(
+    applicationSchema={
+        "name": "ri:inetOrgPerson",
+        "attribute": [
+            {
+                "name": f"c:attributes/ri:attr{i}",
+                "type": "xsd:string",
+                "description": f"LDAP attribute number {i}.",
+                **OCCURS,
+            }
+            for i in range(RESOURCE_ATTRIBUTES)
+        ],
+    },
+    midPointSchema={
+        "name": "c:UserType",
+        "attribute": [
+            {"name": f"c:attr{i}", "type": "xsd:string", "description": f"midPoint property number {i}.", **OCCURS}
+            for i in range(MIDPOINT_ATTRIBUTES)
+        ],
+    },
+)
+
+
+async def simulated_llm(prompt_value):
+    text = prompt_value.to_string()
+    resources = re.findall(r'"c:attributes/ri:attr(\d+)"', text)
+    output = json.dumps(
+        {
+            "pairs": [
+                {"MidPoint": f"c:attr{int(i) % MIDPOINT_ATTRIBUTES}", "Resource": [f"c:attributes/ri:attr{i}"]}
+                for i in resources
+            ]
+        }
+    )
+    await asyncio.sleep(
+        FIRST_TOKEN_SECONDS
+        + token_estimator.count(text) * SECONDS_PER_PROMPT_TOKEN
+        + token_estimator.count(output) * SECONDS_PER_OUTPUT_TOKEN
+    )
+    return AIMessage(content=output)
+
+
+async def measure() -> tuple[float, int]:
+    started = time.perf_counter()
+    response = await match_midpoint_schema(REQUEST)
+    return time.perf_counter() - started, len(response.attributeMatch)
+
+
+async def main() -> None:
+    config.cache.enabled = False
+    llm = RunnableLambda(simulated_llm)
+    cases = [("single prompt", False, 0, 1)] + [
+        (f"{tokens} tokens x {concurrency}", True, tokens, concurrency)
+        for tokens in (8000, 4000, 2000)
+        for concurrency in (2, 4, 8)
+    ]
+
+    print(f"{'case':<24} {'latency':>10} {'matches':>8}")
+    with patch("src.modules.matching.service.get_default_llm", return_value=llm):
+        for name, enabled, tokens, concurrency in cases:
+            config.matching.sharding_enabled = enabled
+            config.matching.shard_tokens = tokens
+            config.matching.max_concurrency = concurrency
+            seconds, matches = await measure()
+            print(f"{name:<24} {seconds:>9.2f}s {matches:>8}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,103 @@
+# Copyright (c) 2010-2025 Evolveum and contributors
+#
+# Licensed under the EUPL-1.2 or later.
+
+"""
+Benchmark of prompt payload serializers.
+
+Reports the size (characters and estimated tokens) of representative prompt payloads in every
+serialization format, the savings against indented JSON and the serialization time. Tokens are estimated
+by the prompt budget estimator; tokenizers merging runs of indentation make real savings of the compact
+formats somewhat smaller.
+
+Usage: uv run python -m benchmark.prompt_serialization
+"""
+
+import random
+import timeit
+from typing import Any
+
+from src.common.budget import token_estimator
+from src.common.serializers import SERIALIZERS
+from src.config import PromptFormat
+
+ITERATIONS = 200
+
+rng = random.Random(42)
+
+
+def object_type_statistics(attributes: int = 40, values: int = 10) -> dict[str, Any]:
+    """
+    Statistics payload shaped like `build_object_type_prompt_data` output.
+    """
+    return {
+        "schema": {
+            "attributes": [{"name": f"c:attributes/ri:attr{i}", "type": "xsd:string"} for i in range(attributes)]
+        },
+        "statistics": [
+            {
+                "column": f"c:attributes/ri:attr{i}",
+                "uniqueCount": values,
+                "uniqueRatio": round(rng.random(), 4),
+                "missingCount": rng.randint(0, 100),
+                "missingRatio": round(rng.random() / 10, 4),
+                "topN": values,
+                "values": [{"value": f"value-{i}-{j}", "count": rng.randint(1, 500)} for j in range(values)],
+                "patterns": [
+                    {"value": f"ou=unit{j},dc=example,dc=com", "type": "dn_suffix", "count": rng.randint(1, 500)}
+                    for j in range(3)
+                ],
+            }
+            for i in range(attributes)
+        ],
+        "crosstabs": [],
+        "size": 1000,
+        "coverage": 1.0,
+    }
+
+
+def complex_pairing_records(pairs: int = 50, attributes: int = 8) -> list[dict[str, Any]]:
+    """
+    Record pairs shaped like the complex_pairing prompt payload.
+    """
+
+    def record(side: str, i: int) -> dict[str, Any]:
+        return {
+            "identifier": f"{side}{i}",
+            "content": [{"attribute": f"c:attr{k}", "value": [f"{side}-value-{i}-{k}"]} for k in range(attributes)],
+        }
+
+    return [
+        {"midPoint": [record("M", i)], "application": [record("A", i), record("A", i + pairs)]} for i in range(pairs)
+    ]
+
+
+def matching_schema(attributes: int = 200) -> dict[str, dict[str, str]]:
+    """
+    Resource schema shaped like the matching prompt payload.
+    """
+    return {
+        f"c:attributes/ri:attr{i}": {"type": "xsd:string", "description": f"Directory attribute number {i}."}
+        for i in range(attributes)
+    }
+
+
+def main() -> None:
+    payloads = [
+        ("object_type statistics", object_type_statistics()),
+        ("complex_pairing records", complex_pairing_records()),
+        ("matching schema", matching_schema()),
+    ]
+    print(f"{'payload':<26} {'format':<8} {'chars':>8} {'tokens':>8} {'saved':>7} {'time':>10}")
+    for name, payload in payloads:
+        baseline = token_estimator.count(SERIALIZERS[PromptFormat.pretty](payload))
+        for fmt, serialize in SERIALIZERS.items():
+            text = serialize(payload)
+            tokens = token_estimator.count(text)
+            seconds = min(timeit.repeat(lambda: serialize(payload), number=ITERATIONS, repeat=3)) / ITERATIONS
+            saved = 1 - tokens / baseline
+            print(f"{name:<26} {fmt.value:<8} {len(text):>8} {tokens:>8} {saved:>6.0%} {seconds * 1e6:>7.1f} µs")
+
+
+if __name__ == "__main__":
+    main()
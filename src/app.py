@@ -2,12 +2,36 @@
 #
 # Licensed under the EUPL-1.2 or later.
 
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
 
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import PlainTextResponse
+
+from .common.cache import llm_cache
+from .common.context import start_request_stats
+from .common.jobs import job_manager
+from .common.llm import chains, get_default_llm, llm_clients
+from .common.metrics import metrics
 from .config import config
 from .router import root_router
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """
+    Manage application-wide resources: the pooled LLM clients and the result cache are warmed up and module
+    chains are built on startup; unfinished jobs are cancelled and the clients and the cache are closed on shutdown.
+    """
+    await llm_clients.start()
+    chains.build_all(get_default_llm())
+    await llm_cache.start(chains.output_models())
+    yield
+    await job_manager.aclose()
+    await llm_cache.aclose()
+    await llm_clients.aclose()
+
+
 def create_api() -> FastAPI:
     """
     Initialize and configure the FastAPI application.
@@ -16,9 +40,26 @@ def create_api() -> FastAPI:
     """
     git_commit = config.app.git_commit
     commit_info = f" ({git_commit})" if git_commit else ""
-    app = FastAPI(title=config.app.title, version=f"0.1.0{commit_info}")
+    app = FastAPI(title=config.app.title, version=f"0.1.0{commit_info}", lifespan=lifespan)
     app.include_router(root_router, prefix=config.app.api_base_url)
 
+    @app.middleware("http")
+    async def request_stats_headers(request: Request, call_next) -> Response:
+        """
+        Collect per-request statistics (e.g. LLM cache hits) and expose them as response headers.
+        """
+        stats = start_request_stats()
+        response = await call_next(request)
+        response.headers.update(stats.headers())
+        return response
+
+    @app.get("/metrics", response_class=PlainTextResponse)
+    async def metrics_endpoint() -> str:
+        """
+        Application metrics in the Prometheus text format.
+        """
+        return metrics.render()
+
     @app.get("/health")
     async def health() -> dict:
         """
@@ -0,0 +1,269 @@
+# Copyright (c) 2010-2025 Evolveum and contributors
+#
+# Licensed under the EUPL-1.2 or later.
+
+import copy
+import logging
+import math
+from collections import OrderedDict
+from typing import Any, Callable, Mapping
+
+from langchain.prompts import BasePromptTemplate
+
+from ..config import PromptBudgetSettings, config
+from .metrics import metrics
+
+"""
+Offline prompt token estimation and compaction of prompts exceeding the token budget of their endpoint.
+
+Token counts are estimated from the text length without a tokenizer and cached per text fragment
+(static template text and rendered prompt variables), so repeated fragments are counted once.
+Compaction works on the JSON-like payload the prompt variables are rendered from; the strategies
+are applied in order until the prompt fits the budget.
+"""
+
+logger = logging.getLogger(__name__)
+
+prompt_tokens = metrics.histogram(
+    "llm_prompt_tokens",
+    "Estimated prompt tokens before and after compaction.",
+    ["endpoint", "stage"],
+    buckets=(500, 1000, 2000, 4000, 8000, 16000, 32000, 64000, 128000),
+)
+prompt_compactions = metrics.counter(
+    "llm_prompt_compactions_total", "Compaction strategies applied to prompts over budget.", ["endpoint", "strategy"]
+)
+prompt_over_budget = metrics.counter(
+    "llm_prompt_over_budget_total", "Prompts exceeding the token budget after all compaction strategies.", ["endpoint"]
+)
+
+# payload keys compaction strategies apply to
+DESCRIPTION_KEYS = ("description",)
+VALUE_COUNT_KEYS = ("values", "valueCount", "counts", "tupleCount")
+PATTERN_KEYS = ("patterns", "valuePatternCount")
+
+Payload = Any
+Render = Callable[[Payload], dict[str, Any]]
+
+
+class TokenEstimator:
+    """
+    Estimates token counts of text fragments, caching the counts of recently seen fragments.
+
+    ASCII text is counted by `chars_per_token`; every other character is counted as one token,
+    since tokenizers rarely merge accented or non-Latin characters.
+    """
+
+    def __init__(self, chars_per_token: float = 4.0, cache_size: int = 4096):
+        self.chars_per_token = chars_per_token
+        self.cache_size = cache_size
+        self._fragments: OrderedDict[str, int] = OrderedDict()
+        self._templates: dict[int, tuple[BasePromptTemplate, int]] = {}
+
+    def count(self, text: str) -> int:
+        """
+        Estimate the number of tokens of a text fragment.
+        """
+        tokens = self._fragments.get(text)
+        if tokens is not None:
+            self._fragments.move_to_end(text)
+            return tokens
+        ascii_chars = len(text.encode("ascii", "ignore"))
+        tokens = math.ceil(ascii_chars / self.chars_per_token) + len(text) - ascii_chars
+        self._fragments[text] = tokens
+        if len(self._fragments) > self.cache_size:
+            self._fragments.popitem(last=False)
+        return tokens
+
+    def template_tokens(self, prompt: BasePromptTemplate) -> int:
+        """
+        Estimate the number of tokens of the static text of a prompt template (including partial variables).
+        """
+        cached = self._templates.get(id(prompt))
+        if cached is not None and cached[0] is prompt:
+            return cached[1]
+        tokens = self.count(prompt.format(**{name: "" for name in prompt.input_variables}))
+        self._templates[id(prompt)] = (prompt, tokens)
+        return tokens
+
+    def estimate_prompt(self, prompt: BasePromptTemplate, variables: Mapping[str, Any]) -> int:
+        """
+        Estimate the number of tokens of the prompt rendered with the given variables.
+        """
+        return self.template_tokens(prompt) + sum(
+            self.count(value if isinstance(value, str) else str(value)) for value in variables.values()
+        )
+
+
+def _walk(value: Any, visit: Callable[[dict], bool]) -> bool:
+    """
+    Call `visit` for every dict nested in the payload; return whether any call changed the payload.
+    """
+    changed = False
+    if isinstance(value, dict):
+        changed = visit(value)
+        for item in value.values():
+            changed = _walk(item, visit) or changed
+    elif isinstance(value, list):
+        for item in value:
+            changed = _walk(item, visit) or changed
+    return changed
+
+
+def drop_empty_descriptions(payload: Payload, settings: PromptBudgetSettings) -> bool:
+    """
+    Remove description fields without text.
+    """
+
+    def visit(node: dict) -> bool:
+        empty = [key for key in DESCRIPTION_KEYS if key in node and not str(node[key] or "").strip()]
+        for key in empty:
+            del node[key]
+        return bool(empty)
+
+    return _walk(payload, visit)
+
+
+def truncate_descriptions(payload: Payload, settings: PromptBudgetSettings) -> bool:
+    """
+    Truncate descriptions longer than `description_max_chars`.
+    """
+    limit = settings.description_max_chars
+
+    def visit(node: dict) -> bool:
+        changed = False
+        for key in DESCRIPTION_KEYS:
+            text = node.get(key)
+            if isinstance(text, str) and len(text) > limit:
+                node[key] = text[:limit].rstrip() + "…"
+                changed = True
+        return changed
+
+    return _walk(payload, visit)
+
+
+def _count_of(item: Any) -> float:
+    count = item.get("count") if isinstance(item, dict) else None
+    return count if isinstance(count, (int, float)) else 0
+
+
+def trim_value_counts(payload: Payload, settings: PromptBudgetSettings) -> bool:
+    """
+    Keep only the `max_values` most frequent entries of value count lists, in their original order.
+    """
+    limit = settings.max_values
+
+    def visit(node: dict) -> bool:
+        changed = False
+        for key in VALUE_COUNT_KEYS:
+            items = node.get(key)
+            if isinstance(items, list) and len(items) > limit:
+                top = sorted(range(len(items)), key=lambda i: -_count_of(items[i]))[:limit]
+                node[key] = [items[i] for i in sorted(top)]
+                changed = True
+        return changed
+
+    return _walk(payload, visit)
+
+
+def collapse_duplicate_patterns(payload: Payload, settings: PromptBudgetSettings) -> bool:
+    """
+    Merge pattern entries differing only in case or surrounding whitespace, summing their counts.
+    """
+
+    def visit(node: dict) -> bool:
+        changed = False
+        for key in PATTERN_KEYS:
+            items = node.get(key)
+            if not isinstance(items, list):
+                continue
+            merged: dict[Any, Any] = {}
+            for item in items:
+                if not isinstance(item, dict):
+                    merged[id(item)] = item
+                    continue
+                identity = (str(item.get("value", "")).strip().casefold(), str(item.get("type", "")))
+                if identity in merged:
+                    first = merged[identity]
+                    merged[identity] = {**first, "count": _count_of(first) + _count_of(item)}
+                else:
+                    merged[identity] = item
+            if len(merged) < len(items):
+                node[key] = list(merged.values())
+                changed = True
+        return changed
+
+    return _walk(payload, visit)
+
+
+# compaction strategies in the order they are applied
+STRATEGIES: list[tuple[str, Callable[[Payload, PromptBudgetSettings], bool]]] = [
+    ("drop_empty_descriptions", drop_empty_descriptions),
+    ("truncate_descriptions", truncate_descriptions),
+    ("trim_value_counts", trim_value_counts),
+    ("collapse_duplicate_patterns", collapse_duplicate_patterns),
+]
+
+
+class PromptBudget:
+    """
+    Fits prompts into per-endpoint token budgets by compacting their payload.
+    """
+
+    def __init__(self, settings: PromptBudgetSettings, estimator: TokenEstimator):
+        self.settings = settings
+        self.estimator = estimator
+
+    def budget_for(self, endpoint: str) -> int:
+        """
+        Return the token budget of the endpoint; 0 means unlimited.
+        """
+        return self.settings.endpoints.get(endpoint, self.settings.default_budget)
+
+    def fit(self, endpoint: str, prompt: BasePromptTemplate, payload: Payload, render: Render) -> dict[str, Any]:
+        """
+        Render the prompt variables from the payload, compacting the payload while the prompt exceeds the budget.
+
+        :param endpoint: Endpoint (chain) name.
+        :param prompt: Prompt template the variables are rendered into.
+        :param payload: JSON-like data the variables are rendered from; it is not modified.
+        :param render: Function rendering the payload into prompt variables.
+        :return: Prompt variables, compacted when necessary.
+        """
+        variables = render(payload)
+        budget = self.budget_for(endpoint)
+        if not self.settings.enabled or budget <= 0:
+            return variables
+
+        before = tokens = self.estimator.estimate_prompt(prompt, variables)
+        if before > budget:
+            payload = copy.deepcopy(payload)
+            applied = []
+            for name, strategy in STRATEGIES:
+                if not strategy(payload, self.settings):
+                    continue
+                applied.append(name)
+                prompt_compactions.inc(endpoint=endpoint, strategy=name)
+                variables = render(payload)
+                tokens = self.estimator.estimate_prompt(prompt, variables)
+                if tokens <= budget:
+                    break
+            logger.info(
+                "Compacted prompt of %s from %d to %d estimated tokens (budget %d) by %s",
+                endpoint,
+                before,
+                tokens,
+                budget,
+                ", ".join(applied) or "no applicable strategy",
+            )
+            if tokens > budget:
+                prompt_over_budget.inc(endpoint=endpoint)
+                logger.warning("Prompt of %s exceeds its budget of %d tokens after compaction", endpoint, budget)
+
+        prompt_tokens.observe(before, endpoint=endpoint, stage="before")
+        prompt_tokens.observe(tokens, endpoint=endpoint, stage="after")
+        return variables
+
+
+token_estimator = TokenEstimator(config.prompt_budget.chars_per_token, config.prompt_budget.cache_size)
+prompt_budget = PromptBudget(config.prompt_budget, token_estimator)
@@ -0,0 +1,355 @@
+# Copyright (c) 2010-2025 Evolveum and contributors
+#
+# Licensed under the EUPL-1.2 or later.
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Mapping, Optional
+
+from pydantic import BaseModel
+
+from ..config import CacheSettings, config
+from .metrics import metrics
+
+"""
+Content-addressed cache of parsed LLM results.
+
+Entries are keyed by a canonical hash of the chain name, model name, prompt template version
+and rendered prompt variables, so any change of the prompt or its inputs results in a new key.
+
+The cache has two tiers: a per-process in-memory LRU and an optional SQLite (WAL) file shared by
+all workers on the node, which also keeps entries across restarts.
+"""
+
+logger = logging.getLogger(__name__)
+
+cache_requests = metrics.counter(
+    "llm_cache_requests_total", "LLM result cache lookups by endpoint and result.", ["endpoint", "result"]
+)
+cache_evictions = metrics.counter("llm_cache_evictions_total", "LLM result cache evictions by reason.", ["reason"])
+cache_entries = metrics.gauge("llm_cache_entries", "Number of entries in the LLM result cache.")
+cache_bytes = metrics.gauge("llm_cache_bytes", "Approximate size of the LLM result cache in bytes.")
+disk_cache_requests = metrics.counter(
+    "llm_disk_cache_requests_total", "Persistent LLM result cache lookups by result.", ["result"]
+)
+disk_cache_compacted = metrics.counter(
+    "llm_disk_cache_compacted_total", "Entries removed from the persistent LLM result cache by compaction."
+)
+
+
+def canonical_json(value: Any) -> str:
+    """
+    Serialize a value into a canonical JSON string (sorted keys, no insignificant whitespace).
+    """
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def template_version(prompt: Any) -> str:
+    """
+    Compute a short version hash of a prompt template including its partial variables.
+
+    :param prompt: LangChain prompt template.
+    :return: Hex digest identifying the template content.
+    """
+    return hashlib.sha256(canonical_json(prompt.to_json()).encode()).hexdigest()[:16]
+
+
+def cache_key(endpoint: str, model_name: str, version: str, variables: Mapping[str, Any]) -> str:
+    """
+    Build the content-addressed cache key for one chain invocation.
+
+    :param endpoint: Chain (endpoint) name.
+    :param model_name: Name of the model producing the result.
+    :param version: Prompt template version, see `template_version`.
+    :param variables: Rendered prompt variables.
+    :return: Hex digest of the canonical representation.
+    """
+    payload = canonical_json({"endpoint": endpoint, "model": model_name, "version": version, "vars": variables})
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class DiskCacheTier:
+    """
+    Persistent cache tier stored in a local SQLite database in WAL mode.
+
+    WAL allows concurrent readers and one writer across processes, so all uvicorn workers on a node
+    share the entries. Values are stored as zlib-compressed JSON together with the endpoint name,
+    which identifies the model class needed to deserialize them. All methods are blocking.
+    """
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS llm_cache (
+            key TEXT PRIMARY KEY,
+            endpoint TEXT NOT NULL,
+            value BLOB NOT NULL,
+            expires_at REAL NOT NULL,
+            accessed_at REAL NOT NULL,
+            hits INTEGER NOT NULL DEFAULT 0
+        )
+    """
+
+    def __init__(self, path: str, max_entries: int):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False, isolation_level=None)
+            # auto_vacuum has to be set before the table is created to take effect
+            conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(self._SCHEMA)
+            conn.execute("CREATE INDEX IF NOT EXISTS llm_cache_accessed ON llm_cache (accessed_at)")
+            self._conn = conn
+        return self._conn
+
+    def get(self, key: str) -> Optional[tuple[str, bytes]]:
+        """
+        Return (endpoint, serialized JSON) of a live entry and record the access, or None.
+        """
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute(
+                "SELECT endpoint, value FROM llm_cache WHERE key = ? AND expires_at > ?", (key, now)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE llm_cache SET accessed_at = ?, hits = hits + 1 WHERE key = ?", (now, key))
+        return row[0], zlib.decompress(row[1])
+
+    def set(self, key: str, endpoint: str, value: bytes, ttl_seconds: float) -> None:
+        now = time.time()
+        with self._lock:
+            self._connection().execute(
+                "INSERT OR REPLACE INTO llm_cache (key, endpoint, value, expires_at, accessed_at, hits) "
+                "VALUES (?, ?, ?, ?, ?, 0)",
+                (key, endpoint, zlib.compress(value), now + ttl_seconds, now),
+            )
+
+    def hot_entries(self, limit: int) -> list[tuple[str, str, bytes, float]]:
+        """
+        Return up to `limit` live entries ordered by hit count as (key, endpoint, JSON, remaining TTL).
+        """
+        now = time.time()
+        with self._lock:
+            rows = (
+                self._connection()
+                .execute(
+                    "SELECT key, endpoint, value, expires_at FROM llm_cache WHERE expires_at > ? "
+                    "ORDER BY hits DESC, accessed_at DESC LIMIT ?",
+                    (now, limit),
+                )
+                .fetchall()
+            )
+        return [(key, endpoint, zlib.decompress(value), expires_at - now) for key, endpoint, value, expires_at in rows]
+
+    def compact(self) -> int:
+        """
+        Remove expired entries and the least recently accessed entries above the size limit,
+        then return freed pages to the file system and truncate the WAL.
+
+        :return: Number of removed entries.
+        """
+        with self._lock:
+            conn = self._connection()
+            removed = conn.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (time.time(),)).rowcount
+            removed += conn.execute(
+                "DELETE FROM llm_cache WHERE key IN "
+                "(SELECT key FROM llm_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            ).rowcount
+            conn.execute("PRAGMA incremental_vacuum").fetchall()
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return removed
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class _Entry:
+    __slots__ = ("value", "size", "expires_at")
+
+    def __init__(self, value: BaseModel, size: int, expires_at: float):
+        self.value = value
+        self.size = size
+        self.expires_at = expires_at
+
+
+class LLMResultCache:
+    """
+    Two-tier cache of parsed LLM results: in-memory LRU with TTL and size limits backed by an optional
+    persistent `DiskCacheTier`.
+
+    Values are Pydantic models; a deep copy is returned on every hit so callers can post-process
+    results without affecting the cached entry.
+    """
+
+    def __init__(self, settings: CacheSettings):
+        self.settings = settings
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._size = 0
+        self.disk = DiskCacheTier(settings.disk_path, settings.disk_max_entries) if settings.disk_enabled else None
+        self._compaction_task: Optional[asyncio.Task] = None
+
+    def enabled_for(self, endpoint: str) -> bool:
+        """
+        Caching is opt-in per endpoint.
+        """
+        return self.settings.enabled and endpoint in self.settings.endpoints
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remove(self, key: str, reason: str) -> None:
+        entry = self._entries.pop(key)
+        self._size -= entry.size
+        cache_evictions.inc(reason=reason)
+
+    def _update_gauges(self) -> None:
+        cache_entries.set(len(self._entries))
+        cache_bytes.set(self._size)
+
+    def get(self, key: str) -> Optional[BaseModel]:
+        """
+        Return a copy of the cached value, or None when missing or expired.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= time.monotonic():
+            self._remove(key, "expired")
+            self._update_gauges()
+            return None
+        self._entries.move_to_end(key)
+        return entry.value.model_copy(deep=True)
+
+    def set(self, key: str, value: BaseModel, ttl_seconds: Optional[float] = None) -> None:
+        """
+        Store a value in memory, evicting least recently used entries to stay within the size limits.
+        Values larger than the whole cache are not stored.
+        """
+        size = len(value.model_dump_json())
+        if size > self.settings.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key, "replaced")
+
+        ttl = self.settings.ttl_seconds if ttl_seconds is None else ttl_seconds
+        self._entries[key] = _Entry(value.model_copy(deep=True), size, time.monotonic() + ttl)
+        self._size += size
+
+        while len(self._entries) > self.settings.max_entries or self._size > self.settings.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest, "size")
+        self._update_gauges()
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._size = 0
+        self._update_gauges()
+
+    async def aget(self, key: str, model: type[BaseModel]) -> Optional[BaseModel]:
+        """
+        Look the key up in memory first, then in the persistent tier; disk hits are promoted to memory.
+
+        :param key: Cache key, see `cache_key`.
+        :param model: Pydantic model class used to deserialize entries from the persistent tier.
+        :return: Copy of the cached value or None.
+        """
+        value = self.get(key)
+        if value is not None or self.disk is None:
+            return value
+
+        try:
+            row = await asyncio.to_thread(self.disk.get, key)
+        except sqlite3.Error as exc:
+            logger.warning("Persistent LLM cache lookup failed: %s", exc)
+            return None
+        disk_cache_requests.inc(result="hit" if row is not None else "miss")
+        if row is None:
+            return None
+
+        value = model.model_validate_json(row[1])
+        self.set(key, value)
+        return value
+
+    async def aset(self, key: str, endpoint: str, value: BaseModel) -> None:
+        """
+        Store the value in memory and in the persistent tier.
+        """
+        self.set(key, value)
+        if self.disk is None:
+            return
+        try:
+            await asyncio.to_thread(
+                self.disk.set, key, endpoint, value.model_dump_json().encode(), self.settings.ttl_seconds
+            )
+        except sqlite3.Error as exc:
+            logger.warning("Persistent LLM cache write failed: %s", exc)
+
+    async def start(self, models: Mapping[str, type[BaseModel]]) -> None:
+        """
+        Preload the most used entries of the persistent tier into memory and start background compaction.
+
+        :param models: Pydantic model class of cached values per endpoint name.
+        """
+        if not self.settings.enabled or self.disk is None:
+            return
+        try:
+            await asyncio.to_thread(self.disk.compact)
+            rows = await asyncio.to_thread(self.disk.hot_entries, self.settings.warmup_entries)
+        except sqlite3.Error as exc:
+            logger.warning("Persistent LLM cache warm-up failed: %s", exc)
+            return
+
+        loaded = 0
+        for key, endpoint, value, ttl in rows:
+            model = models.get(endpoint)
+            if model is None or not self.enabled_for(endpoint):
+                continue
+            self.set(key, model.model_validate_json(value), ttl_seconds=ttl)
+            loaded += 1
+        logger.info("LLM result cache warmed up with %d entries", loaded)
+
+        self._compaction_task = asyncio.create_task(self._compact_periodically())
+
+    async def _compact_periodically(self) -> None:
+        assert self.disk is not None
+        while True:
+            await asyncio.sleep(self.settings.compaction_interval)
+            try:
+                removed = await asyncio.to_thread(self.disk.compact)
+                disk_cache_compacted.inc(removed)
+            except sqlite3.Error as exc:
+                logger.warning("Persistent LLM cache compaction failed: %s", exc)
+
+    async def aclose(self) -> None:
+        """
+        Stop background compaction and close the persistent tier.
+        """
+        if self._compaction_task is not None:
+            self._compaction_task.cancel()
+            self._compaction_task = None
+        if self.disk is not None:
+            await asyncio.to_thread(self.disk.close)
+
+
+llm_cache = LLMResultCache(config.cache)
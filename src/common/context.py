@@ -0,0 +1,60 @@
+# Copyright (c) 2010-2025 Evolveum and contributors
+#
+# Licensed under the EUPL-1.2 or later.
+
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+"""
+Per-request context shared between the HTTP layer and the services.
+
+The middleware installs a fresh `RequestStats` for every request; services record what happened
+while serving it (e.g. cache hits) and the middleware turns it into response headers.
+"""
+
+
+@dataclass
+class RequestStats:
+    """
+    Mutable statistics collected while serving one API request.
+
+    :param cache_hits: Number of LLM invocations answered from the result cache.
+    :param cache_misses: Number of LLM invocations that had to call the model.
+    """
+
+    cache_hits: int = 0
+    cache_misses: int = 0
+
+    def headers(self) -> Dict[str, str]:
+        """
+        Build response headers describing the collected statistics.
+        """
+        headers: Dict[str, str] = {}
+        if self.cache_hits or self.cache_misses:
+            if not self.cache_misses:
+                headers["X-Cache"] = "HIT"
+            elif not self.cache_hits:
+                headers["X-Cache"] = "MISS"
+            else:
+                headers["X-Cache"] = "PARTIAL"
+        return headers
+
+
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def start_request_stats() -> RequestStats:
+    """
+    Install fresh statistics for the current request context and return them.
+    """
+    stats = RequestStats()
+    _request_stats.set(stats)
+    return stats
+
+
+def current_request_stats() -> RequestStats:
+    """
+    Return statistics of the current request; outside of a request a detached instance is returned.
+    """
+    return _request_stats.get() or RequestStats()
@@ -0,0 +1,108 @@
+# Copyright (c) 2010-2025 Evolveum and contributors
+#
+# Licensed under the EUPL-1.2 or later.
+
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, List, Optional, Tuple, TypeVar
+
+from ..config import CorrectionSettings, config
+from .errors import LLMResponseValidationException
+from .metrics import metrics
+from .schema import CorrectionStats
+
+"""
+Server-side self-correction loop of suggestions.
+
+A generated suggestion is validated locally; while it fails, it is regenerated with a compact context of
+the validation errors, up to `max_attempts` generations and within the `deadline`. The first valid result
+is returned together with the statistics of the attempts, which saves the client a request per correction.
+"""
+
+logger = logging.getLogger(__name__)
+
+correction_outcomes = metrics.counter(
+    "suggestion_self_correction_total",
+    "Self-corrected suggestions by outcome (valid, corrected, exhausted or deadline).",
+    ["suggestion", "outcome"],
+)
+correction_attempts = metrics.counter(
+    "suggestion_self_correction_attempts_total",
+    "Generations of self-corrected suggestions, including the first one.",
+    ["suggestion"],
+)
+
+ResultT = TypeVar("ResultT")
+ErrorT = TypeVar("ErrorT")
+
+
+async def self_correct(
+    name: str,
+    result: ResultT,
+    validate: Callable[[ResultT], Awaitable[Optional[ErrorT]]],
+    regenerate: Callable[[ResultT, ErrorT], Awaitable[ResultT]],
+    describe: Callable[[ErrorT], str] = str,
+    started: Optional[float] = None,
+    settings: Optional[CorrectionSettings] = None,
+) -> Tuple[ResultT, Optional[CorrectionStats]]:
+    """
+    Validate the generated result and regenerate it with its validation errors while it fails.
+
+    An attempt whose response cannot be parsed counts as failed and the previous result is corrected again.
+
+    :param name: Suggestion name used in metrics and logs, e.g. "mapping".
+    :param result: Result of the first generation.
+    :param validate: Returns the validation errors of a result, or None when it is valid.
+    :param regenerate: Generates a new result from the rejected one and its validation errors.
+    :param describe: Renders validation errors for the statistics.
+    :param started: `time.monotonic()` when the first generation started, defaults to now.
+    :param settings: Loop configuration, defaults to `config.correction`.
+    :return: The first valid result, otherwise the last generated one, with the attempt statistics;
+        the statistics are None when the loop is disabled or the first result is valid.
+    """
+    settings = settings or config.correction
+    if not settings.enabled:
+        return result, None
+    started = time.monotonic() if started is None else started
+    errors: List[str] = []
+    attempts = 1
+    deadline_passed = False
+
+    error = await validate(result)
+    if error is not None:
+        errors.append(describe(error))
+    while error is not None and attempts < settings.max_attempts:
+        remaining = settings.deadline - (time.monotonic() - started)
+        if remaining <= 0:
+            deadline_passed = True
+            break
+        attempts += 1
+        logger.info("Suggested %s fails validation, correcting (attempt %d/%d)", name, attempts, settings.max_attempts)
+        try:
+            result = await asyncio.wait_for(regenerate(result, error), remaining)
+        except asyncio.TimeoutError:
+            deadline_passed = True
+            break
+        except LLMResponseValidationException:
+            errors.append("The response of the LLM could not be parsed.")
+            continue
+        error = await validate(result)
+        if error is not None:
+            errors.append(describe(error))
+
+    if error is None:
+        outcome = "valid" if attempts == 1 else "corrected"
+    else:
+        outcome = "deadline" if deadline_passed else "exhausted"
+    correction_attempts.inc(attempts, suggestion=name)
+    correction_outcomes.inc(suggestion=name, outcome=outcome)
+    if outcome == "valid":
+        return result, None
+    stats = CorrectionStats(
+        attempts=attempts,
+        valid=error is None,
+        elapsedSeconds=round(time.monotonic() - started, 3),
+        errors=errors,
+    )
+    return result, stats
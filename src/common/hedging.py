@@ -0,0 +1,129 @@
+# Copyright (c) 2010-2025 Evolveum and contributors
+#
+# Licensed under the EUPL-1.2 or later.
+
+import asyncio
+import logging
+import math
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable
+
+from ..config import HedgingSettings, config
+from .metrics import metrics
+
+"""
+Hedged LLM requests cutting the tail latency of stalled upstream calls.
+
+When the primary call does not complete within a delay derived from a latency percentile of recent calls,
+a duplicate call is started and the first successful result wins; the other call is cancelled. Hedges are
+paid for by a per-endpoint budget, so they never exceed the configured fraction of calls.
+"""
+
+logger = logging.getLogger(__name__)
+
+hedged_calls = metrics.counter("llm_hedged_calls_total", "LLM calls for which a hedge request was sent.", ["endpoint"])
+hedge_wins = metrics.counter(
+    "llm_hedge_wins_total", "Hedged LLM calls by the request providing the result.", ["endpoint", "winner"]
+)
+hedge_budget_exhausted = metrics.counter(
+    "llm_hedge_budget_exhausted_total", "Hedge requests skipped because the endpoint budget was spent.", ["endpoint"]
+)
+hedge_delay = metrics.gauge("llm_hedge_delay_seconds", "Current hedge delay by endpoint.", ["endpoint"])
+
+# maximum number of hedges an endpoint can save up while calls complete in time
+MAX_CREDITS = 10.0
+
+
+class Hedger:
+    """
+    Runs opted-in calls with a hedge request after a percentile-based delay.
+    """
+
+    def __init__(self, settings: HedgingSettings):
+        self.settings = settings
+        self._latencies: dict[str, deque[float]] = {}
+        self._credits: dict[str, float] = {}
+
+    def enabled_for(self, endpoint: str) -> bool:
+        """
+        Hedging is opt-in per endpoint.
+        """
+        return self.settings.enabled and endpoint in self.settings.endpoints
+
+    def record(self, endpoint: str, latency: float) -> None:
+        """
+        Record the latency of a successful call.
+        """
+        latencies = self._latencies.get(endpoint)
+        if latencies is None:
+            latencies = self._latencies[endpoint] = deque(maxlen=self.settings.window)
+        latencies.append(latency)
+
+    def delay(self, endpoint: str) -> float:
+        """
+        Return the hedge delay: the configured percentile of recent latencies within the delay bounds.
+        """
+        latencies = sorted(self._latencies.get(endpoint, ()))
+        if len(latencies) < self.settings.min_samples:
+            delay = self.settings.initial_delay
+        else:
+            delay = latencies[max(0, math.ceil(self.settings.percentile * len(latencies)) - 1)]
+        delay = min(self.settings.max_delay, max(self.settings.min_delay, delay))
+        hedge_delay.set(delay, endpoint=endpoint)
+        return delay
+
+    def _earn(self, endpoint: str) -> None:
+        budget = self.settings.endpoints.get(endpoint, 0.0)
+        self._credits[endpoint] = min(MAX_CREDITS, self._credits.get(endpoint, 1.0) + budget)
+
+    def _spend(self, endpoint: str) -> bool:
+        credits = self._credits.get(endpoint, 1.0)
+        if credits < 1.0:
+            hedge_budget_exhausted.inc(endpoint=endpoint)
+            return False
+        self._credits[endpoint] = credits - 1.0
+        return True
+
+    async def run(
+        self, endpoint: str, primary: Callable[[], Awaitable[Any]], hedge: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """
+        Run the primary call and hedge it when it does not complete within the hedge delay.
+
+        :param endpoint: Endpoint (chain) name.
+        :param primary: Factory of the primary call.
+        :param hedge: Factory of the duplicate call sent to an alternate provider or model.
+        :return: The first successful result.
+        :raises Exception: Error of the primary call when both calls fail.
+        """
+        self._earn(endpoint)
+        started = time.monotonic()
+        primary_task = asyncio.ensure_future(primary())
+        tasks = {primary_task}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=self.delay(endpoint))
+            if not done and self._spend(endpoint):
+                hedged_calls.inc(endpoint=endpoint)
+                logger.info("LLM call of %s exceeded the hedge delay, sending hedge request", endpoint)
+                tasks.add(asyncio.ensure_future(hedge()))
+
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        self.record(endpoint, time.monotonic() - started)
+                        if len(tasks) > 1:
+                            hedge_wins.inc(endpoint=endpoint, winner="primary" if task is primary_task else "hedge")
+                        return task.result()
+            return primary_task.result()
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+                elif not task.cancelled():
+                    task.exception()
+
+
+hedger = Hedger(config.hedging)
@@ -0,0 +1,271 @@
+# Copyright (c) 2010-2025 Evolveum and contributors
+#
+# Licensed under the EUPL-1.2 or later.
+
+import asyncio
+import logging
+import time
+import uuid
+from enum import Enum
+from typing import Any, Awaitable, Callable, Generic, Optional, TypeVar
+
+from fastapi import APIRouter, HTTPException, Request, Response
+from pydantic import BaseModel, Field
+
+from ..config import JobSettings, config
+from .metrics import metrics
+
+"""
+Asynchronous job API for long-running suggestions.
+
+Every suggestion endpoint `POST .../<operation>` has a job variant: `POST .../<operation>/jobs` accepts the same
+request and responds immediately with a job id, `GET .../<operation>/jobs/{jobId}` returns the job status and,
+once finished, the result or error, and `DELETE .../<operation>/jobs/{jobId}` cancels the job.
+Jobs run in the service process with bounded concurrency; finished jobs are kept for `jobs.result_ttl` seconds.
+
+Job state lives in the memory of the worker process that accepted the job: it is lost on restart and unknown
+to other workers, so with `app.workers` > 1 or several replicas behind a load balancer, polling needs sticky
+routing to the same process, otherwise it responds with 404.
+"""
+
+logger = logging.getLogger(__name__)
+
+jobs_finished = metrics.counter("jobs_total", "Finished suggestion jobs by final status.", ["endpoint", "status"])
+jobs_active = metrics.gauge("jobs_active", "Suggestion jobs queued or running.", ["endpoint"])
+
+ResultT = TypeVar("ResultT")
+
+
+class JobStatus(str, Enum):
+    """
+    Lifecycle state of a job.
+
+    :cvar pending: Waiting for a free executor slot.
+    :cvar running: Being processed.
+    :cvar succeeded: Finished with a result.
+    :cvar failed: Finished with an error.
+    :cvar cancelled: Cancelled by the client or on shutdown.
+    """
+
+    pending = "pending"
+    running = "running"
+    succeeded = "succeeded"
+    failed = "failed"
+    cancelled = "cancelled"
+
+
+FINISHED = (JobStatus.succeeded, JobStatus.failed, JobStatus.cancelled)
+
+
+class JobError(BaseModel):
+    """
+    Error of a failed job, equivalent to the error response of the synchronous endpoint.
+    """
+
+    status: int = Field(..., description="HTTP status code of the error.")
+    detail: Any = Field(None, description="Error detail.")
+
+
+class JobInfo(BaseModel, Generic[ResultT]):
+    """
+    Status of an asynchronous job, including its result once it succeeded.
+    """
+
+    jobId: str = Field(..., description="Job identifier.")
+    status: JobStatus = Field(..., description="Job status.")
+    result: Optional[ResultT] = Field(None, description="Result of a succeeded job.")
+    error: Optional[JobError] = Field(None, description="Error of a failed job.")
+
+
+class Job:
+    """
+    One submitted job and its outcome.
+    """
+
+    def __init__(self, endpoint: str):
+        self.id = uuid.uuid4().hex
+        self.endpoint = endpoint
+        self.status = JobStatus.pending
+        self.result: Any = None
+        self.error: Optional[JobError] = None
+        self.finished_at: Optional[float] = None
+        self.task: Optional[asyncio.Task] = None
+
+    def info(self) -> JobInfo:
+        return JobInfo(jobId=self.id, status=self.status, result=self.result, error=self.error)
+
+
+class JobManager:
+    """
+    Runs jobs in background tasks with bounded concurrency and keeps finished jobs for a limited time.
+    """
+
+    def __init__(self, settings: JobSettings):
+        self.settings = settings
+        self._jobs: dict[str, Job] = {}
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        # the semaphore is bound to the event loop it is used on
+        loop = asyncio.get_running_loop()
+        if self._slots is None or self._loop is not loop:
+            self._slots = asyncio.Semaphore(max(1, self.settings.max_concurrency))
+            self._loop = loop
+        return self._slots
+
+    def _purge(self) -> None:
+        deadline = time.monotonic() - self.settings.result_ttl
+        finished = sorted(
+            ((job.finished_at, job.id) for job in self._jobs.values() if job.finished_at is not None),
+        )
+        # expired jobs first, then the oldest jobs over the limit
+        keep = self.settings.max_results
+        for index, (finished_at, job_id) in enumerate(finished):
+            if finished_at <= deadline or index < len(finished) - keep:
+                del self._jobs[job_id]
+
+    def submit(self, endpoint: str, call: Callable[[], Awaitable[Any]]) -> Job:
+        """
+        Submit a job running the call in the background.
+
+        :param endpoint: Endpoint name used in metrics and logs.
+        :param call: Factory of the awaitable producing the job result.
+        :return: The submitted job.
+        :raises HTTPException: 503 when `max_pending` jobs are already unfinished.
+        """
+        self._purge()
+        pending = sum(1 for job in self._jobs.values() if job.finished_at is None)
+        if pending >= self.settings.max_pending:
+            raise HTTPException(status_code=503, detail="Too many pending jobs", headers={"Retry-After": "5"})
+
+        job = Job(endpoint)
+        self._jobs[job.id] = job
+        jobs_active.inc(endpoint=endpoint)
+        job.task = asyncio.create_task(self._run(job, call))
+        return job
+
+    async def _run(self, job: Job, call: Callable[[], Awaitable[Any]]) -> None:
+        try:
+            async with self._semaphore():
+                job.status = JobStatus.running
+                result = await call()
+            job.result = result
+            job.status = JobStatus.succeeded
+        except asyncio.CancelledError:
+            job.status = JobStatus.cancelled
+        except HTTPException as exc:
+            job.status = JobStatus.failed
+            job.error = JobError(status=exc.status_code, detail=exc.detail)
+        except Exception:
+            logger.exception("Job %s of %s failed", job.id, job.endpoint)
+            job.status = JobStatus.failed
+            job.error = JobError(status=500, detail="Internal Server Error")
+        finally:
+            job.finished_at = time.monotonic()
+            jobs_active.dec(endpoint=job.endpoint)
+            jobs_finished.inc(endpoint=job.endpoint, status=job.status.value)
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """
+        Return the job, or None when it does not exist or has expired.
+        """
+        self._purge()
+        return self._jobs.get(job_id)
+
+    async def cancel(self, job_id: str) -> Optional[Job]:
+        """
+        Cancel an unfinished job; finished jobs are returned unchanged.
+        """
+        job = self.get(job_id)
+        if job is not None and job.task is not None and not job.task.done():
+            job.task.cancel()
+            await asyncio.gather(job.task, return_exceptions=True)
+        return job
+
+    async def aclose(self) -> None:
+        """
+        Cancel all unfinished jobs, e.g. on shutdown.
+        """
+        tasks = [job.task for job in self._jobs.values() if job.task is not None and not job.task.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+job_manager = JobManager(config.jobs)
+
+
+def add_job_routes(
+    router: APIRouter,
+    path: str,
+    run: Callable[[Any], Awaitable[Any]],
+    request_model: type[BaseModel],
+    response_model: type[BaseModel],
+    exclude_none: bool = False,
+    manager: Optional[JobManager] = None,
+) -> None:
+    """
+    Add the asynchronous job routes of a suggestion endpoint to its router.
+
+    :param router: Module router.
+    :param path: Path of the synchronous endpoint, e.g. "/suggestObjectType".
+    :param run: Service function computing the response for a request.
+    :param request_model: Request model of the endpoint.
+    :param response_model: Response model of the endpoint, used as the job result.
+    :param exclude_none: Omit None values from job responses, like `response_model_exclude_none` of the endpoint.
+    :param manager: Job manager, defaults to the process-wide one.
+    """
+    endpoint = path.strip("/")
+    jobs = manager or job_manager
+    job_info_model = JobInfo[response_model]  # type: ignore[valid-type]
+
+    def found(job: Optional[Job]) -> Job:
+        if job is None:
+            raise HTTPException(status_code=404, detail="Job not found")
+        return job
+
+    async def submit_job(req: request_model, request: Request, response: Response):  # type: ignore[valid-type]
+        job = jobs.submit(endpoint, lambda: run(req))
+        response.headers["Location"] = f"{request.url.path}/{job.id}"
+        return job.info()
+
+    async def get_job(jobId: str):
+        return found(jobs.get(jobId)).info()
+
+    async def cancel_job(jobId: str):
+        return found(await jobs.cancel(jobId)).info()
+
+    per_process = (
+        "Jobs are kept in the memory of the worker process that accepted them and are lost on restart; "
+        "with several workers or replicas, poll the same process (sticky routing)."
+    )
+    submit_job.__doc__ = f"Submit an asynchronous job computing the response of `{path}`. {per_process}"
+    get_job.__doc__ = f"Return the status of the job and its result or error once finished. {per_process}"
+    cancel_job.__doc__ = f"Cancel the job; finished jobs are returned unchanged. {per_process}"
+
+    router.add_api_route(
+        f"{path}/jobs",
+        submit_job,
+        methods=["POST"],
+        status_code=202,
+        response_model=job_info_model,
+        response_model_exclude_none=exclude_none,
+        name=f"{endpoint}_submit_job",
+    )
+    router.add_api_route(
+        f"{path}/jobs/{{jobId}}",
+        get_job,
+        methods=["GET"],
+        response_model=job_info_model,
+        response_model_exclude_none=exclude_none,
+        name=f"{endpoint}_get_job",
+    )
+    router.add_api_route(
+        f"{path}/jobs/{{jobId}}",
+        cancel_job,
+        methods=["DELETE"],
+        response_model=job_info_model,
+        response_model_exclude_none=exclude_none,
+        name=f"{endpoint}_cancel_job",
+    )
@@ -3,9 +3,10 @@
 # Licensed under the EUPL-1.2 or later.
 
 import json
-from typing import Callable
+from typing import Any, Callable
 
 from fastapi import APIRouter, Request, Response
+from fastapi.responses import StreamingResponse
 from fastapi.routing import APIRoute
 from langfuse import Langfuse
 from langfuse.langchain import CallbackHandler
@@ -27,6 +28,19 @@ langfuse = Langfuse(
 langfuse_handler = CallbackHandler(public_key=config.langfuse.public_key)
 
 
+def _json_body(body: bytes) -> Any:
+    """
+    Decode a JSON request or response body; empty and non-JSON bodies (e.g. of GET and DELETE requests) are
+    observed as None.
+    """
+    if not body:
+        return None
+    try:
+        return json.loads(body)
+    except ValueError:
+        return None
+
+
 class ObservedRoute(APIRoute):
     """
     Custom API route that starts new langfuse trace and automatically observes request and response.
@@ -36,11 +50,15 @@ class ObservedRoute(APIRoute):
         original_route_handler = super().get_route_handler()
 
         async def custom_route_handler(request: Request) -> Response:
-            request_json = await request.json()
+            request_json = _json_body(await request.body())
             with langfuse.start_as_current_span(name="api_request", input=request_json) as span:
                 span.update_trace(name=request.url.path, tags=["smart_integration"])
                 response: Response = await original_route_handler(request)
-                response_json = json.loads(response.body)
+                if isinstance(response, StreamingResponse):
+                    # streamed events are sent after the handler returns
+                    span.update(output={"streaming": response.media_type})
+                    return response
+                response_json = _json_body(bytes(response.body))
                 span.update(output=response_json)
                 return response
 
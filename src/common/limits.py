@@ -0,0 +1,170 @@
+# Copyright (c) 2010-2025 Evolveum and contributors
+#
+# Licensed under the EUPL-1.2 or later.
+
+import asyncio
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional
+
+import httpx
+import openai
+
+from ..config import ConcurrencySettings
+from .metrics import metrics
+
+"""
+Adaptive concurrency limiting of upstream LLM calls.
+
+The limit follows the AIMD scheme known from TCP congestion control: it grows additively while calls
+complete with healthy latency and is cut multiplicatively when the provider signals overload
+(HTTP 429 or a timeout). Calls over the limit wait in a FIFO queue instead of being sent upstream.
+"""
+
+logger = logging.getLogger(__name__)
+
+concurrency_limit = metrics.gauge("llm_concurrency_limit", "Current adaptive limit of concurrent LLM calls.")
+concurrency_in_flight = metrics.gauge("llm_concurrency_in_flight", "Number of LLM calls currently in flight.")
+concurrency_queue_depth = metrics.gauge("llm_concurrency_queue_depth", "Number of LLM calls waiting for a slot.")
+concurrency_wait = metrics.histogram("llm_concurrency_wait_seconds", "Time LLM calls spent waiting for a slot.")
+concurrency_decreases = metrics.counter(
+    "llm_concurrency_decreases_total", "Multiplicative decreases of the LLM concurrency limit by reason.", ["reason"]
+)
+
+OVERLOAD_ERRORS: dict[type[BaseException], str] = {
+    openai.RateLimitError: "rate_limit",
+    openai.APITimeoutError: "timeout",
+    httpx.TimeoutException: "timeout",
+    asyncio.TimeoutError: "timeout",
+}
+
+
+def overload_reason(exc: BaseException) -> Optional[str]:
+    """
+    Return the overload reason signalled by an exception, or None when it does not indicate overload.
+    """
+    for error_type, reason in OVERLOAD_ERRORS.items():
+        if isinstance(exc, error_type):
+            return reason
+    return None
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    AIMD limiter of concurrent calls with a FIFO queue for the excess.
+
+    Only calls admitted after the last decrease may trigger another one, so a burst of failures caused
+    by the same overload cuts the limit once instead of collapsing it to the minimum. The limit grows
+    only when it was actually reached, otherwise an idle service would inflate it without evidence.
+    """
+
+    def __init__(self, settings: ConcurrencySettings):
+        self.settings = settings
+        self._limit = float(settings.initial_limit)
+        self._in_flight = 0
+        self._waiters: deque[asyncio.Future] = deque()
+        self._last_decrease = float("-inf")
+        concurrency_limit.set(self.limit)
+
+    @property
+    def limit(self) -> int:
+        return max(self.settings.min_limit, int(self._limit))
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+
+    def _update_gauges(self) -> None:
+        concurrency_limit.set(self.limit)
+        concurrency_in_flight.set(self._in_flight)
+        concurrency_queue_depth.set(len(self._waiters))
+
+    async def _acquire(self) -> None:
+        if self._in_flight < self.limit and not self._waiters:
+            self._in_flight += 1
+            self._update_gauges()
+            concurrency_wait.observe(0.0)
+            return
+
+        started = time.monotonic()
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self._update_gauges()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # the slot was already handed over to this caller, pass it on
+                self._release()
+            else:
+                self._waiters.remove(waiter)
+                self._update_gauges()
+            raise
+        concurrency_wait.observe(time.monotonic() - started)
+
+    def _release(self) -> None:
+        self._in_flight -= 1
+        self._wake_up()
+
+    def _wake_up(self) -> None:
+        while self._waiters and self._in_flight < self.limit:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self._in_flight += 1
+                waiter.set_result(None)
+        self._update_gauges()
+
+    def _on_success(self, started: float, latency: float) -> None:
+        if latency > self.settings.latency_threshold:
+            return
+        # the slot of this call is still held, so reaching the limit means it was fully utilized
+        if self._in_flight >= self.limit and started > self._last_decrease:
+            self._limit = min(float(self.settings.max_limit), self._limit + self.settings.increase)
+
+    def _on_overload(self, started: float, reason: str) -> None:
+        if started <= self._last_decrease:
+            return
+        previous = self.limit
+        self._limit = max(float(self.settings.min_limit), self._limit * self.settings.decrease_factor)
+        self._last_decrease = time.monotonic()
+        concurrency_decreases.inc(reason=reason)
+        logger.warning("LLM overload (%s), concurrency limit decreased %d -> %d", reason, previous, self.limit)
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """
+        Hold one slot for the duration of the block and adapt the limit according to its outcome.
+        """
+        if not self.settings.enabled:
+            yield
+            return
+
+        await self._acquire()
+        started = time.monotonic()
+        try:
+            yield
+        except Exception as exc:
+            reason = overload_reason(exc)
+            if reason is not None:
+                self._on_overload(started, reason)
+            raise
+        else:
+            self._on_success(started, time.monotonic() - started)
+        finally:
+            self._release()
+
+    async def run(self, call: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run the call once a slot is available and adapt the limit according to its outcome.
+
+        :param call: Factory of the awaitable performing the upstream call.
+        :return: Result of the call.
+        """
+        async with self.slot():
+            return await call()
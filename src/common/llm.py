@@ -2,52 +2,623 @@
 #
 # Licensed under the EUPL-1.2 or later.
 
+import asyncio
+import importlib.util
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Optional, cast
+
+import httpx
 from langchain.output_parsers import RetryWithErrorOutputParser
 from langchain.prompts import BasePromptTemplate
-from langchain_core.output_parsers import BaseOutputParser
-from langchain_core.runnables import Runnable, RunnableLambda, RunnableParallel
+from langchain_core.exceptions import OutputParserException
+from langchain_core.output_parsers import BaseOutputParser, PydanticOutputParser
+from langchain_core.prompt_values import PromptValue
+from langchain_core.runnables import Runnable, RunnableConfig, RunnableLambda, RunnableParallel
+from langchain_core.utils.json import parse_json_markdown
 from langchain_openai import ChatOpenAI
+from pydantic import BaseModel
+
+from ..config import LLMSettings, config
+from .cache import cache_key, cache_requests, llm_cache, template_version
+from .context import current_request_stats
+from .hedging import Hedger, hedger
+from .limits import AdaptiveConcurrencyLimiter
+from .metrics import metrics
+from .output_parsers import repair_output
+from .ratelimit import RateLimiter, rate_limiter
+from .singleflight import SingleFlight
+from .structured import (
+    STRUCTURED_FORMAT_INSTRUCTIONS,
+    StructuredOutputSupport,
+    format_variable,
+    is_unsupported_error,
+    response_format,
+    structured_output,
+    structured_output_calls,
+)
+
+logger = logging.getLogger(__name__)
+
+retries_avoided = metrics.counter(
+    "llm_retries_avoided_total", "Invalid LLM outputs repaired locally instead of an LLM retry.", ["endpoint"]
+)
+repair_failures = metrics.counter(
+    "llm_output_repair_failures_total", "Invalid LLM outputs that could not be repaired locally.", ["endpoint"]
+)
+
+# seconds between progress events of a streamed chain invocation without partial output
+PROGRESS_INTERVAL = 1.0
+
+LLMClientKey = tuple[str, float, str]
+
+
+class LLMClientRegistry:
+    """
+    Process-wide registry of ChatOpenAI clients sharing one keep-alive HTTP connection pool.
+
+    Clients are keyed by (model, temperature, reasoning_effort) and created lazily on first use,
+    so every module draws the same long-lived instance instead of building a new client per request.
+    The pool is bound to the event loop it was created on and transparently rebuilt for a new loop.
+    """
+
+    def __init__(self, settings: LLMSettings):
+        self._settings = settings
+        self._clients: dict[LLMClientKey, ChatOpenAI] = {}
+        self._alternates: dict[LLMClientKey, Runnable] = {}
+        self._http_client: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def http2_enabled(self) -> bool:
+        """
+        HTTP/2 is used only when enabled in settings and the optional `h2` package is installed.
+        """
+        return self._settings.http2 and importlib.util.find_spec("h2") is not None
+
+    def _running_loop(self) -> Optional[asyncio.AbstractEventLoop]:
+        try:
+            return asyncio.get_running_loop()
+        except RuntimeError:
+            return None
+
+    def _create_http_client(self) -> httpx.AsyncClient:
+        settings = self._settings
+        limits = httpx.Limits(
+            max_connections=settings.pool_max_connections,
+            max_keepalive_connections=settings.pool_max_keepalive_connections,
+            keepalive_expiry=settings.pool_keepalive_expiry,
+        )
+        return httpx.AsyncClient(
+            http2=self.http2_enabled,
+            limits=limits,
+            timeout=httpx.Timeout(settings.request_timeout),
+            event_hooks={"response": [rate_limiter.observe_response]},
+        )
+
+    def _ensure_pool(self) -> httpx.AsyncClient:
+        loop = self._running_loop()
+        if self._http_client is not None and (loop is None or self._loop is None or loop is self._loop):
+            if self._loop is None:
+                self._loop = loop
+            return self._http_client
+
+        if self._http_client is not None:
+            # connections of the previous pool belong to another event loop and cannot be reused
+            logger.debug("Event loop changed, rebuilding LLM connection pool")
+            self._clients.clear()
+            self._alternates.clear()
+
+        self._http_client = self._create_http_client()
+        self._loop = loop
+        return self._http_client
+
+    def get(
+        self,
+        model_name: Optional[str] = None,
+        temperature: float = 1.0,
+        reasoning_effort: str = "high",
+    ) -> ChatOpenAI:
+        """
+        Return the pooled ChatOpenAI client for the given parameters, creating it on first use.
+
+        :param model_name: Model identifier, defaults to the configured model.
+        :param temperature: Sampling temperature for the LLM (controls randomness).
+        :param reasoning_effort: Reasoning effort passed to the model.
+        :return: Shared ChatOpenAI instance.
+        """
+        http_client = self._ensure_pool()
+        key: LLMClientKey = (model_name or self._settings.model_name, temperature, reasoning_effort)
+        llm = self._clients.get(key)
+        if llm is None:
+            llm = ChatOpenAI(
+                openai_api_key=self._settings.openai_api_key,
+                openai_api_base=self._settings.openai_api_base,
+                model_name=key[0],
+                request_timeout=self._settings.request_timeout,
+                temperature=temperature,
+                reasoning_effort=reasoning_effort,
+                extra_body=self._settings.extra_body,
+                http_async_client=http_client,
+            )
+            self._clients[key] = llm
+        return llm
+
+    def alternate(self, llm: Any, model_name: Optional[str] = None) -> Optional[Runnable]:
+        """
+        Return the LLM receiving hedge requests of a pooled client.
+
+        With `model_name` the alternate is the pooled client of that model, otherwise the same client bound
+        to the provider order rotated by one, so the duplicate request goes to the next provider.
+
+        :param llm: Pooled client returned by `get`.
+        :param model_name: Optional alternate model.
+        :return: The alternate LLM, or None when `llm` is not pooled or there is no other provider.
+        """
+        key = next((key for key, client in self._clients.items() if client is llm), None)
+        if key is None:
+            return None
+        if model_name:
+            return self.get(model_name, temperature=key[1], reasoning_effort=key[2])
+
+        alternate = self._alternates.get(key)
+        if alternate is None:
+            extra_body = llm.extra_body or {}
+            provider = extra_body.get("provider") or {}
+            order = provider.get("order") or []
+            if len(order) < 2:
+                return None
+            rotated = {**extra_body, "provider": {**provider, "order": [*order[1:], order[0]]}}
+            alternate = self._alternates[key] = llm.bind(extra_body=rotated)
+        return alternate
+
+    async def start(self) -> None:
+        """
+        Create the connection pool and pre-warm connections to the LLM endpoint.
+
+        Pre-warming performs the TCP/TLS handshakes upfront; failures are logged and ignored
+        because the endpoint does not have to be reachable for the application to start.
+        """
+        http_client = self._ensure_pool()
+        count = self._settings.prewarm_connections
+        if count <= 0:
+            return
+
+        url = self._settings.openai_api_base.rstrip("/") + "/models"
+        headers = {"Authorization": f"Bearer {self._settings.openai_api_key}"}
 
-from ..config import config
+        async def prewarm() -> None:
+            try:
+                await http_client.get(url, headers=headers, timeout=5.0)
+            except (httpx.HTTPError, ValueError) as exc:
+                logger.warning("LLM connection pre-warming failed: %s", exc)
+
+        await asyncio.gather(*(prewarm() for _ in range(count)))
+        logger.info("LLM connection pool ready (http2=%s, prewarmed=%d)", self.http2_enabled, count)
+
+    async def aclose(self) -> None:
+        """
+        Close the shared connection pool and drop all cached clients.
+        """
+        http_client, self._http_client = self._http_client, None
+        self._clients.clear()
+        self._alternates.clear()
+        self._loop = None
+        if http_client is not None:
+            await http_client.aclose()
+
+
+llm_clients = LLMClientRegistry(config.llm)
 
 
 def get_default_llm(temperature: float = 1.0) -> ChatOpenAI:
     """
-    Create and return a ChatOpenAI LLM instance with default parameters.
+    Return the pooled ChatOpenAI LLM instance with default parameters.
 
     :param temperature: Sampling temperature for the LLM (controls randomness).
-    :return: Configured ChatOpenAI instance.
+    :return: Shared ChatOpenAI instance from the process-wide client registry.
     """
-    return ChatOpenAI(
-        openai_api_key=config.llm.openai_api_key,
-        openai_api_base=config.llm.openai_api_base,
-        model_name=config.llm.model_name,
-        request_timeout=config.llm.request_timeout,
-        temperature=temperature,
-        reasoning_effort="high",
-        extra_body=config.llm.extra_body,
-    )
+    return llm_clients.get(temperature=temperature, reasoning_effort="high")
 
 
-def make_basic_chain(prompt: BasePromptTemplate, llm: ChatOpenAI, parser: BaseOutputParser) -> Runnable:
+def make_basic_chain(
+    prompt: BasePromptTemplate,
+    llm: ChatOpenAI,
+    parser: BaseOutputParser,
+    name: str = "default",
+    retry_parser: Optional[RetryWithErrorOutputParser] = None,
+) -> Runnable:
     """
     Creates a basic processing chain that combines a prompt template, a language model, and an output parser.
 
     :param prompt: The template for generating prompts.
     :param llm: The language model used for generating completions.
     :param parser: The parser for processing the output.
+    :param name: Chain name used as metric label.
+    :param retry_parser: Parser retrying invalid output with the LLM, built for the parser and LLM if omitted.
     :return: A runnable chain that processes input through the prompt, language model, and parser.
     """
 
     async def parse_with_retry(param):
-        return await retry_parser.aparse_with_prompt(param["completion"].content, param["prompt_value"])
+        return await aparse_with_repair(name, parser, retry_parser, param["completion"].content, param["prompt_value"])
 
     completion_chain = prompt | llm
 
     # retries once if it fails with an error message
     # ref: https://python.langchain.com/docs/how_to/output_parser_retry/
-    retry_parser = RetryWithErrorOutputParser.from_llm(parser=parser, llm=llm)
+    retry_parser = retry_parser or RetryWithErrorOutputParser.from_llm(parser=parser, llm=llm)
 
     chain = RunnableParallel(completion=completion_chain, prompt_value=prompt) | RunnableLambda(parse_with_retry)
 
     return chain
+
+
+def make_structured_chain(
+    prompt: BasePromptTemplate,
+    llm: ChatOpenAI,
+    parser: BaseOutputParser,
+    name: str = "default",
+    retry_parser: Optional[RetryWithErrorOutputParser] = None,
+) -> Runnable:
+    """
+    Creates a chain like `make_basic_chain` that requests provider-native structured output.
+
+    The `response_format` is read per invocation from `config["configurable"]["response_format"]`,
+    so the chain is built once although the schema (its enums) differs between requests.
+
+    :param prompt: The template for generating prompts.
+    :param llm: The language model used for generating completions.
+    :param parser: The parser for processing the output.
+    :param name: Chain name used as metric label.
+    :param retry_parser: Parser retrying invalid output with the LLM, built for the parser and LLM if omitted.
+    :return: A runnable chain that processes input through the prompt, language model, and parser.
+    """
+
+    async def generate(prompt_value: PromptValue, config: RunnableConfig) -> Any:
+        fmt = (config.get("configurable") or {}).get("response_format")
+        return await llm.ainvoke(prompt_value, config=config, response_format=fmt)
+
+    async def parse_with_retry(param):
+        return await aparse_with_repair(name, parser, retry_parser, param["completion"].content, param["prompt_value"])
+
+    retry_parser = retry_parser or RetryWithErrorOutputParser.from_llm(parser=parser, llm=llm)
+    completion_chain = prompt | RunnableLambda(generate)
+    return RunnableParallel(completion=completion_chain, prompt_value=prompt) | RunnableLambda(parse_with_retry)
+
+
+async def aparse_with_repair(
+    name: str,
+    parser: BaseOutputParser,
+    retry_parser: RetryWithErrorOutputParser,
+    completion: str,
+    prompt_value: PromptValue,
+) -> Any:
+    """
+    Parse the LLM completion; output failing to parse is first repaired locally (see `repair_output`)
+    and only output that is still invalid is sent to the LLM-based retry parser.
+
+    :param name: Chain name used as metric label.
+    :param parser: The parser for processing the output.
+    :param retry_parser: Parser retrying the completion with the LLM.
+    :param completion: Raw LLM completion.
+    :param prompt_value: Prompt the completion was produced for.
+    :return: Parsed output.
+    """
+    try:
+        return await parser.aparse(completion)
+    except OutputParserException:
+        pass
+
+    model = getattr(parser, "pydantic_object", None)
+    if model is not None:
+        repaired = repair_output(model, completion)
+        if repaired is not None:
+            retries_avoided.inc(endpoint=name)
+            logger.debug("Repaired invalid LLM output of %s locally", name)
+            return repaired
+        repair_failures.inc(endpoint=name)
+    return await retry_parser.aparse_with_prompt(completion, prompt_value)
+
+
+@dataclass(frozen=True)
+class ChainSpec:
+    """
+    Registered definition of a module chain.
+
+    :param prompt: The template for generating prompts.
+    :param parser: The parser for processing the output.
+    :param version: Prompt template version used in result cache keys.
+    :param format_variable: Prompt variable holding the format instructions, replaced in structured output mode.
+    """
+
+    prompt: BasePromptTemplate
+    parser: PydanticOutputParser
+    version: str
+    format_variable: Optional[str] = None
+
+    @property
+    def output_model(self) -> type[BaseModel]:
+        """
+        Pydantic model produced by the parser, used to (de)serialize cached results.
+        """
+        return self.parser.pydantic_object
+
+
+class ChainRegistry:
+    """
+    Registry of per-module LLM chains built once and reused across requests.
+
+    Modules register their prompt and parser at import time; the chain itself is built on startup
+    (or on first use) and cached together with the LLM it was built for. A chain is rebuilt only when
+    a different LLM instance is requested, e.g. when the pooled clients were recreated.
+    """
+
+    def __init__(
+        self,
+        limiter: Optional[AdaptiveConcurrencyLimiter] = None,
+        rate: Optional[RateLimiter] = None,
+        hedging: Optional[Hedger] = None,
+        structured: Optional[StructuredOutputSupport] = None,
+    ) -> None:
+        self._specs: dict[str, ChainSpec] = {}
+        self._chains: dict[tuple[str, bool], tuple[ChatOpenAI, Runnable]] = {}
+        self._hedge_chains: dict[tuple[str, bool], tuple[Runnable, Runnable]] = {}
+        self._retry_parsers: dict[str, tuple[ChatOpenAI, RetryWithErrorOutputParser]] = {}
+        self._in_flight = SingleFlight()
+        self.limiter = limiter or AdaptiveConcurrencyLimiter(config.concurrency)
+        self.rate = rate or rate_limiter
+        self.hedging = hedging or hedger
+        self.structured = structured or structured_output
+
+    @property
+    def names(self) -> list[str]:
+        return list(self._specs)
+
+    def spec(self, name: str) -> ChainSpec:
+        return self._specs[name]
+
+    def register(self, name: str, prompt: BasePromptTemplate, parser: PydanticOutputParser) -> None:
+        """
+        Register the prompt and parser of a module chain.
+
+        :param name: Unique chain name, usually the module name.
+        :param prompt: The template for generating prompts.
+        :param parser: The parser for processing the output.
+        """
+        self._specs[name] = ChainSpec(
+            prompt=prompt, parser=parser, version=template_version(prompt), format_variable=format_variable(prompt)
+        )
+        for key in [(name, False), (name, True)]:
+            self._chains.pop(key, None)
+            self._hedge_chains.pop(key, None)
+        self._retry_parsers.pop(name, None)
+
+    def retry_parser(self, name: str, llm: ChatOpenAI) -> RetryWithErrorOutputParser:
+        """
+        Return the cached parser retrying invalid output of the module chain with the LLM,
+        building it if missing or built for another LLM.
+        """
+        cached = self._retry_parsers.get(name)
+        if cached is not None and cached[0] is llm:
+            return cached[1]
+
+        retry_parser = RetryWithErrorOutputParser.from_llm(parser=self._specs[name].parser, llm=llm)
+        self._retry_parsers[name] = (llm, retry_parser)
+        return retry_parser
+
+    def get(self, name: str, llm: ChatOpenAI, structured: bool = False) -> Runnable:
+        """
+        Return the cached chain for the module, building it if missing or built for another LLM.
+
+        :param name: Registered chain name.
+        :param llm: The language model the chain should use.
+        :param structured: Return the chain requesting provider-native structured output.
+        :return: A runnable chain as produced by `make_basic_chain` or `make_structured_chain`.
+        :raises KeyError: If no chain with the given name is registered.
+        """
+        cached = self._chains.get((name, structured))
+        if cached is not None and cached[0] is llm:
+            return cached[1]
+
+        spec = self._specs[name]
+        make_chain = make_structured_chain if structured else make_basic_chain
+        chain = make_chain(spec.prompt, llm, spec.parser, name=name, retry_parser=self.retry_parser(name, llm))
+        self._chains[(name, structured)] = (llm, chain)
+        return chain
+
+    def hedge_chain(self, name: str, llm: Runnable, structured: bool = False) -> Runnable:
+        """
+        Return the cached chain sending hedge requests through the alternate LLM.
+        """
+        cached = self._hedge_chains.get((name, structured))
+        if cached is not None and cached[0] is llm:
+            return cached[1]
+
+        spec = self._specs[name]
+        make_chain = make_structured_chain if structured else make_basic_chain
+        # the alternate is a pooled client or a client bound to other request parameters
+        chain = make_chain(spec.prompt, cast(ChatOpenAI, llm), spec.parser, name=name)
+        self._hedge_chains[(name, structured)] = (llm, chain)
+        return chain
+
+    def build_all(self, llm: ChatOpenAI) -> None:
+        """
+        Build chains of all registered modules upfront for the given LLM.
+        """
+        for name in self._specs:
+            self.get(name, llm)
+            if self.structured.enabled:
+                self.get(name, llm, structured=True)
+        logger.info("Built LLM chains: %s", ", ".join(self._specs))
+
+    async def ainvoke(
+        self,
+        name: str,
+        llm: ChatOpenAI,
+        variables: dict[str, Any],
+        config: Optional[RunnableConfig] = None,
+        enums: Optional[dict[str, list[str]]] = None,
+    ) -> Any:
+        """
+        Invoke the registered chain with the given prompt variables.
+
+        For endpoints opted in to caching, the parsed result is looked up in the content-addressed
+        result cache first and stored there after a successful invocation. Concurrent invocations
+        with the same canonical key are coalesced into one upstream call, and upstream calls are
+        subject to the per-model rate limits and the adaptive concurrency limit. Calls of endpoints
+        opted in to hedging are duplicated to an alternate provider or model when they stall.
+
+        With structured output enabled, the output model is sent as JSON schema `response_format` in place
+        of the format instructions; models rejecting it are remembered and served by the text-parsing chain.
+
+        :param name: Registered chain name.
+        :param llm: The language model the chain should use.
+        :param variables: Prompt variables.
+        :param config: Optional runnable config (e.g. callbacks).
+        :param enums: Allowed values of output properties by name, applied to the structured output schema.
+        :return: Parsed chain output.
+        """
+        spec = self._specs[name]
+        key = cache_key(name, model_name_of(llm), spec.version, variables)
+        use_cache = llm_cache.enabled_for(name)
+
+        if use_cache:
+            cached = await self._cached(name, key, spec)
+            if cached is not None:
+                return cached
+
+        alternate = None
+        if self.hedging.enabled_for(name):
+            alternate = llm_clients.alternate(llm, self.hedging.settings.alternate_model)
+
+        async def invoke(structured: bool) -> Any:
+            inputs, run_config = variables, config
+            if structured:
+                if spec.format_variable:
+                    inputs = {**variables, spec.format_variable: STRUCTURED_FORMAT_INSTRUCTIONS}
+                configurable = {"response_format": response_format(name, spec.output_model, enums)}
+                run_config = {
+                    **(config or {}),
+                    "configurable": {**(config or {}).get("configurable", {}), **configurable},
+                }
+            tokens = self.rate.estimate_prompt_tokens(spec.prompt, inputs)
+
+            def upstream(target: Runnable, target_chain: Runnable) -> Awaitable[Any]:
+                return self.rate.run(
+                    model_name_of(target),
+                    tokens,
+                    lambda: self.limiter.run(lambda: target_chain.ainvoke(inputs, config=run_config)),
+                )
+
+            chain = self.get(name, llm, structured)
+            if alternate is None:
+                return await upstream(llm, chain)
+            hedge_chain = self.hedge_chain(name, alternate, structured)
+            return await self.hedging.run(name, lambda: upstream(llm, chain), lambda: upstream(alternate, hedge_chain))
+
+        async def call() -> Any:
+            model = model_name_of(llm)
+            if self.structured.supported(model):
+                try:
+                    result = await invoke(structured=True)
+                    structured_output_calls.inc(endpoint=name, mode="structured")
+                except Exception as exc:
+                    if not is_unsupported_error(exc):
+                        raise
+                    self.structured.mark_unsupported(model)
+                    structured_output_calls.inc(endpoint=name, mode="fallback")
+                    result = await invoke(structured=False)
+            else:
+                result = await invoke(structured=False)
+                structured_output_calls.inc(endpoint=name, mode="text")
+            if use_cache and isinstance(result, spec.output_model):
+                await llm_cache.aset(key, name, result)
+            return result
+
+        return await self._in_flight.do(name, key, call)
+
+    async def _cached(self, name: str, key: str, spec: ChainSpec) -> Optional[BaseModel]:
+        stats = current_request_stats()
+        cached = await llm_cache.aget(key, spec.output_model)
+        if cached is not None:
+            stats.cache_hits += 1
+            cache_requests.inc(endpoint=name, result="hit")
+            return cached
+        stats.cache_misses += 1
+        cache_requests.inc(endpoint=name, result="miss")
+        return None
+
+    async def astream(
+        self, name: str, llm: ChatOpenAI, variables: dict[str, Any], config: Optional[RunnableConfig] = None
+    ) -> AsyncIterator[tuple[str, Any]]:
+        """
+        Invoke the registered chain streaming the model output.
+
+        While the model produces tokens, the output is parsed as partial JSON and every change is yielded
+        as ("partial", dict); ("progress", {"chars": n}) is yielded at least every `PROGRESS_INTERVAL` seconds
+        otherwise. The stream ends with ("result", parsed output) parsed (and retried) like in `ainvoke`.
+        Cached results are yielded directly; streamed calls respect the rate and concurrency limits but are
+        neither coalesced nor hedged.
+
+        :param name: Registered chain name.
+        :param llm: The language model the chain should use.
+        :param variables: Prompt variables.
+        :param config: Optional runnable config (e.g. callbacks).
+        :return: Async iterator of (event, payload) tuples.
+        """
+        spec = self._specs[name]
+        key = cache_key(name, model_name_of(llm), spec.version, variables)
+        use_cache = llm_cache.enabled_for(name)
+
+        if use_cache:
+            cached = await self._cached(name, key, spec)
+            if cached is not None:
+                yield "result", cached
+                return
+
+        prompt_value = spec.prompt.format_prompt(**variables)
+        await self.rate.acquire(model_name_of(llm), self.rate.estimate_prompt_tokens(spec.prompt, variables))
+
+        text = ""
+        partial: Any = None
+        last_event = time.monotonic()
+        async with self.limiter.slot():
+            async for chunk in llm.astream(prompt_value, config=config):
+                content = chunk.content if isinstance(chunk.content, str) else ""
+                text += content
+                # a value can only be completed by a closing bracket, quote or separator
+                if any(c in content for c in '}]",'):
+                    try:
+                        parsed = parse_json_markdown(text)
+                    except ValueError:
+                        parsed = None
+                    if isinstance(parsed, dict) and parsed != partial:
+                        partial = parsed
+                        last_event = time.monotonic()
+                        yield "partial", parsed
+                        continue
+                if time.monotonic() - last_event >= PROGRESS_INTERVAL:
+                    last_event = time.monotonic()
+                    yield "progress", {"chars": len(text)}
+
+        result = await aparse_with_repair(name, spec.parser, self.retry_parser(name, llm), text, prompt_value)
+        if use_cache and isinstance(result, spec.output_model):
+            await llm_cache.aset(key, name, result)
+        yield "result", result
+
+    def output_models(self) -> dict[str, type[BaseModel]]:
+        """
+        Return the Pydantic output model of every registered chain.
+        """
+        return {name: spec.output_model for name, spec in self._specs.items()}
+
+
+def model_name_of(llm: Any) -> str:
+    """
+    Return the model name of an LLM runnable, falling back to the configured default model.
+    """
+    return getattr(llm, "model_name", None) or config.llm.model_name
+
+
+chains = ChainRegistry()
@@ -2,8 +2,17 @@
 #
 # Licensed under the EUPL-1.2 or later.
 
+import json
+import re
+from types import UnionType
+from typing import Any, List, Optional, TypeVar, Union, get_args, get_origin
+
+import yaml  # type: ignore[import-untyped]  # installed with langchain
 from langchain.schema.output_parser import OutputParserException
 from langchain_core.output_parsers import BaseOutputParser
+from pydantic import BaseModel
+
+TModel = TypeVar("TModel", bound=BaseModel)
 
 
 class CodeSnippetOutputParser(BaseOutputParser[str]):
@@ -39,3 +48,162 @@ class CodeSnippetOutputParser(BaseOutputParser[str]):
     @property
     def _type(self) -> str:
         return "code_snippet_output_parser"
+
+
+_FENCE = re.compile(r"```[\w-]*[ \t]*\n?(.*?)(?:```|$)", re.DOTALL)
+_PYTHON_LITERALS = {"True": "true", "False": "false", "None": "null"}
+
+
+def _strip_fences(text: str) -> str:
+    match = _FENCE.search(text)
+    return match.group(1) if match else text
+
+
+def _normalize_json(text: str) -> str:
+    """
+    Rewrite JSON-like text into JSON in one pass: comments are removed, single-quoted strings re-quoted,
+    Python literals replaced, trailing commas dropped, text after the document ignored and a truncated
+    document closed (an unterminated string value is dropped together with its key).
+    """
+    out: list[str] = []
+    stack: list[str] = []
+    i, n = 0, len(text)
+    while i < n:
+        c = text[i]
+        if c in "\"'":
+            # string literal, always emitted double-quoted
+            j, chars, closed = i + 1, [], False
+            while j < n:
+                d = text[j]
+                if d == "\\" and j + 1 < n:
+                    escaped = text[j + 1]
+                    chars.append(escaped if escaped == "'" else d + escaped)
+                    j += 2
+                    continue
+                if d == c:
+                    closed = True
+                    break
+                chars.append('\\"' if d == '"' else "\\n" if d == "\n" else d)
+                j += 1
+            if not closed:
+                # truncated inside a string: the incomplete value is dropped
+                break
+            out.append('"' + "".join(chars) + '"')
+            i = j + 1
+        elif text.startswith("//", i) or c == "#":
+            end = text.find("\n", i)
+            i = n if end < 0 else end
+        elif text.startswith("/*", i):
+            end = text.find("*/", i + 2)
+            i = n if end < 0 else end + 2
+        elif c in "{[":
+            stack.append("}" if c == "{" else "]")
+            out.append(c)
+            i += 1
+        elif c in "}]":
+            _drop_trailing_comma(out)
+            if stack and stack[-1] == c:
+                stack.pop()
+            out.append(c)
+            i += 1
+            if not stack:
+                # end of the document, ignore any trailing prose
+                break
+        elif c.isalpha():
+            j = i
+            while j < n and (text[j].isalnum() or text[j] == "_"):
+                j += 1
+            word = text[i:j]
+            out.append(_PYTHON_LITERALS.get(word, word))
+            i = j
+        else:
+            out.append(c)
+            i += 1
+
+    # close a truncated document: drop a dangling separator or key, then close open brackets
+    result = "".join(out).rstrip()
+    result = re.sub(r'(,\s*"[^"]*"\s*:?|[,:])\s*$', "", result) if stack else result
+    return result + "".join(reversed(stack))
+
+
+def _drop_trailing_comma(out: list[str]) -> None:
+    k = len(out) - 1
+    while k >= 0 and out[k].isspace():
+        k -= 1
+    if k >= 0 and out[k] == ",":
+        del out[k]
+
+
+def repair_json(text: str) -> Any:
+    """
+    Parse JSON from LLM output fixing the common failure modes: markdown code fences, surrounding prose,
+    comments, single quotes, Python literals, trailing commas, truncated strings and brackets, and YAML.
+
+    :param text: Raw LLM output.
+    :return: Parsed JSON value.
+    :raises ValueError: If the text cannot be repaired.
+    """
+    body = _strip_fences(text).strip()
+    if not body.startswith(("{", "[")):
+        # the model may have answered in YAML
+        try:
+            value = yaml.safe_load(body)
+        except yaml.YAMLError:
+            value = None
+        if isinstance(value, (dict, list)):
+            return value
+
+    # JSON possibly surrounded by prose
+    start = min((i for i in (body.find("{"), body.find("[")) if i >= 0), default=-1)
+    if start < 0:
+        raise ValueError("No JSON or YAML document found")
+    return json.loads(_normalize_json(body[start:]))
+
+
+def _unwrap_optional(annotation: Any) -> Any:
+    if get_origin(annotation) in (Union, UnionType):
+        args = [arg for arg in get_args(annotation) if arg is not type(None)]
+        if len(args) == 1:
+            return args[0]
+    return annotation
+
+
+def coerce_to_schema(value: Any, annotation: Any) -> Any:
+    """
+    Adjust parsed data to the shape expected by a Pydantic model: a string where a list is expected
+    (e.g. a single `filter` expression) is wrapped into a list. Nested models and lists are processed recursively.
+
+    :param value: Parsed JSON value.
+    :param annotation: Expected type, usually a Pydantic model class.
+    :return: Coerced value.
+    """
+    annotation = _unwrap_optional(annotation)
+    origin = get_origin(annotation)
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel) and isinstance(value, dict):
+        value = dict(value)
+        for name, field in annotation.model_fields.items():
+            key = field.alias or name
+            if key in value:
+                value[key] = coerce_to_schema(value[key], field.annotation)
+        return value
+    if origin in (list, List):
+        (item_type,) = get_args(annotation) or (Any,)
+        if isinstance(value, str):
+            value = [value]
+        if isinstance(value, list):
+            return [coerce_to_schema(item, item_type) for item in value]
+    return value
+
+
+def repair_output(model: type[TModel], text: str) -> Optional[TModel]:
+    """
+    Try to repair LLM output locally into an instance of the model.
+
+    :param model: Pydantic model expected by the output parser.
+    :param text: Raw LLM output that failed to parse.
+    :return: The validated model, or None if the output cannot be repaired.
+    """
+    try:
+        return model.model_validate(coerce_to_schema(repair_json(text), model))
+    except (ValueError, TypeError):
+        return None
@@ -0,0 +1,260 @@
+# Copyright (c) 2010-2025 Evolveum and contributors
+#
+# Licensed under the EUPL-1.2 or later.
+
+import asyncio
+import json
+import logging
+import re
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Mapping, Optional
+
+import httpx
+import openai
+from langchain.prompts import BasePromptTemplate
+
+from ..config import ModelRateLimit, RateLimitSettings, config
+from .budget import TokenEstimator, token_estimator
+from .metrics import metrics
+
+"""
+Client-side rate limiting of LLM calls by requests and prompt tokens per minute.
+
+Every call reserves capacity in token buckets of its model before it is dispatched and is delayed
+until the capacity is available. Rate limit headers of provider responses (`Retry-After`,
+`x-ratelimit-remaining-*`, `x-ratelimit-reset-*`) tighten the buckets, and calls rejected with 429
+are delayed and retried instead of failing the request.
+"""
+
+logger = logging.getLogger(__name__)
+
+rate_limit_delay = metrics.histogram(
+    "llm_rate_limit_delay_seconds", "Time LLM calls were delayed by the rate limiter.", ["model"]
+)
+rate_limit_retries = metrics.counter(
+    "llm_rate_limit_retries_total", "LLM calls retried after being rejected with 429.", ["model"]
+)
+rate_limit_tokens = metrics.counter(
+    "llm_rate_limit_reserved_tokens_total", "Estimated prompt tokens reserved by LLM calls.", ["model"]
+)
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def parse_delay(value: Optional[str], now: Optional[float] = None) -> Optional[float]:
+    """
+    Parse a `Retry-After` or rate limit reset header value into a delay in seconds.
+
+    Supported are plain seconds, durations like "1m30s" or "250ms", epoch timestamps in seconds or
+    milliseconds, and HTTP dates.
+
+    :param value: Header value.
+    :param now: Current wall-clock time, defaults to `time.time()`.
+    :return: Non-negative delay in seconds, or None when the value cannot be parsed.
+    """
+    if not value:
+        return None
+    value = value.strip()
+    now = time.time() if now is None else now
+
+    try:
+        number = float(value)
+    except ValueError:
+        pass
+    else:
+        if number > 1e11:
+            return max(0.0, number / 1000 - now)
+        if number > 1e9:
+            return max(0.0, number - now)
+        return max(0.0, number)
+
+    parts = _DURATION_PART.findall(value)
+    if parts and "".join(amount + unit for amount, unit in parts) == value:
+        return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in parts)
+
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - now)
+    except (TypeError, ValueError):
+        return None
+
+
+def retry_after(headers: Mapping[str, str]) -> Optional[float]:
+    """
+    Return the delay requested by `retry-after-ms` or `retry-after` headers, if any.
+    """
+    if "retry-after-ms" in headers:
+        delay = parse_delay(headers["retry-after-ms"])
+        if delay is not None:
+            return delay / 1000
+    return parse_delay(headers.get("retry-after"))
+
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously up to its per-minute capacity.
+
+    Reservations are taken immediately and may drive the level negative; the caller then waits until
+    the level would be refilled back to zero, which keeps waiting calls in FIFO order.
+    """
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, amount: float, now: float) -> float:
+        """
+        Reserve capacity and return the delay in seconds before it is available.
+        """
+        self._refill(now)
+        self.level -= min(amount, self.capacity)
+        return max(0.0, -self.level / self.rate)
+
+    def limit_remaining(self, remaining: float, now: float) -> None:
+        """
+        Lower the level to the remaining capacity reported by the provider.
+        """
+        self._refill(now)
+        self.level = min(self.level, remaining)
+
+
+class _ModelLimits:
+    def __init__(self, limits: ModelRateLimit):
+        self.requests = TokenBucket(limits.requests_per_minute) if limits.requests_per_minute > 0 else None
+        self.tokens = TokenBucket(limits.tokens_per_minute) if limits.tokens_per_minute > 0 else None
+        self.blocked_until = 0.0
+
+
+class RateLimiter:
+    """
+    Per-model request and token rate limiter of LLM calls.
+    """
+
+    def __init__(self, settings: RateLimitSettings, estimator: Optional[TokenEstimator] = None):
+        self.settings = settings
+        self.estimator = estimator or token_estimator
+        self._models: dict[str, _ModelLimits] = {}
+
+    def _limits(self, model: str) -> _ModelLimits:
+        limits = self._models.get(model)
+        if limits is None:
+            limits = _ModelLimits(self.settings.models.get(model, self.settings.default))
+            self._models[model] = limits
+        return limits
+
+    def estimate_prompt_tokens(self, prompt: BasePromptTemplate, variables: Mapping[str, Any]) -> int:
+        """
+        Estimate the number of tokens of the rendered prompt; returns 0 when rate limiting is disabled.
+        """
+        if not self.settings.enabled:
+            return 0
+        return self.estimator.estimate_prompt(prompt, variables)
+
+    def block(self, model: str, seconds: float) -> None:
+        """
+        Hold back all calls of the model for the given number of seconds.
+        """
+        limits = self._limits(model)
+        limits.blocked_until = max(limits.blocked_until, time.monotonic() + min(seconds, self.settings.max_delay))
+
+    def observe_headers(self, model: str, headers: Mapping[str, str]) -> None:
+        """
+        Tighten the limits of the model according to rate limit headers of a provider response.
+
+        :param model: Model identifier the response belongs to.
+        :param headers: Response headers (case-insensitive mapping).
+        """
+        if not self.settings.enabled:
+            return
+        delay = retry_after(headers)
+        if delay is not None:
+            self.block(model, delay)
+
+        now = time.monotonic()
+        limits = self._limits(model)
+        for kind, remaining_header, reset_header in (
+            ("requests", "x-ratelimit-remaining-requests", "x-ratelimit-reset-requests"),
+            ("requests", "x-ratelimit-remaining", "x-ratelimit-reset"),
+            ("tokens", "x-ratelimit-remaining-tokens", "x-ratelimit-reset-tokens"),
+        ):
+            try:
+                remaining = float(headers[remaining_header])
+            except (KeyError, ValueError):
+                continue
+            bucket = limits.requests if kind == "requests" else limits.tokens
+            if bucket is not None:
+                bucket.limit_remaining(remaining, now)
+            if remaining <= 0:
+                reset = parse_delay(headers.get(reset_header))
+                self.block(model, self.settings.default_retry_after if reset is None else reset)
+
+    async def observe_response(self, response: httpx.Response) -> None:
+        """
+        httpx response hook feeding rate limit headers of chat completion responses to the limiter.
+        """
+        if not self.settings.enabled or not response.request.url.path.endswith("/chat/completions"):
+            return
+        try:
+            model = json.loads(response.request.content).get("model")
+        except (ValueError, AttributeError, httpx.RequestNotRead):
+            return
+        if model:
+            self.observe_headers(model, response.headers)
+
+    async def acquire(self, model: str, tokens: int) -> None:
+        """
+        Reserve one request and the estimated prompt tokens of the model, waiting until they are available.
+        """
+        if not self.settings.enabled:
+            return
+        limits = self._limits(model)
+        now = time.monotonic()
+        delay = max(0.0, limits.blocked_until - now)
+        if limits.requests is not None:
+            delay = max(delay, limits.requests.reserve(1, now))
+        if limits.tokens is not None and tokens > 0:
+            delay = max(delay, limits.tokens.reserve(tokens, now))
+        rate_limit_tokens.inc(tokens, model=model)
+
+        delay = min(delay, self.settings.max_delay)
+        rate_limit_delay.observe(delay, model=model)
+        if delay > 0:
+            logger.debug("Delaying LLM call of %s by %.2fs due to rate limits", model, delay)
+            await asyncio.sleep(delay)
+
+    async def run(self, model: str, tokens: int, call: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run the call within the rate limits of the model, delaying and retrying it when rejected with 429.
+
+        :param model: Model identifier.
+        :param tokens: Estimated prompt tokens, see `estimate_prompt_tokens`.
+        :param call: Factory of the awaitable performing the upstream call.
+        :return: Result of the call.
+        :raises openai.RateLimitError: When the call is still rejected after `max_retries` retries.
+        """
+        if not self.settings.enabled:
+            return await call()
+
+        attempt = 0
+        while True:
+            await self.acquire(model, tokens)
+            try:
+                return await call()
+            except openai.RateLimitError as exc:
+                if attempt >= self.settings.max_retries:
+                    raise
+                attempt += 1
+                delay = retry_after(exc.response.headers)
+                self.block(model, self.settings.default_retry_after if delay is None else delay)
+                rate_limit_retries.inc(model=model)
+                logger.info("LLM call of %s rate limited, retry %d/%d", model, attempt, self.settings.max_retries)
+
+
+rate_limiter = RateLimiter(config.rate_limit)
@@ -87,3 +87,16 @@ class MidpointSchema(BaseSchema):
     """
 
     name: FocusType = Field(..., description="Name of Midpoint schema always represents a focus type.")
+
+
+class CorrectionStats(BaseModel):
+    """
+    Statistics of the server-side self-correction loop of one suggestion.
+    """
+
+    attempts: int = Field(..., description="Number of generations, including the first one.")
+    valid: bool = Field(..., description="True when the returned suggestion passed local validation.")
+    elapsedSeconds: float = Field(..., description="Wall time of all attempts in seconds.")
+    errors: List[str] = Field(
+        default_factory=list, description="Validation errors of the rejected attempts, in order of the attempts."
+    )
@@ -0,0 +1,73 @@
+# Copyright (c) 2010-2025 Evolveum and contributors
+#
+# Licensed under the EUPL-1.2 or later.
+
+import json
+from typing import Any, Callable
+
+from ..config import PromptFormat, SerializationSettings, config
+from ..utils import pretty_json
+
+"""
+Pluggable serializers of prompt payloads.
+
+Indented JSON spends a large share of prompt tokens on whitespace and on keys repeated in every item of
+a list. Besides the indented format, payloads can be serialized as compact JSON, or as tabular JSON where
+every homogeneous list of objects (attribute statistics, value counts, records) is encoded once as
+{"columns": [...], "rows": [[...], ...]}. The format is selected per module in `serialization` settings.
+"""
+
+Serializer = Callable[[Any], str]
+
+# minimum number of items of a list of objects encoded as a table
+MIN_TABLE_ROWS = 2
+
+
+def compact_json(value: Any) -> str:
+    """
+    Serialize a Python object into JSON without insignificant whitespace.
+    """
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def tabulate(value: Any) -> Any:
+    """
+    Replace homogeneous lists of objects (same keys in the same order) by a header-plus-rows table.
+
+    :param value: JSON-serializable value.
+    :return: Value with tables as {"columns": [keys], "rows": [[values], ...]}; nested values are tabulated too.
+    """
+    if isinstance(value, dict):
+        return {key: tabulate(item) for key, item in value.items()}
+    if not isinstance(value, (list, tuple)):
+        return value
+    if len(value) >= MIN_TABLE_ROWS and all(isinstance(item, dict) for item in value):
+        columns = list(value[0])
+        if columns and all(list(item) == columns for item in value):
+            return {"columns": columns, "rows": [[tabulate(item[key]) for key in columns] for item in value]}
+    return [tabulate(item) for item in value]
+
+
+def tabular_json(value: Any) -> str:
+    """
+    Serialize a Python object into compact JSON with homogeneous lists of objects encoded as tables.
+    """
+    return compact_json(tabulate(value))
+
+
+SERIALIZERS: dict[PromptFormat, Serializer] = {
+    PromptFormat.pretty: pretty_json,
+    PromptFormat.compact: compact_json,
+    PromptFormat.tabular: tabular_json,
+}
+
+
+def serializer_for(module: str, settings: SerializationSettings = config.serialization) -> Serializer:
+    """
+    Return the serializer of prompt payloads configured for the module.
+
+    :param module: Module (chain) name, e.g. "object_type".
+    :param settings: Serialization settings, defaults to the application settings.
+    :return: Function serializing a JSON-serializable value into a string.
+    """
+    return SERIALIZERS[settings.modules.get(module, settings.default)]
@@ -0,0 +1,60 @@
+# Copyright (c) 2010-2025 Evolveum and contributors
+#
+# Licensed under the EUPL-1.2 or later.
+
+import asyncio
+from typing import Any, Awaitable, Callable
+
+from pydantic import BaseModel
+
+from .metrics import metrics
+
+"""
+Coalescing of identical in-flight calls: concurrent callers with the same key share one execution.
+"""
+
+coalesced_calls = metrics.counter(
+    "llm_coalesced_calls_total", "LLM calls served by an identical call already in flight.", ["endpoint"]
+)
+
+
+class SingleFlight:
+    """
+    Runs at most one call per key at a time; callers arriving while it is in flight await its result.
+
+    The call runs in its own task, so a cancelled caller (e.g. a disconnected client) does not cancel
+    the shared call for the remaining waiters. Exceptions propagate to all waiters.
+    """
+
+    def __init__(self) -> None:
+        self._tasks: dict[str, asyncio.Task] = {}
+
+    def in_flight(self, key: str) -> bool:
+        return key in self._tasks
+
+    async def do(self, endpoint: str, key: str, call: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Execute `call` unless an identical call is in flight, and return its result.
+
+        :param endpoint: Endpoint name used as metric label.
+        :param key: Canonical key identifying identical calls.
+        :param call: Factory of the awaitable performing the call.
+        :return: Result of the call; followers receive a deep copy of Pydantic results.
+        """
+        task = self._tasks.get(key)
+        if task is None:
+            task = asyncio.ensure_future(call())
+            self._tasks[key] = task
+            task.add_done_callback(lambda t: self._forget(key, t))
+            return await asyncio.shield(task)
+
+        coalesced_calls.inc(endpoint=endpoint)
+        result = await asyncio.shield(task)
+        return result.model_copy(deep=True) if isinstance(result, BaseModel) else result
+
+    def _forget(self, key: str, task: asyncio.Task) -> None:
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        if not task.cancelled():
+            # mark the exception as retrieved even when all waiters were cancelled
+            task.exception()
@@ -0,0 +1,126 @@
+# Copyright (c) 2010-2025 Evolveum and contributors
+#
+# Licensed under the EUPL-1.2 or later.
+
+import json
+import logging
+from typing import Any, AsyncIterator, Optional, Sequence
+
+from fastapi import HTTPException, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+"""
+Streaming of long-running suggestions as Server-Sent Events or newline-delimited JSON.
+
+Clients opt in with the `Accept` header (`text/event-stream` or `application/x-ndjson`); otherwise endpoints
+respond with the plain JSON payload. A stream consists of `progress` events, `item` events carrying list items
+(e.g. object type suggestions) or `partial` events carrying completed fields as soon as they are available,
+and a final `result` event with the validated response payload.
+Failures after the stream has started are reported as an `error` event with the HTTP status and detail.
+"""
+
+logger = logging.getLogger(__name__)
+
+SSE_MEDIA_TYPE = "text/event-stream"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# OpenAPI description of the streamed responses, see `responses` of FastAPI route decorators
+STREAMING_RESPONSES: dict[int | str, dict[str, Any]] = {
+    200: {
+        "content": {
+            SSE_MEDIA_TYPE: {"schema": {"type": "string"}},
+            NDJSON_MEDIA_TYPE: {"schema": {"type": "string"}},
+        },
+        "description": "Streamed progress, item and result events when requested by the Accept header.",
+    }
+}
+
+
+class StreamEvent(BaseModel):
+    """
+    One event of a streamed response.
+
+    :param event: Event type: progress, item, partial, result or error.
+    :param data: JSON-serializable event payload.
+    """
+
+    event: str
+    data: Any = None
+
+
+def streaming_media_type(request: Request) -> Optional[str]:
+    """
+    Return the streaming media type requested by the Accept header, or None for a plain JSON response.
+    """
+    accept = request.headers.get("accept", "")
+    for media_type in (SSE_MEDIA_TYPE, NDJSON_MEDIA_TYPE):
+        if media_type in accept:
+            return media_type
+    return None
+
+
+def format_event(event: StreamEvent, media_type: str) -> str:
+    """
+    Serialize an event into an SSE message or an NDJSON line.
+    """
+    data = json.dumps(event.data, ensure_ascii=False)
+    if media_type == SSE_MEDIA_TYPE:
+        return f"event: {event.event}\ndata: {data}\n\n"
+    return json.dumps({"event": event.event, "data": event.data}, ensure_ascii=False) + "\n"
+
+
+def stream_response(events: AsyncIterator[StreamEvent], media_type: str) -> StreamingResponse:
+    """
+    Create a streaming response from the events of a suggestion.
+
+    :param events: Async iterator of events, usually ending with a `result` event.
+    :param media_type: SSE or NDJSON media type, see `streaming_media_type`.
+    :return: Streaming response.
+    """
+
+    async def body() -> AsyncIterator[str]:
+        try:
+            async for event in events:
+                yield format_event(event, media_type)
+        except HTTPException as exc:
+            yield format_event(
+                StreamEvent(event="error", data={"status": exc.status_code, "detail": exc.detail}), media_type
+            )
+        except Exception:
+            logger.exception("Streamed suggestion failed")
+            yield format_event(
+                StreamEvent(event="error", data={"status": 500, "detail": "Internal Server Error"}), media_type
+            )
+
+    # disable proxy buffering so that events reach the client immediately
+    return StreamingResponse(
+        body(), media_type=media_type, headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+def complete_items(partial: Any, path: Sequence[str]) -> list[Any]:
+    """
+    Return the items of a list in partially parsed JSON output that are already complete.
+
+    All items but the last one are complete, since the model has started producing the next item.
+
+    :param partial: Partially parsed JSON output.
+    :param path: Keys leading to the list, e.g. ("object_class", "rules").
+    :return: Complete items, possibly empty.
+    """
+    value = partial
+    for key in path:
+        if not isinstance(value, dict):
+            return []
+        value = value.get(key)
+    return value[:-1] if isinstance(value, list) else []
+
+
+def complete_fields(partial: Any) -> dict[str, Any]:
+    """
+    Return the fields of a partially parsed JSON object that are already complete (all but the last one).
+    """
+    if not isinstance(partial, dict):
+        return {}
+    return dict(list(partial.items())[:-1])
@@ -0,0 +1,116 @@
+# Copyright (c) 2010-2025 Evolveum and contributors
+#
+# Licensed under the EUPL-1.2 or later.
+
+import copy
+import logging
+from typing import Any, Mapping, Optional, Sequence
+
+import openai
+from pydantic import BaseModel
+
+from ..config import config
+from .metrics import metrics
+
+"""
+Provider-native structured output: output models are sent as a JSON schema `response_format`, so the
+provider constrains the completion to valid JSON and the format instructions can be left out of the prompt.
+
+The schema can be narrowed per request by enums of allowed values (e.g. the attribute names of the request).
+Models (providers) rejecting `response_format` are remembered and served by the text-parsing path.
+"""
+
+logger = logging.getLogger(__name__)
+
+structured_output_calls = metrics.counter(
+    "llm_structured_output_total", "LLM calls by structured output mode.", ["endpoint", "mode"]
+)
+
+# replaces the format instructions of prompts when the schema is sent as response_format
+STRUCTURED_FORMAT_INSTRUCTIONS = "Respond with a single JSON object conforming to the provided response schema."
+
+# names of prompt variables holding the format instructions, see `format_variable`
+FORMAT_VARIABLES = ("format_instructions", "FORMAT")
+
+
+def format_variable(prompt: Any) -> Optional[str]:
+    """
+    Return the name of the prompt's partial variable holding the parser's format instructions, if any.
+    """
+    partials = getattr(prompt, "partial_variables", None) or {}
+    return next((name for name in FORMAT_VARIABLES if name in partials), None)
+
+
+def _restrict(schema: Any, enums: Mapping[str, Sequence[str]]) -> None:
+    if isinstance(schema, list):
+        for item in schema:
+            _restrict(item, enums)
+        return
+    if not isinstance(schema, dict):
+        return
+    for name, prop in (schema.get("properties") or {}).items():
+        values = enums.get(name)
+        if values and isinstance(prop, dict):
+            target = prop.get("items") if prop.get("type") == "array" else prop
+            if isinstance(target, dict) and target.get("type") == "string":
+                target["enum"] = list(dict.fromkeys(values))
+    for value in schema.values():
+        _restrict(value, enums)
+
+
+def response_schema(model: type[BaseModel], enums: Optional[Mapping[str, Sequence[str]]] = None) -> dict[str, Any]:
+    """
+    Build the JSON schema of an output model, restricting string properties (or string array items)
+    named in `enums` to the given values.
+
+    :param model: Pydantic output model.
+    :param enums: Allowed values per property name, e.g. {"MidPoint": ["c:givenName", ...]}.
+    :return: JSON schema.
+    """
+    schema = copy.deepcopy(model.model_json_schema())
+    if enums:
+        _restrict(schema, enums)
+    return schema
+
+
+def response_format(
+    name: str, model: type[BaseModel], enums: Optional[Mapping[str, Sequence[str]]] = None
+) -> dict[str, Any]:
+    """
+    Build the OpenAI-compatible `response_format` parameter for an output model.
+    """
+    return {
+        "type": "json_schema",
+        "json_schema": {"name": name, "schema": response_schema(model, enums), "strict": False},
+    }
+
+
+def is_unsupported_error(exc: BaseException) -> bool:
+    """
+    Whether the provider rejected the request because it does not support structured output.
+    """
+    if not isinstance(exc, (openai.BadRequestError, openai.UnprocessableEntityError)):
+        return False
+    message = str(exc).lower()
+    return any(hint in message for hint in ("response_format", "json_schema", "structured output"))
+
+
+class StructuredOutputSupport:
+    """
+    Tracks which models support structured output; all models are assumed to support it until one fails.
+    """
+
+    def __init__(self, enabled: bool):
+        self.enabled = enabled
+        self._unsupported: set[str] = set()
+
+    def supported(self, model_name: str) -> bool:
+        return self.enabled and model_name not in self._unsupported
+
+    def mark_unsupported(self, model_name: str) -> None:
+        if model_name not in self._unsupported:
+            logger.warning("Model %s does not support structured output, falling back to text parsing", model_name)
+        self._unsupported.add(model_name)
+
+
+structured_output = StructuredOutputSupport(config.llm.structured_output)
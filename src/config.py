@@ -3,7 +3,7 @@
 # Licensed under the EUPL-1.2 or later.
 
 from enum import Enum
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
 from pydantic import BaseModel, Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -52,6 +52,13 @@ class LLMSettings(BaseModel):
     :param model_name: Default model identifier to use.
     :param request_timeout: Timeout for API requests in seconds.
     :param extra_body: Extra body used for provider-specific requests.
+    :param pool_max_connections: Maximum number of connections in the shared HTTP connection pool.
+    :param pool_max_keepalive_connections: Maximum number of idle keep-alive connections kept in the pool.
+    :param pool_keepalive_expiry: Seconds an idle keep-alive connection is kept open.
+    :param http2: Use HTTP/2 for the LLM endpoint when the optional `h2` package is installed.
+    :param prewarm_connections: Number of connections opened to the LLM endpoint at startup (0 disables it).
+    :param structured_output: Send output models as provider-native JSON schema `response_format` instead of
+        format instructions in the prompt; models rejecting it fall back to parsing the text output.
     """
 
     openai_api_key: str = ""
@@ -64,6 +71,12 @@ class LLMSettings(BaseModel):
             "provider": {"order": ["groq", "parasail", "deepinfra"]},
         }
     )
+    pool_max_connections: int = 100
+    pool_max_keepalive_connections: int = 20
+    pool_keepalive_expiry: float = 30.0
+    http2: bool = True
+    prewarm_connections: int = 1
+    structured_output: bool = False
 
 
 class LangfuseSettings(BaseModel):
@@ -84,6 +97,304 @@ class LangfuseSettings(BaseModel):
     environment: str = "dev-whoami"
 
 
+class CacheSettings(BaseModel):
+    """
+    Configuration for the LLM result cache.
+
+    :param enabled: Enable/disable the cache globally.
+    :param endpoints: Names of the endpoints (chains) opting in to caching.
+    :param ttl_seconds: Time to live of a cached entry in seconds.
+    :param max_entries: Maximum number of cached entries.
+    :param max_bytes: Maximum total size of cached entries (serialized JSON) in bytes.
+    :param disk_enabled: Enable the persistent SQLite tier shared by all workers on the node.
+    :param disk_path: Path of the SQLite database file of the persistent tier.
+    :param disk_max_entries: Maximum number of entries kept in the persistent tier.
+    :param compaction_interval: Seconds between background compactions of the persistent tier.
+    :param warmup_entries: Number of most used entries preloaded from the persistent tier at startup.
+    """
+
+    enabled: bool = True
+    endpoints: List[str] = Field(default_factory=lambda: ["matching", "focus_type", "object_type"])
+    ttl_seconds: int = 3600
+    max_entries: int = 1024
+    max_bytes: int = 64 * 1024 * 1024
+    disk_enabled: bool = True
+    disk_path: str = ".cache/llm-results.sqlite3"
+    disk_max_entries: int = 100_000
+    compaction_interval: int = 300
+    warmup_entries: int = 256
+
+
+class ConcurrencySettings(BaseModel):
+    """
+    Configuration of the adaptive (AIMD) concurrency limit of upstream LLM calls.
+
+    :param enabled: Enable/disable the limiter; when disabled, calls are never queued.
+    :param initial_limit: Number of concurrent LLM calls allowed at startup.
+    :param min_limit: Lower bound of the limit.
+    :param max_limit: Upper bound of the limit.
+    :param increase: Additive increase of the limit after a healthy call at full utilization.
+    :param decrease_factor: Multiplicative factor applied to the limit on a 429 or timeout.
+    :param latency_threshold: Call latency in seconds up to which a call is considered healthy.
+    """
+
+    enabled: bool = True
+    initial_limit: int = 8
+    min_limit: int = 1
+    max_limit: int = 64
+    increase: float = 1.0
+    decrease_factor: float = 0.5
+    latency_threshold: float = 30.0
+
+
+class ModelRateLimit(BaseModel):
+    """
+    Rate limits of one provider model; 0 disables the respective limit.
+
+    :param requests_per_minute: Maximum number of requests per minute.
+    :param tokens_per_minute: Maximum number of prompt tokens per minute.
+    """
+
+    requests_per_minute: int = 0
+    tokens_per_minute: int = 0
+
+
+class RateLimitSettings(BaseModel):
+    """
+    Configuration of client-side rate limiting of LLM calls.
+
+    :param enabled: Enable/disable rate limiting.
+    :param default: Limits of models without an explicit entry in `models`.
+    :param models: Limits per model identifier, e.g. {"openai/gpt-oss-20b": {"tokens_per_minute": 200000}}.
+    :param max_retries: Number of times a rate-limited call is delayed and retried before the error is raised.
+    :param default_retry_after: Delay in seconds before a retry when the provider does not send `Retry-After`.
+    :param max_delay: Upper bound of a single delay in seconds.
+    """
+
+    enabled: bool = True
+    default: ModelRateLimit = ModelRateLimit()
+    models: Dict[str, ModelRateLimit] = Field(default_factory=dict)
+    max_retries: int = 3
+    default_retry_after: float = 5.0
+    max_delay: float = 60.0
+
+
+class HedgingSettings(BaseModel):
+    """
+    Configuration of hedged LLM requests.
+
+    When the response of an upstream call does not arrive within the hedge delay, a duplicate request is sent
+    to the next provider in `extra_body.provider.order` (or to `alternate_model`) and the first valid result wins.
+
+    :param enabled: Enable/disable hedging globally.
+    :param endpoints: Endpoints (chains) opting in to hedging with their budget, i.e. the maximum fraction
+        of calls that may be hedged, e.g. {"mapping": 0.1}.
+    :param percentile: Latency percentile of recent calls used as the hedge delay.
+    :param initial_delay: Hedge delay in seconds used until `min_samples` latencies are recorded.
+    :param min_delay: Lower bound of the hedge delay in seconds.
+    :param max_delay: Upper bound of the hedge delay in seconds.
+    :param min_samples: Number of recorded latencies required to use the percentile.
+    :param window: Number of recent latencies per endpoint the percentile is computed from.
+    :param alternate_model: Model receiving the duplicate request instead of the next provider.
+    """
+
+    enabled: bool = False
+    endpoints: Dict[str, float] = Field(default_factory=lambda: {"mapping": 0.1})
+    percentile: float = 0.95
+    initial_delay: float = 20.0
+    min_delay: float = 2.0
+    max_delay: float = 60.0
+    min_samples: int = 20
+    window: int = 200
+    alternate_model: Optional[str] = None
+
+
+class PromptBudgetSettings(BaseModel):
+    """
+    Configuration of prompt token estimation and compaction.
+
+    Prompts exceeding the token budget of their endpoint are compacted step by step: empty descriptions
+    are dropped, long descriptions truncated, value count lists trimmed and duplicate patterns collapsed,
+    until the prompt fits the budget.
+
+    :param enabled: Enable/disable prompt compaction.
+    :param chars_per_token: Average number of prompt characters per token used to estimate prompt tokens.
+    :param default_budget: Token budget of endpoints without an explicit entry in `endpoints` (0 = unlimited).
+    :param endpoints: Token budget per endpoint (chain), e.g. {"matching": 24000}.
+    :param description_max_chars: Length descriptions are truncated to.
+    :param max_values: Number of most frequent entries kept in value count lists.
+    :param cache_size: Number of text fragments whose token counts are cached.
+    """
+
+    enabled: bool = True
+    chars_per_token: float = 4.0
+    default_budget: int = 0
+    endpoints: Dict[str, int] = Field(
+        default_factory=lambda: {
+            "matching": 24000,
+            "object_type": 24000,
+            "complex_pairing": 24000,
+            "extension_att": 24000,
+        }
+    )
+    description_max_chars: int = 200
+    max_values: int = 10
+    cache_size: int = 4096
+
+
+class PromptFormat(str, Enum):
+    """
+    Serialization format of prompt payloads.
+
+    :cvar pretty: Indented JSON.
+    :cvar compact: JSON without insignificant whitespace.
+    :cvar tabular: Compact JSON with homogeneous lists of objects encoded as a header and rows.
+    """
+
+    pretty = "pretty"
+    compact = "compact"
+    tabular = "tabular"
+
+
+class SerializationSettings(BaseModel):
+    """
+    Configuration of prompt payload serialization.
+
+    :param default: Format of modules without an explicit entry in `modules`.
+    :param modules: Format per module, e.g. {"object_type": "tabular", "complex_pairing": "compact"}.
+    """
+
+    default: PromptFormat = PromptFormat.pretty
+    modules: Dict[str, PromptFormat] = Field(default_factory=dict)
+
+
+class MatchingSettings(BaseModel):
+    """
+    Configuration of sharded schema matching.
+
+    Resource schemas whose serialized attributes exceed `shard_tokens` are split into chunks of at most
+    that many estimated tokens, matched by concurrent LLM calls and merged in schema order.
+
+    :param sharding_enabled: Enable/disable sharded matching of large schemas.
+    :param shard_tokens: Maximum estimated tokens of the attributes of one shard.
+    :param shard_midpoint: Shard the midPoint schema as well; every midPoint shard is matched with every
+        resource shard.
+    :param max_concurrency: Maximum number of shards of one request matched concurrently.
+    """
+
+    sharding_enabled: bool = False
+    shard_tokens: int = 6000
+    shard_midpoint: bool = False
+    max_concurrency: int = 4
+
+
+class MappingSettings(BaseModel):
+    """
+    Configuration of mapping script suggestions.
+
+    :param local_synthesis: Synthesize trivial transformation scripts (case conversion, substring, split,
+        date reformat, ...) locally from the examples instead of calling the LLM. Requests correcting a
+        previous script (with `errorLog` or `previousScript`) always go to the LLM.
+    :param verify_scripts: Run suggested scripts against the examples with the in-process Groovy interpreter;
+        scripts failing them are corrected by the self-correction loop (see `CorrectionSettings`).
+    :param verify_timeout: Seconds the verification of one script may take; slower scripts are left
+        unverified.
+    """
+
+    local_synthesis: bool = True
+    verify_scripts: bool = True
+    verify_timeout: float = 2.0
+
+
+class ObjectTypeSettings(BaseModel):
+    """
+    Configuration of object type suggestions.
+
+    :param evaluate_rules: Estimate the objects matched by the suggested delineation rules, their overlaps
+        and the uncovered remainder from the request statistics, and attach the estimates to the response.
+    :param overlap_threshold: Fraction of objects two rules must certainly share before the suggestion is
+        corrected as not mutually exclusive.
+    """
+
+    evaluate_rules: bool = True
+    overlap_threshold: float = 0.01
+
+
+class ComplexPairingSettings(BaseModel):
+    """
+    Configuration of complex record pairing.
+
+    :param prematching: Pair records with clearly matching normalized values locally and send only the
+        remaining ambiguous records to the LLM.
+    :param min_score: Minimum score (0.0-1.0) of a one-to-one record assignment accepted without the LLM;
+        1.0 accepts only records with equal normalized values and compatible categories.
+    :param max_block_size: Maximum number of records per side of a block of the blocking index; only records
+        sharing a block are compared, larger blocks (e.g. a domain shared by all emails) are not used.
+    :param sharding_enabled: Split the pairs left for the LLM into shards of at most `shard_tokens` estimated
+        tokens judged by concurrent LLM calls; the verdict is then decided by the strict-majority rule.
+    :param shard_tokens: Maximum estimated tokens of the pairs of one shard.
+    :param max_concurrency: Maximum number of shards of one request judged concurrently.
+    :param early_stopping: Judge the samples in batches and stop as soon as the strict-majority verdict is
+        decided; the response then reports the number of evaluated samples.
+    :param batch_size: Number of samples judged by the LLM per batch with early stopping.
+    :param evaluation_order: Order the samples are judged in with early stopping: 'request' or 'random'.
+    :param stopping_confidence: Confidence (0.0-1.0) with which the verdict may be decided from the samples
+        judged so far; 1.0 stops only when the remaining samples cannot change the verdict.
+    """
+
+    prematching: bool = True
+    min_score: float = 1.0
+    max_block_size: int = 50
+    sharding_enabled: bool = True
+    shard_tokens: int = 4000
+    max_concurrency: int = 4
+    early_stopping: bool = False
+    batch_size: int = 10
+    evaluation_order: str = "random"
+    stopping_confidence: float = 1.0
+
+
+class CorrectionSettings(BaseModel):
+    """
+    Configuration of the server-side self-correction loop of mapping and object type suggestions.
+
+    A suggestion failing local validation is regenerated with a compact error context (the same context
+    the client would send as `errorLog`/`previousScript` or `validationErrorFeedback`) until it passes,
+    without a round trip to the client.
+
+    :param enabled: Enable/disable the loop (disabled by default); when disabled, suggestions are returned as
+        generated and the client drives the correction.
+    :param max_attempts: Maximum number of generations per suggestion, including the first one.
+    :param deadline: Seconds since the suggestion started after which no further attempt is made;
+        a running attempt is cancelled when the deadline passes and the last result is returned.
+    :param max_errors: Maximum number of validation errors included in the error context of an attempt.
+    """
+
+    enabled: bool = False
+    max_attempts: int = 2
+    deadline: float = 60.0
+    max_errors: int = 5
+
+
+class JobSettings(BaseModel):
+    """
+    Configuration of asynchronous suggestion jobs.
+
+    Jobs are kept in the memory of the worker process that accepted them and are lost on restart; with
+    `APP__WORKERS` > 1 or several replicas behind a load balancer, job polling requires sticky routing.
+
+    :param max_concurrency: Maximum number of jobs running at the same time; further jobs wait in the queue.
+    :param max_pending: Maximum number of unfinished (queued or running) jobs; new jobs are rejected beyond it.
+    :param result_ttl: Seconds finished jobs and their results are kept for polling.
+    :param max_results: Maximum number of finished jobs kept; the oldest are evicted first.
+    """
+
+    max_concurrency: int = 8
+    max_pending: int = 100
+    result_ttl: float = 900.0
+    max_results: int = 1000
+
+
 class AppSettings(BaseModel):
     """
     Core application settings for the API service.
@@ -143,6 +454,18 @@ class Settings(BaseSettings):
     logging: LoggingSettings = LoggingSettings()
     llm: LLMSettings = LLMSettings()
     langfuse: LangfuseSettings = LangfuseSettings()
+    cache: CacheSettings = CacheSettings()
+    concurrency: ConcurrencySettings = ConcurrencySettings()
+    rate_limit: RateLimitSettings = RateLimitSettings()
+    hedging: HedgingSettings = HedgingSettings()
+    prompt_budget: PromptBudgetSettings = PromptBudgetSettings()
+    serialization: SerializationSettings = SerializationSettings()
+    matching: MatchingSettings = MatchingSettings()
+    mapping: MappingSettings = MappingSettings()
+    object_type: ObjectTypeSettings = ObjectTypeSettings()
+    complex_pairing: ComplexPairingSettings = ComplexPairingSettings()
+    correction: CorrectionSettings = CorrectionSettings()
+    jobs: JobSettings = JobSettings()
 
 
 config = Settings()
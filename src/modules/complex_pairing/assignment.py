@@ -0,0 +1,66 @@
+# Copyright (c) 2010-2025 Evolveum and contributors
+#
+# Licensed under the EUPL-1.2 or later.
+
+from typing import List, Sequence, Tuple
+
+"""
+Optimal one-to-one assignment of records by the Hungarian algorithm.
+
+Pure Python on purpose: the score matrices of complex pairing samples are small (a few records per side),
+where the O(n²·m) potentials formulation runs in microseconds without a numeric dependency.
+"""
+
+
+def linear_assignment(scores: Sequence[Sequence[float]]) -> List[Tuple[int, int]]:
+    """
+    Find the one-to-one assignment of rows to columns with the maximum total score.
+
+    Rectangular matrices are supported; every row (or column, whichever side is smaller) is assigned.
+
+    :param scores: Score matrix, ``scores[i][j]`` being the score of assigning row i to column j.
+    :return: Assigned (row, column) pairs ordered by row.
+    """
+    if not scores or not scores[0]:
+        return []
+    transposed = len(scores) > len(scores[0])
+    matrix = [list(column) for column in zip(*scores)] if transposed else [list(row) for row in scores]
+    rows, columns = len(matrix), len(matrix[0])
+
+    # potentials of rows (u) and columns (v); column 0 is a virtual one the augmenting paths start from
+    u = [0.0] * (rows + 1)
+    v = [0.0] * (columns + 1)
+    owner = [0] * (columns + 1)
+    way = [0] * (columns + 1)
+    for row in range(1, rows + 1):
+        owner[0] = row
+        current = 0
+        slack = [float("inf")] * (columns + 1)
+        used = [False] * (columns + 1)
+        while True:
+            used[current] = True
+            assigned, delta, following = owner[current], float("inf"), 0
+            for column in range(1, columns + 1):
+                if used[column]:
+                    continue
+                reduced = -matrix[assigned - 1][column - 1] - u[assigned] - v[column]
+                if reduced < slack[column]:
+                    slack[column], way[column] = reduced, current
+                if slack[column] < delta:
+                    delta, following = slack[column], column
+            for column in range(columns + 1):
+                if used[column]:
+                    u[owner[column]] += delta
+                    v[column] -= delta
+                else:
+                    slack[column] -= delta
+            current = following
+            if owner[current] == 0:
+                break
+        while current:
+            previous = way[current]
+            owner[current] = owner[previous]
+            current = previous
+
+    pairs = [(owner[column] - 1, column - 1) for column in range(1, columns + 1) if owner[column]]
+    return sorted((column, row) for row, column in pairs) if transposed else sorted(pairs)
@@ -0,0 +1,103 @@
+# Copyright (c) 2010-2025 Evolveum and contributors
+#
+# Licensed under the EUPL-1.2 or later.
+
+from typing import Dict, Iterable, List, Sequence, Set, Tuple
+
+from .normalization import RecordKey
+
+"""
+Blocking index of complex pairing records.
+
+Records are put into blocks by normalized keys (email domain and local-part prefix, digit-only phone suffix,
+URL host, text tokens, category bucket and the normalized values themselves), and only records sharing a
+block are compared. Every pair of records with a positive score shares a block, so blocking only loses
+candidates of blocks purged for being too large; the exact-value and full local-part blocks keep the
+records scored by equal values together unless the values repeat in more than `max_block_size` records.
+"""
+
+LOCAL_PREFIX = 4
+PHONE_DIGITS = 4
+MAX_BLOCK_SIZE = 50
+
+Edge = Tuple[int, int]
+
+
+def blocking_keys(key: RecordKey) -> Set[Tuple[str, str]]:
+    """
+    Blocks of a record.
+
+    :param key: Normalized content of the record.
+    :return: Block kinds and values.
+    """
+    blocks = {("category", category) for category in key.categories}
+    for kind, value in key.values:
+        blocks.add((kind, value))
+        if kind == "email":
+            local, _, domain = value.rpartition("@")
+            blocks |= {("local", local), ("prefix", local[:LOCAL_PREFIX]), ("domain", domain)}
+        elif kind == "phone":
+            blocks.add(("phone", value[-PHONE_DIGITS:]))
+        elif kind == "url":
+            blocks.add(("host", value.split("/", 1)[0]))
+        elif kind == "text":
+            # every token scored by `value_similarity`, frequent short ones end up in purged blocks
+            blocks |= {("token", token) for token in value.split()}
+    return blocks
+
+
+class BlockingIndex:
+    """
+    Blocks of the midPoint and application records of one sample.
+
+    :param midpoints: Normalized midPoint records.
+    :param applications: Normalized application records.
+    :param max_block_size: Blocks with more records on either side are purged; comparing all their records
+        would be quadratic, and more selective blocks usually pair them anyway.
+    """
+
+    def __init__(
+        self, midpoints: Sequence[RecordKey], applications: Sequence[RecordKey], max_block_size: int = MAX_BLOCK_SIZE
+    ):
+        self.max_block_size = max_block_size
+        self.blocks: Dict[Tuple[str, str], Tuple[List[int], List[int]]] = {}
+        for side, keys in enumerate((midpoints, applications)):
+            for index, key in enumerate(keys):
+                for block in blocking_keys(key):
+                    self.blocks.setdefault(block, ([], []))[side].append(index)
+
+    def candidates(self) -> Set[Edge]:
+        """
+        Pairs of midPoint and application records sharing a block that is not purged.
+        """
+        edges: Set[Edge] = set()
+        for midpoints, applications in self.blocks.values():
+            if len(midpoints) > self.max_block_size or len(applications) > self.max_block_size:
+                continue
+            edges.update((i, j) for i in midpoints for j in applications)
+        return edges
+
+
+def components(edges: Iterable[Edge]) -> List[Tuple[List[int], List[int]]]:
+    """
+    Split a bipartite graph into connected components.
+
+    :param edges: Edges between midPoint (first) and application (second) record indexes.
+    :return: Midpoint and application indexes of every component, ordered by their first midPoint record.
+    """
+    parent: Dict[Tuple[int, int], Tuple[int, int]] = {}
+
+    def find(node: Tuple[int, int]) -> Tuple[int, int]:
+        parent.setdefault(node, node)
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    for i, j in edges:
+        parent[find((0, i))] = find((1, j))
+
+    grouped: Dict[Tuple[int, int], Tuple[List[int], List[int]]] = {}
+    for node in sorted(parent):
+        grouped.setdefault(find(node), ([], []))[node[0]].append(node[1])
+    return sorted(grouped.values())
@@ -0,0 +1,86 @@
+# Copyright (c) 2010-2025 Evolveum and contributors
+#
+# Licensed under the EUPL-1.2 or later.
+
+import math
+import random
+from typing import List, Optional, Sequence
+
+from .prematching import PairResolution, sample_matching
+from .schema import Pair
+
+"""
+Sequential early stopping of the complex pairing majority verdict.
+
+`similar` is a strict majority of the considered samples matching, so it is fixed as soon as enough samples
+are known to match (or not to match) regardless of the rest. Samples are judged in batches and the judging
+stops once the majority is decided exactly or, optionally, with a given confidence estimated from the
+samples judged so far.
+"""
+
+ORDERS = ("request", "random")
+
+
+def sample_status(pair: Pair, resolution: PairResolution) -> Optional[bool]:
+    """
+    Match of a sample known from its pre-matching alone.
+
+    :param pair: Sample of the request.
+    :param resolution: Pre-matching outcome of the sample.
+    :return: True or False when the residual records cannot change the outcome, None when they can.
+    """
+    if sample_matching(pair, resolution.mappings):
+        return True
+    # the residual records can add at most `capacity` one-to-one mappings
+    capacity = sum(min(len(group.midPoint), len(group.application)) for group in resolution.groups)
+    return None if 2 * (len(resolution.mappings) + capacity) > min(len(pair.midPoint), len(pair.application)) else False
+
+
+def evaluation_order(count: int, order: str, seed: int = 0) -> List[int]:
+    """
+    Order in which samples are judged.
+
+    :param count: Number of samples.
+    :param order: 'request' keeps the request order; 'random' shuffles the samples (seeded, so the result is
+        reproducible), which makes the judged samples a fair sample of the rest for confidence-based stopping.
+    :param seed: Seed of the random order.
+    :return: Sample indexes.
+    """
+    if order not in ORDERS:
+        raise ValueError(f"Unknown evaluation order '{order}', expected one of {', '.join(ORDERS)}")
+    indexes = list(range(count))
+    if order == "random":
+        random.Random(seed).shuffle(indexes)
+    return indexes
+
+
+def majority_decision(
+    statuses: Sequence[Optional[bool]], judged: Sequence[bool] = (), confidence: float = 1.0
+) -> Optional[bool]:
+    """
+    Decide the strict-majority verdict if the unknown samples can no longer change it.
+
+    With `confidence` below 1.0 the verdict is also decided when the samples judged so far make the opposite
+    outcome less likely than ``1 - confidence``; the probability is bounded by Hoeffding's inequality, treating
+    the judged samples as a random sample of the unknown ones.
+
+    :param statuses: Match of every considered sample, None when not known yet.
+    :param judged: Matches of the samples judged by the LLM so far.
+    :param confidence: Required confidence of a verdict decided before all samples are known.
+    :return: The verdict, or None when it is not decided yet.
+    """
+    matching = sum(status is True for status in statuses)
+    unknown = sum(status is None for status in statuses)
+    if 2 * matching > len(statuses):
+        return True
+    if 2 * (matching + unknown) <= len(statuses):
+        return False
+    if confidence >= 1.0 or not judged:
+        return None
+
+    # fraction of the unknown samples that must match for the verdict to be similar
+    needed = (len(statuses) // 2 + 1 - matching) / unknown
+    observed = sum(judged) / len(judged)
+    if math.exp(-2 * len(judged) * (needed - observed) ** 2) > 1.0 - confidence:
+        return None
+    return observed > needed
@@ -0,0 +1,129 @@
+# Copyright (c) 2010-2025 Evolveum and contributors
+#
+# Licensed under the EUPL-1.2 or later.
+
+import re
+import unicodedata
+from dataclasses import dataclass
+from typing import FrozenSet, Set, Tuple
+
+from .schema import Record
+
+"""
+Normalization of complex pairing records.
+
+Implements the normalization rules of the complex pairing prompt: case and diacritics folding, Gmail dot and
+plus-tag normalization, value kinds (emails, phones, URLs and other text) and category synonyms.
+"""
+
+EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+URL_RE = re.compile(r"^(?:[a-z][a-z0-9+.-]*://|www\.)")
+PHONE_RE = re.compile(r"^\+?[\d\s().\-/]+$")
+
+GMAIL_DOMAINS = ("gmail.com", "googlemail.com")
+PHONE_MIN_DIGITS = 6
+PHONE_SUFFIX = 9
+"""Phones compare by their last digits, so national and international formats of a number match."""
+
+CATEGORY_ATTRIBUTES = ("type", "category", "kind", "label", "usage", "purpose")
+CATEGORY_SYNONYMS = {
+    "home": "personal",
+    "personal": "personal",
+    "private": "personal",
+    "work": "work",
+    "business": "work",
+    "company": "work",
+    "office": "work",
+    "job": "work",
+    "mobile": "mobile",
+    "cell": "mobile",
+}
+
+
+def fold(text: str) -> str:
+    """
+    Fold case and diacritics and normalize whitespace.
+    """
+    decomposed = unicodedata.normalize("NFKD", text)
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(stripped.casefold().split())
+
+
+def attribute_name(path: str) -> str:
+    """
+    Local name of the last segment of an attribute path, e.g. 'type' for 'c:email[*]/type'.
+    """
+    segment = path.rsplit("/", 1)[-1].split("[", 1)[0]
+    return segment.rsplit(":", 1)[-1].casefold()
+
+
+def normalize_email(folded: str) -> str:
+    local, _, domain = folded.rpartition("@")
+    local = local.split("+", 1)[0]
+    if domain in GMAIL_DOMAINS:
+        local, domain = local.replace(".", ""), GMAIL_DOMAINS[0]
+    return f"{local}@{domain}"
+
+
+def normalize_url(folded: str) -> str:
+    url = re.sub(r"^[a-z][a-z0-9+.-]*://", "", folded)
+    return url.removeprefix("www.").rstrip("/")
+
+
+def classify(value: str) -> Tuple[str, str]:
+    """
+    Determine the kind of a value and its normalized form used for matching.
+
+    :param value: Raw attribute value.
+    :return: Kind (email, phone, url or text) and the normalized value.
+    """
+    folded = fold(value)
+    if EMAIL_RE.match(folded):
+        return "email", normalize_email(folded)
+    if URL_RE.match(folded):
+        return "url", normalize_url(folded)
+    digits = re.sub(r"\D", "", folded)
+    if PHONE_RE.match(folded) and len(digits) >= PHONE_MIN_DIGITS:
+        return "phone", digits[-PHONE_SUFFIX:]
+    return "text", folded
+
+
+def category(value: str) -> str:
+    folded = fold(value)
+    return CATEGORY_SYNONYMS.get(folded, folded)
+
+
+@dataclass(frozen=True)
+class RecordKey:
+    """
+    Normalized content of a record.
+
+    :param identifier: Side-local identifier of the record.
+    :param values: Kinds and normalized values of the record.
+    :param categories: Canonical categories of the record (e.g. 'work' for 'business').
+    """
+
+    identifier: str
+    values: FrozenSet[Tuple[str, str]]
+    categories: FrozenSet[str]
+
+    def of_kind(self, kind: str) -> Set[str]:
+        return {value for value_kind, value in self.values if value_kind == kind}
+
+    @property
+    def kinds(self) -> Set[str]:
+        return {kind for kind, _ in self.values}
+
+
+def record_key(record: Record) -> RecordKey:
+    values, categories = set(), set()
+    for item in record.content:
+        is_category = attribute_name(item.attribute) in CATEGORY_ATTRIBUTES
+        for value in item.value:
+            if not value.strip():
+                continue
+            if is_category:
+                categories.add(category(value))
+            else:
+                values.add(classify(value))
+    return RecordKey(record.identifier, frozenset(values), frozenset(categories))
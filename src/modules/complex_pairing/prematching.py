@@ -0,0 +1,277 @@
+# Copyright (c) 2010-2025 Evolveum and contributors
+#
+# Licensed under the EUPL-1.2 or later.
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from .assignment import linear_assignment
+from .blocking import MAX_BLOCK_SIZE, BlockingIndex, Edge, components
+from .normalization import RecordKey, record_key
+from .schema import IdMapping, Pair
+
+"""
+Deterministic pre-matching of complex pairing samples.
+
+Applies the matching rules of the complex pairing prompt locally to the normalized records (see
+`normalization`): values match only values of the same kind and categories match by their synonyms. Records
+sharing a block (see `blocking`) are scored against each other and paired by the optimal one-to-one assignment;
+confident assignments are made without the LLM. The prompt counts every same-kind value-edge as a match
+candidate, so the remaining records with a same-kind record on the other side, even a differing one, are left
+for the model to judge; only records without any are not matched.
+"""
+
+SAME_LOCAL_PART = 0.6
+SAME_HOST = 0.5
+CATEGORY_CONFLICT = 0.5
+MAX_ASSIGNMENT_SIZE = 50
+
+
+def value_similarity(kind: str, left: str, right: str) -> float:
+    """
+    Similarity of two normalized values of the same kind, 1.0 for equal values.
+    """
+    if left == right:
+        return 1.0
+    if kind == "email":
+        return SAME_LOCAL_PART if left.rpartition("@")[0] == right.rpartition("@")[0] else 0.0
+    if kind == "url":
+        return SAME_HOST if left.split("/", 1)[0] == right.split("/", 1)[0] else 0.0
+    if kind == "text":
+        tokens, other = set(left.split()), set(right.split())
+        return len(tokens & other) / len(tokens | other)
+    return 0.0
+
+
+def score(midpoint: RecordKey, application: RecordKey) -> float:
+    """
+    Score how well two records correspond, from 0.0 (no match) to 1.0 (equal normalized values).
+
+    Every kind of value both records have contributes the similarity of its best matching values; values of
+    different kinds never match. Conflicting categories lower the score, missing ones do not.
+    """
+    shared = midpoint.kinds & application.kinds
+    if not shared:
+        return 0.0
+    total = sum(
+        max(
+            value_similarity(kind, left, right)
+            for left in midpoint.of_kind(kind)
+            for right in application.of_kind(kind)
+        )
+        for kind in shared
+    ) / len(shared)
+    if midpoint.categories and application.categories and not midpoint.categories & application.categories:
+        total *= CATEGORY_CONFLICT
+    return total
+
+
+@dataclass
+class PairResolution:
+    """
+    Outcome of pre-matching one sample.
+
+    :param mappings: Record pairs resolved locally.
+    :param residual: Unpaired records with a value of the same kind as some unpaired record on the other side,
+        if any; only these need the LLM.
+    :param groups: Residual records split into groups of mutual candidates (connected by shared value kinds);
+        records of different groups are never paired, so the groups are judged as separate pairs.
+    """
+
+    mappings: List[IdMapping] = field(default_factory=list)
+    residual: Optional[Pair] = None
+    groups: List[Pair] = field(default_factory=list)
+
+
+def assign(scores: Dict[Edge, float], min_score: float) -> List[Edge]:
+    """
+    Assign records one-to-one within every connected component of the scored edges.
+
+    Components up to `MAX_ASSIGNMENT_SIZE` records per side are assigned optimally, larger ones greedily by
+    descending score.
+
+    :param scores: Positive scores of the candidate record pairs.
+    :param min_score: Minimum score of an accepted assignment.
+    :return: Accepted (midPoint, application) index pairs.
+    """
+    accepted = []
+    for midpoints, applications in components(scores):
+        if len(midpoints) <= MAX_ASSIGNMENT_SIZE and len(applications) <= MAX_ASSIGNMENT_SIZE:
+            matrix = [[scores.get((i, j), 0.0) for j in applications] for i in midpoints]
+            edges = [(midpoints[i], applications[j]) for i, j in linear_assignment(matrix)]
+        else:
+            used: Set[Tuple[int, int]] = set()
+            edges = []
+            members = set(midpoints)
+            edge_scores = [(edge, scores[edge]) for edge in scores if edge[0] in members]
+            for (i, j), _ in sorted(edge_scores, key=lambda item: (-item[1], item[0])):
+                if (0, i) not in used and (1, j) not in used:
+                    edges.append((i, j))
+                    used |= {(0, i), (1, j)}
+        accepted += [edge for edge in edges if scores.get(edge, 0.0) >= min_score]
+    return sorted(accepted)
+
+
+def kind_edges(midpoints: Sequence[Tuple[int, RecordKey]], applications: Sequence[Tuple[int, RecordKey]]) -> List[Edge]:
+    """
+    Edges connecting the records sharing a value kind, enough to find their connected components.
+
+    Every record is connected to the first record of each of its kinds on the other side instead of to all
+    of them, which keeps the edges linear in the number of records.
+
+    :param midpoints: Indexes and normalized content of the midPoint records.
+    :param applications: Indexes and normalized content of the application records.
+    :return: (midPoint, application) index pairs of records with a value of the same kind.
+    """
+    first_midpoint: Dict[str, int] = {}
+    first_application: Dict[str, int] = {}
+    for index, key in midpoints:
+        for kind in key.kinds:
+            first_midpoint.setdefault(kind, index)
+    for index, key in applications:
+        for kind in key.kinds:
+            first_application.setdefault(kind, index)
+
+    edges: Set[Edge] = set()
+    for index, key in midpoints:
+        edges.update((index, first_application[kind]) for kind in key.kinds if kind in first_application)
+    for index, key in applications:
+        edges.update((first_midpoint[kind], index) for kind in key.kinds if kind in first_midpoint)
+    return sorted(edges)
+
+
+def resolve_pair(pair: Pair, min_score: float = 1.0, max_block_size: int = MAX_BLOCK_SIZE) -> PairResolution:
+    """
+    Pair the records of one sample by the optimal one-to-one assignment of their scores.
+
+    Only records sharing a block of the blocking index are scored. Assigned records scoring at least
+    `min_score` are paired locally. The remaining records sharing a value kind with some remaining record on
+    the other side are left for the LLM to judge, whatever their score: differing values of the same kind
+    (e.g. another email local part) score 0.0 locally, yet are value-edges the prompt accepts. Records
+    without a same-kind counterpart are not matched.
+
+    :param pair: Sample to pre-match.
+    :param min_score: Minimum score of a locally accepted assignment.
+    :param max_block_size: Maximum number of records per side of a block, see `BlockingIndex`.
+    :return: Local mappings and the residual sample.
+    """
+    midpoints = [record_key(record) for record in pair.midPoint]
+    applications = [record_key(record) for record in pair.application]
+    scores = {}
+    for i, j in BlockingIndex(midpoints, applications, max_block_size).candidates():
+        value = score(midpoints[i], applications[j])
+        if value > 0.0:
+            scores[i, j] = value
+    accepted = assign(scores, min_score)
+    resolution = PairResolution(
+        mappings=[
+            IdMapping(midPointIdentifier=midpoints[i].identifier, applicationIdentifier=applications[j].identifier)
+            for i, j in accepted
+        ]
+    )
+
+    paired_midpoints, paired_applications = {i for i, _ in accepted}, {j for _, j in accepted}
+    edges = kind_edges(
+        [(i, midpoints[i]) for i in range(len(midpoints)) if i not in paired_midpoints],
+        [(j, applications[j]) for j in range(len(applications)) if j not in paired_applications],
+    )
+    if edges:
+        resolution.groups = [
+            Pair(
+                midPoint=[pair.midPoint[i] for i in group_midpoints],
+                application=[pair.application[j] for j in group_applications],
+            )
+            for group_midpoints, group_applications in components(edges)
+        ]
+        resolution.residual = Pair(
+            midPoint=[record for group in resolution.groups for record in group.midPoint],
+            application=[record for group in resolution.groups for record in group.application],
+        )
+    return resolution
+
+
+def assign_mappings(pairs: Sequence[Pair], mappings: Sequence[IdMapping]) -> List[List[IdMapping]]:
+    """
+    Attribute identifier mappings to the samples containing both records, keeping them one-to-one.
+
+    Mappings referring to records of no sample, or to records already mapped in the sample, are dropped.
+
+    :param pairs: Samples the mappings were produced for.
+    :param mappings: Mappings in the order they were produced.
+    :return: Mappings of every sample.
+    """
+    assigned: List[List[IdMapping]] = [[] for _ in pairs]
+    used: List[Set[Tuple[str, str]]] = [set() for _ in pairs]
+    for mapping in mappings:
+        for index, pair in enumerate(pairs):
+            midpoint = ("midPoint", mapping.midPointIdentifier)
+            application = ("application", mapping.applicationIdentifier)
+            if midpoint in used[index] or application in used[index]:
+                continue
+            if any(r.identifier == mapping.midPointIdentifier for r in pair.midPoint) and any(
+                r.identifier == mapping.applicationIdentifier for r in pair.application
+            ):
+                assigned[index].append(mapping)
+                used[index] |= {midpoint, application}
+                break
+    return assigned
+
+
+def sample_matching(pair: Pair, mappings: Sequence[IdMapping]) -> bool:
+    """
+    A sample matches when a majority of its evaluated value-edges score at least 1 (same kind or better).
+
+    The one-to-one value-edges of a sample are at most as many as the records of its smaller side, and its
+    mappings are exactly the edges scoring at least 1: the local ones have equal values and the LLM maps the
+    same-kind residual records it accepts.
+    """
+    return 2 * len(mappings) > min(len(pair.midPoint), len(pair.application))
+
+
+@dataclass
+class PairingVerdict:
+    """
+    Verdict over all samples of a request.
+
+    :param similar: Whether a strict majority of the considered samples match.
+    :param rationale: Short explanation of the verdict.
+    :param mappings: Mappings of all samples.
+    """
+
+    similar: bool
+    rationale: str
+    mappings: List[IdMapping]
+
+
+def merge_verdict(
+    pairs: Sequence[Pair],
+    resolutions: Sequence[PairResolution],
+    llm_mappings: Sequence[Sequence[IdMapping]] = (),
+    llm_rationales: Sequence[str] = (),
+) -> PairingVerdict:
+    """
+    Merge local and LLM mappings and decide the verdict by the strict-majority rule.
+
+    :param pairs: Samples of the request.
+    :param resolutions: Pre-matching outcome of every sample.
+    :param llm_mappings: Mappings the LLM produced for every residual sample, in the order of the samples
+        (see `assign_mappings`); missing for residual samples the LLM did not judge.
+    :param llm_rationales: Rationales of the LLM calls, in the order they were made.
+    :return: Verdict over all samples.
+    """
+    residual = [index for index, resolution in enumerate(resolutions) if resolution.residual is not None]
+    by_pair = [list(resolution.mappings) for resolution in resolutions]
+    for index, mappings in zip(residual, llm_mappings):
+        by_pair[index] += mappings
+
+    considered = [index for index, pair in enumerate(pairs) if pair.midPoint and pair.application]
+    matching = sum(sample_matching(pairs[index], by_pair[index]) for index in considered)
+    local = sum(len(resolution.mappings) for resolution in resolutions)
+    summary = f"{matching} of {len(considered)} samples match"
+    if local:
+        summary += f"; {local} record pairs were matched by normalized values"
+    return PairingVerdict(
+        similar=2 * matching > len(considered),
+        rationale=" ".join([summary + "."] + list(dict.fromkeys(llm_rationales))),
+        mappings=[mapping for mappings in by_pair for mapping in mappings],
+    )
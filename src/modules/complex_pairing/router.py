@@ -4,16 +4,27 @@
 
 from fastapi import APIRouter
 
+from ...common.jobs import add_job_routes
 from . import service
 from .schema import ComplexPairingRequest, ComplexPairingResponse
 
 router = APIRouter()
 
 
-@router.post("/complexPairing", response_model=ComplexPairingResponse)
+@router.post("/complexPairing", response_model=ComplexPairingResponse, response_model_exclude_none=True)
 async def complex_pairing(req: ComplexPairingRequest):
     """
     Perform complex pairing matching across 5 samples.
     Returns similar=true if at least 3/5 are clear or near-matches.
     """
     return await service.complex_pairing(req)
+
+
+add_job_routes(
+    router,
+    "/complexPairing",
+    service.complex_pairing,
+    ComplexPairingRequest,
+    ComplexPairingResponse,
+    exclude_none=True,
+)
@@ -2,7 +2,7 @@
 #
 # Licensed under the EUPL-1.2 or later.
 
-from typing import List
+from typing import List, Optional
 
 from pydantic import BaseModel, Field
 
@@ -44,6 +44,11 @@ class ComplexPairingRequest(BaseModel):
         default_factory=list,
         description="Aligned samples as pairs with `midPoint` and `application`, both being lists of records.",
     )
+    fillMappings: bool = Field(
+        True,
+        description="When the verdict is decided early, include the mappings of unevaluated samples found by "
+        "local pre-matching; when false they are omitted.",
+    )
 
     model_config = {
         "json_schema_extra": {
@@ -199,7 +204,13 @@ class ComplexPairingResponse(BaseModel):
     similar: bool = Field(..., description="True if a strict majority (>50%) of non-empty samples match.")
     rationale: str = Field(..., min_length=1, description="Short explanation for the decision.")
     mappings: List[IdMapping] = Field(
-        ..., min_length=1, description="Resolved identifier pairs MidPoint -> Application."
+        ...,
+        description="Resolved identifier pairs MidPoint -> Application; empty when no records correspond, e.g. "
+        "when pre-matching decides every sample does not match, or when early stopping omits the mappings of "
+        "unevaluated samples.",
+    )
+    evaluatedSamples: Optional[int] = Field(
+        None, description="Number of samples evaluated before the verdict was decided, with early stopping."
     )
 
     model_config = {
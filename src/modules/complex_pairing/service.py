@@ -2,17 +2,23 @@
 #
 # Licensed under the EUPL-1.2 or later.
 
+import asyncio
 import logging
-from typing import Any, Dict, List
-
-from src.utils import pretty_json
+from typing import Any, Dict, List, Optional, Tuple
 
+from ...common.budget import prompt_budget, token_estimator
 from ...common.errors import LLMResponseValidationException
 from ...common.langfuse import langfuse_handler
-from ...common.llm import get_default_llm, make_basic_chain
+from ...common.llm import chains, get_default_llm
+from ...common.metrics import metrics
+from ...common.serializers import serializer_for
+from ...config import ComplexPairingSettings, config
+from .early_stopping import evaluation_order, majority_decision, sample_status
+from .prematching import PairResolution, assign_mappings, merge_verdict, resolve_pair, sample_matching
+from .prompts import ComplexPairingResponse as LLMVerdict
 from .prompts import parser as verdict_parser
 from .prompts import prompt_all
-from .schema import ComplexPairingResponse
+from .schema import ComplexPairingRequest, ComplexPairingResponse, IdMapping, Pair
 
 logger = logging.getLogger(__name__)
 
@@ -25,6 +31,18 @@ MidPoint and Application records using a language model to determine
 potential matches based on attribute values and their semantic similarity.
 """
 
+chains.register("complex_pairing", prompt_all, verdict_parser)
+
+prematched_records = metrics.counter(
+    "complex_pairing_prematched_records_total",
+    "Records of complex pairing samples by where they were paired (local or llm).",
+    ["resolution"],
+)
+early_stopped_samples = metrics.counter(
+    "complex_pairing_early_stopped_samples_total",
+    "Complex pairing samples left unevaluated because the verdict was already decided.",
+)
+
 
 def _pairs_json(req: Any) -> List[Dict[str, Any]]:
     """
@@ -50,26 +68,187 @@ def _pairs_json(req: Any) -> List[Dict[str, Any]]:
     ]
 
 
-async def complex_pairing(req: Any) -> ComplexPairingResponse:
+def shard_pairs(pairs: List[Pair], max_tokens: int) -> List[List[Pair]]:
     """
-    Perform complex pairing between MidPoint and Application records using an LLM.
+    Split pairs into consecutive chunks of at most `max_tokens` estimated prompt tokens.
 
-    This function takes a request containing pairs of records, converts them to a JSON
-    format suitable for the LLM, and processes them through a chain that includes
-    the LLM and a response parser.
+    A pair exceeding the limit on its own forms a chunk of its own, so every pair is kept.
+
+    :param pairs: Pairs to judge.
+    :param max_tokens: Maximum estimated tokens of one chunk.
+    :return: Chunks in request order; a single (possibly empty) chunk when the pairs fit.
+    """
+    serialize = serializer_for("complex_pairing")
+    shards: List[List[Pair]] = [[]]
+    size = 0
+    for pair in pairs:
+        tokens = token_estimator.count(serialize(_pairs_json(ComplexPairingRequest(pairs=[pair]))))
+        if shards[-1] and size + tokens > max_tokens:
+            shards.append([])
+            size = 0
+        shards[-1].append(pair)
+        size += tokens
+    return shards
+
+
+async def judge_pairs(req: Any) -> LLMVerdict:
+    """
+    Judge the record pairs of the request by the LLM.
 
     :param req: The request object containing record pairs to be matched.
-    :return: A ComplexPairingResponse containing the matching results.
+    :return: The verdict of the LLM; its mappings may be empty.
     """
-    pairs_json = pretty_json(_pairs_json(req))
+    variables = prompt_budget.fit(
+        "complex_pairing",
+        prompt_all,
+        _pairs_json(req),
+        lambda pairs: {"pairs_json": serializer_for("complex_pairing")(pairs)},
+    )
 
-    llm = get_default_llm()
-    chain = make_basic_chain(prompt_all, llm, verdict_parser)
     try:
-        verdict = await chain.ainvoke({"pairs_json": pairs_json}, config={"callbacks": [langfuse_handler]})
+        verdict = await chains.ainvoke(
+            "complex_pairing",
+            get_default_llm(),
+            variables,
+            config={"callbacks": [langfuse_handler]},
+        )
     except Exception as exc:
         logger.exception("LLM chain failed in coarse_bk_match: %s", exc)
         raise LLMResponseValidationException() from exc
 
-    data = verdict.model_dump() if hasattr(verdict, "model_dump") else verdict
-    return ComplexPairingResponse.model_validate(data)
+    return verdict if isinstance(verdict, LLMVerdict) else LLMVerdict.model_validate(verdict)
+
+
+async def judge_shards(shards: List[List[Pair]], max_concurrency: int) -> List[LLMVerdict]:
+    """
+    Judge every shard by the LLM with bounded concurrency.
+
+    :param shards: Chunks of pairs, see `shard_pairs`.
+    :param max_concurrency: Maximum number of shards judged at the same time.
+    :return: Verdicts in the order of the shards.
+    """
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def run(shard: List[Pair]) -> LLMVerdict:
+        async with semaphore:
+            return await judge_pairs(ComplexPairingRequest(pairs=shard))
+
+    tasks = [asyncio.ensure_future(run(shard)) for shard in shards]
+    try:
+        return list(await asyncio.gather(*tasks))
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def judge_residual(
+    resolutions: List[PairResolution], settings: ComplexPairingSettings
+) -> Tuple[List[List[IdMapping]], List[str]]:
+    """
+    Judge the residual records of samples by the LLM and attribute the mappings to the samples.
+
+    Every group of mutual candidates (see `PairResolution.groups`) is rendered as a pair of its own; the groups
+    are sharded when enabled.
+
+    :param resolutions: Pre-matching outcome of the samples to judge.
+    :param settings: Complex pairing settings.
+    :return: LLM mappings of every sample and the rationales of the LLM calls.
+    """
+    groups = [group for resolution in resolutions for group in resolution.groups]
+    shards = shard_pairs(groups, settings.shard_tokens) if settings.sharding_enabled else [groups]
+    shards = [shard for shard in shards if shard]
+    if len(shards) > 1:
+        logger.info("Pairing %d record groups in %d shards", len(groups), len(shards))
+
+    verdicts = await judge_shards(shards, settings.max_concurrency)
+    by_group = iter(
+        assigned
+        for shard, verdict in zip(shards, verdicts)
+        for assigned in assign_mappings(shard, [IdMapping.model_validate(m.model_dump()) for m in verdict.mappings])
+    )
+    mappings = [[mapping for _ in resolution.groups for mapping in next(by_group)] for resolution in resolutions]
+    return mappings, [verdict.rationale for verdict in verdicts]
+
+
+async def complex_pairing(req: Any) -> ComplexPairingResponse:
+    """
+    Perform complex pairing between MidPoint and Application records using an LLM.
+
+    Records are paired locally first by the optimal assignment of their scores (see `prematching`); only the
+    records with undecided candidates are sent to the LLM, in groups of mutual candidates found by the
+    blocking index (see `blocking`). With sharding enabled, they are split into
+    token-bounded shards (see `shard_pairs`) judged concurrently by up to `complex_pairing.max_concurrency`
+    LLM calls. The LLM mappings are merged with the local ones and `similar` is decided by the strict-majority
+    rule over all samples; with early stopping, only until the verdict is decided (see `pair_until_decided`).
+
+    :param req: The request object containing record pairs to be matched.
+    :return: A ComplexPairingResponse containing the matching results; its mappings are empty when no records
+        correspond, whether the LLM is called once or per shard.
+    """
+    settings = config.complex_pairing
+    if settings.prematching:
+        resolutions = [resolve_pair(pair, settings.min_score, settings.max_block_size) for pair in req.pairs]
+    else:
+        resolutions = [PairResolution(residual=pair, groups=[pair]) for pair in req.pairs]
+    if settings.early_stopping:
+        return await pair_until_decided(req, resolutions, settings)
+    residual = [resolution for resolution in resolutions if resolution.residual is not None]
+    groups = [group for resolution in residual for group in resolution.groups]
+    single = not settings.sharding_enabled or len(shard_pairs(groups, settings.shard_tokens)) == 1
+    if single and not any(resolution.mappings for resolution in resolutions):
+        return ComplexPairingResponse.model_validate((await judge_pairs(req)).model_dump())
+
+    local = sum(len(resolution.mappings) for resolution in resolutions)
+    prematched_records.inc(2 * local, resolution="local")
+    prematched_records.inc(sum(len(p.midPoint) + len(p.application) for p in groups), resolution="llm")
+
+    llm_mappings, rationales = await judge_residual(residual, settings)
+    merged = merge_verdict(req.pairs, resolutions, llm_mappings, rationales)
+    return ComplexPairingResponse(similar=merged.similar, rationale=merged.rationale, mappings=merged.mappings)
+
+
+async def pair_until_decided(
+    req: Any, resolutions: List[PairResolution], settings: ComplexPairingSettings
+) -> ComplexPairingResponse:
+    """
+    Judge the samples in batches until the strict-majority verdict is decided.
+
+    Samples whose match follows from pre-matching alone are known upfront. The others are judged in batches of
+    `complex_pairing.batch_size` in `complex_pairing.evaluation_order` until the remaining samples can no
+    longer change the verdict, or cannot change it with `complex_pairing.stopping_confidence`.
+
+    :param req: The request object containing record pairs to be matched.
+    :param resolutions: Pre-matching outcome of every sample.
+    :param settings: Complex pairing settings.
+    :return: The verdict with the number of evaluated samples; mappings of samples left unevaluated are the
+        local ones if `fillMappings` is set on the request, otherwise omitted.
+    """
+    considered = [i for i, pair in enumerate(req.pairs) if pair.midPoint and pair.application]
+    statuses: Dict[int, Optional[bool]] = {i: sample_status(req.pairs[i], resolutions[i]) for i in considered}
+    by_pair = {i: list(resolutions[i].mappings) for i in considered}
+    pending = [i for i in evaluation_order(len(req.pairs), settings.evaluation_order) if statuses.get(i, False) is None]
+    judged: List[bool] = []
+    rationales: List[str] = []
+    size = max(1, settings.batch_size)
+
+    decision = majority_decision(list(statuses.values()), judged, settings.stopping_confidence)
+    while decision is None and pending:
+        batch, pending = pending[:size], pending[size:]
+        llm_mappings, batch_rationales = await judge_residual([resolutions[i] for i in batch], settings)
+        rationales += batch_rationales
+        for i, mappings in zip(batch, llm_mappings):
+            by_pair[i] += mappings
+            statuses[i] = sample_matching(req.pairs[i], by_pair[i])
+            judged.append(statuses[i] is True)
+        decision = majority_decision(list(statuses.values()), judged, settings.stopping_confidence)
+
+    evaluated = [i for i in considered if statuses[i] is not None]
+    matching = sum(statuses[i] is True for i in considered)
+    early_stopped_samples.inc(len(considered) - len(evaluated))
+    summary = f"{matching} of {len(evaluated)} evaluated samples match ({len(considered)} samples in total)."
+    return ComplexPairingResponse(
+        similar=decision is True,
+        rationale=" ".join([summary] + list(dict.fromkeys(rationales))),
+        mappings=[mapping for i in considered if statuses[i] is not None or req.fillMappings for mapping in by_pair[i]],
+        evaluatedSamples=len(evaluated),
+    )
@@ -2,6 +2,7 @@
 #
 # Licensed under the EUPL-1.2 or later.
 
+from ...common.jobs import add_job_routes
 from ...common.langfuse import ObservableAPIRouter
 from . import service
 from .schema import (
@@ -18,3 +19,12 @@ async def suggest_extension_correlators(req: SuggestExtensionCorrelatorsRequest)
     Suggest suitable correlators based on provided extension attributes.
     """
     return await service.suggest_extension_correlators(req)
+
+
+add_job_routes(
+    router,
+    "/suggestExtensionCorrelators",
+    service.suggest_extension_correlators,
+    SuggestExtensionCorrelatorsRequest,
+    SuggestExtensionCorrelatorsResponse,
+)
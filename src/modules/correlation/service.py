@@ -7,13 +7,13 @@ import logging
 from langchain.schema.output_parser import OutputParserException
 
 from src.common.errors import LLMResponseValidationException
-from src.common.llm import get_default_llm, make_basic_chain
+from src.common.llm import chains, get_default_llm
+from src.common.serializers import serializer_for
 from src.modules.correlation.prompts import parser, prompt
 from src.modules.correlation.schema import (
     SuggestExtensionCorrelatorsRequest,
     SuggestExtensionCorrelatorsResponse,
 )
-from src.utils import pretty_json
 
 from ...common.langfuse import langfuse_handler
 
@@ -22,6 +22,8 @@ logger = logging.getLogger(__name__)
 
 """Service module for suggesting correlators from midPoint extension attributes."""
 
+chains.register("correlation", prompt, parser)
+
 
 def _build_prompt_inputs(req: SuggestExtensionCorrelatorsRequest) -> dict:
     """
@@ -39,11 +41,12 @@ def _build_prompt_inputs(req: SuggestExtensionCorrelatorsRequest) -> dict:
         }
         for a in req.extensionAttributes
     ]
-    ext_json = pretty_json(attrs)
+    serialize = serializer_for("correlation")
+    ext_json = serialize(attrs)
 
     # Serialize stats
     stats_payload = {k: v.model_dump() for k, v in req.attributeStats.items()}
-    stats_json = pretty_json(stats_payload)
+    stats_json = serialize(stats_payload)
 
     return {
         "schema_name": req.schemaName,
@@ -66,16 +69,18 @@ async def suggest_extension_correlators(
     # 1) Prepare serialized inputs for the prompt
     prompt_vars = _build_prompt_inputs(req)
 
-    # 2) Build the chain
-    llm = get_default_llm()
-    chain = make_basic_chain(prompt, llm, parser)
-
-    # 3) Invoke the chain and parse
+    # 2) Invoke the chain and parse
     try:
-        parsed = await chain.ainvoke(prompt_vars, config={"callbacks": [langfuse_handler]})
+        parsed = await chains.ainvoke(
+            "correlation",
+            get_default_llm(),
+            prompt_vars,
+            config={"callbacks": [langfuse_handler]},
+            enums={"correlators": [a.name for a in req.extensionAttributes]},
+        )
     except OutputParserException as exc:
         logger.exception("Output parsing failed: %s", exc)
         raise LLMResponseValidationException() from exc
 
-    # 4) Return as response model
+    # 3) Return as response model
     return SuggestExtensionCorrelatorsResponse(correlators=parsed.correlators)
@@ -2,6 +2,7 @@
 #
 # Licensed under the EUPL-1.2 or later.
 
+from ...common.jobs import add_job_routes
 from ...common.langfuse import ObservableAPIRouter
 from . import service
 from .schema import (
@@ -18,3 +19,8 @@ async def suggest_extension_attributes(req: SuggestExtensionRequest):
     Suggest extension attributes.
     """
     return await service.suggest_extension(req)
+
+
+add_job_routes(
+    router, "/suggestExtensionAttributes", service.suggest_extension, SuggestExtensionRequest, SuggestExtensionResponse
+)
@@ -6,9 +6,10 @@ import logging
 
 from langchain.schema.output_parser import OutputParserException
 
+from src.common.budget import prompt_budget
 from src.common.errors import LLMResponseValidationException
-from src.common.llm import get_default_llm, make_basic_chain
-from src.utils import pretty_json
+from src.common.llm import chains, get_default_llm
+from src.common.serializers import serializer_for
 
 from ...common.langfuse import langfuse_handler
 from .prompts import ExtensionAttributes, parser, prompt
@@ -18,6 +19,8 @@ logger = logging.getLogger(__name__)
 
 """Service module for suggesting extension attributes from UNMAPPED Resource attributes."""
 
+chains.register("extension_att", prompt, parser)
+
 
 def _build_extension_prompt_data(req: SuggestExtensionRequest) -> dict[str, str]:
     """
@@ -32,25 +35,23 @@ def _build_extension_prompt_data(req: SuggestExtensionRequest) -> dict[str, str]
         attr.name: {"type": attr.type, "description": attr.description or ""}
         for attr in req.applicationSchema.attribute
     }
-    if req.attributeStats:
-        # Convert Pydantic models to plain dicts for JSON serialization
-        stats_dict: dict[str, dict] = {
-            name: {
-                "totalCount": s.totalCount,
-                "nuniq": s.nuniq,
-                "nmissing": s.nmissing,
-            }
-            for name, s in req.attributeStats.items()
+    # Convert Pydantic models to plain dicts for JSON serialization
+    stats_dict: dict[str, dict] = {
+        name: {
+            "totalCount": s.totalCount,
+            "nuniq": s.nuniq,
+            "nmissing": s.nmissing,
         }
-        attr_stats_json = pretty_json(stats_dict)
-    else:
-        attr_stats_json = pretty_json({})
-
-    return {
-        "Resource_schema": pretty_json(resource_schema),
-        "Attribute_stats": attr_stats_json,
+        for name, s in (req.attributeStats or {}).items()
     }
 
+    return prompt_budget.fit(
+        "extension_att",
+        prompt,
+        {"Resource_schema": resource_schema, "Attribute_stats": stats_dict},
+        lambda data: {name: serializer_for("extension_att")(value) for name, value in data.items()},
+    )
+
 
 async def suggest_extension(req: SuggestExtensionRequest) -> SuggestExtensionResponse:
     """
@@ -70,11 +71,14 @@ async def suggest_extension(req: SuggestExtensionRequest) -> SuggestExtensionRes
     """
     variables = _build_extension_prompt_data(req)
 
-    llm = get_default_llm()
-    chain = make_basic_chain(prompt, llm, parser)
-
     try:
-        parsed: ExtensionAttributes = await chain.ainvoke(variables, config={"callbacks": [langfuse_handler]})
+        parsed: ExtensionAttributes = await chains.ainvoke(
+            "extension_att",
+            get_default_llm(),
+            variables,
+            config={"callbacks": [langfuse_handler]},
+            enums={"extensionAttributes": [attr.name for attr in req.applicationSchema.attribute]},
+        )
     except OutputParserException as exc:
         logger.exception("Extension suggestions output parsing failed: %s", exc)
         raise LLMResponseValidationException() from exc
@@ -2,6 +2,7 @@
 #
 # Licensed under the EUPL-1.2 or later.
 
+from ...common.jobs import add_job_routes
 from ...common.langfuse import ObservableAPIRouter
 from . import service
 from .schema import (
@@ -18,3 +19,8 @@ async def suggest_focus_type(req: SuggestFocusTypeRequest):
     Suggest focus type for an object type and application schema.
     """
     return await service.suggest_focus_type(req)
+
+
+add_job_routes(
+    router, "/suggestFocusType", service.suggest_focus_type, SuggestFocusTypeRequest, SuggestFocusTypeResponse
+)
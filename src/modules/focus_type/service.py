@@ -7,8 +7,8 @@ import logging
 from langchain.schema.output_parser import OutputParserException
 from langchain_core.prompts import ChatPromptTemplate
 
-from src.common.llm import get_default_llm, make_basic_chain
-from src.utils import pretty_json
+from src.common.llm import chains, get_default_llm
+from src.common.serializers import serializer_for
 
 from ...common.errors import LLMResponseValidationException
 from ...common.langfuse import langfuse_handler
@@ -30,6 +30,8 @@ prompt: ChatPromptTemplate = ChatPromptTemplate.from_messages(
     ]
 )
 
+chains.register("focus_type", prompt, parser)
+
 
 def build_focus_type_prompt_data(req: SuggestFocusTypeRequest) -> dict:
     """
@@ -57,13 +59,12 @@ async def suggest_focus_type(req: SuggestFocusTypeRequest) -> SuggestFocusTypeRe
     :return: SuggestFocusTypeResponse containing the first suggested FocusType.
     """
     payload = build_focus_type_prompt_data(req)
-    payload_json = pretty_json(payload)
-
-    llm = get_default_llm()
-    chain = make_basic_chain(prompt, llm, parser)
+    payload_json = serializer_for("focus_type")(payload)
 
     try:
-        response: SuggestFocusTypeResponse = await chain.ainvoke(
+        response: SuggestFocusTypeResponse = await chains.ainvoke(
+            "focus_type",
+            get_default_llm(),
             {"payload_json": payload_json},
             config={"callbacks": [langfuse_handler]},
         )
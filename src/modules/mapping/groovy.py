@@ -0,0 +1,2220 @@
+# Copyright (c) 2010-2025 Evolveum and contributors
+#
+# Licensed under the EUPL-1.2 or later.
+
+import functools
+import re
+import time
+import unicodedata
+from contextvars import ContextVar
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone, tzinfo
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterator, List, Mapping, Optional, Sequence, Tuple
+from zoneinfo import ZoneInfo
+
+import regex  # type: ignore[import-untyped]
+
+"""
+Interpreter of the Groovy subset used by suggested transformation scripts.
+
+Supported are literals (strings, GStrings, slashy strings, numbers, lists, maps, ranges), variables declared
+with `def` or a type, assignments, `if`/`else`, `for (x in ...)`, `try`/`catch`, `return`, the usual
+operators including ternary, elvis, null-safe navigation (`?.`), spread (`*.`), regex operators, `instanceof`
+and `as` casts, closures, and the common methods of strings, collections, maps, numbers and dates together
+with static helpers like `Date.parse`, `Integer.parseInt`, `Normalizer.normalize` or `StringUtils`.
+
+A script failing like it would in Groovy (null dereference, missing variable or method, bad number or
+date format, ...) raises `GroovyError`. Syntax and library calls outside of the subset raise
+`GroovyUnsupportedError`, since the result of such a script is unknown rather than wrong.
+
+Dates are Python datetimes; naive datetimes are in UTC, which is assumed to be the default time zone.
+"""
+
+
+class GroovyError(Exception):
+    """
+    Script failed at runtime, e.g. with a NullPointerException or MissingPropertyException.
+    """
+
+
+class GroovyUnsupportedError(Exception):
+    """
+    Script uses syntax or library calls outside of the supported subset.
+    """
+
+
+# ---- lexer ----
+
+KEYWORDS = {
+    "def", "return", "if", "else", "true", "false", "null", "instanceof", "in", "as", "new", "for", "while",
+    "do", "import", "break", "continue", "throw", "try", "catch", "finally", "switch", "case", "class",
+}  # fmt: skip
+
+OPERATORS = sorted(
+    [
+        "?.", "?:", "*.", "?[", "==~", "=~", "==", "!=", "<=>", "<=", ">=", "&&", "||", "->", "++", "--", "+=",
+        "-=", "*=", "/=", "..<", "..", "<<", "**", "!", "?", ":", ".", ",", "(", ")", "[", "]", "{", "}", "+", "-",
+        "*", "/", "%", "<", ">", "=", ";", "&", "|", "^", "~",
+    ],
+    key=len,
+    reverse=True,
+)  # fmt: skip
+
+_NUMBER = re.compile(r"\d+(\.\d+)?([eE][+-]?\d+)?([lLgGdDfFiI]?)")
+_NAME = re.compile(r"[A-Za-z_$][\w$]*")
+_ESCAPES = {"n": "\n", "t": "\t", "r": "\r", "b": "\b", "f": "\f", "\\": "\\", "'": "'", '"': '"', "$": "$"}
+
+
+@dataclass(frozen=True)
+class Token:
+    """
+    Lexical token; kind is one of num, str, gstr, name, kw, op, nl or eof.
+    """
+
+    kind: str
+    value: Any
+
+
+def _value_end(tokens: List[Token]) -> bool:
+    # whether a `/` after the last token is a division rather than the start of a slashy string
+    if not tokens:
+        return False
+    last = tokens[-1]
+    if last.kind in ("num", "str", "gstr", "name"):
+        return True
+    return (last.kind == "kw" and last.value in ("true", "false", "null")) or (
+        last.kind == "op" and last.value in (")", "]", "}")
+    )
+
+
+def _read_string(source: str, start: int, quote: str) -> Tuple[str, int, bool]:
+    # returns (raw content with escapes resolved, end index, whether `$` occurs unescaped)
+    i = start + len(quote)
+    chars: List[str] = []
+    interpolated = False
+    while True:
+        if i >= len(source):
+            raise GroovyUnsupportedError("Unterminated string literal")
+        if source.startswith(quote, i):
+            return "".join(chars), i + len(quote), interpolated
+        c = source[i]
+        if c == "\n" and len(quote) == 1:
+            raise GroovyUnsupportedError("Unterminated string literal")
+        if c == "\\" and i + 1 < len(source):
+            nxt = source[i + 1]
+            if nxt == "u" and re.match(r"[0-9a-fA-F]{4}", source[i + 2 : i + 6]):
+                chars.append(chr(int(source[i + 2 : i + 6], 16)))
+                i += 6
+                continue
+            # keep an escaped `$` distinguishable from interpolation
+            chars.append("\\$" if nxt == "$" else _ESCAPES.get(nxt, nxt))
+            i += 2
+            continue
+        if c == "$":
+            interpolated = True
+        chars.append(c)
+        i += 1
+
+
+def _gstring_parts(content: str) -> List[Any]:
+    """
+    Split GString content into literal strings and ("expr", source) interpolations.
+    """
+    parts: List[Any] = []
+    literal: List[str] = []
+    i = 0
+    while i < len(content):
+        if content.startswith("\\$", i):
+            literal.append("$")
+            i += 2
+        elif content[i] == "$" and content.startswith("${", i):
+            depth, j = 1, i + 2
+            while j < len(content) and depth:
+                depth += {"{": 1, "}": -1}.get(content[j], 0)
+                j += 1
+            if depth:
+                raise GroovyUnsupportedError("Unterminated GString expression")
+            parts += ["".join(literal), ("expr", content[i + 2 : j - 1])]
+            literal = []
+            i = j
+        elif content[i] == "$" and (match := re.match(r"[A-Za-z_]\w*(\.[A-Za-z_]\w*)*", content[i + 1 :])):
+            parts += ["".join(literal), ("expr", match.group(0))]
+            literal = []
+            i += 1 + match.end()
+        else:
+            literal.append(content[i])
+            i += 1
+    parts.append("".join(literal))
+    return [part for part in parts if part != ""]
+
+
+def tokenize(source: str) -> List[Token]:
+    """
+    Split a script into tokens.
+
+    :raises GroovyUnsupportedError: On unknown characters or unterminated literals.
+    """
+    tokens: List[Token] = []
+    i = 0
+    while i < len(source):
+        c = source[i]
+        if c in " \t\r\f":
+            i += 1
+        elif c == "\n":
+            tokens.append(Token("nl", "\n"))
+            i += 1
+        elif source.startswith("//", i) or source.startswith("#!", i):
+            end = source.find("\n", i)
+            i = len(source) if end < 0 else end
+        elif source.startswith("/*", i):
+            end = source.find("*/", i + 2)
+            if end < 0:
+                raise GroovyUnsupportedError("Unterminated comment")
+            i = end + 2
+        elif c.isdigit():
+            match = _NUMBER.match(source, i)
+            assert match is not None
+            text, fraction, exponent, suffix = match.group(0), match.group(1), match.group(2), match.group(3)
+            number = text[: len(text) - len(suffix)]
+            is_float = bool(fraction or exponent) or suffix.lower() in ("d", "f")
+            tokens.append(Token("num", float(number) if is_float else int(number)))
+            i = match.end()
+        elif c.isalpha() or c in "_$":
+            match = _NAME.match(source, i)
+            assert match is not None
+            name = match.group(0)
+            tokens.append(Token("kw" if name in KEYWORDS else "name", name))
+            i = match.end()
+        elif c in "'\"":
+            quote = c * 3 if source.startswith(c * 3, i) else c
+            content, i, interpolated = _read_string(source, i, quote)
+            if c == '"' and interpolated:
+                tokens.append(Token("gstr", _gstring_parts(content)))
+            else:
+                tokens.append(Token("str", content.replace("\\$", "$")))
+        elif c == "/" and not _value_end(tokens) and not source.startswith("/=", i):
+            end = i + 1
+            while end < len(source) and source[end] != "/":
+                end += 2 if source[end] == "\\" else 1
+            if end >= len(source):
+                raise GroovyUnsupportedError("Unterminated slashy string")
+            tokens.append(Token("str", source[i + 1 : end].replace("\\/", "/")))
+            i = end + 1
+        else:
+            op = next((op for op in OPERATORS if source.startswith(op, i)), None)
+            if op is None:
+                raise GroovyUnsupportedError(f"Unexpected character {c!r}")
+            tokens.append(Token("op", op))
+            i += len(op)
+    tokens.append(Token("eof", None))
+    return tokens
+
+
+# ---- parser ----
+
+# binary operators by increasing precedence
+BINARY_LEVELS: Sequence[Tuple[str, ...]] = (
+    ("||",),
+    ("&&",),
+    ("==", "!=", "<=>", "=~", "==~"),
+    ("<", "<=", ">", ">=", "in", "instanceof", "as"),
+    ("..", "..<"),
+    ("<<",),
+    ("+", "-"),
+    ("*", "/", "%"),
+    ("**",),
+)
+
+# operators continuing an expression on the next line
+CONTINUATIONS = {"?", ":", "?:", ".", "?.", "*.", "&&", "||"}
+
+ASSIGNMENTS = {"=", "+=", "-=", "*=", "/="}
+
+Node = Tuple[Any, ...]
+
+
+class Parser:
+    """
+    Recursive descent parser producing tuple nodes, e.g. ("bin", "+", left, right).
+    """
+
+    def __init__(self, tokens: List[Token]):
+        self.tokens = tokens
+        self.pos = 0
+        # newlines are insignificant inside parentheses and brackets
+        self.nesting = 0
+
+    def peek(self, offset: int = 0) -> Token:
+        if self.nesting:
+            while self.tokens[self.pos].kind == "nl":
+                self.pos += 1
+        index = self.pos
+        for _ in range(offset):
+            index = min(index + 1, len(self.tokens) - 1)
+        return self.tokens[index]
+
+    def next(self) -> Token:
+        token = self.peek()
+        self.pos = min(self.pos + 1, len(self.tokens) - 1)
+        return token
+
+    def at(self, kind: str, value: Any = None) -> bool:
+        token = self.peek()
+        return token.kind == kind and (value is None or token.value == value)
+
+    def at_op(self, *ops: str) -> bool:
+        token = self.peek()
+        if token.kind == "nl" and not self.nesting and any(op in CONTINUATIONS for op in ops):
+            index = self.pos
+            while self.tokens[index].kind == "nl":
+                index += 1
+            if self.tokens[index].kind == "op" and self.tokens[index].value in ops:
+                self.pos = index
+                return True
+            return False
+        return token.kind == "op" and token.value in ops
+
+    def match_op(self, *ops: str) -> Optional[str]:
+        if self.at_op(*ops):
+            return self.next().value
+        return None
+
+    def expect_op(self, op: str) -> None:
+        if not self.match_op(op):
+            raise GroovyUnsupportedError(f"Expected {op!r}, got {self.peek().value!r}")
+
+    def expect_name(self) -> str:
+        token = self.next()
+        if token.kind not in ("name", "kw"):
+            raise GroovyUnsupportedError(f"Expected a name, got {token.value!r}")
+        return token.value
+
+    def skip_separators(self) -> None:
+        while self.peek().kind == "nl" or self.at_op(";"):
+            self.pos += 1
+
+    def nested(self, parse: Callable[[], Any], close: str) -> Any:
+        self.nesting += 1
+        try:
+            result = parse()
+            self.expect_op(close)
+        finally:
+            self.nesting -= 1
+        return result
+
+    def unnested(self, parse: Callable[[], Any]) -> Any:
+        saved, self.nesting = self.nesting, 0
+        try:
+            return parse()
+        finally:
+            self.nesting = saved
+
+    # ---- statements ----
+
+    def script(self) -> Node:
+        body = self.statements("eof")
+        if not self.at("eof"):
+            raise GroovyUnsupportedError(f"Unexpected {self.peek().value!r}")
+        return body
+
+    def statements(self, end: str) -> Node:
+        statements = []
+        while True:
+            self.skip_separators()
+            if self.at("eof") or (end == "}" and self.at_op("}")):
+                break
+            statement = self.statement()
+            if statement is not None:
+                statements.append(statement)
+            if not (self.peek().kind in ("nl", "eof") or self.at_op(";", "}")):
+                raise GroovyUnsupportedError(f"Unexpected {self.peek().value!r}")
+        return ("block", statements)
+
+    def block(self) -> Node:
+        if self.match_op("{"):
+            body = self.unnested(lambda: self.statements("}"))
+            self.expect_op("}")
+            return body
+        self.skip_separators()
+        return ("block", [self.statement()])
+
+    def statement(self) -> Optional[Node]:
+        token = self.peek()
+        if token.kind == "kw":
+            if token.value == "import":
+                while self.peek().kind not in ("nl", "eof") and not self.at_op(";"):
+                    self.next()
+                return None
+            if token.value == "def":
+                self.next()
+                return self.declaration()
+            if token.value == "return":
+                self.next()
+                if self.peek().kind in ("nl", "eof") or self.at_op(";", "}"):
+                    return ("return", None)
+                return ("return", self.expression())
+            if token.value == "if":
+                return self.if_statement()
+            if token.value == "for":
+                return self.for_statement()
+            if token.value == "try":
+                return self.try_statement()
+            if token.value not in ("true", "false", "null", "new"):
+                raise GroovyUnsupportedError(f"Unsupported statement {token.value!r}")
+        if token.kind == "name" and self.is_declaration():
+            self.type_name()
+            return self.declaration()
+        expression = self.expression()
+        op = self.match_op(*ASSIGNMENTS)
+        if op:
+            if expression[0] not in ("var", "prop", "index"):
+                raise GroovyUnsupportedError("Invalid assignment target")
+            return ("assign", op, expression, self.expression())
+        return expression
+
+    def is_declaration(self) -> bool:
+        # `Type name = ...` or `Type<Generic> name = ...`
+        index = self.pos
+        tokens = self.tokens
+        if tokens[index].kind != "name" or not (tokens[index].value[0].isupper() or tokens[index].value in PRIMITIVES):
+            return False
+        index += 1
+        while tokens[index].kind == "op" and tokens[index].value == "." and tokens[index + 1].kind == "name":
+            index += 2
+        if tokens[index].kind == "op" and tokens[index].value == "<":
+            depth = 0
+            while tokens[index].kind != "eof":
+                depth += {"<": 1, ">": -1}.get(tokens[index].value, 0) if tokens[index].kind == "op" else 0
+                index += 1
+                if depth == 0:
+                    break
+        return tokens[index].kind == "name" and tokens[index + 1].kind in ("op", "nl", "eof")
+
+    def declaration(self) -> Node:
+        if self.is_declaration():
+            self.type_name()
+        name = self.expect_name()
+        if self.at_op("("):
+            raise GroovyUnsupportedError("Method definitions are not supported")
+        value = self.expression() if self.match_op("=") else ("lit", None)
+        return ("decl", name, value)
+
+    def if_statement(self) -> Node:
+        self.next()
+        self.expect_op("(")
+        condition = self.nested(self.expression, ")")
+        then = self.block()
+        otherwise = None
+        index = self.pos
+        while self.tokens[index].kind == "nl" or (self.tokens[index].kind == "op" and self.tokens[index].value == ";"):
+            index += 1
+        if self.tokens[index].kind == "kw" and self.tokens[index].value == "else":
+            self.pos = index + 1
+            otherwise = self.block() if not self.at("kw", "if") else ("block", [self.if_statement()])
+        return ("if", condition, then, otherwise)
+
+    def for_statement(self) -> Node:
+        self.next()
+        self.expect_op("(")
+
+        def header() -> Tuple[str, Node]:
+            if self.at("kw", "def") or self.is_declaration():
+                self.next() if self.at("kw", "def") else self.type_name()
+            name = self.expect_name()
+            if not self.at("kw", "in") and not self.at_op(":"):
+                raise GroovyUnsupportedError("Only for-in loops are supported")
+            self.next()
+            return name, self.expression()
+
+        name, iterable = self.nested(header, ")")
+        return ("for", name, iterable, self.block())
+
+    def try_statement(self) -> Node:
+        self.next()
+        body = self.block()
+        handlers = []
+        self.skip_separators()
+        while self.at("kw", "catch"):
+            self.next()
+            self.expect_op("(")
+
+            def handler() -> str:
+                names = [self.expect_name()]
+                while self.match_op("|", "."):
+                    names.append(self.expect_name())
+                if self.peek().kind == "name":
+                    names.append(self.expect_name())
+                return names[-1]
+
+            name = self.nested(handler, ")")
+            handlers.append((name, self.block()))
+            self.skip_separators()
+        final = None
+        if self.at("kw", "finally"):
+            self.next()
+            final = self.block()
+        return ("try", body, handlers, final)
+
+    def type_name(self) -> str:
+        name = self.expect_name()
+        while self.at_op(".") and self.peek(1).kind == "name":
+            self.next()
+            name = self.expect_name()
+        if self.at_op("<"):
+            depth = 0
+            while not self.at("eof"):
+                token = self.next()
+                depth += {"<": 1, ">": -1}.get(token.value, 0) if token.kind == "op" else 0
+                if depth == 0:
+                    break
+        if self.at_op("[") and self.peek(1).kind == "op" and self.peek(1).value == "]":
+            self.next()
+            self.next()
+            return "List"
+        return name
+
+    # ---- expressions ----
+
+    def expression(self) -> Node:
+        condition = self.binary(0)
+        if self.match_op("?:"):
+            return ("elvis", condition, self.expression())
+        if self.match_op("?"):
+            then = self.expression()
+            self.expect_op(":")
+            return ("ternary", condition, then, self.expression())
+        return condition
+
+    def binary(self, level: int) -> Node:
+        if level == len(BINARY_LEVELS):
+            return self.unary()
+        left = self.binary(level + 1)
+        ops = BINARY_LEVELS[level]
+        while True:
+            token = self.peek()
+            if token.kind == "kw" and token.value in ops:
+                op = self.next().value
+            elif (
+                token.kind == "op" and token.value == "!" and "in" in ops and self.peek(1).value in ("in", "instanceof")
+            ):
+                self.next()
+                op = "!" + self.next().value
+            else:
+                op = self.match_op(*[op for op in ops if op not in KEYWORDS])
+                if op is None:
+                    return left
+            if op in ("instanceof", "!instanceof"):
+                left = ("instanceof", left, self.type_name(), op.startswith("!"))
+            elif op == "as":
+                left = ("cast", left, self.type_name())
+            else:
+                left = ("bin", op, left, self.binary(level + 1))
+
+    def unary(self) -> Node:
+        op = self.match_op("!", "-", "+", "~", "++", "--")
+        if op in ("~", "++", "--"):
+            raise GroovyUnsupportedError(f"Unsupported operator {op!r}")
+        if op:
+            operand = self.unary()
+            return operand if op == "+" else ("not" if op == "!" else "neg", operand)
+        if self.is_cast():
+            self.next()
+            type_name = self.nested(self.type_name, ")")
+            return ("cast", self.unary(), type_name)
+        return self.postfix(self.primary())
+
+    def is_cast(self) -> bool:
+        # `(String) value`
+        if not self.at_op("("):
+            return False
+        index = self.pos + 1
+        tokens = self.tokens
+        if tokens[index].kind != "name" or not (tokens[index].value[0].isupper() or tokens[index].value in PRIMITIVES):
+            return False
+        index += 1
+        while tokens[index].kind == "op" and tokens[index].value == "." and tokens[index + 1].kind == "name":
+            index += 2
+        if not (tokens[index].kind == "op" and tokens[index].value == ")"):
+            return False
+        after = tokens[index + 1]
+        return after.kind in ("name", "num", "str", "gstr") or (after.kind == "op" and after.value in ("(", "["))
+
+    def arguments(self) -> List[Node]:
+        def parse() -> List[Node]:
+            args: List[Node] = []
+            named: List[Tuple[Node, Node]] = []
+            while not self.at_op(")"):
+                if self.peek().kind in ("name", "str") and self.peek(1).kind == "op" and self.peek(1).value == ":":
+                    key = self.next().value
+                    self.next()
+                    named.append((("lit", key), self.expression()))
+                else:
+                    args.append(self.expression())
+                if not self.match_op(","):
+                    break
+            return ([("map", named)] if named else []) + args
+
+        return self.nested(parse, ")")
+
+    def trailing_closures(self, args: List[Node]) -> List[Node]:
+        while self.peek().kind == "op" and self.peek().value == "{":
+            self.next()
+            args.append(self.closure())
+        return args
+
+    def postfix(self, node: Node) -> Node:
+        while True:
+            op = self.match_op(".", "?.", "*.")
+            if op:
+                token = self.next()
+                if token.kind not in ("name", "kw", "str"):
+                    raise GroovyUnsupportedError(f"Expected a member name, got {token.value!r}")
+                mode = {".": "", "?.": "safe", "*.": "spread"}[op]
+                if self.peek().kind == "op" and self.peek().value == "(":
+                    self.next()
+                    node = ("call", node, token.value, self.trailing_closures(self.arguments()), mode)
+                elif self.peek().kind == "op" and self.peek().value == "{":
+                    node = ("call", node, token.value, self.trailing_closures([]), mode)
+                else:
+                    node = ("prop", node, token.value, mode)
+            elif self.peek().kind == "op" and self.peek().value in ("[", "?["):
+                safe = self.next().value == "?["
+                index = self.nested(self.expression, "]")
+                node = ("index", node, index, safe)
+            elif self.peek().kind == "op" and self.peek().value == "(" and node[0] in ("var", "closure"):
+                self.next()
+                node = ("fcall", node, self.trailing_closures(self.arguments()))
+            else:
+                return node
+
+    def primary(self) -> Node:
+        token = self.next()
+        if token.kind in ("num", "str"):
+            return ("lit", token.value)
+        if token.kind == "gstr":
+            parts = [
+                part if isinstance(part, str) else Parser(tokenize(part[1])).single_expression() for part in token.value
+            ]
+            return ("gstr", parts)
+        if token.kind == "kw":
+            if token.value in ("true", "false", "null"):
+                return ("lit", {"true": True, "false": False, "null": None}[token.value])
+            if token.value == "new":
+                type_name = self.type_name()
+                self.expect_op("(")
+                return ("new", type_name, self.arguments())
+            raise GroovyUnsupportedError(f"Unexpected keyword {token.value!r}")
+        if token.kind == "name":
+            return ("var", token.value)
+        if token.kind == "op":
+            if token.value == "(":
+                return self.nested(self.expression, ")")
+            if token.value == "[":
+                return self.nested(self.collection, "]")
+            if token.value == "{":
+                return self.closure()
+        raise GroovyUnsupportedError(f"Unexpected {token.value!r}")
+
+    def single_expression(self) -> Node:
+        expression = self.expression()
+        if not self.at("eof"):
+            raise GroovyUnsupportedError(f"Unexpected {self.peek().value!r}")
+        return expression
+
+    def collection(self) -> Node:
+        if self.at_op(":") and self.peek(1).value == "]":
+            self.next()
+            return ("map", [])
+        items: List[Node] = []
+        entries: List[Tuple[Node, Node]] = []
+        while not self.at_op("]"):
+            if self.peek().kind in ("name", "kw", "str") and self.peek(1).kind == "op" and self.peek(1).value == ":":
+                key: Node = ("lit", self.next().value)
+            else:
+                key = self.expression()
+            if self.match_op(":"):
+                entries.append((key, self.expression()))
+            else:
+                items.append(key)
+            if not self.match_op(","):
+                break
+        if entries and items:
+            raise GroovyUnsupportedError("Mixed list and map literal")
+        return ("map", entries) if entries else ("list", items)
+
+    def closure(self) -> Node:
+        params: Optional[List[str]] = None
+        index = self.pos
+        names: List[str] = []
+        while self.tokens[index].kind in ("name", "nl") or (
+            self.tokens[index].kind == "op" and self.tokens[index].value in (",", ".", "<", ">")
+        ):
+            if self.tokens[index].kind == "name" and (
+                self.tokens[index + 1].kind != "name" and self.tokens[index + 1].value != "."
+            ):
+                names.append(self.tokens[index].value)
+            index += 1
+        if self.tokens[index].kind == "op" and self.tokens[index].value == "->":
+            params = names
+            self.pos = index + 1
+        body = self.unnested(lambda: self.statements("}"))
+        self.expect_op("}")
+        return ("closure", params, body)
+
+
+@lru_cache(maxsize=256)
+def parse_script(source: str) -> Node:
+    """
+    Parse a script into its syntax tree.
+
+    :raises GroovyUnsupportedError: When the script is not in the supported subset (or not valid Groovy).
+    """
+    return Parser(tokenize(source)).script()
+
+
+# ---- runtime values ----
+
+PRIMITIVES = {"int", "long", "short", "byte", "double", "float", "boolean", "char"}
+
+MIDPOINT_VARIABLES = {
+    "basic", "midpoint", "log", "focus", "user", "projection", "shadow", "account", "resource", "actor",
+    "configuration", "legal", "assigned", "entitlement", "associationTargetObjectClass", "ldap", "report",
+}  # fmt: skip
+
+PACKAGES = {"java", "javax", "groovy", "org", "com"}
+
+# bounds on the values a script may build, the step limit alone does not bound the allocated memory
+MAX_SIZE = 1_000_000
+MAX_INTEGER_BITS = 4096
+DEADLINE_CHECK_STEPS = 1000
+
+
+def check_size(size: int) -> int:
+    """
+    Check the number of characters or items of a value about to be built.
+
+    :raises GroovyUnsupportedError: When the value would exceed `MAX_SIZE`.
+    """
+    if size > MAX_SIZE:
+        raise GroovyUnsupportedError(f"Script value exceeded the size limit of {MAX_SIZE}")
+    return size
+
+
+def sized(value: Any) -> Any:
+    """
+    Return a built string or list after checking its size, see `check_size`.
+    """
+    if isinstance(value, (str, list)):
+        check_size(len(value))
+    return value
+
+
+def repeat(value: Any, times: Any) -> Any:
+    """
+    Repeat a string or list like Groovy `multiply`, checking the result size before building it.
+    """
+    times = _require_int(times)
+    check_size(len(value) * max(0, times))
+    return value * times
+
+
+def power(a: Any, b: Any) -> Any:
+    """
+    Raise a number to a power, checking the size of integer results before computing them.
+    """
+    if (
+        isinstance(a, int)
+        and isinstance(b, int)
+        and b > 0
+        and abs(a) > 1
+        and b * abs(a).bit_length() > MAX_INTEGER_BITS
+    ):
+        raise GroovyUnsupportedError(f"Script value exceeded the size limit of {MAX_INTEGER_BITS} bits")
+    try:
+        return a**b
+    except OverflowError as exc:
+        raise GroovyUnsupportedError("Script value exceeded the size limit") from exc
+
+
+@dataclass(frozen=True)
+class ClassRef:
+    """
+    Reference to a class or package, e.g. `Date` or `java.text.Normalizer.Form`.
+    """
+
+    name: str
+
+    @property
+    def simple_name(self) -> str:
+        return self.name.rsplit(".", 1)[-1]
+
+
+@dataclass(frozen=True)
+class GRange:
+    """
+    Integer range `from..to` or `from..<to`.
+    """
+
+    start: int
+    end: int
+    exclusive: bool
+
+    def to_list(self) -> List[int]:
+        step = 1 if self.end >= self.start else -1
+        stop = self.end if self.exclusive else self.end + step
+        items = range(self.start, stop, step)
+        check_size(len(items))
+        return list(items)
+
+
+@dataclass(frozen=True)
+class MapEntry:
+    key: Any
+    value: Any
+
+
+class RegexMatcher:
+    """
+    Result of the `=~` operator.
+    """
+
+    def __init__(self, pattern: "JavaRegex", text: str):
+        self.matches = list(pattern.finditer(text))
+
+    def __bool__(self) -> bool:
+        return bool(self.matches)
+
+    def get(self, index: int) -> Any:
+        match = self.matches[index]
+        return [match.group(0), *match.groups()] if match.groups() else match.group(0)
+
+
+class ReturnSignal(Exception):
+    def __init__(self, value: Any):
+        self.value = value
+
+
+class Scope:
+    def __init__(self, variables: Optional[Dict[str, Any]] = None, parent: Optional["Scope"] = None):
+        self.variables = variables if variables is not None else {}
+        self.parent = parent
+
+    def find(self, name: str) -> Optional["Scope"]:
+        scope: Optional[Scope] = self
+        while scope is not None:
+            if name in scope.variables:
+                return scope
+            scope = scope.parent
+        return None
+
+
+class Closure:
+    def __init__(self, interpreter: "Interpreter", params: Optional[List[str]], body: Node, scope: Scope):
+        self.interpreter = interpreter
+        self.params = params
+        self.body = body
+        self.scope = scope
+
+    @property
+    def arity(self) -> int:
+        return 1 if self.params is None else len(self.params)
+
+    def __call__(self, *args: Any) -> Any:
+        if self.params is None:
+            variables = {"it": args[0] if args else None}
+        else:
+            if len(self.params) == 1 and len(args) > 1:
+                args = (list(args),)
+            variables = {name: args[i] if i < len(args) else None for i, name in enumerate(self.params)}
+        try:
+            return self.interpreter.execute(self.body, Scope(variables, self.scope))
+        except ReturnSignal as signal:
+            return signal.value
+
+
+def is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def truth(value: Any) -> bool:
+    """
+    Groovy truth: null, false, zero, empty strings and empty collections are false.
+    """
+    if value is None:
+        return False
+    if isinstance(value, (bool, int, float, str, list, dict, RegexMatcher)):
+        return bool(value)
+    return True
+
+
+def to_string(value: Any) -> str:
+    """
+    Groovy `toString()` of a value; null gives "null".
+    """
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, float):
+        if value.is_integer() and abs(value) < 1e7:
+            return f"{value:.1f}"
+        return repr(value).replace("e+", "E").replace("e", "E")
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (list, GRange)):
+        items = value.to_list() if isinstance(value, GRange) else value
+        return "[" + ", ".join(to_string(item) for item in items) + "]"
+    if isinstance(value, dict):
+        return "[" + ", ".join(f"{to_string(k)}:{to_string(v)}" for k, v in value.items()) + "]" if value else "[:]"
+    if isinstance(value, datetime):
+        return format_date(value, "EEE MMM dd HH:mm:ss zzz yyyy")
+    if isinstance(value, ClassRef):
+        return f"class {value.name}"
+    return str(value)
+
+
+def groovy_equals(a: Any, b: Any) -> bool:
+    if is_number(a) and is_number(b):
+        return a == b
+    if isinstance(a, bool) or isinstance(b, bool):
+        return type(a) is type(b) and a == b
+    if isinstance(a, (list, GRange)) and isinstance(b, (list, GRange)):
+        a_items = a.to_list() if isinstance(a, GRange) else a
+        b_items = b.to_list() if isinstance(b, GRange) else b
+        return len(a_items) == len(b_items) and all(groovy_equals(x, y) for x, y in zip(a_items, b_items))
+    if isinstance(a, dict) and isinstance(b, dict):
+        return a.keys() == b.keys() and all(groovy_equals(a[k], b[k]) for k in a)
+    if isinstance(a, datetime) and isinstance(b, datetime):
+        return as_utc(a) == as_utc(b)
+    return type(a) is type(b) and a == b
+
+
+def compare(a: Any, b: Any) -> int:
+    if a is None or b is None:
+        return (a is not None) - (b is not None)
+    if is_number(a) and is_number(b) or isinstance(a, str) and isinstance(b, str):
+        return (a > b) - (a < b)
+    if isinstance(a, datetime) and isinstance(b, datetime):
+        return (as_utc(a) > as_utc(b)) - (as_utc(a) < as_utc(b))
+    if isinstance(a, bool) and isinstance(b, bool):
+        return int(a) - int(b)
+    raise GroovyError(f"Cannot compare {type_name(a)} with {type_name(b)}")
+
+
+def type_name(value: Any) -> str:
+    if value is None:
+        return "null"
+    return {
+        bool: "java.lang.Boolean",
+        int: "java.lang.Integer",
+        float: "java.math.BigDecimal",
+        str: "java.lang.String",
+        list: "java.util.ArrayList",
+        dict: "java.util.LinkedHashMap",
+        datetime: "java.util.Date",
+    }.get(type(value), type(value).__name__)
+
+
+# ---- dates ----
+
+_DATE_TOKEN = re.compile(r"'(?:[^']|'')*'|([A-Za-z])\1*|.", re.S)
+_MONTHS = ["January", "February", "March", "April", "May", "June", "July", "August", "September", "October",
+           "November", "December"]  # fmt: skip
+_DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+
+def as_utc(value: datetime) -> datetime:
+    """
+    Convert an aware datetime to a naive UTC datetime.
+    """
+    return value.astimezone(timezone.utc).replace(tzinfo=None) if value.tzinfo else value
+
+
+def _date_tokens(pattern: str) -> Iterator[Tuple[str, str]]:
+    # yields ("literal", text) or (letter, run)
+    for match in _DATE_TOKEN.finditer(pattern):
+        token = match.group(0)
+        if token.startswith("'"):
+            yield "literal", token[1:-1].replace("''", "'") if token != "''" else "'"
+        elif token[0].isalpha():
+            yield token[0], token
+        else:
+            yield "literal", token
+
+
+def _offset(value: datetime, letter: str, n: int) -> str:
+    offset = value.strftime("%z")
+    if letter == "X" and offset == "+0000":
+        return "Z"
+    if letter == "X" and n == 1:
+        return offset[:3]
+    if letter == "X" and n >= 3:
+        return f"{offset[:3]}:{offset[3:]}"
+    return offset
+
+
+def _date_field(value: datetime, letter: str, n: int) -> str:
+    if letter == "y":
+        return f"{value.year % 100:02d}" if n == 2 else str(value.year).zfill(n)
+    if letter == "M":
+        name = _MONTHS[value.month - 1]
+        return name[:3] if n == 3 else name if n > 3 else f"{value.month:0{n}d}"
+    if letter == "E":
+        name = _DAYS[value.weekday()]
+        return name if n > 3 else name[:3]
+    if letter == "a":
+        return "AM" if value.hour < 12 else "PM"
+    if letter in "ZX":
+        return _offset(value, letter, n)
+    if letter == "z":
+        return value.tzname() or "UTC"
+    numbers = {
+        "d": value.day,
+        "H": value.hour,
+        "h": (value.hour % 12) or 12,
+        "m": value.minute,
+        "s": value.second,
+        "S": value.microsecond // 1000,
+    }
+    if letter not in numbers:
+        raise GroovyUnsupportedError(f"Unsupported date pattern letter {letter!r}")
+    return f"{numbers[letter]:0{n}d}"
+
+
+def format_date(value: datetime, pattern: str, zone: Optional[tzinfo] = None) -> str:
+    """
+    Format a date like `java.text.SimpleDateFormat`.
+    """
+    local = (value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value).astimezone(zone or timezone.utc)
+    return "".join(
+        run if letter == "literal" else _date_field(local, letter, len(run)) for letter, run in _date_tokens(pattern)
+    )
+
+
+_DATE_FIELD_PATTERNS = {
+    "d": r"(\d{1,2})",
+    "H": r"(\d{1,2})",
+    "h": r"(\d{1,2})",
+    "m": r"(\d{1,2})",
+    "s": r"(\d{1,2})",
+    "S": r"(\d{1,3})",
+    "a": "([AaPp][Mm])",
+    "E": "([A-Za-z]+)",
+    "Z": r"(Z|[+-]\d{2}:?\d{2}|[+-]\d{2})",
+    "X": r"(Z|[+-]\d{2}:?\d{2}|[+-]\d{2})",
+}
+
+
+def _date_field_pattern(letter: str, n: int) -> str:
+    if letter == "y":
+        return r"(\d{2})" if n == 2 else r"(\d{1,4})"
+    if letter == "M":
+        return "([A-Za-z]+)" if n >= 3 else r"(\d{1,2})"
+    if letter not in _DATE_FIELD_PATTERNS:
+        raise GroovyUnsupportedError(f"Unsupported date pattern letter {letter!r}")
+    return _DATE_FIELD_PATTERNS[letter]
+
+
+def parse_date(pattern: str, text: str) -> datetime:
+    """
+    Parse a date like `java.text.SimpleDateFormat.parse`; trailing text is ignored.
+    """
+    regex = []
+    fields = []
+    for letter, run in _date_tokens(pattern):
+        if letter == "literal":
+            regex.append(re.escape(run))
+        else:
+            regex.append(_date_field_pattern(letter, len(run)))
+            fields.append((letter, run))
+    match = re.match("".join(regex), text)
+    if not match:
+        raise GroovyError(f'ParseException: Unparseable date: "{text}"')
+    parts: Dict[str, Any] = {"y": 1970, "M": 1, "d": 1, "H": 0, "m": 0, "s": 0, "S": 0}
+    pm = None
+    offset = None
+    for (letter, run), group in zip(fields, match.groups()):
+        if letter == "M" and len(run) >= 3:
+            month = next((i for i, name in enumerate(_MONTHS) if name.lower().startswith(group.lower()[:3])), None)
+            if month is None:
+                raise GroovyError(f'ParseException: Unparseable date: "{text}"')
+            parts["M"] = month + 1
+        elif letter == "y":
+            parts["y"] = int(group) + (2000 if len(run) == 2 and int(group) < 80 else 1900 if len(run) == 2 else 0)
+        elif letter == "h":
+            parts["H"] = int(group) % 12
+        elif letter == "a":
+            pm = group.lower() == "pm"
+        elif letter in "ZX":
+            offset = group
+        elif letter != "E":
+            parts[letter] = int(group)
+    if pm:
+        parts["H"] += 12
+    try:
+        value = datetime(parts["y"], parts["M"], parts["d"], parts["H"], parts["m"], parts["s"], parts["S"] * 1000)
+    except ValueError as exc:
+        raise GroovyError(f'ParseException: Unparseable date: "{text}"') from exc
+    if offset and offset != "Z":
+        sign = -1 if offset[0] == "-" else 1
+        digits = offset[1:].replace(":", "")
+        value -= sign * timedelta(hours=int(digits[:2]), minutes=int(digits[2:] or 0))
+    return value
+
+
+def time_zone(zone_id: str) -> tzinfo:
+    if zone_id in ("UTC", "GMT", "Z"):
+        return timezone.utc
+    try:
+        return ZoneInfo(zone_id)
+    except (ValueError, KeyError) as exc:
+        raise GroovyUnsupportedError(f"Unknown time zone {zone_id!r}") from exc
+
+
+# ---- regular expressions ----
+
+_JAVA_CLASSES = {
+    r"\p{InCombiningDiacriticalMarks}": "[̀-ͯ]",
+    r"\p{M}": "[̀-ͯ]",
+    r"\p{Mn}": "[̀-ͯ]",
+    r"\p{Alpha}": "[A-Za-z]",
+    r"\p{Digit}": "[0-9]",
+    r"\p{Alnum}": "[A-Za-z0-9]",
+    r"\p{Upper}": "[A-Z]",
+    r"\p{Lower}": "[a-z]",
+    r"\p{Punct}": "[!-/:-@\\[-`{-~]",
+    r"\p{Space}": "\\s",
+    r"\p{L}": "[^\\W\\d_]",
+    r"\p{IsAlphabetic}": "[^\\W\\d_]",
+}
+
+
+# `time.monotonic()` after which the evaluation of the current script is stopped, if any
+_deadline: ContextVar[Optional[float]] = ContextVar("groovy_deadline", default=None)
+
+
+class JavaRegex:
+    """
+    Compiled Java regular expression matching within the evaluation deadline.
+
+    A single catastrophically backtracking match never returns to the interpreter to check the deadline, so
+    every match is run by the `regex` engine with the remaining time as its timeout.
+    """
+
+    def __init__(self, pattern: Any):
+        self.pattern = pattern
+
+    def _run(self, method: str, *args: Any) -> Any:
+        deadline = _deadline.get()
+        timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+        try:
+            result = getattr(self.pattern, method)(*args, timeout=timeout)
+            return list(result) if method == "finditer" else result
+        except TimeoutError as exc:
+            raise GroovyUnsupportedError("Script evaluation exceeded the time limit") from exc
+
+    def search(self, text: str) -> Any:
+        return self._run("search", text)
+
+    def fullmatch(self, text: str) -> Any:
+        return self._run("fullmatch", text)
+
+    def finditer(self, text: str) -> List[Any]:
+        return self._run("finditer", text)
+
+    def sub(self, replacement: Callable[[Any], str], text: str, count: int = 0) -> str:
+        return self._run("sub", replacement, text, count)
+
+
+@lru_cache(maxsize=256)
+def java_regex(pattern: str) -> JavaRegex:
+    """
+    Compile a Java regular expression.
+    """
+    translated = re.sub(r"\\Q(.*?)(\\E|$)", lambda m: re.escape(m.group(1)), pattern)
+    for java, python in _JAVA_CLASSES.items():
+        translated = translated.replace(java, python)
+    translated = translated.replace("(?<", "(?P<").replace("(?P<=", "(?<=").replace("(?P<!", "(?<!")
+    if "\\p{" in translated or "\\P{" in translated:
+        raise GroovyUnsupportedError(f"Unsupported regular expression {pattern!r}")
+    try:
+        return JavaRegex(regex.compile(translated))
+    except regex.error as exc:
+        raise GroovyUnsupportedError(f"Unsupported regular expression {pattern!r}: {exc}") from exc
+
+
+def java_replacement(replacement: Any) -> Callable[["re.Match[str]"], str]:
+    """
+    Replacement function of a Java replacement string (`$1`, `${name}`) or a Groovy closure.
+    """
+    if isinstance(replacement, Closure):
+
+        def call_closure(match: "re.Match[str]") -> str:
+            groups = [match.group(0), *match.groups()]
+            return to_string(replacement(groups if match.groups() else match.group(0)))
+
+        return call_closure
+
+    template = to_string(replacement)
+
+    def expand(match: "re.Match[str]") -> str:
+        out = []
+        i = 0
+        while i < len(template):
+            c = template[i]
+            if c == "\\" and i + 1 < len(template):
+                out.append(template[i + 1])
+                i += 2
+            elif c == "$":
+                named = re.match(r"\{(\w+)\}", template[i + 1 :])
+                numbered = re.match(r"\d", template[i + 1 :])
+                if named:
+                    out.append(match.group(named.group(1)) or "")
+                    i += 1 + named.end()
+                elif numbered:
+                    out.append(match.group(int(numbered.group(0))) or "")
+                    i += 2
+                else:
+                    raise GroovyError("IllegalArgumentException: Illegal group reference")
+            else:
+                out.append(c)
+                i += 1
+        return "".join(out)
+
+    return expand
+
+
+def java_split(value: str, regex: str, limit: int = 0) -> List[str]:
+    """
+    Split like Java `String.split`: no leading empty part for a zero-width match, trailing empty parts
+    removed when the limit is zero.
+    """
+    if value == "":
+        return [""]
+    parts: List[str] = []
+    start = 0
+    for match in java_regex(regex).finditer(value):
+        if limit > 0 and len(parts) == limit - 1:
+            break
+        if match.end() == 0:
+            continue
+        parts.append(value[start : match.start()])
+        start = match.end()
+    parts.append(value[start:])
+    if limit == 0:
+        while parts and parts[-1] == "":
+            parts.pop()
+    return parts
+
+
+# ---- library ----
+
+
+def _require_int(value: Any) -> int:
+    if not isinstance(value, int) or isinstance(value, bool):
+        raise GroovyUnsupportedError(f"Expected an integer argument, got {type_name(value)}")
+    return value
+
+
+def _parse_int(value: Any, trim: bool = False) -> int:
+    text = to_string(value)
+    text = text.strip() if trim else text
+    if not re.fullmatch(r"[+-]?\d+", text):
+        raise GroovyError(f'NumberFormatException: For input string: "{text}"')
+    return int(text)
+
+
+def _parse_float(value: Any) -> float:
+    text = to_string(value).strip()
+    try:
+        return float(text)
+    except ValueError as exc:
+        raise GroovyError(f'NumberFormatException: For input string: "{text}"') from exc
+
+
+def _substring(s: str, begin: int, end: Optional[int] = None) -> str:
+    end = len(s) if end is None else _require_int(end)
+    if _require_int(begin) < 0 or end > len(s) or begin > end:
+        raise GroovyError(f"StringIndexOutOfBoundsException: begin {begin}, end {end}, length {len(s)}")
+    return s[begin:end]
+
+
+def _char_at(s: str, index: int) -> str:
+    if not 0 <= _require_int(index) < len(s):
+        raise GroovyError(f"StringIndexOutOfBoundsException: index {index}, length {len(s)}")
+    return s[index]
+
+
+def _get_at(value: Any, index: Any) -> Any:
+    if isinstance(index, (GRange, list)):
+        positions = index.to_list() if isinstance(index, GRange) else index
+        selected = [_get_at(value, position) for position in positions]
+        return "".join(selected) if isinstance(value, str) else selected
+    if isinstance(value, dict):
+        return value.get(index)
+    if isinstance(value, RegexMatcher):
+        if not 0 <= _require_int(index) < len(value.matches):
+            raise GroovyError(f"IndexOutOfBoundsException: index is out of range {index}")
+        return value.get(index)
+    position = _require_int(index)
+    if isinstance(value, str):
+        if not -len(value) <= position < len(value):
+            raise GroovyError(f"StringIndexOutOfBoundsException: index {position}, length {len(value)}")
+        return value[position]
+    if isinstance(value, list):
+        if position >= len(value):
+            return None
+        if position < -len(value):
+            raise GroovyError(f"ArrayIndexOutOfBoundsException: Negative array index [{position}] too large")
+        return value[position]
+    raise GroovyUnsupportedError(f"Cannot index {type_name(value)}")
+
+
+def _first(items: List[Any]) -> Any:
+    if not items:
+        raise GroovyError("NoSuchElementException: Cannot access first() element from an empty List")
+    return items[0]
+
+
+def _last(items: List[Any]) -> Any:
+    if not items:
+        raise GroovyError("NoSuchElementException: Cannot access last() element from an empty List")
+    return items[-1]
+
+
+def _pad(s: str, n: int, pad: str, left: bool) -> str:
+    missing = _require_int(n) - len(s)
+    if missing <= 0 or not pad:
+        return s
+    check_size(len(s) + missing)
+    fill = (pad * missing)[:missing]
+    return fill + s if left else s + fill
+
+
+def _unique(items: List[Any]) -> List[Any]:
+    result: List[Any] = []
+    for item in items:
+        if not any(groovy_equals(item, seen) for seen in result):
+            result.append(item)
+    return result
+
+
+def _sort_key(closure: Optional[Closure]) -> Callable[[Any], Any]:
+    if closure is None:
+        return functools.cmp_to_key(compare)
+    if closure.arity == 2:
+        return functools.cmp_to_key(lambda a, b: _require_int(closure(a, b)))
+    return functools.cmp_to_key(lambda a, b: compare(closure(a), closure(b)))
+
+
+def _sorted(items: List[Any], closure: Optional[Closure] = None, mutate: bool = True) -> List[Any]:
+    result = sorted(items, key=_sort_key(closure))
+    if mutate:
+        items[:] = result
+        return items
+    return result
+
+
+def _sum(items: List[Any], initial: Any = None) -> Any:
+    total = initial
+    for item in items:
+        total = item if total is None else binary_op("+", total, item)
+    return total
+
+
+def _contains(container: Any, item: Any) -> bool:
+    if isinstance(container, str):
+        return to_string(item) in container
+    if isinstance(container, dict):
+        return item in container
+    if isinstance(container, GRange):
+        return item in container.to_list()
+    return any(groovy_equals(item, element) for element in container)
+
+
+def _plus(a: Any, b: Any) -> Any:
+    return binary_op("+", a, b)
+
+
+def _join(items: List[Any], separator: str = "") -> str:
+    return to_string(separator).join(to_string(item) for item in items)
+
+
+def _minus_string(s: str, other: Any) -> str:
+    text = to_string(other)
+    index = s.find(text)
+    return s if index < 0 else s[:index] + s[index + len(text) :]
+
+
+def _is_number(s: str) -> bool:
+    return bool(re.fullmatch(r"[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?[dDfFgG]?", s.strip()))
+
+
+def _each(items: List[Any], closure: Closure, with_index: bool = False) -> List[Any]:
+    for index, item in enumerate(items):
+        closure(item, index) if with_index else closure(item)
+    return items
+
+
+def _unique_method(items: List[Any], *args: Any) -> List[Any]:
+    if any(not isinstance(arg, bool) for arg in args):
+        raise GroovyUnsupportedError("unique() with a comparator is not supported")
+    result = _unique(items)
+    if args and args[0] is False:
+        return result
+    items[:] = result
+    return items
+
+
+def _filtered(items: List[Any], closure: Optional[Closure]) -> List[Any]:
+    return [item for item in items if truth(closure(item) if closure else item)]
+
+
+def _grep(items: List[Any], criterion: Any = None) -> List[Any]:
+    if criterion is None:
+        return _filtered(items, None)
+    if isinstance(criterion, Closure):
+        return _filtered(items, criterion)
+    if isinstance(criterion, str):
+        pattern = java_regex(criterion)
+        return [item for item in items if pattern.fullmatch(to_string(item))]
+    return [item for item in items if groovy_equals(item, criterion)]
+
+
+def _collect_entries(items: Any, closure: Optional[Closure] = None) -> Dict[Any, Any]:
+    result: Dict[Any, Any] = {}
+    for item in items:
+        entry = closure(item) if closure else item
+        if isinstance(entry, dict):
+            result.update(entry)
+        elif isinstance(entry, list) and len(entry) == 2:
+            result[entry[0]] = entry[1]
+        else:
+            raise GroovyError("collectEntries closure must return a Map or a two-element List")
+    return result
+
+
+def _flatten(items: List[Any]) -> List[Any]:
+    result: List[Any] = []
+    for item in items:
+        result.extend(_flatten(item) if isinstance(item, list) else [item])
+    return result
+
+
+def _inject(items: List[Any], *args: Any) -> Any:
+    if len(args) == 1:
+        if not items:
+            raise GroovyError(
+                "NoSuchElementException: Cannot call inject() on an empty collection without an initial value"
+            )
+        accumulator, rest, closure = items[0], items[1:], args[0]
+    else:
+        accumulator, rest, closure = args[0], items, args[1]
+    for item in rest:
+        accumulator = closure(accumulator, item)
+    return accumulator
+
+
+def _find(items: List[Any], closure: Optional[Closure] = None) -> Any:
+    return next((item for item in items if truth(closure(item) if closure else item)), None)
+
+
+def _tokenize(s: str, delimiters: Any = None) -> List[str]:
+    chars = " \t\n\r\f" if delimiters is None else to_string(delimiters)
+    return [token for token in re.split("[" + re.escape(chars) + "]", s) if token]
+
+
+def _strip_accents(s: Optional[str]) -> Optional[str]:
+    if s is None:
+        return None
+    return "".join(c for c in unicodedata.normalize("NFD", s) if not unicodedata.combining(c))
+
+
+def _java_trim(s: str) -> str:
+    start, end = 0, len(s)
+    while start < end and s[start] <= " ":
+        start += 1
+    while end > start and s[end - 1] <= " ":
+        end -= 1
+    return s[start:end]
+
+
+def _java_format(pattern: str, *args: Any) -> str:
+    converted = [to_string(arg) if isinstance(arg, (bool, type(None))) else arg for arg in args]
+    try:
+        return to_string(pattern).replace("%n", "\n") % tuple(converted)
+    except (TypeError, ValueError) as exc:
+        raise GroovyUnsupportedError(f"Unsupported format {pattern!r}") from exc
+
+
+def _normalize(s: str, form: Any) -> str:
+    name = form.simple_name if isinstance(form, ClassRef) else to_string(form)
+    if name not in ("NFC", "NFD", "NFKC", "NFKD"):
+        raise GroovyUnsupportedError(f"Unsupported normalization form {name!r}")
+    return unicodedata.normalize(name, s)  # type: ignore[arg-type]
+
+
+def _round_half_up(value: float) -> int:
+    return int((value + 0.5) // 1)
+
+
+STRING_METHODS: Dict[str, Callable[..., Any]] = {
+    "toUpperCase": lambda s: s.upper(),
+    "toLowerCase": lambda s: s.lower(),
+    "trim": _java_trim,
+    "strip": lambda s: s.strip(),
+    "stripLeading": lambda s: s.lstrip(),
+    "stripTrailing": lambda s: s.rstrip(),
+    "length": len,
+    "size": len,
+    "isEmpty": lambda s: s == "",
+    "isBlank": lambda s: s.strip() == "",
+    "isAllWhitespace": lambda s: s.strip() == "",
+    "substring": _substring,
+    "subSequence": _substring,
+    "charAt": _char_at,
+    "indexOf": lambda s, sub, start=0: s.find(to_string(sub), _require_int(start)),
+    "lastIndexOf": lambda s, sub: s.rfind(to_string(sub)),
+    "contains": lambda s, sub: to_string(sub) in s,
+    "startsWith": lambda s, prefix: s.startswith(to_string(prefix)),
+    "endsWith": lambda s, suffix: s.endswith(to_string(suffix)),
+    "equals": lambda s, other: isinstance(other, str) and s == other,
+    "equalsIgnoreCase": lambda s, other: isinstance(other, str) and s.lower() == other.lower(),
+    "compareTo": lambda s, other: compare(s, other),
+    "compareToIgnoreCase": lambda s, other: compare(s.lower(), to_string(other).lower()),
+    "replace": lambda s, old, new: s.replace(to_string(old), to_string(new)),
+    "replaceAll": lambda s, regex, replacement: java_regex(to_string(regex)).sub(java_replacement(replacement), s),
+    "replaceFirst": lambda s, regex, replacement: java_regex(to_string(regex)).sub(
+        java_replacement(replacement), s, count=1
+    ),
+    "split": lambda s, regex=None, limit=0: s.split() if regex is None else java_split(s, to_string(regex), limit),
+    "tokenize": _tokenize,
+    "matches": lambda s, regex: java_regex(to_string(regex)).fullmatch(s) is not None,
+    "find": lambda s, regex: (lambda m: m.group(0) if m else None)(java_regex(to_string(regex)).search(s)),
+    "findAll": lambda s, regex: [m.group(0) for m in java_regex(to_string(regex)).finditer(s)],
+    "toInteger": lambda s: _parse_int(s, trim=True),
+    "toLong": lambda s: _parse_int(s, trim=True),
+    "toBigInteger": lambda s: _parse_int(s, trim=True),
+    "toDouble": _parse_float,
+    "toFloat": _parse_float,
+    "toBigDecimal": _parse_float,
+    "toBoolean": lambda s: s.strip().lower() in ("true", "y", "1"),
+    "isNumber": _is_number,
+    "isBigDecimal": _is_number,
+    "isDouble": _is_number,
+    "isFloat": _is_number,
+    "isInteger": lambda s: bool(re.fullmatch(r"[+-]?\d+", s.strip())),
+    "isLong": lambda s: bool(re.fullmatch(r"[+-]?\d+", s.strip())),
+    "toString": lambda s: s,
+    "intern": lambda s: s,
+    "capitalize": lambda s: s[:1].upper() + s[1:],
+    "uncapitalize": lambda s: s[:1].lower() + s[1:],
+    "take": lambda s, n: s[: max(0, _require_int(n))],
+    "drop": lambda s, n: s[max(0, _require_int(n)) :],
+    "takeRight": lambda s, n: s[len(s) - min(len(s), max(0, _require_int(n))) :],
+    "dropRight": lambda s, n: s[: len(s) - min(len(s), max(0, _require_int(n)))],
+    "reverse": lambda s: s[::-1],
+    "padLeft": lambda s, n, pad=" ": _pad(s, n, to_string(pad), left=True),
+    "padRight": lambda s, n, pad=" ": _pad(s, n, to_string(pad), left=False),
+    "getAt": _get_at,
+    "plus": _plus,
+    "concat": lambda s, other: sized(s + other) if isinstance(other, str) else _unsupported_argument("concat", other),
+    "minus": _minus_string,
+    "multiply": repeat,
+    "count": lambda s, sub: s.count(to_string(sub)),
+    "toList": list,
+    "toCharArray": list,
+    "chars": list,
+    "readLines": lambda s: s.splitlines(),
+    "asBoolean": lambda s: s != "",
+}
+
+LIST_METHODS: Dict[str, Callable[..., Any]] = {
+    "size": len,
+    "isEmpty": lambda items: not items,
+    "get": lambda items, i: items[i] if 0 <= _require_int(i) < len(items) else _index_error(i, len(items)),
+    "getAt": _get_at,
+    "first": _first,
+    "last": _last,
+    "head": _first,
+    "tail": lambda items: items[1:] if items else _first(items),
+    "init": lambda items: items[:-1] if items else _last(items),
+    "collect": lambda items, closure=None: [closure(item) if closure else item for item in items],
+    "collectMany": lambda items, closure: _flatten([closure(item) for item in items]),
+    "collectEntries": _collect_entries,
+    "findAll": _filtered,
+    "grep": _grep,
+    "find": _find,
+    "findResult": lambda items, closure: next((r for r in (closure(i) for i in items) if r is not None), None),
+    "findIndexOf": lambda items, closure: next((i for i, item in enumerate(items) if truth(closure(item))), -1),
+    "any": lambda items, closure=None: any(truth(closure(item) if closure else item) for item in items),
+    "every": lambda items, closure=None: all(truth(closure(item) if closure else item) for item in items),
+    "each": _each,
+    "eachWithIndex": lambda items, closure: _each(items, closure, with_index=True),
+    "count": lambda items, criterion: sum(
+        1
+        for item in items
+        if (truth(criterion(item)) if isinstance(criterion, Closure) else groovy_equals(item, criterion))
+    ),
+    "join": _join,
+    "contains": _contains,
+    "containsAll": lambda items, others: all(_contains(items, other) for other in others),
+    "indexOf": lambda items, item: next((i for i, element in enumerate(items) if groovy_equals(element, item)), -1),
+    "unique": _unique_method,
+    "toUnique": _unique,
+    "sort": lambda items, *args: _sorted(
+        items,
+        next((a for a in args if isinstance(a, Closure)), None),
+        mutate=next((a for a in args if isinstance(a, bool)), True),
+    ),
+    "toSorted": lambda items, closure=None: _sorted(items, closure, mutate=False),
+    "reverse": lambda items: items[::-1],
+    "sum": _sum,
+    "min": lambda items, closure=None: min(items, key=_sort_key(closure)) if items else None,
+    "max": lambda items, closure=None: max(items, key=_sort_key(closure)) if items else None,
+    "plus": _plus,
+    "minus": lambda items, other: binary_op("-", items, other),
+    "flatten": _flatten,
+    "toList": list,
+    "asList": list,
+    "toArray": list,
+    "toSet": _unique,
+    "take": lambda items, n: items[: max(0, _require_int(n))],
+    "drop": lambda items, n: items[max(0, _require_int(n)) :],
+    "takeRight": lambda items, n: items[len(items) - min(len(items), max(0, _require_int(n))) :],
+    "dropRight": lambda items, n: items[: len(items) - min(len(items), max(0, _require_int(n)))],
+    "inject": _inject,
+    "add": lambda items, item: items.append(item) or True,
+    "addAll": lambda items, others: items.extend(others) or True,
+    "intersect": lambda items, others: [item for item in _unique(items) if _contains(others, item)],
+    "disjoint": lambda items, others: not any(_contains(others, item) for item in items),
+    "subList": lambda items, start, end: (
+        items[start:end]
+        if 0 <= _require_int(start) <= _require_int(end) <= len(items)
+        else _index_error(end, len(items))
+    ),
+    "split": lambda items, closure: [_filtered(items, closure), [i for i in items if not truth(closure(i))]],
+    "asBoolean": lambda items: bool(items),
+    "withIndex": lambda items: [[item, i] for i, item in enumerate(items)],
+}
+
+MAP_METHODS: Dict[str, Callable[..., Any]] = {
+    "get": lambda m, key, default=None: m.get(key, default),
+    "getAt": lambda m, key: m.get(key),
+    "getOrDefault": lambda m, key, default: m.get(key, default),
+    "containsKey": lambda m, key: key in m,
+    "containsValue": lambda m, value: any(groovy_equals(v, value) for v in m.values()),
+    "keySet": lambda m: list(m.keys()),
+    "values": lambda m: list(m.values()),
+    "entrySet": lambda m: [MapEntry(k, v) for k, v in m.items()],
+    "size": len,
+    "isEmpty": lambda m: not m,
+    "each": lambda m, closure: _each([MapEntry(k, v) for k, v in m.items()], closure) and m,
+    "collect": lambda m, closure: [_call_entry(closure, k, v) for k, v in m.items()],
+    "findAll": lambda m, closure: {k: v for k, v in m.items() if truth(_call_entry(closure, k, v))},
+    "find": lambda m, closure: next((MapEntry(k, v) for k, v in m.items() if truth(_call_entry(closure, k, v))), None),
+    "any": lambda m, closure: any(truth(_call_entry(closure, k, v)) for k, v in m.items()),
+    "every": lambda m, closure: all(truth(_call_entry(closure, k, v)) for k, v in m.items()),
+    "collectEntries": lambda m, closure: _collect_entries([MapEntry(k, v) for k, v in m.items()], closure),
+    "put": lambda m, key, value: m.__setitem__(key, value),
+    "plus": _plus,
+    "asBoolean": lambda m: bool(m),
+}
+
+NUMBER_METHODS: Dict[str, Callable[..., Any]] = {
+    "toString": to_string,
+    "toInteger": int,
+    "intValue": int,
+    "toLong": int,
+    "longValue": int,
+    "toDouble": float,
+    "doubleValue": float,
+    "toBigDecimal": float,
+    "toBigInteger": int,
+    "abs": abs,
+    "round": lambda n, digits=None: _round_half_up(n) if digits is None else round(n, _require_int(digits)),
+    "intdiv": lambda n, d: int(n / d) if d else _division_by_zero(),
+    "compareTo": compare,
+    "equals": groovy_equals,
+    "plus": _plus,
+    "minus": lambda n, other: binary_op("-", n, other),
+    "multiply": lambda n, other: binary_op("*", n, other),
+    "div": lambda n, other: binary_op("/", n, other),
+    "asBoolean": lambda n: n != 0,
+}
+
+BOOLEAN_METHODS: Dict[str, Callable[..., Any]] = {
+    "toString": to_string,
+    "booleanValue": lambda b: b,
+    "equals": lambda b, other: isinstance(other, bool) and b == other,
+    "and": lambda b, other: b and truth(other),
+    "or": lambda b, other: b or truth(other),
+    "xor": lambda b, other: b != truth(other),
+    "asBoolean": lambda b: b,
+}
+
+DATE_METHODS: Dict[str, Callable[..., Any]] = {
+    "format": lambda d, pattern, zone=None: format_date(d, to_string(pattern), zone),
+    "getTime": lambda d: int(as_utc(d).replace(tzinfo=timezone.utc).timestamp() * 1000),
+    "before": lambda d, other: compare(d, other) < 0,
+    "after": lambda d, other: compare(d, other) > 0,
+    "compareTo": compare,
+    "equals": groovy_equals,
+    "plus": lambda d, days: d + timedelta(days=_require_int(days)),
+    "minus": lambda d, other: binary_op("-", d, other),
+    "toString": to_string,
+}
+
+MATCHER_METHODS: Dict[str, Callable[..., Any]] = {
+    "find": lambda m: bool(m.matches),
+    "matches": lambda m: bool(m.matches),
+    "getCount": lambda m: len(m.matches),
+    "size": lambda m: len(m.matches),
+    "getAt": _get_at,
+    "group": lambda m, index=0: m.matches[0].group(index) if m.matches else _illegal_state("No match found"),
+    "asBoolean": lambda m: bool(m.matches),
+}
+
+
+def _index_error(index: Any, size: int) -> Any:
+    raise GroovyError(f"IndexOutOfBoundsException: Index {index} out of bounds for length {size}")
+
+
+def _division_by_zero() -> Any:
+    raise GroovyError("ArithmeticException: Division by zero")
+
+
+def _illegal_state(message: str) -> Any:
+    raise GroovyError(f"IllegalStateException: {message}")
+
+
+def _unsupported_argument(method: str, value: Any) -> Any:
+    raise GroovyUnsupportedError(f"Unsupported argument of {method}: {type_name(value)}")
+
+
+def _call_entry(closure: Closure, key: Any, value: Any) -> Any:
+    return closure(key, value) if closure.arity == 2 else closure(MapEntry(key, value))
+
+
+def _string_utils(name: str) -> Optional[Callable[..., Any]]:
+    def null_safe(function: Callable[..., Any]) -> Callable[..., Any]:
+        return lambda s, *args: None if s is None else function(to_string(s), *args)
+
+    def before(s: str, separator: Any, last: bool = False) -> str:
+        separator = to_string(separator)
+        index = s.rfind(separator) if last else s.find(separator)
+        return s if index < 0 else s[:index]
+
+    def after(s: str, separator: Any, last: bool = False) -> str:
+        separator = to_string(separator)
+        index = s.rfind(separator) if last else s.find(separator)
+        return "" if index < 0 else s[index + len(separator) :]
+
+    functions: Dict[str, Callable[..., Any]] = {
+        "isBlank": lambda s: s is None or to_string(s).strip() == "",
+        "isNotBlank": lambda s: s is not None and to_string(s).strip() != "",
+        "isEmpty": lambda s: s is None or s == "",
+        "isNotEmpty": lambda s: s is not None and s != "",
+        "stripAccents": _strip_accents,
+        "capitalize": null_safe(lambda s: s[:1].upper() + s[1:]),
+        "uncapitalize": null_safe(lambda s: s[:1].lower() + s[1:]),
+        "upperCase": null_safe(str.upper),
+        "lowerCase": null_safe(str.lower),
+        "trim": null_safe(_java_trim),
+        "strip": null_safe(str.strip),
+        "trimToNull": lambda s: None if s is None or _java_trim(to_string(s)) == "" else _java_trim(to_string(s)),
+        "trimToEmpty": lambda s: "" if s is None else _java_trim(to_string(s)),
+        "defaultString": lambda s, default="": default if s is None else s,
+        "defaultIfBlank": lambda s, default: default if s is None or to_string(s).strip() == "" else s,
+        "defaultIfEmpty": lambda s, default: default if s is None or s == "" else s,
+        "substringBefore": null_safe(before),
+        "substringAfter": null_safe(after),
+        "substringBeforeLast": null_safe(lambda s, sep: before(s, sep, last=True)),
+        "substringAfterLast": null_safe(lambda s, sep: after(s, sep, last=True)),
+        "left": null_safe(lambda s, n: s[: max(0, _require_int(n))]),
+        "right": null_safe(lambda s, n: s[len(s) - min(len(s), max(0, _require_int(n))) :]),
+        "leftPad": null_safe(lambda s, n, pad=" ": _pad(s, n, to_string(pad), left=True)),
+        "rightPad": null_safe(lambda s, n, pad=" ": _pad(s, n, to_string(pad), left=False)),
+        "remove": null_safe(lambda s, sub: s.replace(to_string(sub), "")),
+        "replace": null_safe(lambda s, old, new: s.replace(to_string(old), to_string(new))),
+        "deleteWhitespace": null_safe(lambda s: re.sub(r"\s", "", s)),
+        "contains": lambda s, sub: s is not None and to_string(sub) in to_string(s),
+        "startsWith": lambda s, prefix: s is not None and to_string(s).startswith(to_string(prefix)),
+        "endsWith": lambda s, suffix: s is not None and to_string(s).endswith(to_string(suffix)),
+        "equals": lambda a, b: groovy_equals(a, b),
+        "equalsIgnoreCase": lambda a, b: a is b is None or (a is not None and b is not None and a.lower() == b.lower()),
+        "join": lambda items, separator="": None if items is None else _join(items, separator or ""),
+        "reverse": null_safe(lambda s: s[::-1]),
+        "isNumeric": lambda s: s is not None and to_string(s).isdigit(),
+        "isAlpha": lambda s: s is not None and to_string(s).isalpha(),
+    }
+    return functions.get(name)
+
+
+STATIC_METHODS: Dict[str, Callable[..., Any]] = {
+    "Date.parse": lambda pattern, text, zone=None: parse_date(to_string(pattern), to_string(text)),
+    "String.valueOf": to_string,
+    "String.format": _java_format,
+    "String.join": lambda separator, *items: _join(
+        items[0] if len(items) == 1 and isinstance(items[0], list) else list(items), separator
+    ),
+    "Integer.parseInt": _parse_int,
+    "Integer.valueOf": _parse_int,
+    "Long.parseLong": _parse_int,
+    "Long.valueOf": _parse_int,
+    "Double.parseDouble": _parse_float,
+    "Double.valueOf": _parse_float,
+    "Float.parseFloat": _parse_float,
+    "Boolean.parseBoolean": lambda s: s is not None and to_string(s).lower() == "true",
+    "Boolean.valueOf": lambda s: s if isinstance(s, bool) else s is not None and to_string(s).lower() == "true",
+    "Math.max": lambda a, b: a if compare(a, b) >= 0 else b,
+    "Math.min": lambda a, b: a if compare(a, b) <= 0 else b,
+    "Math.abs": abs,
+    "Math.round": _round_half_up,
+    "Math.floor": lambda n: float(int(n // 1)),
+    "Math.ceil": lambda n: float(-int(-n // 1)),
+    "TimeZone.getTimeZone": lambda zone_id: time_zone(to_string(zone_id)),
+    "Normalizer.normalize": lambda s, form: _normalize(to_string(s), form),
+    "Objects.equals": groovy_equals,
+    "Objects.isNull": lambda value: value is None,
+    "Objects.nonNull": lambda value: value is not None,
+    "Objects.toString": lambda value, default=None: (
+        default if value is None and default is not None else to_string(value)
+    ),
+}
+
+TYPE_CHECKS: Dict[str, Callable[[Any], bool]] = {
+    "String": lambda v: isinstance(v, str),
+    "CharSequence": lambda v: isinstance(v, str),
+    "GString": lambda v: isinstance(v, str),
+    "Integer": lambda v: isinstance(v, int) and not isinstance(v, bool),
+    "Long": lambda v: isinstance(v, int) and not isinstance(v, bool),
+    "BigInteger": lambda v: isinstance(v, int) and not isinstance(v, bool),
+    "Short": lambda v: isinstance(v, int) and not isinstance(v, bool),
+    "Double": lambda v: isinstance(v, float),
+    "Float": lambda v: isinstance(v, float),
+    "BigDecimal": lambda v: isinstance(v, float),
+    "Number": is_number,
+    "Boolean": lambda v: isinstance(v, bool),
+    "List": lambda v: isinstance(v, list),
+    "ArrayList": lambda v: isinstance(v, list),
+    "Collection": lambda v: isinstance(v, list),
+    "Iterable": lambda v: isinstance(v, (list, dict)),
+    "Set": lambda v: isinstance(v, list),
+    "Map": lambda v: isinstance(v, dict),
+    "Date": lambda v: isinstance(v, datetime),
+    "Object": lambda v: v is not None,
+}
+
+
+def cast(value: Any, target: str) -> Any:
+    """
+    Groovy `as` coercion.
+    """
+    if value is None:
+        return False if target in ("Boolean", "boolean") else None
+    if target in ("String", "CharSequence"):
+        return to_string(value)
+    if target in ("Integer", "int", "Long", "long", "BigInteger", "Short", "short"):
+        return int(value) if is_number(value) else _parse_int(value)
+    if target in ("Double", "double", "Float", "float", "BigDecimal", "Number"):
+        return float(value) if is_number(value) else _parse_float(value)
+    if target in ("Boolean", "boolean"):
+        return truth(value)
+    if target in ("List", "ArrayList", "Collection"):
+        return (
+            list(value.to_list() if isinstance(value, GRange) else value)
+            if isinstance(value, (list, GRange))
+            else [value]
+        )
+    if target in ("Set", "HashSet", "LinkedHashSet"):
+        return _unique(value if isinstance(value, list) else [value])
+    if target in TYPE_CHECKS and TYPE_CHECKS[target](value):
+        return value
+    raise GroovyUnsupportedError(f"Unsupported cast of {type_name(value)} to {target}")
+
+
+def binary_op(op: str, a: Any, b: Any) -> Any:
+    """
+    Evaluate an arithmetic, comparison or membership operator.
+    """
+    if op == "==":
+        return groovy_equals(a, b)
+    if op == "!=":
+        return not groovy_equals(a, b)
+    if op == "<=>":
+        return compare(a, b)
+    if op in ("<", "<=", ">", ">="):
+        result = compare(a, b)
+        return {"<": result < 0, "<=": result <= 0, ">": result > 0, ">=": result >= 0}[op]
+    if op in ("in", "!in"):
+        found = b is not None and _contains(b, a)
+        return found if op == "in" else not found
+    if op == "=~":
+        return RegexMatcher(java_regex(to_string(b)), to_string(a))
+    if op == "==~":
+        return java_regex(to_string(b)).fullmatch(to_string(a)) is not None
+    if op in ("..", "..<"):
+        return GRange(_require_int(a), _require_int(b), op == "..<")
+    if a is None:
+        if op == "+" and isinstance(b, str):
+            return "null" + b
+        raise GroovyError(f"NullPointerException: Cannot execute null{op}{to_string(b)}")
+    if op == "+":
+        if isinstance(a, str):
+            return sized(a + to_string(b))
+        if isinstance(a, list):
+            return sized(a + (b if isinstance(b, list) else [b]))
+        if isinstance(a, dict) and isinstance(b, dict):
+            return {**a, **b}
+        if isinstance(a, datetime) and is_number(b):
+            return a + timedelta(days=_require_int(b))
+        if is_number(a) and isinstance(b, str):
+            return to_string(a) + b
+    if op == "-":
+        if isinstance(a, str):
+            return _minus_string(a, b)
+        if isinstance(a, list):
+            removed = b if isinstance(b, list) else [b]
+            return [item for item in a if not any(groovy_equals(item, r) for r in removed)]
+        if isinstance(a, datetime) and isinstance(b, datetime):
+            return (as_utc(a).date() - as_utc(b).date()).days
+        if isinstance(a, datetime) and is_number(b):
+            return a - timedelta(days=_require_int(b))
+    if op == "*":
+        if isinstance(a, (str, list)) and is_number(b):
+            return repeat(a, b)
+    if op == "<<":
+        if isinstance(a, list):
+            a.append(b)
+            return sized(a)
+        if isinstance(a, str):
+            return sized(a + to_string(b))
+    if is_number(a) and is_number(b):
+        if op == "+":
+            return a + b
+        if op == "-":
+            return a - b
+        if op == "*":
+            return a * b
+        if op == "**":
+            return power(a, b)
+        if b == 0 and op in ("/", "%"):
+            return _division_by_zero()
+        if op == "/":
+            result = a / b
+            return int(result) if isinstance(a, int) and isinstance(b, int) and result.is_integer() else result
+        if op == "%":
+            return int(a - b * int(a / b)) if isinstance(a, int) and isinstance(b, int) else a % b
+    raise GroovyError(f"MissingMethodException: No signature of method: {type_name(a)}.{op}() for {type_name(b)}")
+
+
+METHODS_BY_TYPE: Sequence[Tuple[Callable[[Any], bool], Dict[str, Callable[..., Any]]]] = (
+    (lambda v: isinstance(v, str), STRING_METHODS),
+    (lambda v: isinstance(v, bool), BOOLEAN_METHODS),
+    (is_number, NUMBER_METHODS),
+    (lambda v: isinstance(v, list), LIST_METHODS),
+    (lambda v: isinstance(v, dict), MAP_METHODS),
+    (lambda v: isinstance(v, datetime), DATE_METHODS),
+    (lambda v: isinstance(v, RegexMatcher), MATCHER_METHODS),
+)
+
+KNOWN_METHODS = {name for _, methods in METHODS_BY_TYPE for name in methods}
+
+
+def methods_of(value: Any) -> Optional[Dict[str, Callable[..., Any]]]:
+    return next((methods for matches, methods in METHODS_BY_TYPE if matches(value)), None)
+
+
+def call_method(target: Any, name: str, args: List[Any]) -> Any:
+    """
+    Call a method of a runtime value.
+    """
+    if isinstance(target, GRange):
+        target = target.to_list()
+    if isinstance(target, ClassRef):
+        return call_static(target, name, args)
+    if isinstance(target, Closure) and name == "call":
+        return target(*args)
+    if isinstance(target, MapEntry) and name in ("getKey", "getValue"):
+        return target.key if name == "getKey" else target.value
+    if name == "with" and len(args) == 1 and isinstance(args[0], Closure):
+        return args[0](target)
+    if target is None:
+        if name == "toString":
+            return "null"
+        if name in ("equals", "is"):
+            return args[0] is None
+        if name == "asBoolean":
+            return False
+        raise GroovyError(f"NullPointerException: Cannot invoke method {name}() on null object")
+
+    methods = methods_of(target)
+    if methods is not None and name in methods:
+        try:
+            return methods[name](target, *args)
+        except TypeError as exc:
+            raise GroovyUnsupportedError(f"Unsupported call {type_name(target)}.{name}(): {exc}") from exc
+        except (RecursionError, MemoryError, OverflowError) as exc:
+            raise GroovyUnsupportedError(f"Call {type_name(target)}.{name}() could not be evaluated") from exc
+    if name == "toString":
+        return to_string(target)
+    if name in ("equals", "is"):
+        return groovy_equals(target, args[0])
+    if name == "asBoolean":
+        return truth(target)
+    if methods is not None and name in KNOWN_METHODS:
+        raise GroovyError(f"MissingMethodException: No signature of method: {type_name(target)}.{name}()")
+    raise GroovyUnsupportedError(f"Unsupported method {type_name(target)}.{name}()")
+
+
+def call_static(target: ClassRef, name: str, args: List[Any]) -> Any:
+    if target.simple_name == "StringUtils":
+        function = _string_utils(name)
+    else:
+        function = STATIC_METHODS.get(f"{target.simple_name}.{name}")
+    if function is None:
+        raise GroovyUnsupportedError(f"Unsupported static method {target.name}.{name}()")
+    try:
+        return function(*args)
+    except TypeError as exc:
+        raise GroovyUnsupportedError(f"Unsupported call {target.name}.{name}(): {exc}") from exc
+
+
+def get_property(target: Any, name: str) -> Any:
+    """
+    Property access `target.name`, including bean getters like `.empty` or `.time`.
+    """
+    if isinstance(target, ClassRef):
+        return ClassRef(f"{target.name}.{name}")
+    if isinstance(target, dict):
+        return target.get(name)
+    if isinstance(target, MapEntry) and name in ("key", "value"):
+        return target.key if name == "key" else target.value
+    if target is None:
+        raise GroovyError(f"NullPointerException: Cannot get property '{name}' on null object")
+    if name == "class":
+        return ClassRef(type_name(target))
+    methods = methods_of(target) or {}
+    for getter in ("get" + name[:1].upper() + name[1:], "is" + name[:1].upper() + name[1:]):
+        if getter in methods:
+            return call_method(target, getter, [])
+    if isinstance(target, list):
+        return [None if item is None else get_property(item, name) for item in target]
+    raise GroovyError(f"MissingPropertyException: No such property: {name} for class: {type_name(target)}")
+
+
+# ---- interpreter ----
+
+
+class Interpreter:
+    """
+    Tree-walking evaluator of parsed scripts with a bound on the number of evaluation steps and, optionally,
+    on the evaluation time.
+    """
+
+    def __init__(self, max_steps: int = 100_000, deadline: Optional[float] = None):
+        self.max_steps = max_steps
+        self.deadline = deadline
+        self.steps = 0
+
+    def tick(self) -> None:
+        self.steps += 1
+        if self.steps > self.max_steps:
+            raise GroovyUnsupportedError("Script evaluation exceeded the step limit")
+        if self.deadline is not None and self.steps % DEADLINE_CHECK_STEPS == 0 and time.monotonic() > self.deadline:
+            raise GroovyUnsupportedError("Script evaluation exceeded the time limit")
+
+    def execute(self, block: Node, scope: Scope) -> Any:
+        result = None
+        for statement in block[1]:
+            result = self.statement(statement, scope)
+        return result
+
+    def statement(self, node: Node, scope: Scope) -> Any:
+        kind = node[0]
+        if kind == "decl":
+            scope.variables[node[1]] = self.eval(node[2], scope)
+            return scope.variables[node[1]]
+        if kind == "assign":
+            return self.assign(node, scope)
+        if kind == "return":
+            raise ReturnSignal(None if node[1] is None else self.eval(node[1], scope))
+        if kind == "if":
+            if truth(self.eval(node[1], scope)):
+                return self.execute(node[2], Scope(parent=scope))
+            return self.execute(node[3], Scope(parent=scope)) if node[3] is not None else None
+        if kind == "for":
+            iterable = self.eval(node[2], scope)
+            items = iterable.to_list() if isinstance(iterable, GRange) else iterable
+            if isinstance(items, dict):
+                items = [MapEntry(k, v) for k, v in items.items()]
+            elif isinstance(items, str):
+                items = list(items)
+            elif items is None:
+                items = []
+            for item in items:
+                self.tick()
+                self.execute(node[3], Scope({node[1]: item}, scope))
+            return None
+        if kind == "try":
+            try:
+                return self.execute(node[1], Scope(parent=scope))
+            except GroovyError as exc:
+                if not node[2]:
+                    raise
+                name, handler = node[2][0]
+                return self.execute(handler, Scope({name: {"message": str(exc)}}, scope))
+            finally:
+                if node[3] is not None:
+                    self.execute(node[3], Scope(parent=scope))
+        return self.eval(node, scope)
+
+    def assign(self, node: Node, scope: Scope) -> Any:
+        _, op, target, value_node = node
+        value = self.eval(value_node, scope)
+        if op != "=":
+            value = binary_op(op[0], self.eval(target, scope), value)
+        if target[0] == "var":
+            owner = scope.find(target[1])
+            (owner or scope).variables[target[1]] = value
+        elif target[0] == "prop":
+            container = self.eval(target[1], scope)
+            if not isinstance(container, dict):
+                raise GroovyUnsupportedError("Only map properties can be assigned")
+            container[target[2]] = value
+        else:
+            container = self.eval(target[1], scope)
+            index = self.eval(target[2], scope)
+            if isinstance(container, dict):
+                container[index] = value
+            elif isinstance(container, list) and 0 <= _require_int(index) < len(container):
+                container[index] = value
+            else:
+                raise GroovyUnsupportedError("Unsupported indexed assignment")
+        return value
+
+    def variable(self, name: str, scope: Scope) -> Any:
+        owner = scope.find(name)
+        if owner is not None:
+            return owner.variables[name]
+        if name[0].isupper() or name in PACKAGES:
+            return ClassRef(name)
+        if name in MIDPOINT_VARIABLES:
+            raise GroovyUnsupportedError(f"midPoint variable {name!r} is not available")
+        raise GroovyError(f"MissingPropertyException: No such property: {name}")
+
+    def eval(self, node: Node, scope: Scope) -> Any:
+        self.tick()
+        kind = node[0]
+        if kind == "lit":
+            return node[1]
+        if kind == "var":
+            return self.variable(node[1], scope)
+        if kind == "gstr":
+            return "".join(part if isinstance(part, str) else to_string(self.eval(part, scope)) for part in node[1])
+        if kind == "list":
+            return [self.eval(item, scope) for item in node[1]]
+        if kind == "map":
+            return {self.eval(key, scope): self.eval(value, scope) for key, value in node[1]}
+        if kind == "closure":
+            return Closure(self, node[1], node[2], scope)
+        if kind == "not":
+            return not truth(self.eval(node[1], scope))
+        if kind == "neg":
+            value = self.eval(node[1], scope)
+            if not is_number(value):
+                raise GroovyError(f"MissingMethodException: No signature of method: {type_name(value)}.negative()")
+            return -value
+        if kind == "bin":
+            op = node[1]
+            if op == "&&":
+                return truth(self.eval(node[2], scope)) and truth(self.eval(node[3], scope))
+            if op == "||":
+                return truth(self.eval(node[2], scope)) or truth(self.eval(node[3], scope))
+            return binary_op(op, self.eval(node[2], scope), self.eval(node[3], scope))
+        if kind == "ternary":
+            return self.eval(node[2] if truth(self.eval(node[1], scope)) else node[3], scope)
+        if kind == "elvis":
+            value = self.eval(node[1], scope)
+            return value if truth(value) else self.eval(node[2], scope)
+        if kind == "instanceof":
+            value = self.eval(node[1], scope)
+            check = TYPE_CHECKS.get(node[2])
+            if check is None:
+                raise GroovyUnsupportedError(f"Unsupported type {node[2]}")
+            return check(value) != node[3]
+        if kind == "cast":
+            return cast(self.eval(node[1], scope), node[2])
+        if kind == "prop":
+            target = self.eval(node[1], scope)
+            if node[3] == "safe" and target is None:
+                return None
+            if node[3] == "spread":
+                return None if target is None else [get_property(item, node[2]) for item in target]
+            return get_property(target, node[2])
+        if kind == "index":
+            target = self.eval(node[1], scope)
+            if target is None and node[3]:
+                return None
+            if target is None:
+                raise GroovyError("NullPointerException: Cannot invoke method getAt() on null object")
+            return _get_at(target.to_list() if isinstance(target, GRange) else target, self.eval(node[2], scope))
+        if kind == "call":
+            target = self.eval(node[1], scope)
+            if node[4] == "safe" and target is None:
+                return None
+            args = [self.eval(arg, scope) for arg in node[3]]
+            if node[4] == "spread":
+                return None if target is None else [call_method(item, node[2], args) for item in target]
+            return call_method(target, node[2], args)
+        if kind == "fcall":
+            if node[1][0] == "var" and scope.find(node[1][1]) is None:
+                raise GroovyUnsupportedError(f"Unsupported function {node[1][1]}()")
+            function = self.eval(node[1], scope)
+            args = [self.eval(arg, scope) for arg in node[2]]
+            if not isinstance(function, Closure):
+                raise GroovyUnsupportedError("Only closures can be called directly")
+            return function(*args)
+        if kind == "new":
+            args = [self.eval(arg, scope) for arg in node[2]]
+            if node[1] in ("ArrayList", "LinkedList", "HashSet", "LinkedHashSet", "TreeSet") and len(args) <= 1:
+                items = list(args[0]) if args else []
+                return _sorted(_unique(items), mutate=False) if node[1] == "TreeSet" else items
+            if node[1] in ("HashMap", "LinkedHashMap") and len(args) <= 1:
+                return dict(args[0]) if args else {}
+            if node[1] in ("String", "StringBuilder", "StringBuffer") and len(args) <= 1:
+                return to_string(args[0]) if args else ""
+            if node[1] in ("BigDecimal", "Integer", "Long", "Double") and len(args) == 1:
+                return cast(args[0], node[1])
+            raise GroovyUnsupportedError(f"Unsupported constructor {node[1]}")
+        if kind in ("decl", "assign", "if", "for", "try", "return", "block"):
+            return self.statement(node, scope)
+        raise GroovyUnsupportedError(f"Unsupported expression {kind}")
+
+
+def evaluate(
+    source: str, variables: Mapping[str, Any], max_steps: int = 100_000, deadline: Optional[float] = None
+) -> Any:
+    """
+    Evaluate a script with the given top-level variables.
+
+    :param source: Groovy script.
+    :param variables: Values of the script variables, e.g. {"input": "John"}.
+    :param max_steps: Bound on evaluated nodes, protecting against runaway loops.
+    :param deadline: `time.monotonic()` after which the evaluation is stopped, if any.
+    :return: Value of the last evaluated statement or of the `return` statement.
+    :raises GroovyError: When the script fails at runtime.
+    :raises GroovyUnsupportedError: When the script is outside of the supported subset.
+    """
+    tree = parse_script(source)
+    token = _deadline.set(deadline)
+    try:
+        return Interpreter(max_steps, deadline).execute(tree, Scope(dict(variables)))
+    except ReturnSignal as signal:
+        return signal.value
+    except RecursionError as exc:
+        raise GroovyUnsupportedError("Script is nested too deeply") from exc
+    finally:
+        _deadline.reset(token)
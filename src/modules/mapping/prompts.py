@@ -2,8 +2,13 @@
 #
 # Licensed under the EUPL-1.2 or later.
 
+from langchain_core.output_parsers import PydanticOutputParser
 from langchain_core.prompts import ChatPromptTemplate
 
+from .schema import MappingScript
+
+parser: PydanticOutputParser = PydanticOutputParser(pydantic_object=MappingScript)
+
 suggest_mapping_system_prompt = """
 You are a Groovy code generator.
 
@@ -71,4 +76,4 @@ suggest_mapping_prompt: ChatPromptTemplate = ChatPromptTemplate.from_messages(
         ("human", suggest_mapping_human_prompt),
         ("human", "{format_instructions}"),
     ]
-)
+).partial(format_instructions=parser.get_format_instructions())
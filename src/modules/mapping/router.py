@@ -2,7 +2,11 @@
 #
 # Licensed under the EUPL-1.2 or later.
 
+from fastapi import Request
+
+from ...common.jobs import add_job_routes
 from ...common.langfuse import ObservableAPIRouter
+from ...common.streaming import STREAMING_RESPONSES, stream_response, streaming_media_type
 from . import service
 from .schema import (
     SuggestMappingRequest,
@@ -12,9 +16,30 @@ from .schema import (
 router = ObservableAPIRouter()
 
 
-@router.post("/suggestMapping", response_model=SuggestMappingResponse)
-async def suggest_mapping_script(req: SuggestMappingRequest):
+@router.post(
+    "/suggestMapping",
+    response_model=SuggestMappingResponse,
+    response_model_exclude_none=True,
+    responses=STREAMING_RESPONSES,
+)
+async def suggest_mapping_script(req: SuggestMappingRequest, request: Request):
     """
     Suggest mapping script or complex attribute.
+
+    Responds with a stream of progress, partial result and result events when the Accept header
+    requests `text/event-stream` or `application/x-ndjson`.
     """
+    media_type = streaming_media_type(request)
+    if media_type:
+        return stream_response(service.stream_mapping_script(req), media_type)
     return await service.suggest_mapping_script(req)
+
+
+add_job_routes(
+    router,
+    "/suggestMapping",
+    service.suggest_mapping_script,
+    SuggestMappingRequest,
+    SuggestMappingResponse,
+    exclude_none=True,
+)
@@ -7,7 +7,7 @@ from typing import List, Optional
 
 from pydantic import BaseModel, ConfigDict, Field
 
-from ...common.schema import BaseSchemaAttribute
+from ...common.schema import BaseSchemaAttribute, CorrectionStats
 
 
 # Allowed simple xsd types for clarity / validation
@@ -105,7 +105,7 @@ class SuggestMappingRequest(BaseModel):
     }
 
 
-class SuggestMappingResponse(BaseModel):
+class MappingScript(BaseModel):
     """
     The inferred Groovy code snippet that transforms applicationValue into midpointValue.
     """
@@ -119,6 +119,19 @@ class SuggestMappingResponse(BaseModel):
         description="Groovy code starting with a single-line comment `// <description>` on the first line, followed by the code. The last expression must evaluate to the desired value.",
     )
 
+
+class SuggestMappingResponse(MappingScript):
+    """
+    Suggested transformation script, generated by the LLM or synthesized locally from the examples.
+    """
+
+    synthesized: Optional[bool] = Field(
+        None, description="True when the script was synthesized locally from the examples without calling the LLM."
+    )
+    correction: Optional[CorrectionStats] = Field(
+        None, description="Statistics of the server-side verification and correction of the generated script."
+    )
+
     model_config = ConfigDict(
         json_schema_extra={
             "example": {
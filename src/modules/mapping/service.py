@@ -2,21 +2,95 @@
 #
 # Licensed under the EUPL-1.2 or later.
 
+import asyncio
 import logging
+import time
+from typing import Any, AsyncIterator, List, Optional, Tuple
 
 from langchain.schema.output_parser import OutputParserException
-from langchain_core.output_parsers import PydanticOutputParser
 
-from src.common.llm import get_default_llm, make_basic_chain
+from src.common.llm import chains, get_default_llm
 
+from ...common.correction import self_correct
 from ...common.errors import LLMResponseValidationException
 from ...common.langfuse import langfuse_handler
+from ...common.schema import CorrectionStats
+from ...common.streaming import StreamEvent, complete_fields
+from ...config import config
 from ...utils import parse_value_by_type, to_groovy_literal
-from .prompts import suggest_mapping_prompt
-from .schema import BaseSchemaAttribute, SuggestMappingRequest, SuggestMappingResponse, ValueExample
+from .prompts import parser, suggest_mapping_prompt
+from .schema import BaseSchemaAttribute, MappingScript, SuggestMappingRequest, SuggestMappingResponse, ValueExample
+from .synthesis import groovy_variable, synthesis_results, synthesize
+from .verification import ScriptVerification, VerificationStatus, verification_results, verify_script
 
 logger = logging.getLogger(__name__)
 
+chains.register("mapping", suggest_mapping_prompt, parser)
+
+
+def is_multi(attr: BaseSchemaAttribute) -> bool:
+    return attr.maxOccurs > 1 or attr.maxOccurs == -1
+
+
+def example_values(req: SuggestMappingRequest) -> list[tuple[Any, Any]]:
+    """
+    Parse the examples into (source, target) value pairs in the direction of the mapping.
+
+    Inbound mappings transform the application value into the midPoint value, outbound mappings the other way.
+
+    :param req: Suggestion request with exactly one application and one midPoint attribute.
+    :return: Pairs of parsed values; missing values are None, multi-valued attributes give lists.
+    :raises ValueError: If the request maps more than one attribute.
+    """
+    if len(req.applicationAttribute) != 1 or len(req.midPointAttribute) != 1:
+        raise ValueError("Only single-attribute mappings are supported.")
+
+    app_attr = req.applicationAttribute[0]
+    mid_attr = req.midPointAttribute[0]
+
+    # general side-processing function
+    def extract(raw_examples: list[ValueExample] | None, attr: BaseSchemaAttribute) -> Any:
+        multi = is_multi(attr)
+        # pull out the raw string values (or [] if missing/empty)
+        raw = next((ve.value for ve in (raw_examples or []) if ve.name == attr.name), [])
+        val = parse_value_by_type(raw, attr.type, multivalued=multi)
+
+        # empty-list → null
+        if isinstance(val, list) and not val:
+            val = None
+
+        # if single-valued but got a list, unwrap
+        if not multi and isinstance(val, list):
+            val = val[0]
+
+        return val
+
+    pairs = []
+    for ex in req.example:
+        app_val = extract(ex.application, app_attr)
+        mid_val = extract(ex.midPoint, mid_attr)
+        pairs.append((app_val, mid_val) if req.inbound else (mid_val, app_val))
+    return pairs
+
+
+def source_padded(req: SuggestMappingRequest, examples: list[tuple[Any, Any]]) -> bool:
+    """
+    Whether some raw string source value is padded with whitespace, which `parse_value_by_type` strips.
+
+    :param req: Suggestion request with exactly one application and one midPoint attribute.
+    :param examples: Parsed (source, target) value pairs, see `example_values`.
+    :return: True when the examples are strings and a raw source value has surrounding whitespace.
+    """
+    if not all(isinstance(source, str) for source, _ in examples if source is not None):
+        return False
+    attr = req.applicationAttribute[0] if req.inbound else req.midPointAttribute[0]
+    for ex in req.example:
+        values = (ex.application if req.inbound else ex.midPoint) or []
+        raw = next((ve.value for ve in values if ve.name == attr.name), None) or []
+        if any(value != value.strip() for value in raw):
+            return True
+    return False
+
 
 def build_prompt_data(req: SuggestMappingRequest) -> str:
     """
@@ -50,64 +124,25 @@ def build_prompt_data(req: SuggestMappingRequest) -> str:
       - Values are parsed via `parse_value_by_type(...)` and serialized with `to_groovy_literal(...)`.
     """
 
-    if len(req.applicationAttribute) != 1 or len(req.midPointAttribute) != 1:
-        raise ValueError("Only single-attribute mappings are supported.")
-
-    app_attr = req.applicationAttribute[0]
-    mid_attr = req.midPointAttribute[0]
-    inbound = req.inbound
-
-    def is_multi(attr: BaseSchemaAttribute) -> bool:
-        return attr.maxOccurs > 1 or attr.maxOccurs == -1
-
-    app_multi = is_multi(app_attr)
-    mid_multi = is_multi(mid_attr)
-
-    # general side-processing function
-    def extract_and_emit(raw_examples: list[ValueExample] | None, attr: BaseSchemaAttribute, multi: bool):
-        # pull out the raw string values (or [] if missing/empty)
-        raw = next((ve.value for ve in (raw_examples or []) if ve.name == attr.name), [])
-        val = parse_value_by_type(raw, attr.type, multivalued=multi)
-
-        # empty-list → null
-        if isinstance(val, list) and not val:
-            val = None
-
-        # if single-valued but got a list, unwrap
-        if not multi and isinstance(val, list):
-            val = val[0]
-
-        return val
+    pairs = example_values(req)
+    variable = "input" if req.inbound else req.midPointAttribute[0].name
 
     lines = []
-    for ex in req.example:
-        app_val = extract_and_emit(ex.application, app_attr, app_multi)
-        mid_val = extract_and_emit(ex.midPoint, mid_attr, mid_multi)
-
-        if inbound:
-            source_literal = f"[input: {to_groovy_literal(app_val)}]"
-            target_literal = to_groovy_literal(mid_val)
-        else:
-            source_literal = f"[{mid_attr.name}: {to_groovy_literal(mid_val)}]"
-            target_literal = to_groovy_literal(app_val)
-
-        lines.append(f"{source_literal} -> {target_literal}")
+    for source, target in pairs:
+        source_literal = f"[{variable}: {to_groovy_literal(source)}]"
+        lines.append(f"{source_literal} -> {to_groovy_literal(target)}")
 
     return "\n".join(lines)
 
 
-async def suggest_mapping_script(req: SuggestMappingRequest) -> SuggestMappingResponse:
+def build_prompt_variables(req: SuggestMappingRequest) -> dict:
     """
-    Suggest a Groovy transformation script for mapping input→midpoint values.
-    Returns a Pydantic SuggestMappingResponse parsed by PydanticOutputParser.
+    Build the prompt variables: few-shot examples and the optional correction context
+    composed from errorLog and previousScript.
     """
     # Build examples
     data_samples: str = build_prompt_data(req)
 
-    llm = get_default_llm()
-    parser: PydanticOutputParser = PydanticOutputParser(pydantic_object=SuggestMappingResponse)
-    chain = make_basic_chain(suggest_mapping_prompt, llm, parser)
-
     # Compose optional correction context from errorLog and previousScript
     context_parts = []
 
@@ -130,13 +165,77 @@ async def suggest_mapping_script(req: SuggestMappingRequest) -> SuggestMappingRe
 
     error_context = "\n\n".join(context_parts).strip()
 
+    return {
+        "data_samples": data_samples,
+        "error_context": error_context,
+    }
+
+
+def synthesize_mapping_script(req: SuggestMappingRequest) -> Optional[SuggestMappingResponse]:
+    """
+    Synthesize the transformation script locally when a trivial transform reproduces all examples.
+
+    Skipped when disabled, for multi-valued attributes and for requests correcting a previous script.
+
+    :param req: Suggestion request.
+    :return: Synthesized response, or None when the LLM has to be called.
+    """
+    if not config.mapping.local_synthesis:
+        return None
+    attributes = req.applicationAttribute + req.midPointAttribute
+    if req.errorLog or req.previousScript or len(attributes) != 2 or any(is_multi(attr) for attr in attributes):
+        synthesis_results.inc(result="skipped")
+        return None
+
+    examples = example_values(req)
+    program = synthesize(examples, trim=source_padded(req, examples))
+    if program is None:
+        synthesis_results.inc(result="miss")
+        return None
+
+    synthesis_results.inc(result="hit")
+    variable = "input" if req.inbound else groovy_variable(req.midPointAttribute[0].name)
+    logger.debug("Mapping script synthesized locally: %s", program.description)
+    return SuggestMappingResponse(
+        description=program.description, transformationScript=program.script(variable), synthesized=True
+    )
+
+
+def script_variables(req: SuggestMappingRequest) -> List[str]:
+    """
+    Names of the script variables bound to the source value: `input`, and the midPoint attribute name
+    for outbound mappings.
+    """
+    if req.inbound:
+        return ["input"]
+    return ["input", groovy_variable(req.midPointAttribute[0].name)]
+
+
+async def verify_mapping_script(req: SuggestMappingRequest, script: str) -> ScriptVerification:
+    """
+    Run the script against the examples of the request in a worker thread, so that the interpreter does not
+    block the event loop, within `mapping.verify_timeout` seconds; slower scripts are left unverified.
+    """
+    timeout = config.mapping.verify_timeout
+    try:
+        return await asyncio.wait_for(
+            asyncio.to_thread(verify_script, script, example_values(req), script_variables(req), timeout), timeout
+        )
+    except asyncio.TimeoutError:
+        logger.warning("Script verification exceeded %.1f seconds", timeout)
+        verification_results.inc(result=VerificationStatus.UNSUPPORTED.value)
+        return ScriptVerification(VerificationStatus.UNSUPPORTED, reason="Script verification exceeded the time limit")
+
+
+async def generate_mapping_script(req: SuggestMappingRequest) -> MappingScript:
+    """
+    Generate the transformation script by the LLM.
+    """
     try:
-        resp: SuggestMappingResponse = await chain.ainvoke(
-            {
-                "data_samples": data_samples,
-                "error_context": error_context,
-                "format_instructions": parser.get_format_instructions(),
-            },
+        resp: MappingScript = await chains.ainvoke(
+            "mapping",
+            get_default_llm(),
+            build_prompt_variables(req),
             config={"callbacks": [langfuse_handler]},
         )
         return resp
@@ -144,3 +243,104 @@ async def suggest_mapping_script(req: SuggestMappingRequest) -> SuggestMappingRe
     except OutputParserException as exc:
         logger.exception("Output parsing failed: %s", exc)
         raise LLMResponseValidationException() from exc
+
+
+async def correct_mapping_script(
+    req: SuggestMappingRequest,
+    resp: MappingScript,
+    started: Optional[float] = None,
+    verification: Optional[ScriptVerification] = None,
+) -> Tuple[MappingScript, Optional[CorrectionStats]]:
+    """
+    Verify the generated script against the examples and regenerate it with the mismatches as error log
+    while it fails, see `self_correct`.
+
+    :param req: Suggestion request.
+    :param resp: Generated script.
+    :param started: `time.monotonic()` when the generation started.
+    :param verification: Verification of the generated script, if already done.
+    :return: The first script passing the examples (or not verifiable), otherwise the last generated one,
+        with the attempt statistics; no statistics when scripts are not verified.
+    """
+    if not config.mapping.verify_scripts:
+        return resp, None
+
+    async def validate(script: MappingScript) -> Optional[ScriptVerification]:
+        nonlocal verification
+        result = verification or await verify_mapping_script(req, script.transformationScript)
+        verification = None
+        return result if result.status == VerificationStatus.FAILED else None
+
+    def error_log(failed: ScriptVerification) -> str:
+        return failed.error_log(config.correction.max_errors)
+
+    async def regenerate(script: MappingScript, failed: ScriptVerification) -> MappingScript:
+        update = {"errorLog": error_log(failed), "previousScript": script.transformationScript}
+        return await generate_mapping_script(req.model_copy(update=update))
+
+    return await self_correct("mapping", resp, validate, regenerate, error_log, started)
+
+
+async def suggest_mapping_script(req: SuggestMappingRequest) -> SuggestMappingResponse:
+    """
+    Suggest a Groovy transformation script for mapping input→midpoint values.
+    Trivial transforms are synthesized locally, otherwise the script is generated by the LLM,
+    parsed by PydanticOutputParser and corrected while it does not reproduce the examples.
+    """
+    local = await asyncio.to_thread(synthesize_mapping_script, req)
+    if local is not None:
+        return local
+    started = time.monotonic()
+    resp, stats = await correct_mapping_script(req, await generate_mapping_script(req), started)
+    return SuggestMappingResponse(**resp.model_dump(), correction=stats)
+
+
+async def stream_mapping_script(req: SuggestMappingRequest) -> AsyncIterator[StreamEvent]:
+    """
+    Suggest a Groovy transformation script streaming response fields as soon as the LLM completes them
+    (e.g. the description before the script).
+
+    :param req: Suggestion request.
+    :returns: Async iterator of progress and partial events followed by the result event.
+    """
+    local = await asyncio.to_thread(synthesize_mapping_script, req)
+    if local is not None:
+        yield StreamEvent(event="result", data=local.model_dump(exclude_none=True))
+        return
+
+    started = time.monotonic()
+    yield StreamEvent(event="progress", data={"stage": "generating"})
+    fields = set(MappingScript.model_fields)
+    emitted: dict = {}
+    resp: Optional[MappingScript] = None
+    try:
+        async for kind, payload in chains.astream(
+            "mapping",
+            get_default_llm(),
+            build_prompt_variables(req),
+            config={"callbacks": [langfuse_handler]},
+        ):
+            if kind == "progress":
+                yield StreamEvent(event="progress", data={"stage": "generating", **payload})
+            elif kind == "partial":
+                completed = {k: v for k, v in complete_fields(payload).items() if k in fields and k not in emitted}
+                if completed:
+                    emitted.update(completed)
+                    yield StreamEvent(event="partial", data=completed)
+            else:
+                resp = payload
+    except OutputParserException as exc:
+        logger.exception("Output parsing failed: %s", exc)
+        raise LLMResponseValidationException() from exc
+    if resp is None:
+        raise LLMResponseValidationException()
+
+    stats = None
+    if config.mapping.verify_scripts and config.correction.enabled:
+        verification = await verify_mapping_script(req, resp.transformationScript)
+        if verification.status == VerificationStatus.FAILED:
+            yield StreamEvent(event="progress", data={"stage": "correcting"})
+        resp, stats = await correct_mapping_script(req, resp, started, verification)
+
+    result = SuggestMappingResponse(**resp.model_dump(), correction=stats)
+    yield StreamEvent(event="result", data=result.model_dump(exclude_none=True))
@@ -0,0 +1,349 @@
+# Copyright (c) 2010-2025 Evolveum and contributors
+#
+# Licensed under the EUPL-1.2 or later.
+
+import logging
+import re
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable, Iterator, List, Optional, Sequence, Tuple
+
+from ...common.metrics import metrics
+
+"""
+Local synthesis of simple transformation scripts from the examples of a mapping suggestion.
+
+Most mappings are trivial transforms (identity, case conversion, substring, prefix/suffix, split-and-take,
+type or date conversion, boolean inversion, constant). Candidate programs of a small DSL are enumerated
+from the first complete example, simplest first, and the first one reproducing all examples is rendered
+as a Groovy script, so that the LLM is not called at all.
+
+Values are compared after `parse_value_by_type`, which already strips strings, so trimming is not a
+separate candidate; when the raw source values are padded, every candidate trims its input first.
+"""
+
+logger = logging.getLogger(__name__)
+
+synthesis_results = metrics.counter(
+    "mapping_local_synthesis_total",
+    "Mapping suggestions by local synthesis result (hit, miss or skipped).",
+    ["result"],
+)
+
+# (source value, expected target value) of one example
+Example = Tuple[Any, Any]
+
+SEPARATORS = (" ", ",", ";", ".", "@", "-", "_", "/", "\\", "|", ":")
+
+# (SimpleDateFormat pattern, strftime pattern)
+DATE_FORMATS = (
+    ("yyyy-MM-dd", "%Y-%m-%d"),
+    ("dd.MM.yyyy", "%d.%m.%Y"),
+    ("MM/dd/yyyy", "%m/%d/%Y"),
+    ("dd/MM/yyyy", "%d/%m/%Y"),
+    ("yyyyMMdd", "%Y%m%d"),
+    ("yyyy-MM-dd HH:mm:ss", "%Y-%m-%d %H:%M:%S"),
+    ("yyyy-MM-dd'T'HH:mm:ss", "%Y-%m-%dT%H:%M:%S"),
+    ("dd.MM.yyyy HH:mm", "%d.%m.%Y %H:%M"),
+    ("yyyy", "%Y"),
+)
+
+_FAILURES = (TypeError, ValueError, AttributeError, LookupError, OverflowError)
+
+# substring candidates grow quadratically with the source length, longer values are left to the LLM
+MAX_SOURCE_LENGTH = 200
+
+
+def groovy_string(value: str) -> str:
+    """
+    Render a single-quoted Groovy string literal (no GString interpolation).
+    """
+    escaped = value.replace("\\", "\\\\").replace("'", "\\'").replace("\n", "\\n").replace("\r", "\\r")
+    return f"'{escaped}'"
+
+
+def groovy_literal(value: Any) -> str:
+    """
+    Render a string, boolean or number as a Groovy literal.
+    """
+    if isinstance(value, str):
+        return groovy_string(value)
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (int, float)):
+        return repr(value)
+    raise TypeError(f"Unsupported constant {value!r}")
+
+
+def groovy_variable(attribute_name: str) -> str:
+    """
+    Return the script variable of an attribute: its local name without item path and namespace prefix.
+    """
+    return re.split(r"[/:]", attribute_name)[-1]
+
+
+def java_split(value: str, separator: str) -> List[str]:
+    """
+    Split a string like Java `String.split`, which drops trailing empty parts.
+    """
+    if separator not in value:
+        return [value]
+    parts = value.split(separator)
+    while parts and parts[-1] == "":
+        parts.pop()
+    return parts
+
+
+def same_value(actual: Any, expected: Any) -> bool:
+    """
+    Compare values strictly by type, so that e.g. True does not equal 1.
+    """
+    return type(actual) is type(expected) and actual == expected
+
+
+@dataclass(frozen=True)
+class Step:
+    """
+    One null-propagating transform of a program.
+
+    :param description: Lower-case description used in the script comment.
+    :param apply: Transform of a non-null value; raises on unsupported values.
+    :param groovy: Renders the Groovy expression of the transform applied to an expression.
+    """
+
+    description: str
+    apply: Callable[[Any], Any]
+    groovy: Callable[[str], str]
+
+
+@dataclass(frozen=True)
+class Program:
+    """
+    Candidate transformation with its Python semantics and Groovy rendering.
+
+    :param description: One-line description, the first line of the script.
+    :param run: Evaluates the program for a source value.
+    :param expression: Renders the Groovy expression for the source variable.
+    :param complexity: Number of transforms, simpler programs are preferred.
+    """
+
+    description: str
+    run: Callable[[Any], Any]
+    expression: Callable[[str], str]
+    complexity: int
+
+    def script(self, variable: str) -> str:
+        return f"// {self.description}\n{self.expression(variable)}"
+
+    def reproduces(self, examples: Sequence[Example]) -> bool:
+        try:
+            return all(same_value(self.run(source), target) for source, target in examples)
+        except _FAILURES:
+            return False
+
+
+def pipeline(steps: Sequence[Step]) -> Program:
+    """
+    Compose steps into a program; a null value short-circuits the remaining steps.
+    """
+
+    def run(value: Any) -> Any:
+        for step in steps:
+            if value is None:
+                return None
+            value = step.apply(value)
+        return value
+
+    def expression(variable: str) -> str:
+        for step in steps:
+            variable = step.groovy(variable)
+        return variable
+
+    description = ", then ".join(step.description for step in steps) or "copy input unchanged"
+    return Program(description[0].upper() + description[1:], run, expression, len(steps))
+
+
+def string_step(description: str, apply: Callable[[str], Any], groovy: Callable[[str], str]) -> Step:
+    def apply_string(value: Any) -> Any:
+        if not isinstance(value, str):
+            raise TypeError(f"Expected string, got {type(value).__name__}")
+        return apply(value)
+
+    return Step(description, apply_string, groovy)
+
+
+TRIM_STEP = string_step("trim surrounding whitespace", str.strip, lambda e: f"{e}?.trim()")
+
+CASE_STEPS = (
+    string_step("convert to upper case", str.upper, lambda e: f"{e}?.toUpperCase()"),
+    string_step("convert to lower case", str.lower, lambda e: f"{e}?.toLowerCase()"),
+    string_step("capitalize", lambda s: s[:1].upper() + s[1:], lambda e: f"{e}?.capitalize()"),
+)
+
+
+def split_step(separator: str, index: int) -> Step:
+    def take_part(value: str) -> Optional[str]:
+        parts = java_split(value, separator)
+        return parts[index] if -len(parts) <= index < len(parts) else None
+
+    part = "the last part" if index == -1 else f"part {index + 1}"
+    regex = groovy_string(re.escape(separator))
+    return string_step(
+        f"take {part} split by {groovy_string(separator)}",
+        take_part,
+        lambda e: f"{e}?.split({regex})?.toList()?.getAt({index})",
+    )
+
+
+def characters(n: int) -> str:
+    return "character" if n == 1 else f"{n} characters"
+
+
+def extraction_steps(value: str) -> Iterator[Step]:
+    """
+    Enumerate the split and substring steps yielding a non-empty part of the value.
+    """
+    for separator in SEPARATORS:
+        if separator in value:
+            parts = java_split(value, separator)
+            for index in range(len(parts)):
+                yield split_step(separator, index)
+            if len(parts) > 1:
+                yield split_step(separator, -1)
+    for n in range(1, len(value)):
+        yield from substring_steps(n)
+
+
+def substring_steps(n: int) -> Iterator[Step]:
+    yield string_step(f"take the first {characters(n)}", lambda s: s[:n], lambda e: f"{e}?.take({n})")
+    yield string_step(f"take the last {characters(n)}", lambda s: s[-n:], lambda e: f"{e}?.takeRight({n})")
+    yield string_step(f"drop the first {characters(n)}", lambda s: s[n:], lambda e: f"{e}?.drop({n})")
+    yield string_step(f"drop the last {characters(n)}", lambda s: s[:-n], lambda e: f"{e}?.dropRight({n})")
+
+
+def affix_step(prefix: str, suffix: str) -> Step:
+    parts = ([f"prefix {groovy_string(prefix)}"] if prefix else []) + (
+        [f"suffix {groovy_string(suffix)}"] if suffix else []
+    )
+
+    def groovy(e: str) -> str:
+        terms = ([groovy_string(prefix)] if prefix else []) + [e] + ([groovy_string(suffix)] if suffix else [])
+        return f"({e} == null ? null : {' + '.join(terms)})"
+
+    return string_step("add " + " and ".join(parts), lambda s: prefix + s + suffix, groovy)
+
+
+def string_programs(source: str, target: str) -> Iterator[List[Step]]:
+    """
+    Enumerate extract → case → affix pipelines turning the source string into the target string.
+    """
+    for case in (None, *CASE_STEPS):
+        for extract in (None, *extraction_steps(source)):
+            steps = [step for step in (extract, case) if step is not None]
+            value = pipeline(steps).run(source)
+            if value == target:
+                yield steps
+            elif value and value in target:
+                start = target.index(value)
+                yield steps + [affix_step(target[:start], target[start + len(value) :])]
+
+
+def as_utc(value: datetime) -> datetime:
+    return value.astimezone(timezone.utc) if value.tzinfo else value
+
+
+def format_date_step(java: str, python: str) -> Step:
+    return Step(
+        f"format date as {java}",
+        lambda d: as_utc(d).strftime(python),
+        lambda e: f"{e}?.format({groovy_string(java)}, TimeZone.getTimeZone('UTC'))",
+    )
+
+
+def reformat_date_step(date_in: Tuple[str, str], date_out: Tuple[str, str]) -> Step:
+    (java_in, python_in), (java_out, python_out) = date_in, date_out
+    return string_step(
+        f"reformat date from {java_in} to {java_out}",
+        lambda s: datetime.strptime(s, python_in).strftime(python_out),
+        lambda e: f"({e} == null ? null : Date.parse({groovy_string(java_in)}, {e}).format({groovy_string(java_out)}))",
+    )
+
+
+def typed_programs(source: Any, target: Any) -> Iterator[List[Step]]:
+    """
+    Enumerate single-step type, date and boolean conversions between the anchor values.
+    """
+    if isinstance(source, bool) and isinstance(target, bool):
+        yield [Step("invert boolean", lambda b: not b, lambda e: f"({e} == null ? null : !{e})")]
+    if isinstance(source, datetime) and isinstance(target, str):
+        yield from ([format_date_step(java, python)] for java, python in DATE_FORMATS)
+    if isinstance(source, str) and isinstance(target, str):
+        for date_in in DATE_FORMATS:
+            yield from ([reformat_date_step(date_in, date_out)] for date_out in DATE_FORMATS if date_out != date_in)
+    if isinstance(source, (bool, int, float)) and isinstance(target, str):
+        yield [Step("convert to string", groovy_literal, lambda e: f"{e}?.toString()")]
+    if isinstance(source, str) and isinstance(target, bool):
+        yield [
+            string_step(
+                "convert to boolean", lambda s: {"true": True, "false": False}[s], lambda e: f"{e}?.toBoolean()"
+            )
+        ]
+    if isinstance(source, str) and isinstance(target, int) and not isinstance(target, bool):
+        yield [string_step("convert to integer", int, lambda e: f"{e}?.toInteger()")]
+    if isinstance(source, str) and isinstance(target, float):
+        yield [string_step("convert to number", float, lambda e: f"{e}?.toDouble()")]
+
+
+def presence_program() -> Program:
+    return Program(
+        "Check input presence", lambda v: v is not None and v != "", lambda e: f"{e} != null && {e} != ''", 1
+    )
+
+
+def constant_program(value: Any) -> Program:
+    literal = groovy_literal(value)
+    return Program(f"Set constant value {literal}", lambda v: value, lambda e: literal, 1)
+
+
+def candidate_programs(source: Any, target: Any, trim: bool = False) -> Iterator[Program]:
+    """
+    Enumerate candidate programs consistent with one example, simplest first.
+
+    :param trim: Whether the transform pipelines trim the input first.
+    """
+    lead = [TRIM_STEP] if trim else []
+    yield pipeline(lead)
+    candidates = [pipeline(lead + steps) for steps in typed_programs(source, target)]
+    if isinstance(source, str) and isinstance(target, str):
+        candidates += [pipeline(lead + steps) for steps in string_programs(source, target)]
+    yield from sorted(candidates, key=lambda program: program.complexity)
+    if isinstance(target, bool):
+        yield presence_program()
+
+
+def synthesize(examples: Sequence[Example], trim: bool = False) -> Optional[Program]:
+    """
+    Find the simplest program reproducing all examples.
+
+    A constant is only synthesized when at least two distinct non-null inputs map to it. Nothing is
+    synthesized for string sources longer than `MAX_SOURCE_LENGTH`.
+
+    :param examples: Pairs of parsed single source and target values.
+    :param trim: Whether the raw source values are padded with whitespace, which parsing has stripped; the
+        scripts then trim the input before transforming it.
+    :return: Program, or None when no candidate reproduces all examples.
+    """
+    if any(isinstance(source, str) and len(source) > MAX_SOURCE_LENGTH for source, _ in examples):
+        return None
+    anchor = next(((s, t) for s, t in examples if s is not None and t is not None), None)
+    if anchor is None:
+        return None
+    for program in candidate_programs(*anchor, trim=trim):
+        if program.reproduces(examples):
+            return program
+
+    inputs = {repr(source) for source, _ in examples if source is not None}
+    constant = constant_program(anchor[1])
+    if len(inputs) > 1 and not isinstance(anchor[1], datetime) and constant.reproduces(examples):
+        return constant
+    return None
@@ -0,0 +1,167 @@
+# Copyright (c) 2010-2025 Evolveum and contributors
+#
+# Licensed under the EUPL-1.2 or later.
+
+import copy
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from enum import Enum
+from typing import Any, List, Optional, Sequence, Tuple
+
+from ...common.metrics import metrics
+from ...utils import to_groovy_literal
+from .groovy import GroovyError, GroovyUnsupportedError, as_utc, evaluate, is_number, to_string
+
+"""
+Verification of suggested transformation scripts against the examples of the request.
+
+Every example is evaluated by the in-process Groovy interpreter and its result compared with the expected
+value. Mismatches are rendered as an error log in the format the correction prompt expects, so that a
+failing script can be corrected before the response reaches the client.
+"""
+
+logger = logging.getLogger(__name__)
+
+verification_results = metrics.counter(
+    "mapping_script_verification_total",
+    "Suggested mapping scripts by verification result (passed, failed or unsupported).",
+    ["result"],
+)
+
+
+class VerificationStatus(str, Enum):
+    """
+    Result of a script verification.
+
+    :cvar PASSED: The script reproduces all examples.
+    :cvar FAILED: The script fails or produces a different value for at least one example.
+    :cvar UNSUPPORTED: The script is outside of the supported Groovy subset and could not be verified.
+    """
+
+    PASSED = "passed"
+    FAILED = "failed"
+    UNSUPPORTED = "unsupported"
+
+
+@dataclass
+class ExampleMismatch:
+    """
+    Example the script does not reproduce.
+
+    :param index: Position of the example in the request (1-based).
+    :param source: Source value bound to the script variables.
+    :param expected: Expected value.
+    :param actual: Value produced by the script, if it did not fail.
+    :param error: Runtime error of the script, if it failed.
+    """
+
+    index: int
+    source: Any
+    expected: Any
+    actual: Any = None
+    error: Optional[str] = None
+
+    def describe(self) -> str:
+        outcome = f"failed with {self.error}" if self.error else f"returned {to_groovy_literal(self.actual)}"
+        return (
+            f"Example {self.index}: for input {to_groovy_literal(self.source)} the script {outcome}, "
+            f"expected {to_groovy_literal(self.expected)}"
+        )
+
+
+@dataclass
+class ScriptVerification:
+    """
+    Outcome of running a script against the examples.
+
+    :param status: Verification status.
+    :param mismatches: Examples the script does not reproduce.
+    :param reason: Why the script could not be verified, for unsupported scripts.
+    """
+
+    status: VerificationStatus
+    mismatches: List[ExampleMismatch] = field(default_factory=list)
+    reason: Optional[str] = None
+
+    def error_log(self, max_mismatches: int = 5) -> str:
+        """
+        Render the mismatches as an error log for the correction prompt.
+        """
+        lines = [mismatch.describe() for mismatch in self.mismatches[:max_mismatches]]
+        if len(self.mismatches) > max_mismatches:
+            lines.append(f"... and {len(self.mismatches) - max_mismatches} more failing examples")
+        return "The script does not reproduce the examples:\n" + "\n".join(lines)
+
+
+def values_match(actual: Any, expected: Any) -> bool:
+    """
+    Compare a script result with the expected value the way midPoint stores it.
+
+    Numbers compare by value, single values match one-element lists, multi-valued results compare
+    regardless of order, empty lists are missing values, and dates compare in UTC.
+    """
+    if isinstance(actual, (list, tuple, set)):
+        actual = list(actual)
+        if not actual:
+            actual = None
+        elif not isinstance(expected, list) and len(actual) == 1:
+            actual = actual[0]
+    if isinstance(expected, list) and actual is not None and not isinstance(actual, list):
+        actual = [actual]
+    if isinstance(expected, list) and isinstance(actual, list):
+        if len(expected) != len(actual):
+            return False
+        remaining = list(actual)
+        for item in expected:
+            found = next((i for i, candidate in enumerate(remaining) if values_match(candidate, item)), None)
+            if found is None:
+                return False
+            remaining.pop(found)
+        return True
+    if actual is None or expected is None:
+        return actual is None and expected is None
+    if isinstance(expected, bool):
+        return isinstance(actual, bool) and actual == expected
+    if is_number(actual) and is_number(expected):
+        return actual == expected
+    if isinstance(actual, datetime) and isinstance(expected, datetime):
+        return as_utc(actual) == as_utc(expected)
+    if isinstance(expected, str) and not isinstance(actual, str):
+        # midPoint converts numbers and booleans to the string type of the target attribute
+        return (is_number(actual) or isinstance(actual, bool)) and to_string(actual) == expected
+    return actual == expected
+
+
+def verify_script(
+    script: str, examples: Sequence[Tuple[Any, Any]], variables: Sequence[str], timeout: Optional[float] = None
+) -> ScriptVerification:
+    """
+    Run the script for every example and compare its results with the expected values.
+
+    :param script: Groovy transformation script.
+    :param examples: Pairs of parsed source and expected target values.
+    :param variables: Names of the script variables the source value is bound to.
+    :param timeout: Seconds the evaluation of all examples may take, unlimited when None.
+    :return: Verification outcome; unsupported when any example could not be evaluated in time.
+    """
+    deadline = None if timeout is None else time.monotonic() + timeout
+    mismatches = []
+    for index, (source, expected) in enumerate(examples, start=1):
+        bindings = {name: copy.deepcopy(source) for name in variables}
+        try:
+            actual = evaluate(script, bindings, deadline=deadline)
+        except GroovyUnsupportedError as exc:
+            logger.debug("Script verification not supported: %s", exc)
+            verification_results.inc(result=VerificationStatus.UNSUPPORTED.value)
+            return ScriptVerification(VerificationStatus.UNSUPPORTED, reason=str(exc))
+        except GroovyError as exc:
+            mismatches.append(ExampleMismatch(index, source, expected, error=str(exc)))
+            continue
+        if not values_match(actual, expected):
+            mismatches.append(ExampleMismatch(index, source, expected, actual=actual))
+
+    status = VerificationStatus.FAILED if mismatches else VerificationStatus.PASSED
+    verification_results.inc(result=status.value)
+    return ScriptVerification(status, mismatches)
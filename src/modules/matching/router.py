@@ -2,6 +2,7 @@
 #
 # Licensed under the EUPL-1.2 or later.
 
+from ...common.jobs import add_job_routes
 from ...common.langfuse import ObservableAPIRouter
 from . import service
 from .schema import MatchSchemaRequest, MatchSchemaResponse
@@ -15,3 +16,6 @@ async def match_midpoint_schema(req: MatchSchemaRequest):
     Matches attributes of two schemas providing multiple suggestions per attribute.
     """
     return await service.match_midpoint_schema(req)
+
+
+add_job_routes(router, "/matchSchema", service.match_midpoint_schema, MatchSchemaRequest, MatchSchemaResponse)
@@ -2,19 +2,22 @@
 #
 # Licensed under the EUPL-1.2 or later.
 
+import asyncio
 import logging
 
 from langchain.schema.output_parser import OutputParserException
 
+from src.common.budget import prompt_budget, token_estimator
 from src.common.errors import LLMResponseValidationException
-from src.common.llm import get_default_llm, make_basic_chain
-from src.modules.matching.prompts import parser, prompt
+from src.common.llm import chains, get_default_llm
+from src.common.serializers import serializer_for
+from src.config import config
+from src.modules.matching.prompts import Pairs, parser, prompt
 from src.modules.matching.schema import (
     MatchSchemaRequest,
     MatchSchemaResponse,
     SchemaAttributeMatch,
 )
-from src.utils import pretty_json
 
 from ...common.langfuse import langfuse_handler
 
@@ -23,6 +26,8 @@ logger = logging.getLogger(__name__)
 
 """Service module for matching schemas between application and MidPoint. """
 
+chains.register("matching", prompt, parser)
+
 
 def build_match_schema_prompt_data(
     req: MatchSchemaRequest,
@@ -49,6 +54,87 @@ def build_match_schema_prompt_data(
     return {"MidPoint_schema": mid_schema, "Resource_schema": resource_schema}
 
 
+def shard_schema(schema: dict[str, dict[str, str]], max_tokens: int) -> list[dict[str, dict[str, str]]]:
+    """
+    Split schema attributes into consecutive chunks of at most `max_tokens` estimated prompt tokens.
+
+    An attribute exceeding the limit on its own forms a chunk of its own, so every attribute is kept.
+
+    :param schema: Attribute metadata by attribute name, see `build_match_schema_prompt_data`.
+    :param max_tokens: Maximum estimated tokens of one chunk.
+    :return: Chunks in schema order; a single (possibly empty) chunk when the schema fits.
+    """
+    serialize = serializer_for("matching")
+    shards: list[dict[str, dict[str, str]]] = [{}]
+    size = 0
+    for name, meta in schema.items():
+        tokens = token_estimator.count(serialize({name: meta}))
+        if shards[-1] and size + tokens > max_tokens:
+            shards.append({})
+            size = 0
+        shards[-1][name] = meta
+        size += tokens
+    return shards
+
+
+def _render_prompt_variables(prompt_data: dict[str, dict[str, dict[str, str]]]) -> dict[str, str]:
+    serialize = serializer_for("matching")
+    return {
+        "MidPoint_schema": serialize(prompt_data["MidPoint_schema"]),
+        "Resource_schema": serialize(prompt_data["Resource_schema"]),
+    }
+
+
+async def _match_shard(mid_schema: dict[str, dict[str, str]], res_schema: dict[str, dict[str, str]]) -> Pairs:
+    variables = prompt_budget.fit(
+        "matching",
+        prompt,
+        {"MidPoint_schema": mid_schema, "Resource_schema": res_schema},
+        _render_prompt_variables,
+    )
+    try:
+        return await chains.ainvoke(
+            "matching",
+            get_default_llm(),
+            variables,
+            config={"callbacks": [langfuse_handler]},
+            enums={"MidPoint": list(mid_schema), "Resource": list(res_schema)},
+        )
+    except OutputParserException as exc:
+        logger.exception("Output parsing failed: %s", exc)
+        raise LLMResponseValidationException() from exc
+
+
+def merge_pairs(req: MatchSchemaRequest, results: list[Pairs]) -> list[SchemaAttributeMatch]:
+    """
+    Merge matched pairs of all shards into attribute matches.
+
+    Attributes not present in the request are dropped, duplicates removed, and matches ordered by the
+    position of their attributes in the request schemas, so the result does not depend on shard completion order.
+
+    :param req: The matching request.
+    :param results: Parsed LLM output of every shard.
+    :return: Flattened attribute matches.
+    """
+    mid_order = {a.name: i for i, a in enumerate(req.midPointSchema.attribute)}
+    res_order = {a.name: i for i, a in enumerate(req.applicationSchema.attribute)}
+
+    grouped: dict[str, set[str]] = {}
+    for parsed in results:
+        for pair in parsed.pairs:
+            if pair.MidPoint not in mid_order:
+                continue
+            for r in pair.Resource or []:
+                if r in res_order:
+                    grouped.setdefault(pair.MidPoint, set()).add(r)
+
+    return [
+        SchemaAttributeMatch(midPointAttribute=mid, applicationAttribute=r)
+        for mid in sorted(grouped, key=mid_order.__getitem__)
+        for r in sorted(grouped[mid], key=res_order.__getitem__)
+    ]
+
+
 async def match_midpoint_schema(
     req: MatchSchemaRequest,
 ) -> MatchSchemaResponse:
@@ -57,54 +143,39 @@ async def match_midpoint_schema(
     on the given request, invoking a language model chain to generate predictions and then
     validating and organizing results.
 
+    With sharding enabled, large schemas are split into token-bounded shards (see `shard_schema`)
+    matched concurrently by up to `matching.max_concurrency` LLM calls.
+
     :param req: The request data containing MidPoint schema and application schema
                 attributes to match against.
     :return: A response object containing the matched attributes between MidPoint
              and application schema.
     """
-    # 1. Build and serialize prompt
+    # 1. Build and shard the prompt data
     prompt_data = build_match_schema_prompt_data(req)
-    mid_json = pretty_json(prompt_data["MidPoint_schema"])
-    res_json = pretty_json(prompt_data["Resource_schema"])
-    # 2. Invoke the chain
-    llm = get_default_llm()
-    chain = make_basic_chain(prompt, llm, parser)
+    settings = config.matching
+    mid_shards = [prompt_data["MidPoint_schema"]]
+    res_shards = [prompt_data["Resource_schema"]]
+    if settings.sharding_enabled:
+        res_shards = shard_schema(prompt_data["Resource_schema"], settings.shard_tokens)
+        if settings.shard_midpoint:
+            mid_shards = shard_schema(prompt_data["MidPoint_schema"], settings.shard_tokens)
+    if len(mid_shards) * len(res_shards) > 1:
+        logger.info("Matching schemas in %d midPoint x %d resource shards", len(mid_shards), len(res_shards))
+
+    # 2. Invoke the chain for every shard with bounded concurrency
+    semaphore = asyncio.Semaphore(max(1, settings.max_concurrency))
+
+    async def run(mid_schema: dict[str, dict[str, str]], res_schema: dict[str, dict[str, str]]) -> Pairs:
+        async with semaphore:
+            return await _match_shard(mid_schema, res_schema)
+
+    tasks = [asyncio.ensure_future(run(m, r)) for m in mid_shards for r in res_shards]
     try:
-        parsed = await chain.ainvoke(
-            {
-                "MidPoint_schema": mid_json,
-                "Resource_schema": res_json,
-            },
-            config={"callbacks": [langfuse_handler]},
-        )
-    except OutputParserException as exc:
-        logger.exception("Output parsing failed: %s", exc)
-        raise LLMResponseValidationException() from exc
+        results = await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
 
-    # 3. Build validity sets
-    valid_midpoints = {a.name for a in req.midPointSchema.attribute}
-    valid_resources = {a.name for a in req.applicationSchema.attribute}
-
-    # 4. Group under each midpoint
-    grouped: dict[str, set[str]] = {}
-    for pair in parsed.pairs:
-        mid = pair.MidPoint
-        if mid not in valid_midpoints:
-            continue
-        ress = pair.Resource if pair.Resource else []
-        for r in ress:
-            if r in valid_resources:
-                grouped.setdefault(mid, set()).add(r)
-
-    # 5. Flatten into attributeMatch entries
-    matches: list[SchemaAttributeMatch] = []
-    for mid, ress in grouped.items():
-        for r in ress:
-            matches.append(
-                SchemaAttributeMatch(
-                    midPointAttribute=mid,
-                    applicationAttribute=r,
-                )
-            )
-
-    return MatchSchemaResponse(attributeMatch=matches)
+    # 3. Validate and merge the matches of all shards
+    return MatchSchemaResponse(attributeMatch=merge_pairs(req, list(results)))
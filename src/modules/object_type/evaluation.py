@@ -0,0 +1,515 @@
+# Copyright (c) 2010-2025 Evolveum and contributors
+#
+# Licensed under the EUPL-1.2 or later.
+
+import itertools
+import logging
+import operator
+from dataclasses import dataclass, replace
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from .mql import And, Comparison, Exists, Filter, MqlSyntaxError, Not, Or, local_path, parse_filter, path_keys
+from .schema import (
+    AttributeStat,
+    DelineationEstimate,
+    ObjectTypeEstimate,
+    ObjectTypeSuggestion,
+    OverlapEstimate,
+    PatternCountStat,
+    PatternTypeEnum,
+    Statistics,
+)
+
+logger = logging.getLogger(__name__)
+
+"""
+Evaluation of suggested delineation rules against the statistics of the request.
+
+Every attribute referenced by the rules is split into cells by its statistics: missing values, the top-N
+values, values known to match a value pattern only, and the other values. Within a cell each predicate is
+true, false or unknown (three-valued logic), so the number of objects matched by a rule, by two rules at once
+and by no rule is estimated as a range: certainly matched (true in the cell) to possibly matched (not false).
+Top-N values carry their full counts and pattern counts cover all values with the pattern, so the other
+values are known not to equal a top-N value or to start with a counted prefix. The joint values of attributes
+are known only when a crosstab of the statistics covers them; conditions over attributes without one are
+bounded regardless of how the attributes depend on each other, so the ranges stay certain.
+
+The evaluation takes milliseconds, so rules that clearly overlap are corrected before the response is sent
+instead of being reported back by midPoint.
+"""
+
+# tri-state truth value, None is unknown
+Truth = Optional[bool]
+
+# minimal fraction of objects a crosstab must cover to be used as the joint distribution of its attributes
+CROSSTAB_COVERAGE = 0.95
+
+PREFIX_PATTERNS = (PatternTypeEnum.PREFIX, PatternTypeEnum.FIRST_TOKEN)
+
+ORDERINGS: Dict[str, Callable[[Any, Any], bool]] = {
+    "=": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+STRING_TESTS: Dict[str, Callable[[str, str], bool]] = {
+    "startsWith": str.startswith,
+    "endsWith": str.endswith,
+    "contains": lambda value, part: part in value,
+}
+
+
+class _Other:
+    """
+    Present value outside of the top-N value and pattern counts.
+    """
+
+    def __repr__(self) -> str:
+        return "OTHER"
+
+
+class _Unknown:
+    """
+    Value of an attribute without statistics, possibly missing.
+    """
+
+    def __repr__(self) -> str:
+        return "UNKNOWN"
+
+
+OTHER = _Other()
+UNKNOWN = _Unknown()
+
+
+@dataclass(frozen=True)
+class PatternValue:
+    """
+    Value known only to match a value pattern, e.g. to start with "adm".
+    """
+
+    type: PatternTypeEnum
+    value: str
+
+
+@dataclass(frozen=True)
+class InBase:
+    """
+    Predicate of a base context filter: the DN is the base or lies in its subtree.
+    """
+
+    path: str
+    base: str
+
+
+Atom = Union[Comparison, Exists, InBase]
+Condition = Union[Filter, InBase]
+
+
+def not_(value: Truth) -> Truth:
+    return None if value is None else not value
+
+
+def all_(values: Iterable[Truth]) -> Truth:
+    result: Truth = True
+    for value in values:
+        if value is False:
+            return False
+        if value is None:
+            result = None
+    return result
+
+
+def any_(values: Iterable[Truth]) -> Truth:
+    return not_(all_(not_(value) for value in values))
+
+
+def fold(value: str, matching: Optional[str]) -> str:
+    return value.casefold() if matching and matching.endswith("IgnoreCase") else value
+
+
+def in_base(dn: str, base: str) -> bool:
+    dn, base = dn.casefold(), base.casefold()
+    return dn == base or dn.endswith("," + base)
+
+
+def matches_pattern(value: str, pattern: PatternCountStat) -> bool:
+    if pattern.type == PatternTypeEnum.DN_SUFFIX:
+        return in_base(value, pattern.value)
+    if pattern.type in PREFIX_PATTERNS:
+        return value.startswith(pattern.value)
+    return value.endswith(pattern.value)
+
+
+def compare_value(value: str, comparison: Comparison) -> Truth:
+    """
+    Compare a known attribute value (statistics hold values as strings) with the value of the filter.
+    """
+    expected = comparison.value
+    if comparison.operator in STRING_TESTS:
+        if not isinstance(expected, str):
+            return None
+        return STRING_TESTS[comparison.operator](fold(value, comparison.matching), fold(expected, comparison.matching))
+    if isinstance(expected, bool):
+        if comparison.operator not in ("=", "!="):
+            return None
+        return ORDERINGS[comparison.operator](value.strip().lower(), "true" if expected else "false")
+    if isinstance(expected, float):
+        try:
+            number = float(value)
+        except ValueError:
+            return comparison.operator == "!="
+        return ORDERINGS[comparison.operator](number, expected)
+    return ORDERINGS[comparison.operator](fold(value, comparison.matching), fold(expected, comparison.matching))
+
+
+def compare_pattern(pattern: PatternValue, comparison: Comparison) -> Truth:
+    """
+    Compare a value known only by its prefix or suffix with the value of the filter.
+    """
+    if not isinstance(comparison.value, str):
+        return None
+    value, expected = fold(pattern.value, comparison.matching), fold(comparison.value, comparison.matching)
+    is_prefix = pattern.type in PREFIX_PATTERNS
+    has: Callable[[str, str], bool] = str.startswith if is_prefix else str.endswith
+
+    if comparison.operator == ("startsWith" if is_prefix else "endsWith"):
+        if has(value, expected):
+            return True
+        return None if has(expected, value) else False
+    if comparison.operator == "=":
+        return None if has(expected, value) else False
+    if comparison.operator == "contains" and expected in value:
+        return True
+    return None
+
+
+def listed(comparison: Comparison, stat: AttributeStat) -> bool:
+    """
+    Whether the value of an equality is one of the top-N values, which carry its full count.
+    """
+    return any(compare_value(value.value, comparison) for value in stat.valueCount or [])
+
+
+def counted(atom: Union[Comparison, InBase], stat: AttributeStat) -> bool:
+    """
+    Whether every value satisfying the (positive) predicate is counted by a top-N value or a value pattern,
+    so that the other values of the attribute certainly do not satisfy it.
+    """
+    patterns = stat.valuePatternCount or []
+    if isinstance(atom, InBase):
+        return any(p.type == PatternTypeEnum.DN_SUFFIX and in_base(atom.base, p.value) for p in patterns)
+    if atom.operator == "=" and listed(atom, stat):
+        return True
+    if not isinstance(atom.value, str) or atom.matching:
+        return False
+    if atom.operator == "=":
+        return any(p.type != PatternTypeEnum.DN_SUFFIX and matches_pattern(atom.value, p) for p in patterns)
+    if atom.operator == "startsWith":
+        return any(p.type in PREFIX_PATTERNS and atom.value.startswith(p.value) for p in patterns)
+    if atom.operator == "endsWith":
+        suffixes = (PatternTypeEnum.SUFFIX, PatternTypeEnum.LAST_TOKEN)
+        return any(p.type in suffixes and atom.value.endswith(p.value) for p in patterns)
+    return False
+
+
+def comparison_truth(comparison: Comparison, value: Any, stat: Optional[AttributeStat]) -> Truth:
+    """
+    Evaluate a comparison, regardless of its negation, for a present value.
+    """
+    if comparison.operator == "!=":
+        return not_(comparison_truth(replace(comparison, operator="="), value, stat))
+    if isinstance(value, str):
+        return compare_value(value, comparison)
+    if isinstance(value, PatternValue):
+        # pattern cells hold the values outside of the top-N
+        if comparison.operator == "=" and stat and listed(comparison, stat):
+            return False
+        return compare_pattern(value, comparison)
+    return False if stat and counted(comparison, stat) else None
+
+
+def atom_truth(atom: Atom, value: Any, stat: Optional[AttributeStat] = None) -> Truth:
+    """
+    Evaluate a predicate for one cell value: None (missing), a top-N value, a pattern, OTHER or UNKNOWN.
+
+    :param atom: Predicate.
+    :param value: Cell value.
+    :param stat: Statistics of the attribute the cell belongs to.
+    """
+    if value is UNKNOWN:
+        return None
+    if isinstance(atom, Exists):
+        return (value is not None) != atom.negated
+    if value is None:
+        return False
+    if isinstance(atom, InBase):
+        if isinstance(value, str):
+            return in_base(value, atom.base)
+        if isinstance(value, PatternValue) and value.type == PatternTypeEnum.DN_SUFFIX:
+            if in_base(value.value, atom.base):
+                return True
+            deeper = atom.base.casefold().endswith("," + value.value.casefold())
+            # objects below a DN suffix have no further `ou` RDN
+            return None if deeper and "ou=" not in atom.base.casefold()[: -len(value.value) - 1] else False
+        return False if value is OTHER and stat and counted(atom, stat) else None
+
+    result = comparison_truth(atom, value, stat)
+    return not_(result) if atom.negated else result
+
+
+def evaluate(condition: Optional[Condition], truths: Dict[Atom, Truth]) -> Truth:
+    if condition is None:
+        return None
+    if isinstance(condition, (Comparison, Exists, InBase)):
+        return truths[condition]
+    if isinstance(condition, Not):
+        return not_(evaluate(condition.operand, truths))
+    if isinstance(condition, And):
+        return all_(evaluate(operand, truths) for operand in condition.operands)
+    return any_(evaluate(operand, truths) for operand in condition.operands)
+
+
+def atoms_of(condition: Condition) -> List[Atom]:
+    if isinstance(condition, (Comparison, Exists, InBase)):
+        return [condition]
+    if isinstance(condition, Not):
+        return atoms_of(condition.operand)
+    return [atom for operand in condition.operands for atom in atoms_of(operand)]
+
+
+def rule_condition(suggestion: ObjectTypeSuggestion) -> Condition:
+    """
+    Parse the base context filter and filters of a suggestion into one condition.
+
+    :raises MqlSyntaxError: When a filter is not valid MQL.
+    """
+    conditions: List[Condition] = []
+    if suggestion.baseContextFilter:
+        base = parse_filter(suggestion.baseContextFilter)
+        if not isinstance(base, Comparison) or not isinstance(base.value, str):
+            raise MqlSyntaxError("Base context filter is not a DN equality", 0)
+        conditions.append(InBase(base.path, base.value))
+    conditions += [parse_filter(expression) for expression in suggestion.filter or []]
+    return And(tuple(conditions))  # type: ignore[arg-type]
+
+
+def attribute_cells(stat: AttributeStat, size: int) -> List[Tuple[Any, float]]:
+    """
+    Split the objects by the values of an attribute into weighted cells.
+
+    Pattern counts include the top-N values matching them, only the rest of their count is a pattern cell;
+    patterns of different types overlap, so pattern cells are scaled down to the values outside the top-N.
+    """
+    missing = min(max(stat.missingValueCount, 0), size)
+    present = size - missing
+    cells: List[Tuple[Any, float]] = [(None, float(missing))] if missing else []
+
+    values = stat.valueCount or []
+    listed = sum(value.count for value in values)
+    scale = present / listed if listed > present else 1.0
+    cells += [(value.value, value.count * scale) for value in values]
+    residual = present - listed * scale
+
+    patterns = []
+    for pattern in stat.valuePatternCount or []:
+        known = sum(value.count * scale for value in values if matches_pattern(value.value, pattern))
+        if pattern.count > known:
+            patterns.append((PatternValue(pattern.type, pattern.value), pattern.count - known))
+    total = sum(weight for _, weight in patterns)
+    pattern_scale = residual / total if total > residual else 1.0
+    cells += [(value, weight * pattern_scale) for value, weight in patterns]
+    residual -= total * pattern_scale
+
+    if residual > 1e-9:
+        cells.append((OTHER, residual))
+    return cells
+
+
+class _Group:
+    """
+    Attributes evaluated together (one attribute, or two joined by a crosstab) with the weights of the
+    distinct combinations of predicate truth values over their cells.
+    """
+
+    def __init__(
+        self,
+        atoms: List[Atom],
+        cells: Sequence[Tuple[Tuple[Any, ...], float]],
+        positions: List[int],
+        stats: Sequence[Optional[AttributeStat]],
+    ):
+        self.atoms = atoms
+        self.signatures: Dict[Tuple[Truth, ...], float] = {}
+        for values, weight in cells:
+            signature = tuple(
+                atom_truth(atom, values[position], stats[position]) for atom, position in zip(atoms, positions)
+            )
+            self.signatures[signature] = self.signatures.get(signature, 0.0) + weight
+
+
+class _Index:
+    """
+    Resolves item paths of filters to the attribute statistics.
+    """
+
+    def __init__(self, statistics: Statistics):
+        self.stats: Dict[Tuple[str, ...], AttributeStat] = {}
+        for stat in statistics.attribute:
+            for key in path_keys(stat.ref):
+                self.stats.setdefault(key, stat)
+
+    def resolve(self, path: str) -> Optional[AttributeStat]:
+        return self.stats.get(local_path(path))
+
+
+def build_groups(atoms: Sequence[Atom], statistics: Statistics) -> List[_Group]:
+    index = _Index(statistics)
+    size = statistics.size
+    by_attribute: Dict[str, List[Atom]] = {}
+    for atom in dict.fromkeys(atoms):
+        stat = index.resolve(atom.path)
+        by_attribute.setdefault(stat.ref if stat else atom.path, []).append(atom)
+
+    groups: List[_Group] = []
+    for crosstab in statistics.attributeTuple or []:
+        first, second = (index.resolve(ref) for ref in crosstab.ref)
+        if first is None or second is None or first.ref == second.ref:
+            continue
+        if first.ref not in by_attribute or second.ref not in by_attribute:
+            continue
+        counts = crosstab.tupleCount or []
+        covered = sum(count.count for count in counts)
+        if covered < CROSSTAB_COVERAGE * size:
+            continue
+        scale = size / covered
+        joint = [(tuple(count.value), count.count * scale) for count in counts]
+        first_atoms, second_atoms = by_attribute.pop(first.ref), by_attribute.pop(second.ref)
+        positions = [0] * len(first_atoms) + [1] * len(second_atoms)
+        groups.append(_Group(first_atoms + second_atoms, joint, positions, [first, second]))
+
+    for name, attribute_atoms in by_attribute.items():
+        stat = index.resolve(name)
+        cells = attribute_cells(stat, size) if stat else [(UNKNOWN, float(size))]
+        groups.append(
+            _Group(attribute_atoms, [((value,), weight) for value, weight in cells], [0] * len(attribute_atoms), [stat])
+        )
+    return groups
+
+
+def add(counts: List[float], truth: Truth, weight: float) -> None:
+    # counts are [certainly, possibly]
+    if truth is True:
+        counts[0] += weight
+    if truth is not False:
+        counts[1] += weight
+
+
+class _Bounds:
+    """
+    Bounds of the number of objects satisfying a condition.
+
+    Conditions over the attributes of one group are evaluated exactly over its cells. The joint distribution
+    of different groups is not known, so their parts are combined by the Fréchet bounds, which hold whatever
+    the dependence of the attributes is: `max(0, a + b - n)` to `min(a, b)` for a conjunction and
+    `max(a, b)` to `min(n, a + b)` for a disjunction.
+    """
+
+    def __init__(self, groups: Sequence[_Group], size: int):
+        self.groups = groups
+        self.size = size
+        self.owner = {atom: index for index, group in enumerate(groups) for atom in group.atoms}
+
+    def groups_of(self, condition: Condition) -> frozenset:
+        return frozenset(self.owner[atom] for atom in atoms_of(condition))
+
+    def exact(self, condition: Condition, involved: frozenset) -> Tuple[float, float]:
+        counts = [0.0, 0.0]
+        if not involved:
+            add(counts, evaluate(condition, {}), float(self.size))
+            return counts[0], counts[1]
+        group = self.groups[next(iter(involved))]
+        for signature, weight in group.signatures.items():
+            add(counts, evaluate(condition, dict(zip(group.atoms, signature))), weight)
+        return counts[0], counts[1]
+
+    def __call__(self, condition: Condition) -> Tuple[float, float]:
+        involved = self.groups_of(condition)
+        if len(involved) <= 1:
+            return self.exact(condition, involved)
+        if isinstance(condition, Not):
+            low, high = self(condition.operand)
+            return self.size - high, self.size - low
+        assert isinstance(condition, (And, Or))
+        kind = type(condition)
+
+        # operands over the same group are evaluated together, nested operators of the same kind are flattened
+        parts: Dict[Any, List[Condition]] = {}
+        pending = list(condition.operands)
+        while pending:
+            operand = pending.pop(0)
+            operand_groups = self.groups_of(operand)
+            if len(operand_groups) <= 1:
+                parts.setdefault(operand_groups, []).append(operand)
+            elif isinstance(operand, kind):
+                pending += operand.operands
+            else:
+                parts.setdefault(len(parts), []).append(operand)
+        bounds = [
+            self(operands[0] if len(operands) == 1 else kind(tuple(operands)))  # type: ignore[arg-type]
+            for operands in parts.values()
+        ]
+
+        lows, highs = [low for low, _ in bounds], [high for _, high in bounds]
+        if kind is And:
+            return max(0.0, sum(lows) - (len(bounds) - 1) * self.size), min(highs)
+        return max(lows), min(float(self.size), sum(highs))
+
+
+def estimate_delineation(
+    suggestions: Sequence[ObjectTypeSuggestion], statistics: Statistics
+) -> Optional[DelineationEstimate]:
+    """
+    Estimate the objects matched by each suggestion, by pairs of suggestions and by none of them.
+
+    :param suggestions: Suggested object types.
+    :param statistics: Statistics of the object class.
+    :return: Estimate, or None when a filter is not valid MQL.
+    """
+    size = statistics.size
+    if size <= 0:
+        return None
+    try:
+        conditions = [rule_condition(suggestion) for suggestion in suggestions]
+    except MqlSyntaxError:
+        return None
+
+    bounds = _Bounds(build_groups([atom for condition in conditions for atom in atoms_of(condition)], statistics), size)
+    n = len(suggestions)
+    matched = [bounds(condition) for condition in conditions]
+    pairs = {
+        (i, j): bounds(And((conditions[i], conditions[j])))  # type: ignore[arg-type]
+        for i, j in itertools.combinations(range(n), 2)
+    }
+    uncovered = bounds(Not(Or(tuple(conditions))))  # type: ignore[arg-type]
+
+    def label(i: int) -> str:
+        return f"{suggestions[i].kind}/{suggestions[i].intent}"
+
+    return DelineationEstimate(
+        size=size,
+        objectTypes=[
+            ObjectTypeEstimate(
+                kind=suggestion.kind, intent=suggestion.intent, minCount=round(low), maxCount=round(high)
+            )
+            for suggestion, (low, high) in zip(suggestions, matched)
+        ],
+        overlaps=[
+            OverlapEstimate(objectTypes=(label(i), label(j)), minCount=round(low), maxCount=round(high))
+            for (i, j), (low, high) in pairs.items()
+            if round(high) > 0
+        ],
+        minUncovered=round(uncovered[0]),
+        maxUncovered=round(uncovered[1]),
+    )
@@ -0,0 +1,375 @@
+# Copyright (c) 2010-2025 Evolveum and contributors
+#
+# Licensed under the EUPL-1.2 or later.
+
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+from ...common.schema import BaseSchemaAttribute
+
+"""
+Parser and static validator of the midPoint Query Language (MQL) subset used by delineation filters.
+
+Supported are comparisons (`=`, `!=`, `<`, `<=`, `>`, `>=`), the string filters `startsWith`, `endsWith` and
+`contains` with an optional matching rule (`startsWith[stringIgnoreCase] "x"`), `exists` / `not exists`,
+`not` applied to a filter or an operator, `and`, `or` and parentheses. Values are quoted strings, bare
+numbers or booleans.
+
+Paths are resolved against the attributes of the application schema: the full item path
+(`c:attributes/ri:uid`), the path without namespace prefixes (`attributes/uid`) and, for attributes of the
+`attributes` container, the bare local name (`uid`) all refer to the same attribute.
+"""
+
+
+class MqlSyntaxError(ValueError):
+    """
+    Filter is not valid MQL.
+    """
+
+    def __init__(self, message: str, position: int):
+        super().__init__(f"{message} at position {position + 1}")
+        self.position = position
+
+
+STRING_OPERATORS = ("startsWith", "endsWith", "contains")
+OPERATORS = ("=", "!=", "<", "<=", ">", ">=", *STRING_OPERATORS)
+MATCHING_RULES = (
+    "stringIgnoreCase", "origIgnoreCase", "normIgnoreCase", "strictIgnoreCase", "polyStringOrig",
+    "polyStringNorm", "polyStringStrict", "distinguishedName",
+)  # fmt: skip
+
+# item paths that delineation filters must not use, see the prompt
+FORBIDDEN_NAMES = ("kind", "intent", "description")
+
+NUMERIC_TYPES = {
+    "xsd:int", "xsd:integer", "xsd:long", "xsd:short", "xsd:byte", "xsd:double", "xsd:float", "xsd:decimal",
+    "xsd:unsignedInt", "xsd:unsignedLong", "xsd:unsignedShort", "xsd:nonNegativeInteger",
+}  # fmt: skip
+BOOLEAN_TYPES = {"xsd:boolean"}
+
+DN_PATH = ("attributes", "dn")
+
+_TOKEN = re.compile(
+    r"""
+    (?P<space>\s+)
+    | (?P<number>-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?(?![\w:/]))
+    | (?P<op><=|>=|!=|=|<|>)
+    | (?P<punct>[()\[\]])
+    | (?P<path>[A-Za-z_][\w.\-]*(?::[A-Za-z_][\w.\-]*)?(?:/[A-Za-z_][\w.\-]*(?::[A-Za-z_][\w.\-]*)?)*)
+    """,
+    re.VERBOSE,
+)
+
+
+@dataclass(frozen=True)
+class Token:
+    """
+    Lexical token; kind is one of string, number, op, punct, path or end.
+    """
+
+    kind: str
+    value: str
+    position: int
+
+
+def tokenize(source: str) -> List[Token]:
+    tokens = []
+    i = 0
+    while i < len(source):
+        if source[i] in "\"'":
+            quote, start, chars = source[i], i, []
+            i += 1
+            while i < len(source) and source[i] != quote:
+                if source[i] == "\\" and i + 1 < len(source):
+                    i += 1
+                chars.append(source[i])
+                i += 1
+            if i >= len(source):
+                raise MqlSyntaxError("Unterminated string literal", start)
+            tokens.append(Token("string", "".join(chars), start))
+            i += 1
+            continue
+        match = _TOKEN.match(source, i)
+        if match is None:
+            raise MqlSyntaxError(f"Unexpected character {source[i]!r}", i)
+        if match.lastgroup != "space":
+            tokens.append(Token(match.lastgroup or "", match.group(), i))
+        i = match.end()
+    tokens.append(Token("end", "", len(source)))
+    return tokens
+
+
+@dataclass(frozen=True)
+class Comparison:
+    """
+    Comparison of an item with a value, e.g. `uid startsWith "adm"`.
+
+    :param path: Item path as written in the filter.
+    :param operator: One of `OPERATORS`.
+    :param value: String, number or boolean value.
+    :param quoted: Whether the value was a quoted string literal.
+    :param matching: Matching rule, e.g. "stringIgnoreCase".
+    :param negated: Whether the operator was negated (`uid not startsWith "adm"`).
+    """
+
+    path: str
+    operator: str
+    value: Union[str, float, bool]
+    quoted: bool
+    matching: Optional[str] = None
+    negated: bool = False
+
+
+@dataclass(frozen=True)
+class Exists:
+    """
+    Presence of an item, `path exists`, or its absence, `path not exists`.
+    """
+
+    path: str
+    negated: bool = False
+
+
+@dataclass(frozen=True)
+class Not:
+    operand: "Filter"
+
+
+@dataclass(frozen=True)
+class And:
+    operands: Tuple["Filter", ...]
+
+
+@dataclass(frozen=True)
+class Or:
+    operands: Tuple["Filter", ...]
+
+
+Filter = Union[Comparison, Exists, Not, And, Or]
+
+
+class Parser:
+    """
+    Recursive descent parser of one filter expression.
+    """
+
+    def __init__(self, source: str):
+        self.tokens = tokenize(source)
+        self.index = 0
+
+    @property
+    def token(self) -> Token:
+        return self.tokens[self.index]
+
+    def keyword(self, *words: str) -> bool:
+        return self.token.kind == "path" and self.token.value in words
+
+    def advance(self) -> Token:
+        token = self.token
+        self.index += 1
+        return token
+
+    def expect(self, kind: str, value: Optional[str] = None) -> Token:
+        token = self.token
+        if token.kind != kind or (value is not None and token.value != value):
+            raise MqlSyntaxError(f"Expected {value or kind}, found {self.describe(token)}", token.position)
+        return self.advance()
+
+    @staticmethod
+    def describe(token: Token) -> str:
+        return "end of filter" if token.kind == "end" else repr(token.value)
+
+    def parse(self) -> Filter:
+        result = self.parse_or()
+        if self.token.kind != "end":
+            raise MqlSyntaxError(
+                f"Unexpected {self.describe(self.token)}, expected 'and', 'or' or end of filter", self.token.position
+            )
+        return result
+
+    def parse_or(self) -> Filter:
+        operands = [self.parse_and()]
+        while self.keyword("or"):
+            self.advance()
+            operands.append(self.parse_and())
+        return operands[0] if len(operands) == 1 else Or(tuple(operands))
+
+    def parse_and(self) -> Filter:
+        operands = [self.parse_unary()]
+        while self.keyword("and"):
+            self.advance()
+            operands.append(self.parse_unary())
+        return operands[0] if len(operands) == 1 else And(tuple(operands))
+
+    def parse_unary(self) -> Filter:
+        if self.keyword("not"):
+            self.advance()
+            return Not(self.parse_unary())
+        if self.token.kind == "punct" and self.token.value == "(":
+            self.advance()
+            result = self.parse_or()
+            self.expect("punct", ")")
+            return result
+        return self.parse_predicate()
+
+    def parse_predicate(self) -> Filter:
+        token = self.token
+        if token.kind != "path" or token.value in ("and", "or", "exists"):
+            raise MqlSyntaxError(f"Expected item path, found {self.describe(token)}", token.position)
+        path = self.advance().value
+
+        negated = self.keyword("not")
+        if negated:
+            self.advance()
+        if self.keyword("exists"):
+            self.advance()
+            return Exists(path, negated)
+
+        operator = self.token
+        if not (operator.kind == "op" or (operator.kind == "path" and operator.value in STRING_OPERATORS)):
+            raise MqlSyntaxError(
+                f"Expected operator after '{path}', found {self.describe(operator)}", operator.position
+            )
+        self.advance()
+        matching = None
+        if self.token.kind == "punct" and self.token.value == "[":
+            self.advance()
+            rule = self.expect("path")
+            if rule.value not in MATCHING_RULES:
+                raise MqlSyntaxError(f"Unknown matching rule '{rule.value}'", rule.position)
+            matching = rule.value
+            self.expect("punct", "]")
+
+        value = self.advance()
+        if value.kind == "string":
+            return Comparison(path, operator.value, value.value, True, matching, negated)
+        if value.kind == "number":
+            return Comparison(path, operator.value, float(value.value), False, matching, negated)
+        if value.kind == "path" and value.value in ("true", "false"):
+            return Comparison(path, operator.value, value.value == "true", False, matching, negated)
+        if value.kind == "path":
+            raise MqlSyntaxError(f"String value '{value.value}' must be quoted", value.position)
+        raise MqlSyntaxError(f"Expected value, found {self.describe(value)}", value.position)
+
+
+@lru_cache(maxsize=1024)
+def parse_filter(source: str) -> Filter:
+    """
+    Parse an MQL filter expression.
+
+    :raises MqlSyntaxError: When the expression is not valid MQL of the supported subset.
+    """
+    return Parser(source).parse()
+
+
+def local_path(path: str) -> Tuple[str, ...]:
+    """
+    Return the item path without namespace prefixes, e.g. ("attributes", "uid") for "c:attributes/ri:uid".
+    """
+    return tuple(segment.split(":")[-1] for segment in path.split("/"))
+
+
+def path_keys(name: str) -> List[Tuple[str, ...]]:
+    """
+    Return the local paths an item is referred to by: the path without namespace prefixes and, for
+    attributes of the `attributes` container, the bare local name.
+    """
+    path = local_path(name)
+    if len(path) == 2 and path[0] == "attributes":
+        return [path, path[1:]]
+    return [path]
+
+
+class SchemaPaths:
+    """
+    Resolves item paths of filters to the attributes of an application schema.
+    """
+
+    def __init__(self, attributes: Sequence[BaseSchemaAttribute]):
+        self.attributes: Dict[Tuple[str, ...], BaseSchemaAttribute] = {}
+        for attribute in attributes:
+            for key in path_keys(attribute.name):
+                self.attributes.setdefault(key, attribute)
+
+    def resolve(self, path: str) -> Optional[BaseSchemaAttribute]:
+        return self.attributes.get(local_path(path))
+
+
+def predicates(node: Filter) -> List[Union[Comparison, Exists]]:
+    """
+    Return the comparisons and existence checks of a filter, depth first.
+    """
+    if isinstance(node, (Comparison, Exists)):
+        return [node]
+    if isinstance(node, Not):
+        return predicates(node.operand)
+    return [predicate for operand in node.operands for predicate in predicates(operand)]
+
+
+def comparison_errors(comparison: Comparison, attribute: Optional[BaseSchemaAttribute]) -> List[str]:
+    errors = []
+    if comparison.operator in STRING_OPERATORS and not comparison.quoted:
+        errors.append(f"Operator {comparison.operator} of '{comparison.path}' requires a quoted string value")
+    if comparison.matching and not comparison.quoted:
+        errors.append(f"Matching rule {comparison.matching} of '{comparison.path}' requires a quoted string value")
+    if attribute is None or comparison.operator in STRING_OPERATORS:
+        return errors
+    if attribute.type in NUMERIC_TYPES and comparison.quoted:
+        errors.append(f"Numeric attribute '{comparison.path}' must be compared with a bare number, not a quoted string")
+    elif attribute.type in BOOLEAN_TYPES and comparison.quoted:
+        errors.append(f"Boolean attribute '{comparison.path}' must be compared with bare true or false")
+    elif attribute.type not in NUMERIC_TYPES | BOOLEAN_TYPES and not comparison.quoted:
+        errors.append(f"Value of string attribute '{comparison.path}' must be quoted")
+    return errors
+
+
+def filter_errors(source: str, schema: Optional[SchemaPaths] = None) -> List[str]:
+    """
+    Parse a filter expression and check its item paths and values against the schema.
+
+    :param source: MQL filter expression.
+    :param schema: Attributes of the application schema; item paths are not checked when missing.
+    :return: Human-readable error messages, empty when the filter is valid.
+    """
+    try:
+        node = parse_filter(source)
+    except MqlSyntaxError as exc:
+        return [f"Invalid MQL filter '{source}': {exc}"]
+
+    errors = []
+    for predicate in predicates(node):
+        if local_path(predicate.path)[-1] in FORBIDDEN_NAMES:
+            errors.append(f"Attribute '{predicate.path}' must not be used in delineation filters")
+            continue
+        attribute = schema.resolve(predicate.path) if schema else None
+        if schema and attribute is None:
+            errors.append(f"Unknown attribute '{predicate.path}', it is not in the schema of the object class")
+        if isinstance(predicate, Comparison):
+            errors += comparison_errors(predicate, attribute)
+    return list(dict.fromkeys(errors))
+
+
+def base_context_errors(source: str) -> List[str]:
+    """
+    Check that a base context filter is a single equality of the DN with a quoted value.
+
+    :param source: Base context filter expression.
+    :return: Human-readable error messages, empty when the filter is valid.
+    """
+    expected = 'expected c:attributes/ri:dn = "<DN>"'
+    try:
+        node = parse_filter(source)
+    except MqlSyntaxError as exc:
+        return [f"Invalid baseContextFilter '{source}': {exc}, {expected}"]
+    if (
+        not isinstance(node, Comparison)
+        or local_path(node.path) != DN_PATH
+        or node.operator != "="
+        or node.negated
+        or node.matching
+        or not node.quoted
+    ):
+        return [f"Invalid baseContextFilter '{source}', {expected}"]
+    return []
@@ -2,7 +2,11 @@
 #
 # Licensed under the EUPL-1.2 or later.
 
+from fastapi import Request
+
+from ...common.jobs import add_job_routes
 from ...common.langfuse import ObservableAPIRouter
+from ...common.streaming import STREAMING_RESPONSES, stream_response, streaming_media_type
 from . import service
 from .schema import (
     SuggestObjectTypeRequest,
@@ -12,9 +16,30 @@ from .schema import (
 router = ObservableAPIRouter()
 
 
-@router.post("/suggestObjectType", response_model=SuggestObjectTypeResponse, response_model_exclude_none=True)
-async def suggest_delineation(req: SuggestObjectTypeRequest):
+@router.post(
+    "/suggestObjectType",
+    response_model=SuggestObjectTypeResponse,
+    responses=STREAMING_RESPONSES,
+    response_model_exclude_none=True,
+)
+async def suggest_delineation(req: SuggestObjectTypeRequest, request: Request):
     """
     Suggest midPoint object types (kind, intent and delineations) for the given object class.
+
+    Responds with a stream of progress, partial result and result events when the Accept header
+    requests `text/event-stream` or `application/x-ndjson`.
     """
+    media_type = streaming_media_type(request)
+    if media_type:
+        return stream_response(service.stream_delineation(req), media_type)
     return await service.suggest_delineation(req)
+
+
+add_job_routes(
+    router,
+    "/suggestObjectType",
+    service.suggest_delineation,
+    SuggestObjectTypeRequest,
+    SuggestObjectTypeResponse,
+    exclude_none=True,
+)
@@ -7,7 +7,7 @@ from typing import List, Optional, Tuple
 
 from pydantic import BaseModel, ConfigDict, Field
 
-from src.common.schema import ApplicationSchema
+from src.common.schema import ApplicationSchema, CorrectionStats
 
 
 class PatternTypeEnum(str, Enum):
@@ -237,6 +237,44 @@ class ValidationErrorFeedbackEntry(BaseModel):
     )
 
 
+class ObjectTypeEstimate(BaseModel):
+    """
+    Estimated number of objects matched by one suggested object type.
+    """
+
+    kind: str = Field(..., description="Kind of the suggested object type.")
+    intent: str = Field(..., description="Intent of the suggested object type.")
+    minCount: int = Field(..., description="Number of objects the delineation certainly matches.")
+    maxCount: int = Field(..., description="Number of objects the delineation possibly matches.")
+
+
+class OverlapEstimate(BaseModel):
+    """
+    Estimated number of objects matched by two suggested object types at once.
+    """
+
+    objectTypes: Tuple[str, str] = Field(..., description="The overlapping object types as 'kind/intent'.")
+    minCount: int = Field(..., description="Number of objects certainly matched by both delineations.")
+    maxCount: int = Field(..., description="Number of objects possibly matched by both delineations.")
+
+
+class DelineationEstimate(BaseModel):
+    """
+    Coverage and exclusivity of the suggested delineations estimated from the request statistics.
+
+    Values outside of the top-N value and pattern counts are unknown, hence every count is a range; attributes
+    are assumed to be independent unless a crosstab of the statistics shows their joint values.
+    """
+
+    size: int = Field(..., description="Total number of objects of the object class.")
+    objectTypes: List[ObjectTypeEstimate] = Field(..., description="Objects matched by each suggested object type.")
+    overlaps: List[OverlapEstimate] = Field(
+        default_factory=list, description="Pairs of suggested object types which possibly match the same objects."
+    )
+    minUncovered: int = Field(..., description="Number of objects certainly matched by no suggested object type.")
+    maxUncovered: int = Field(..., description="Number of objects possibly matched by no suggested object type.")
+
+
 class SuggestObjectTypeResponse(BaseModel):
     """
     Response payload containing suggested object types.
@@ -274,3 +312,9 @@ class SuggestObjectTypeResponse(BaseModel):
     )
 
     objectType: List[ObjectTypeSuggestion] = Field(..., description="Suggested object types.")
+    correction: Optional[CorrectionStats] = Field(
+        None, description="Statistics of the server-side validation and correction of the suggested object types."
+    )
+    estimate: Optional[DelineationEstimate] = Field(
+        None, description="Objects matched by the suggested object types estimated from the request statistics."
+    )
@@ -3,21 +3,30 @@
 # Licensed under the EUPL-1.2 or later.
 
 import logging
-from typing import Iterable, List, Optional
+import time
+from typing import AsyncIterator, Iterable, List, Optional
 
 from langchain.schema.output_parser import OutputParserException
 
-from src.common.llm import get_default_llm, make_basic_chain
+from src.common.budget import prompt_budget
+from src.common.llm import chains, get_default_llm
+from src.common.serializers import serializer_for
 from src.utils import pretty_json
 
+from ...common.correction import self_correct
 from ...common.errors import LLMResponseValidationException
 from ...common.langfuse import langfuse_handler
-from .prompts import parser, prompt
+from ...common.streaming import StreamEvent, complete_items
+from ...config import config
+from .evaluation import estimate_delineation
+from .prompts import Delineation, Rule, parser, prompt
 from .schema import (
     ObjectTypeSuggestion,
     SuggestObjectTypeRequest,
     SuggestObjectTypeResponse,
+    ValidationErrorFeedbackEntry,
 )
+from .validation import describe_feedback, overlap_feedback, validate_suggestions
 
 logger = logging.getLogger(__name__)
 
@@ -25,6 +34,8 @@ logger = logging.getLogger(__name__)
 Service module for suggesting object types (kind, intent and delineation rules) using an LLM chain.
 """
 
+chains.register("object_type", prompt, parser)
+
 
 def build_feedback_context_json(validation_errors) -> str:
     """
@@ -64,15 +75,12 @@ def build_feedback_context_json(validation_errors) -> str:
     return "```json\n" + pretty_json(payload) + "\n```"
 
 
-async def suggest_delineation(req: SuggestObjectTypeRequest) -> SuggestObjectTypeResponse:
+def build_prompt_variables(req: SuggestObjectTypeRequest) -> dict:
     """
-    Suggest object-type delineations for the supplied statistics.
-
-    :param req: SuggestObjectTypeRequest containing schema and statistical data.
-    :returns: SuggestObjectTypeResponse containing object-type suggestions.
+    Build the prompt variables (statistics JSON and optional validation feedback) for the request.
     """
-    # 1) Build prompt payload and JSON
-    stats_json = pretty_json(build_object_type_prompt_data(req))
+    # 1) Build prompt payload
+    prompt_data = build_object_type_prompt_data(req)
 
     # 2) Build feedback JSON (or empty string)
     feedback_context = ""
@@ -83,36 +91,149 @@ async def suggest_delineation(req: SuggestObjectTypeRequest) -> SuggestObjectTyp
             # be defensive; do not block the flow on feedback formatting
             feedback_context = ""
 
-    # 3) Invoke LLM chain
-    llm = get_default_llm()
-    chain = make_basic_chain(prompt, llm, parser)
+    # 3) Serialize the payload, compacted to the prompt budget
+    return prompt_budget.fit(
+        "object_type",
+        prompt,
+        prompt_data,
+        lambda data: {"stats_json": serializer_for("object_type")(data), "feedback_context": feedback_context},
+    )
+
+
+def to_suggestion(rule: Rule) -> ObjectTypeSuggestion:
+    """
+    Convert a delineation rule produced by the LLM into an object type suggestion.
+    """
+    return ObjectTypeSuggestion(
+        kind=rule.kind,
+        intent=rule.intent,
+        displayName=rule.displayName,
+        description=rule.description,
+        filter=_clean(getattr(rule, "filter", None)),
+        baseContextFilter=getattr(rule, "baseContextFilter", None),
+    )
+
+
+def build_response(delineation: Delineation) -> SuggestObjectTypeResponse:
+    return SuggestObjectTypeResponse(objectType=[to_suggestion(rule) for rule in delineation.object_class.rules])
+
 
+async def generate_delineation(req: SuggestObjectTypeRequest) -> SuggestObjectTypeResponse:
+    """
+    Generate object-type delineations by the LLM.
+    """
     try:
-        delineation = await chain.ainvoke(
-            {
-                "stats_json": stats_json,
-                "feedback_context": feedback_context,
-            },
+        delineation = await chains.ainvoke(
+            "object_type",
+            get_default_llm(),
+            build_prompt_variables(req),
             config={"callbacks": [langfuse_handler]},
         )
     except OutputParserException as exc:
         logger.exception("Output parsing failed: %s", exc)
         raise LLMResponseValidationException() from exc
 
-    # 4) Build response
-    suggestions = [
-        ObjectTypeSuggestion(
-            kind=rule.kind,
-            intent=rule.intent,
-            displayName=rule.displayName,
-            description=rule.description,
-            filter=_clean(getattr(rule, "filter", None)),
-            baseContextFilter=getattr(rule, "baseContextFilter", None),
-        )
-        for rule in delineation.object_class.rules
-    ]
+    return build_response(delineation)
+
+
+def delineation_feedback(
+    req: SuggestObjectTypeRequest, resp: SuggestObjectTypeResponse
+) -> List[ValidationErrorFeedbackEntry]:
+    """
+    Validate the suggested object types against the schema and, when they are valid, check their overlaps
+    estimated from the statistics.
+    """
+    feedback = validate_suggestions(resp.objectType, req.applicationSchema)
+    if not feedback and config.object_type.evaluate_rules:
+        estimate = estimate_delineation(resp.objectType, req.statistics)
+        feedback = overlap_feedback(resp.objectType, estimate, config.object_type.overlap_threshold)
+    return feedback
+
+
+async def correct_delineation(
+    req: SuggestObjectTypeRequest, resp: SuggestObjectTypeResponse, started: Optional[float] = None
+) -> SuggestObjectTypeResponse:
+    """
+    Validate the suggested object types and regenerate them with the validation errors added to the
+    `validationErrorFeedback` of the request while they fail, see `self_correct`, then attach the estimated
+    coverage.
+
+    :param req: Suggestion request.
+    :param resp: Generated suggestions.
+    :param started: `time.monotonic()` when the generation started.
+    :return: The first valid suggestions, otherwise the last generated ones, with the attempt statistics
+        and estimates.
+    """
+
+    async def validate(suggestions: SuggestObjectTypeResponse) -> Optional[List[ValidationErrorFeedbackEntry]]:
+        return delineation_feedback(req, suggestions)[: config.correction.max_errors] or None
+
+    async def regenerate(
+        suggestions: SuggestObjectTypeResponse, feedback: List[ValidationErrorFeedbackEntry]
+    ) -> SuggestObjectTypeResponse:
+        merged = (req.validationErrorFeedback or []) + feedback
+        return await generate_delineation(req.model_copy(update={"validationErrorFeedback": merged}))
+
+    resp, stats = await self_correct("object_type", resp, validate, regenerate, describe_feedback, started)
+    resp.correction = stats
+    if config.object_type.evaluate_rules:
+        resp.estimate = estimate_delineation(resp.objectType, req.statistics)
+    return resp
+
+
+async def suggest_delineation(req: SuggestObjectTypeRequest) -> SuggestObjectTypeResponse:
+    """
+    Suggest object-type delineations for the supplied statistics.
+
+    :param req: SuggestObjectTypeRequest containing schema and statistical data.
+    :returns: SuggestObjectTypeResponse containing object-type suggestions.
+    """
+    started = time.monotonic()
+    return await correct_delineation(req, await generate_delineation(req), started)
+
+
+async def stream_delineation(req: SuggestObjectTypeRequest) -> AsyncIterator[StreamEvent]:
+    """
+    Suggest object-type delineations streaming each suggestion as soon as the LLM completes its rule.
+
+    :param req: SuggestObjectTypeRequest containing schema and statistical data.
+    :returns: Async iterator of progress and item events followed by the result event.
+    """
+    started = time.monotonic()
+    yield StreamEvent(event="progress", data={"stage": "generating"})
+    emitted = 0
+    delineation: Optional[Delineation] = None
+    try:
+        async for kind, payload in chains.astream(
+            "object_type",
+            get_default_llm(),
+            build_prompt_variables(req),
+            config={"callbacks": [langfuse_handler]},
+        ):
+            if kind == "progress":
+                yield StreamEvent(event="progress", data={"stage": "generating", **payload})
+            elif kind == "partial":
+                for item in complete_items(payload, ("object_class", "rules"))[emitted:]:
+                    try:
+                        suggestion = to_suggestion(Rule.model_validate(item))
+                    except ValueError:
+                        # leave malformed rules to the final validated payload
+                        break
+                    emitted += 1
+                    yield StreamEvent(event="item", data=suggestion.model_dump(exclude_none=True))
+            else:
+                delineation = payload
+    except OutputParserException as exc:
+        logger.exception("Output parsing failed: %s", exc)
+        raise LLMResponseValidationException() from exc
+    if delineation is None:
+        raise LLMResponseValidationException()
 
-    return SuggestObjectTypeResponse(objectType=suggestions)
+    resp = build_response(delineation)
+    if config.correction.enabled and delineation_feedback(req, resp):
+        yield StreamEvent(event="progress", data={"stage": "correcting"})
+    resp = await correct_delineation(req, resp, started)
+    yield StreamEvent(event="result", data=resp.model_dump(exclude_none=True))
 
 
 def _clean(xs: Optional[Iterable[str]]) -> Optional[List[str]]:
@@ -0,0 +1,106 @@
+# Copyright (c) 2010-2025 Evolveum and contributors
+#
+# Licensed under the EUPL-1.2 or later.
+
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from ...common.schema import ApplicationSchema
+from .mql import SchemaPaths, base_context_errors, filter_errors
+from .schema import DelineationEstimate, ObjectTypeSuggestion, ValidationErrorFeedbackEntry
+
+"""
+Local validation of suggested object types.
+
+Catches the errors midPoint would report back as `validationErrorFeedback` without applying the filters:
+unknown kinds, duplicate kind/intent pairs, filters that are not valid MQL or refer to attributes missing in
+the schema, malformed base context filters and object types that trivially overlap.
+"""
+
+KINDS = ("account", "entitlement", "generic")
+
+
+def condition(suggestion: ObjectTypeSuggestion) -> Tuple[Optional[str], Tuple[str, ...]]:
+    return suggestion.baseContextFilter, tuple(sorted(suggestion.filter or []))
+
+
+def label(suggestion: ObjectTypeSuggestion) -> str:
+    return f"{suggestion.kind}/{suggestion.intent}"
+
+
+def validate_suggestions(
+    suggestions: Sequence[ObjectTypeSuggestion], schema: Optional[ApplicationSchema] = None
+) -> List[ValidationErrorFeedbackEntry]:
+    """
+    Validate suggested object types the way midPoint does before applying them.
+
+    :param suggestions: Suggested object types.
+    :param schema: Application schema the filters refer to; attribute names are not checked when it has
+        no attributes.
+    :return: Feedback entries of the invalid object types, empty when all are valid.
+    """
+    paths = SchemaPaths(schema.attribute) if schema and schema.attribute else None
+    labels: Set[Tuple[str, str]] = set()
+    conditions: Dict[Tuple[Optional[str], Tuple[str, ...]], str] = {}
+    feedback = []
+    for suggestion in suggestions:
+        errors = []
+        if suggestion.kind not in KINDS:
+            errors.append(f"Unknown kind '{suggestion.kind}', expected one of {', '.join(KINDS)}")
+        if (suggestion.kind, suggestion.intent) in labels:
+            errors.append(f"Kind and intent '{label(suggestion)}' are already used by another object type")
+        if suggestion.baseContextFilter is not None:
+            errors += base_context_errors(suggestion.baseContextFilter)
+        for expression in suggestion.filter or []:
+            errors += filter_errors(expression, paths)
+        if len(suggestions) > 1 and not suggestion.filter and not suggestion.baseContextFilter:
+            errors.append(
+                "Object type without filter and baseContextFilter matches all objects and overlaps the others"
+            )
+        elif condition(suggestion) in conditions:
+            errors.append(
+                f"Same filter as object type '{conditions[condition(suggestion)]}', "
+                "the object types are not mutually exclusive"
+            )
+
+        labels.add((suggestion.kind, suggestion.intent))
+        conditions.setdefault(condition(suggestion), label(suggestion))
+        if errors:
+            feedback.append(ValidationErrorFeedbackEntry(objectType=suggestion, filterErrors=errors))
+    return feedback
+
+
+def overlap_feedback(
+    suggestions: Sequence[ObjectTypeSuggestion], estimate: Optional[DelineationEstimate], threshold: float
+) -> List[ValidationErrorFeedbackEntry]:
+    """
+    Report object types that certainly match the same objects according to the estimate.
+
+    The overlap is reported on the later object type, which should exclude the earlier one by anti-conditions.
+
+    :param suggestions: Suggested object types.
+    :param estimate: Estimate of the suggestions, see `estimate_delineation`.
+    :param threshold: Fraction of all objects two object types must certainly share to be reported.
+    :return: Feedback entries of the overlapping object types, empty when there is no clear overlap.
+    """
+    if estimate is None:
+        return []
+    errors: Dict[str, List[str]] = {}
+    for overlap in estimate.overlaps:
+        if overlap.minCount > 0 and overlap.minCount >= threshold * estimate.size:
+            first, second = overlap.objectTypes
+            errors.setdefault(second, []).append(
+                f"Matches an estimated {overlap.minCount} to {overlap.maxCount} of {estimate.size} objects also "
+                f"matched by object type '{first}'; add anti-conditions so the object types are mutually exclusive"
+            )
+    return [
+        ValidationErrorFeedbackEntry(objectType=suggestion, filterErrors=errors[label(suggestion)])
+        for suggestion in suggestions
+        if label(suggestion) in errors
+    ]
+
+
+def describe_feedback(feedback: Sequence[ValidationErrorFeedbackEntry]) -> str:
+    """
+    Render feedback entries as one line per object type.
+    """
+    return "\n".join(f"{label(entry.objectType)}: {'; '.join(entry.filterErrors or [])}" for entry in feedback)
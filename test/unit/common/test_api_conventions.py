@@ -23,6 +23,8 @@ def test_camel_case_url_convention(client):
         assert "_" not in path
         assert "-" not in path
         for subpath in path.split("/"):
+            # path parameters like {jobId} follow the same convention
+            subpath = subpath.removeprefix("{").removesuffix("}")
             if subpath:
                 assert subpath[0].islower()
 
@@ -0,0 +1,85 @@
+# Copyright (c) 2010-2025 Evolveum and contributors
+#
+# Licensed under the EUPL-1.2 or later.
+
+import json
+
+import pytest
+from langchain.prompts import PromptTemplate
+
+from src.common.budget import (
+    PromptBudget,
+    TokenEstimator,
+    collapse_duplicate_patterns,
+    drop_empty_descriptions,
+    prompt_compactions,
+    trim_value_counts,
+    truncate_descriptions,
+)
+from src.config import PromptBudgetSettings
+
+prompt = PromptTemplate.from_template("Schema: {schema}")
+
+
+def render(payload):
+    return {"schema": json.dumps(payload)}
+
+
+@pytest.fixture
+def estimator() -> TokenEstimator:
+    return TokenEstimator(PromptBudgetSettings().chars_per_token)
+
+
+def test_estimator_counts_and_caches_fragments():
+    estimator = TokenEstimator(chars_per_token=4, cache_size=2)
+    assert estimator.count("Hello John") == 3
+    assert estimator.count("čšž") == 3
+    estimator.count("a")
+    assert list(estimator._fragments) == ["čšž", "a"]
+    assert estimator.estimate_prompt(prompt, {"schema": "John"}) == estimator.count("Schema: ") + 1
+
+
+def test_strategies():
+    settings = PromptBudgetSettings(description_max_chars=5, max_values=2)
+    payload = {
+        "a": {"type": "string", "description": ""},
+        "b": {"description": "A long description"},
+        "values": [{"value": "x", "count": 1}, {"value": "y", "count": 5}, {"value": "z", "count": 3}],
+        "patterns": [{"value": "OU=A", "type": "suffix", "count": 2}, {"value": "ou=a ", "type": "suffix", "count": 3}],
+    }
+
+    assert drop_empty_descriptions(payload, settings)
+    assert payload["a"] == {"type": "string"}
+    assert truncate_descriptions(payload, settings)
+    assert payload["b"]["description"] == "A lon…"
+    assert trim_value_counts(payload, settings)
+    assert [v["value"] for v in payload["values"]] == ["y", "z"]
+    assert collapse_duplicate_patterns(payload, settings)
+    assert payload["patterns"] == [{"value": "OU=A", "type": "suffix", "count": 5}]
+    assert not drop_empty_descriptions(payload, settings)
+
+
+def test_fit_within_budget_does_not_compact(estimator: TokenEstimator):
+    payload = {"a": {"description": ""}}
+    budget = PromptBudget(PromptBudgetSettings(endpoints={"test": 1000}), estimator)
+    assert budget.fit("test", prompt, payload, render) == render(payload)
+    unlimited = PromptBudget(PromptBudgetSettings(endpoints={}), estimator)
+    assert unlimited.fit("test", prompt, payload, render) == render(payload)
+
+
+def test_fit_applies_strategies_until_within_budget(estimator: TokenEstimator):
+    payload = {
+        "attrs": [{"name": f"attr{i}", "description": "" if i % 2 else "x" * 600} for i in range(10)],
+    }
+    budget = PromptBudget(PromptBudgetSettings(endpoints={"test": 500}, description_max_chars=20), estimator)
+    before = prompt_compactions.value(endpoint="test", strategy="truncate_descriptions")
+
+    variables = budget.fit("test", prompt, payload, render)
+
+    compacted = json.loads(variables["schema"])
+    assert compacted["attrs"][1] == {"name": "attr1"}
+    assert len(compacted["attrs"][0]["description"]) == 21
+    assert budget.estimator.estimate_prompt(prompt, variables) <= 500
+    assert prompt_compactions.value(endpoint="test", strategy="truncate_descriptions") - before == 1
+    # the payload itself is left intact
+    assert payload["attrs"][1]["description"] == ""
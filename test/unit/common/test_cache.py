@@ -0,0 +1,174 @@
+# Copyright (c) 2010-2025 Evolveum and contributors
+#
+# Licensed under the EUPL-1.2 or later.
+
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+
+from src.app import api
+from src.common import cache as cache_module
+from src.common.cache import DiskCacheTier, LLMResultCache, cache_key
+from src.config import CacheSettings, config
+from test.unit.modules.utils import response_mock
+
+
+class Item(BaseModel):
+    name: str
+    values: list[str] = []
+
+
+@pytest.fixture
+def cache() -> LLMResultCache:
+    return LLMResultCache(CacheSettings(endpoints=["test"], disk_enabled=False))
+
+
+def test_cache_key_is_canonical():
+    a = cache_key("matching", "model", "v1", {"a": "1", "b": "2"})
+    b = cache_key("matching", "model", "v1", {"b": "2", "a": "1"})
+    assert a == b
+    assert a != cache_key("matching", "other-model", "v1", {"a": "1", "b": "2"})
+    assert a != cache_key("matching", "model", "v2", {"a": "1", "b": "2"})
+    assert a != cache_key("focus_type", "model", "v1", {"a": "1", "b": "2"})
+
+
+def test_cache_returns_copy_of_stored_value(cache):
+    cache.set("k", Item(name="a", values=["x"]))
+
+    hit = cache.get("k")
+    assert hit == Item(name="a", values=["x"])
+    hit.values.append("y")
+    assert cache.get("k") == Item(name="a", values=["x"])
+
+
+def test_cache_evicts_least_recently_used():
+    cache = LLMResultCache(CacheSettings(endpoints=["test"], disk_enabled=False, max_entries=2))
+    cache.set("a", Item(name="a"))
+    cache.set("b", Item(name="b"))
+    cache.get("a")
+    cache.set("c", Item(name="c"))
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+
+
+def test_cache_respects_byte_limit():
+    cache = LLMResultCache(CacheSettings(endpoints=["test"], disk_enabled=False, max_bytes=60))
+    cache.set("a", Item(name="a" * 20))
+    cache.set("b", Item(name="b" * 20))
+    assert len(cache) == 1 and cache.get("b") is not None
+
+    cache.set("huge", Item(name="x" * 100))
+    assert cache.get("huge") is None
+
+
+def test_cache_expires_entries(monkeypatch):
+    cache = LLMResultCache(CacheSettings(endpoints=["test"], disk_enabled=False, ttl_seconds=10))
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+
+    cache.set("a", Item(name="a"))
+    now[0] += 5
+    assert cache.get("a") is not None
+    now[0] += 10
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_cache_endpoint_opt_in(cache):
+    assert cache.enabled_for("test")
+    assert not cache.enabled_for("mapping")
+    assert not LLMResultCache(CacheSettings(enabled=False, endpoints=["test"], disk_enabled=False)).enabled_for("test")
+
+
+@pytest.fixture
+def disk_settings(tmp_path) -> CacheSettings:
+    return CacheSettings(endpoints=["test"], disk_path=str(tmp_path / "cache" / "llm.sqlite3"))
+
+
+@pytest.mark.asyncio
+async def test_disk_tier_is_shared_between_cache_instances(disk_settings):
+    writer = LLMResultCache(disk_settings)
+    reader = LLMResultCache(disk_settings)
+
+    await writer.aset("k", "test", Item(name="a", values=["x"]))
+    assert await reader.aget("k", Item) == Item(name="a", values=["x"])
+    # disk hit is promoted to the memory tier
+    assert reader.get("k") == Item(name="a", values=["x"])
+
+    await writer.aclose()
+    await reader.aclose()
+
+
+@pytest.mark.asyncio
+async def test_disk_tier_survives_restart_and_warms_up_hot_entries(disk_settings):
+    disk_settings.warmup_entries = 1
+    cache = LLMResultCache(disk_settings)
+    await cache.aset("cold", "test", Item(name="cold"))
+    await cache.aset("hot", "test", Item(name="hot"))
+    await cache.aclose()
+    assert cache.disk is not None
+    cache.disk.get("hot")  # record a hit
+    cache.disk.close()
+
+    restarted = LLMResultCache(disk_settings)
+    await restarted.start({"test": Item})
+    assert restarted.get("hot") == Item(name="hot")
+    assert restarted.get("cold") is None
+    assert await restarted.aget("cold", Item) == Item(name="cold")
+    await restarted.aclose()
+
+
+def test_disk_tier_compaction_removes_expired_and_excess_entries(tmp_path, monkeypatch):
+    disk = DiskCacheTier(str(tmp_path / "llm.sqlite3"), max_entries=2)
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, "time", lambda: now[0])
+
+    disk.set("expired", "test", b"{}", ttl_seconds=1)
+    for i in range(3):
+        now[0] += 1
+        disk.set(f"k{i}", "test", b"{}", ttl_seconds=100)
+
+    assert disk.compact() == 2
+    assert disk.get("k0") is None and disk.get("expired") is None
+    assert disk.get("k1") == ("test", b"{}")
+    assert disk.get("k2") == ("test", b"{}")
+    disk.close()
+
+
+_FOCUS_TYPE_PAYLOAD = {
+    "kind": "account",
+    "intent": "default",
+    "schema": {
+        "name": "ri:account",
+        "attribute": [{"name": "c:attributes/ri:uid", "type": "xsd:string", "minOccurs": 0, "maxOccurs": 1}],
+    },
+}
+
+
+@pytest.fixture
+def enabled_cache(monkeypatch):
+    cache = LLMResultCache(CacheSettings(endpoints=["focus_type"], disk_enabled=False))
+    monkeypatch.setattr("src.common.llm.llm_cache", cache)
+    return cache
+
+
+@patch("src.modules.focus_type.service.get_default_llm", response_mock('{"focusTypeName": "UserType"}'))
+def test_cache_hit_is_reported_in_headers_and_metrics(enabled_cache):
+    client = TestClient(api)
+    url = f"{config.app.api_base_url}/focusType/suggestFocusType"
+
+    first = client.post(url, json=_FOCUS_TYPE_PAYLOAD)
+    second = client.post(url, json=_FOCUS_TYPE_PAYLOAD)
+
+    assert first.status_code == 200 and second.status_code == 200
+    assert first.headers["X-Cache"] == "MISS"
+    assert second.headers["X-Cache"] == "HIT"
+    assert second.json() == first.json() == {"focusTypeName": "UserType"}
+    assert len(enabled_cache) == 1
+
+    metrics_text = client.get("/metrics").text
+    assert 'llm_cache_requests_total{endpoint="focus_type",result="hit"}' in metrics_text
@@ -0,0 +1,85 @@
+# Copyright (c) 2010-2025 Evolveum and contributors
+#
+# Licensed under the EUPL-1.2 or later.
+
+import asyncio
+from typing import Optional
+
+import pytest
+
+from src.common.correction import self_correct
+from src.common.errors import LLMResponseValidationException
+from src.config import CorrectionSettings
+
+
+async def validate(result: int) -> Optional[str]:
+    return None if result >= 3 else f"{result} is too small"
+
+
+def incrementing(delay: float = 0.0):
+    async def regenerate(result: int, error: str) -> int:
+        await asyncio.sleep(delay)
+        return result + 1
+
+    return regenerate
+
+
+@pytest.mark.asyncio
+async def test_valid_result_is_returned_without_stats():
+    result, stats = await self_correct("test", 3, validate, incrementing(), settings=CorrectionSettings(enabled=True))
+    assert result == 3
+    assert stats is None
+
+
+@pytest.mark.asyncio
+async def test_invalid_result_is_corrected():
+    settings = CorrectionSettings(enabled=True, max_attempts=5)
+    result, stats = await self_correct("test", 1, validate, incrementing(), settings=settings)
+    assert result == 3
+    assert stats.attempts == 3
+    assert stats.valid
+    assert stats.errors == ["1 is too small", "2 is too small"]
+
+
+@pytest.mark.asyncio
+async def test_attempts_are_limited():
+    result, stats = await self_correct(
+        "test", 0, validate, incrementing(), settings=CorrectionSettings(enabled=True, max_attempts=2)
+    )
+    assert result == 1
+    assert stats.attempts == 2
+    assert not stats.valid
+
+
+@pytest.mark.asyncio
+async def test_deadline_cancels_running_attempt():
+    settings = CorrectionSettings(enabled=True, max_attempts=5, deadline=0.05)
+    result, stats = await self_correct("test", 1, validate, incrementing(delay=1.0), settings=settings)
+    assert result == 1
+    assert stats.attempts == 2
+    assert not stats.valid
+    assert stats.elapsedSeconds < 0.5
+
+
+@pytest.mark.asyncio
+async def test_unparsable_attempt_is_retried():
+    responses = [LLMResponseValidationException(), 3]
+
+    async def regenerate(result: int, error: str) -> int:
+        response = responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    result, stats = await self_correct(
+        "test", 1, validate, regenerate, settings=CorrectionSettings(enabled=True, max_attempts=3)
+    )
+    assert result == 3
+    assert stats.attempts == 3
+    assert stats.errors == ["1 is too small", "The response of the LLM could not be parsed."]
+
+
+@pytest.mark.asyncio
+async def test_disabled_loop_returns_result_as_generated():
+    settings = CorrectionSettings(enabled=False)
+    assert await self_correct("test", 1, validate, incrementing(), settings=settings) == (1, None)
@@ -0,0 +1,128 @@
+# Copyright (c) 2010-2025 Evolveum and contributors
+#
+# Licensed under the EUPL-1.2 or later.
+
+import asyncio
+
+import pytest
+
+from src.common.hedging import Hedger, hedge_wins
+from src.common.llm import LLMClientRegistry
+from src.config import HedgingSettings, LLMSettings
+
+
+@pytest.fixture
+def hedger() -> Hedger:
+    return Hedger(HedgingSettings(enabled=True, endpoints={"test": 0.5}, initial_delay=0.01, min_delay=0.0))
+
+
+def slow(result: str, delay: float = 1.0):
+    async def call():
+        await asyncio.sleep(delay)
+        return result
+
+    return call
+
+
+@pytest.mark.asyncio
+async def test_fast_primary_is_not_hedged(hedger: Hedger):
+    hedger.settings.initial_delay = 1.0
+    hedged = False
+
+    async def hedge():
+        nonlocal hedged
+        hedged = True
+
+    assert await hedger.run("test", slow("primary", 0.001), hedge) == "primary"
+    assert not hedged
+
+
+@pytest.mark.asyncio
+async def test_stalled_primary_is_hedged_and_cancelled(hedger: Hedger):
+    before = hedge_wins.value(endpoint="test", winner="hedge")
+    cancelled = False
+
+    async def primary():
+        nonlocal cancelled
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled = True
+            raise
+
+    assert await hedger.run("test", primary, slow("hedge", 0.001)) == "hedge"
+    await asyncio.sleep(0)
+    assert cancelled
+    assert hedge_wins.value(endpoint="test", winner="hedge") - before == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_hedge_waits_for_primary(hedger: Hedger):
+
+    async def hedge():
+        raise ValueError("invalid output")
+
+    assert await hedger.run("test", slow("primary", 0.05), hedge) == "primary"
+
+
+@pytest.mark.asyncio
+async def test_primary_error_is_raised_when_both_fail(hedger: Hedger):
+
+    async def primary():
+        await asyncio.sleep(0.05)
+        raise RuntimeError("primary")
+
+    async def hedge():
+        raise ValueError("hedge")
+
+    with pytest.raises(RuntimeError, match="primary"):
+        await hedger.run("test", primary, hedge)
+
+
+@pytest.mark.asyncio
+async def test_budget_caps_hedges(hedger: Hedger):
+    hedger.settings.endpoints = {"test": 0.0}
+    hedges = 0
+
+    async def hedge():
+        nonlocal hedges
+        hedges += 1
+        return "hedge"
+
+    results = [await hedger.run("test", slow("primary", 0.03), hedge) for _ in range(3)]
+    # one hedge is available upfront, the zero budget does not earn more
+    assert hedges == 1
+    assert results == ["hedge", "primary", "primary"]
+
+
+def test_delay_follows_latency_percentile(hedger: Hedger):
+    hedger.settings.min_samples, hedger.settings.percentile, hedger.settings.max_delay = 10, 0.9, 5.0
+    assert hedger.delay("test") == 0.01
+
+    for latency in range(1, 11):
+        hedger.record("test", latency / 10)
+    assert hedger.delay("test") == pytest.approx(0.9)
+
+    hedger.record("test", 100)
+    hedger.record("test", 100)
+    assert hedger.delay("test") == 5.0
+
+
+def test_enabled_for(hedger: Hedger):
+    assert hedger.enabled_for("test")
+    assert not hedger.enabled_for("matching")
+    hedger.settings.enabled = False
+    assert not hedger.enabled_for("test")
+
+
+def test_alternate_rotates_provider_order():
+    registry = LLMClientRegistry(LLMSettings(openai_api_key="x", extra_body={"provider": {"order": ["a", "b", "c"]}}))
+    llm = registry.get()
+
+    alternate = registry.alternate(llm)
+    assert alternate is not None and alternate is registry.alternate(llm)
+    assert alternate.kwargs["extra_body"] == {"provider": {"order": ["b", "c", "a"]}}
+
+    other_model = registry.alternate(llm, "other/model")
+    assert other_model is registry.get("other/model")
+    assert registry.alternate(object()) is None
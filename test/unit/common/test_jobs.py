@@ -0,0 +1,98 @@
+# Copyright (c) 2010-2025 Evolveum and contributors
+#
+# Licensed under the EUPL-1.2 or later.
+
+import asyncio
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+
+from src.common.errors import LLMResponseValidationException
+from src.common.jobs import JobManager, JobStatus, add_job_routes
+from src.config import JobSettings
+
+
+class EchoRequest(BaseModel):
+    text: str
+    delay: float = 0.0
+
+
+class EchoResponse(BaseModel):
+    text: str
+
+
+async def echo(req: EchoRequest) -> EchoResponse:
+    await asyncio.sleep(req.delay)
+    if req.text == "invalid":
+        raise LLMResponseValidationException()
+    return EchoResponse(text=req.text.upper())
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    manager = JobManager(JobSettings(max_concurrency=1, max_pending=2))
+    add_job_routes(app.router, "/echo", echo, EchoRequest, EchoResponse, manager=manager)
+    with TestClient(app) as client:
+        yield client
+
+
+def wait_for(client: TestClient, location: str) -> dict:
+    for _ in range(100):
+        body = client.get(location).json()
+        if body["status"] not in (JobStatus.pending, JobStatus.running):
+            return body
+        time.sleep(0.01)
+    raise AssertionError("job did not finish")
+
+
+def test_job_result_is_polled(client):
+    response = client.post("/echo/jobs", json={"text": "john"})
+    assert response.status_code == 202
+    job_id = response.json()["jobId"]
+    assert response.headers["Location"] == f"/echo/jobs/{job_id}"
+
+    assert wait_for(client, response.headers["Location"]) == {
+        "jobId": job_id,
+        "status": "succeeded",
+        "result": {"text": "JOHN"},
+        "error": None,
+    }
+
+
+def test_failed_job_reports_error(client):
+    location = client.post("/echo/jobs", json={"text": "invalid"}).headers["Location"]
+    body = wait_for(client, location)
+    assert body["status"] == "failed"
+    assert body["error"] == {"status": 550, "detail": "LLM Response Validation Error"}
+
+
+def test_job_is_cancelled_and_pending_jobs_are_bounded(client):
+    running = client.post("/echo/jobs", json={"text": "a", "delay": 10}).json()["jobId"]
+    client.post("/echo/jobs", json={"text": "b", "delay": 10})
+    assert client.post("/echo/jobs", json={"text": "c"}).status_code == 503
+
+    response = client.delete(f"/echo/jobs/{running}")
+    assert response.json()["status"] == "cancelled"
+    assert client.post("/echo/jobs", json={"text": "c"}).status_code == 202
+
+
+def test_unknown_job(client):
+    assert client.get("/echo/jobs/missing").status_code == 404
+    assert client.delete("/echo/jobs/missing").status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_finished_jobs_expire():
+    manager = JobManager(JobSettings(result_ttl=0.0))
+
+    async def call():
+        return "done"
+
+    job = manager.submit("test", call)
+    await job.task
+    assert job.status == JobStatus.succeeded
+    assert manager.get(job.id) is None
@@ -0,0 +1,130 @@
+# Copyright (c) 2010-2025 Evolveum and contributors
+#
+# Licensed under the EUPL-1.2 or later.
+
+import asyncio
+
+import httpx
+import openai
+import pytest
+
+from src.common.limits import AdaptiveConcurrencyLimiter, concurrency_decreases, overload_reason
+from src.config import ConcurrencySettings
+from test.unit.common.utils import rate_limit_error
+
+
+@pytest.fixture
+def limiter(request) -> AdaptiveConcurrencyLimiter:
+    # tests override the settings by indirect parametrization
+    settings = getattr(request, "param", {"initial_limit": 2, "max_limit": 4})
+    return AdaptiveConcurrencyLimiter(ConcurrencySettings(**settings))
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("limiter", [{"initial_limit": 2, "max_limit": 2}], indirect=True)
+async def test_excess_calls_are_queued(limiter):
+    running = 0
+    max_running = 0
+
+    async def call():
+        nonlocal running, max_running
+        running += 1
+        max_running = max(max_running, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return "ok"
+
+    tasks = [asyncio.ensure_future(limiter.run(call)) for _ in range(6)]
+    await asyncio.sleep(0)
+    assert limiter.queue_depth == 4
+
+    assert await asyncio.gather(*tasks) == ["ok"] * 6
+    assert max_running == 2
+    assert limiter.in_flight == 0 and limiter.queue_depth == 0
+
+
+@pytest.mark.asyncio
+async def test_limit_grows_additively_while_saturated_and_healthy(limiter):
+
+    async def call():
+        await asyncio.sleep(0.001)
+
+    await asyncio.gather(*(limiter.run(call) for _ in range(2)))
+    assert limiter.limit == 3
+
+    # a single call does not reach the limit, so it is not grown any further
+    await limiter.run(call)
+    assert limiter.limit == 3
+
+    await asyncio.gather(*(limiter.run(call) for _ in range(10)))
+    assert limiter.limit == 4
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("limiter", [{"initial_limit": 2, "max_limit": 4, "latency_threshold": 0.0}], indirect=True)
+async def test_slow_calls_do_not_grow_limit(limiter):
+
+    async def call():
+        await asyncio.sleep(0.001)
+
+    await asyncio.gather(*(limiter.run(call) for _ in range(2)))
+    assert limiter.limit == 2
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("limiter", [{"initial_limit": 4, "max_limit": 8}], indirect=True)
+async def test_burst_of_rate_limits_cuts_limit_once(limiter):
+    before = concurrency_decreases.value(reason="rate_limit")
+
+    async def call():
+        await asyncio.sleep(0.001)
+        raise rate_limit_error()
+
+    results = await asyncio.gather(*(limiter.run(call) for _ in range(4)), return_exceptions=True)
+    assert all(isinstance(r, openai.RateLimitError) for r in results)
+    assert limiter.limit == 2
+    assert concurrency_decreases.value(reason="rate_limit") - before == 1
+
+    with pytest.raises(openai.RateLimitError):
+        await limiter.run(call)
+    assert limiter.limit == 1
+
+
+@pytest.mark.asyncio
+async def test_other_errors_do_not_change_limit(limiter):
+
+    async def call():
+        raise ValueError("invalid output")
+
+    with pytest.raises(ValueError):
+        await limiter.run(call)
+    assert limiter.limit == 2 and limiter.in_flight == 0
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("limiter", [{"initial_limit": 1, "max_limit": 4}], indirect=True)
+async def test_cancelled_waiter_leaves_queue(limiter):
+    release = asyncio.Event()
+
+    async def call():
+        await release.wait()
+
+    first = asyncio.ensure_future(limiter.run(call))
+    second = asyncio.ensure_future(limiter.run(call))
+    await asyncio.sleep(0)
+    assert limiter.queue_depth == 1
+
+    second.cancel()
+    await asyncio.sleep(0)
+    assert limiter.queue_depth == 0
+
+    release.set()
+    await first
+    assert limiter.in_flight == 0
+
+
+def test_overload_reason():
+    assert overload_reason(rate_limit_error()) == "rate_limit"
+    assert overload_reason(asyncio.TimeoutError()) == "timeout"
+    assert overload_reason(httpx.ReadTimeout("timeout")) == "timeout"
+    assert overload_reason(ValueError()) is None
@@ -0,0 +1,165 @@
+# Copyright (c) 2010-2025 Evolveum and contributors
+#
+# Licensed under the EUPL-1.2 or later.
+
+import asyncio
+
+import httpx
+import pytest
+from langchain.prompts import PromptTemplate
+from langchain_core.messages import AIMessage
+from langchain_core.output_parsers import PydanticOutputParser
+from langchain_core.runnables import RunnableLambda
+from pydantic import BaseModel
+
+from src.common.llm import (
+    ChainRegistry,
+    LLMClientRegistry,
+    chains,
+    get_default_llm,
+    make_basic_chain,
+    retries_avoided,
+)
+from src.config import LLMSettings
+
+
+class Joke(BaseModel):
+    topic: str
+
+
+parser: PydanticOutputParser = PydanticOutputParser(pydantic_object=Joke)
+prompt = PromptTemplate.from_template("Tell a joke about {topic}.")
+
+
+@pytest.fixture
+def registry() -> LLMClientRegistry:
+    return LLMClientRegistry(LLMSettings(openai_api_key="invalid", openai_api_base="http://llm.invalid/v1"))
+
+
+def test_registry_reuses_client_for_same_key(registry):
+    first = registry.get(temperature=0.5)
+    second = registry.get(temperature=0.5)
+    assert first is second
+
+
+def test_registry_keys_by_model_temperature_and_effort(registry):
+    base = registry.get()
+    assert registry.get(temperature=0.0) is not base
+    assert registry.get(reasoning_effort="low") is not base
+    assert registry.get(model_name="other/model") is not base
+    assert registry.get(model_name="other/model").model_name == "other/model"
+
+
+def test_registry_clients_share_connection_pool(registry):
+    a = registry.get(temperature=0.0)
+    b = registry.get(temperature=1.0)
+    assert a.http_async_client is b.http_async_client
+    assert isinstance(a.http_async_client, httpx.AsyncClient)
+
+
+def test_registry_rebuilds_pool_for_new_event_loop(registry):
+    async def get_client():
+        return registry.get()
+
+    first = asyncio.run(get_client())
+    second = asyncio.run(get_client())
+    assert first is not second
+    assert first.http_async_client is not second.http_async_client
+
+
+@pytest.mark.asyncio
+async def test_registry_prewarm_failure_is_ignored(registry, monkeypatch):
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.path)
+        raise httpx.ConnectError("unreachable", request=request)
+
+    monkeypatch.setattr(
+        registry, "_create_http_client", lambda: httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    )
+
+    await registry.start()
+    assert calls == ["/v1/models"]
+
+    await registry.aclose()
+    assert registry._http_client is None
+
+
+def test_get_default_llm_returns_pooled_instance():
+    assert get_default_llm() is get_default_llm()
+
+
+def test_chain_registry_builds_chain_once_per_llm():
+    registry = ChainRegistry()
+    registry.register("joke", prompt, parser)
+    llm = RunnableLambda(lambda _: '{"topic": "cats"}')
+
+    first = registry.get("joke", llm)
+    assert registry.get("joke", llm) is first
+
+    other_llm = RunnableLambda(lambda _: '{"topic": "dogs"}')
+    assert registry.get("joke", other_llm) is not first
+
+
+def test_chain_registry_build_all():
+    registry = ChainRegistry()
+    registry.register("a", prompt, parser)
+    registry.register("b", prompt, parser)
+    llm = RunnableLambda(lambda _: "")
+
+    registry.build_all(llm)
+    assert registry.names == ["a", "b"]
+    assert registry._chains[("a", False)][0] is llm and registry._chains[("b", False)][0] is llm
+
+
+def test_chain_registry_unknown_chain():
+    with pytest.raises(KeyError):
+        ChainRegistry().get("missing", RunnableLambda(lambda _: ""))
+
+
+def test_chain_registry_has_all_modules_registered():
+    import src.router  # noqa: F401 - importing routers registers module chains
+
+    assert set(chains.names) >= {
+        "matching",
+        "mapping",
+        "object_type",
+        "focus_type",
+        "complex_pairing",
+        "extension_att",
+        "correlation",
+    }
+
+
+@pytest.mark.asyncio
+async def test_basic_chain_repairs_output_without_llm_retry():
+    calls = 0
+
+    def llm(_):
+        nonlocal calls
+        calls += 1
+        return AIMessage(content="```json\n{'topic': 'cats',}\n```")
+
+    before = retries_avoided.value(endpoint="jokes")
+    chain = make_basic_chain(prompt, RunnableLambda(llm), parser, name="jokes")
+
+    assert await chain.ainvoke({"topic": "cats"}) == Joke(topic="cats")
+    assert calls == 1
+    assert retries_avoided.value(endpoint="jokes") - before == 1
+
+
+@pytest.mark.asyncio
+async def test_basic_chain_falls_back_to_llm_retry():
+    responses = iter(["I cannot tell jokes.", '{"topic": "cats"}'])
+    calls = 0
+
+    def llm(_):
+        nonlocal calls
+        calls += 1
+        return AIMessage(content=next(responses))
+
+    chain = make_basic_chain(prompt, RunnableLambda(llm), parser, name="jokes")
+
+    assert await chain.ainvoke({"topic": "cats"}) == Joke(topic="cats")
+    assert calls == 2
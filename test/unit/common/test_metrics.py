@@ -0,0 +1,53 @@
+# Copyright (c) 2010-2025 Evolveum and contributors
+#
+# Licensed under the EUPL-1.2 or later.
+
+import pytest
+
+from src.common.metrics import MetricsRegistry
+
+
+def test_counter_and_gauge_render():
+    registry = MetricsRegistry()
+    counter = registry.counter("requests_total", "Requests.", ["endpoint"])
+    gauge = registry.gauge("queue_depth", "Queue depth.")
+
+    counter.inc(endpoint="a")
+    counter.inc(2, endpoint="a")
+    gauge.set(3)
+    gauge.dec()
+
+    assert counter.value(endpoint="a") == 3
+    text = registry.render()
+    assert "# TYPE requests_total counter" in text
+    assert 'requests_total{endpoint="a"} 3' in text
+    assert "queue_depth 2" in text
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry()
+    histogram = registry.histogram("latency_seconds", "Latency.", buckets=(1, 5))
+
+    histogram.observe(0.5)
+    histogram.observe(3)
+    histogram.observe(10)
+
+    text = registry.render()
+    assert 'latency_seconds_bucket{le="1"} 1' in text
+    assert 'latency_seconds_bucket{le="5"} 2' in text
+    assert 'latency_seconds_bucket{le="+Inf"} 3' in text
+    assert "latency_seconds_count 3" in text
+    assert histogram.count() == 3
+
+
+def test_registry_returns_existing_metric():
+    registry = MetricsRegistry()
+    assert registry.counter("a_total", "A.") is registry.counter("a_total", "A.")
+    with pytest.raises(ValueError):
+        registry.gauge("a_total", "A.")
+
+
+def test_metric_rejects_unknown_labels():
+    counter = MetricsRegistry().counter("b_total", "B.", ["endpoint"])
+    with pytest.raises(ValueError):
+        counter.inc(other="x")
@@ -3,11 +3,13 @@
 # Licensed under the EUPL-1.2 or later.
 
 from textwrap import dedent
+from typing import List, Optional
 
 import pytest
 from langchain.schema.output_parser import OutputParserException
+from pydantic import BaseModel
 
-from src.common.output_parsers import CodeSnippetOutputParser
+from src.common.output_parsers import CodeSnippetOutputParser, coerce_to_schema, repair_json, repair_output
 
 parser = CodeSnippetOutputParser()
 
@@ -98,3 +100,52 @@ def test_invalid_snippets():
     """)
     with pytest.raises(OutputParserException):
         parser.parse(raw)
+
+
+class Rule(BaseModel):
+    kind: str
+    filter: Optional[List[str]] = None
+
+
+class Delineation(BaseModel):
+    name: str
+    rules: List[Rule]
+
+
+@pytest.mark.parametrize(
+    "raw, expected",
+    [
+        ('```json\n{"a": 1}\n```', {"a": 1}),
+        ('Here is the result:\n{"a": 1}\nHope it helps!', {"a": 1}),
+        ('{"a": [1, 2,],}', {"a": [1, 2]}),
+        ('{\n  // the answer\n  "a": 1 /* one */\n}', {"a": 1}),
+        ("{'a': 'it\\'s \"quoted\"'}", {"a": 'it\'s "quoted"'}),
+        ('{"a": True, "b": None}', {"a": True, "b": None}),
+        ('{"a": {"b": [1, 2', {"a": {"b": [1, 2]}}),
+        ('{"a": 1, "b": "trunc', {"a": 1}),
+        ('{"url": "http://x.y/#z"}', {"url": "http://x.y/#z"}),
+        ("a: 1\nb:\n  - x\n  - y", {"a": 1, "b": ["x", "y"]}),
+    ],
+)
+def test_repair_json(raw, expected):
+    assert repair_json(raw) == expected
+
+
+@pytest.mark.parametrize("raw", ["", "not valid json", "Sorry, I cannot help with that."])
+def test_repair_json_fails_on_garbage(raw):
+    with pytest.raises(ValueError):
+        repair_json(raw)
+
+
+def test_coerce_to_schema_wraps_string_filters():
+    data = {"name": "ri:group", "rules": [{"kind": "a", "filter": "x = 1"}, {"kind": "b", "filter": ["y = 2"]}]}
+    assert coerce_to_schema(data, Delineation) == {
+        "name": "ri:group",
+        "rules": [{"kind": "a", "filter": ["x = 1"]}, {"kind": "b", "filter": ["y = 2"]}],
+    }
+
+
+def test_repair_output():
+    raw = "```json\n{'name': 'ri:group', 'rules': [{'kind': 'a', 'filter': 'x = 1'},]\n```"
+    assert repair_output(Delineation, raw) == Delineation(name="ri:group", rules=[Rule(kind="a", filter=["x = 1"])])
+    assert repair_output(Delineation, '{"name": "ri:group"}') is None
@@ -0,0 +1,129 @@
+# Copyright (c) 2010-2025 Evolveum and contributors
+#
+# Licensed under the EUPL-1.2 or later.
+
+import httpx
+import openai
+import pytest
+from langchain.prompts import PromptTemplate
+
+from src.common import ratelimit
+from src.common.ratelimit import RateLimiter, parse_delay, rate_limit_retries
+from src.config import ModelRateLimit, RateLimitSettings
+from test.unit.common.utils import rate_limit_error
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    delays: list[float] = []
+
+    async def sleep(delay: float) -> None:
+        delays.append(delay)
+
+    monkeypatch.setattr(ratelimit.asyncio, "sleep", sleep)
+    return delays
+
+
+@pytest.fixture
+def limiter() -> RateLimiter:
+    return RateLimiter(RateLimitSettings())
+
+
+def test_parse_delay():
+    assert parse_delay("2") == 2.0
+    assert parse_delay("1m30s") == 90.0
+    assert parse_delay("250ms") == 0.25
+    assert parse_delay("6m0s") == 360.0
+    assert parse_delay(str(1_700_000_010_000), now=1_700_000_000) == 10.0
+    assert parse_delay("1700000005", now=1_700_000_000) == 5.0
+    assert parse_delay("Tue, 14 Nov 2023 22:13:30 GMT", now=1_700_000_000) == 10.0
+    assert parse_delay("soon") is None
+    assert parse_delay(None) is None
+
+
+def test_estimate_prompt_tokens(limiter):
+    prompt = PromptTemplate.from_template("Hello {name}")
+    assert limiter.estimate_prompt_tokens(prompt, {"name": "John"}) == 3
+    assert RateLimiter(RateLimitSettings(enabled=False)).estimate_prompt_tokens(prompt, {"name": "John"}) == 0
+
+
+@pytest.mark.asyncio
+async def test_calls_over_token_budget_are_delayed(sleeps):
+    limiter = RateLimiter(RateLimitSettings(models={"m": ModelRateLimit(tokens_per_minute=600)}))
+
+    await limiter.acquire("m", 600)
+    assert sleeps == []
+
+    await limiter.acquire("m", 100)
+    assert sleeps == [pytest.approx(10, abs=0.1)]
+
+    # other models use the default limits, which are unlimited
+    await limiter.acquire("other", 10_000)
+    assert len(sleeps) == 1
+
+
+@pytest.mark.asyncio
+async def test_request_budget_delays_calls(sleeps):
+    limiter = RateLimiter(RateLimitSettings(default=ModelRateLimit(requests_per_minute=2)))
+    for _ in range(3):
+        await limiter.acquire("m", 0)
+    assert sleeps == [pytest.approx(30, abs=0.1)]
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_headers_delay_next_call(sleeps):
+    limiter = RateLimiter(RateLimitSettings(default=ModelRateLimit(tokens_per_minute=6000)))
+
+    limiter.observe_headers("m", httpx.Headers({"x-ratelimit-remaining-tokens": "0"}))
+    await limiter.acquire("m", 100)
+    assert sleeps[-1] == pytest.approx(5, abs=0.1)
+
+    limiter.observe_headers("n", httpx.Headers({"Retry-After": "7"}))
+    await limiter.acquire("n", 1)
+    assert sleeps[-1] == pytest.approx(7, abs=0.1)
+
+
+@pytest.mark.asyncio
+async def test_rate_limited_call_is_retried_after_retry_after(sleeps):
+    limiter = RateLimiter(RateLimitSettings(max_retries=2))
+    before = rate_limit_retries.value(model="m")
+    attempts = 0
+
+    async def call():
+        nonlocal attempts
+        attempts += 1
+        if attempts == 1:
+            raise rate_limit_error({"retry-after": "3"})
+        return "ok"
+
+    assert await limiter.run("m", 10, call) == "ok"
+    assert attempts == 2
+    assert sleeps == [pytest.approx(3, abs=0.1)]
+    assert rate_limit_retries.value(model="m") - before == 1
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_error_is_raised_after_max_retries(sleeps):
+    limiter = RateLimiter(RateLimitSettings(max_retries=1))
+
+    async def call():
+        raise rate_limit_error()
+
+    with pytest.raises(openai.RateLimitError):
+        await limiter.run("m", 10, call)
+    assert sleeps == [pytest.approx(5, abs=0.1)]
+
+
+@pytest.mark.asyncio
+async def test_response_hook_observes_headers_of_chat_completions(sleeps, limiter):
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, headers={"retry-after": "4"}, json={})
+
+    async with httpx.AsyncClient(
+        transport=httpx.MockTransport(handler), event_hooks={"response": [limiter.observe_response]}
+    ) as client:
+        await client.post("https://llm.example/v1/chat/completions", json={"model": "m", "messages": []})
+
+    await limiter.acquire("m", 1)
+    assert sleeps == [pytest.approx(4, abs=0.1)]
@@ -0,0 +1,40 @@
+# Copyright (c) 2010-2025 Evolveum and contributors
+#
+# Licensed under the EUPL-1.2 or later.
+
+import json
+
+from src.common.serializers import compact_json, serializer_for, tabular_json, tabulate
+from src.config import PromptFormat, SerializationSettings
+from src.utils import pretty_json
+
+
+def test_compact_json():
+    assert compact_json({"a": [1, "á"]}) == '{"a":[1,"á"]}'
+
+
+def test_tabulate_homogeneous_lists():
+    stats = {
+        "statistics": [
+            {"column": "a", "values": [{"value": "x", "count": 1}, {"value": "y", "count": 2}]},
+            {"column": "b", "values": []},
+        ],
+        "single": [{"value": "x"}],
+        "mixed": [{"a": 1}, {"b": 2}],
+    }
+    assert tabulate(stats) == {
+        "statistics": {
+            "columns": ["column", "values"],
+            "rows": [["a", {"columns": ["value", "count"], "rows": [["x", 1], ["y", 2]]}], ["b", []]],
+        },
+        "single": [{"value": "x"}],
+        "mixed": [{"a": 1}, {"b": 2}],
+    }
+    assert json.loads(tabular_json(stats)) == tabulate(stats)
+
+
+def test_serializer_for_module():
+    settings = SerializationSettings(modules={"object_type": "tabular"})
+    assert serializer_for("object_type", settings) is tabular_json
+    assert serializer_for("matching", settings) is pretty_json
+    assert serializer_for("matching", SerializationSettings(default=PromptFormat.compact)) is compact_json
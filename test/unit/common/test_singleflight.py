@@ -0,0 +1,107 @@
+# Copyright (c) 2010-2025 Evolveum and contributors
+#
+# Licensed under the EUPL-1.2 or later.
+
+import asyncio
+
+import pytest
+from langchain.prompts import PromptTemplate
+from langchain_core.messages import AIMessage
+from langchain_core.output_parsers import PydanticOutputParser
+from langchain_core.runnables import RunnableLambda
+from pydantic import BaseModel
+
+from src.common.llm import ChainRegistry
+from src.common.singleflight import SingleFlight, coalesced_calls
+
+
+class Answer(BaseModel):
+    value: str
+
+
+@pytest.mark.asyncio
+async def test_identical_calls_are_coalesced():
+    flight = SingleFlight()
+    calls = 0
+    before = coalesced_calls.value(endpoint="test")
+
+    async def call():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return Answer(value="x")
+
+    results = await asyncio.gather(*(flight.do("test", "key", call) for _ in range(5)))
+
+    assert calls == 1
+    assert all(r == Answer(value="x") for r in results)
+    assert len({id(r) for r in results}) == 5
+    assert coalesced_calls.value(endpoint="test") - before == 4
+    assert not flight.in_flight("key")
+
+
+@pytest.mark.asyncio
+async def test_different_keys_are_not_coalesced():
+    flight = SingleFlight()
+    calls = []
+
+    async def call(key):
+        calls.append(key)
+        await asyncio.sleep(0.01)
+        return key
+
+    results = await asyncio.gather(flight.do("test", "a", lambda: call("a")), flight.do("test", "b", lambda: call("b")))
+    assert results == ["a", "b"]
+    assert calls == ["a", "b"]
+
+
+@pytest.mark.asyncio
+async def test_failure_propagates_to_all_waiters():
+    flight = SingleFlight()
+
+    async def call():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("upstream failed")
+
+    results = await asyncio.gather(*(flight.do("test", "key", call) for _ in range(3)), return_exceptions=True)
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert not flight.in_flight("key")
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_cancel_shared_call():
+    flight = SingleFlight()
+
+    async def call():
+        await asyncio.sleep(0.02)
+        return "done"
+
+    leader = asyncio.ensure_future(flight.do("test", "key", call))
+    await asyncio.sleep(0)
+    follower = asyncio.ensure_future(flight.do("test", "key", call))
+    await asyncio.sleep(0)
+    leader.cancel()
+
+    assert await follower == "done"
+
+
+@pytest.mark.asyncio
+async def test_chain_registry_coalesces_identical_invocations():
+    llm_calls = 0
+
+    async def llm(_):
+        nonlocal llm_calls
+        llm_calls += 1
+        await asyncio.sleep(0.01)
+        return AIMessage(content='{"value": "x"}')
+
+    registry = ChainRegistry()
+    registry.register("test", PromptTemplate.from_template("Say {word}."), PydanticOutputParser(pydantic_object=Answer))
+    fake_llm = RunnableLambda(llm)
+
+    results = await asyncio.gather(*(registry.ainvoke("test", fake_llm, {"word": "x"}) for _ in range(3)))
+    assert results == [Answer(value="x")] * 3
+    assert llm_calls == 1
+
+    await registry.ainvoke("test", fake_llm, {"word": "y"})
+    assert llm_calls == 2
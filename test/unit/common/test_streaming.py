@@ -0,0 +1,84 @@
+# Copyright (c) 2010-2025 Evolveum and contributors
+#
+# Licensed under the EUPL-1.2 or later.
+
+from unittest.mock import patch
+
+import pytest
+from langchain.output_parsers import RetryWithErrorOutputParser
+from langchain.prompts import PromptTemplate
+from langchain_core.messages import AIMessageChunk
+from langchain_core.output_parsers import PydanticOutputParser
+from langchain_core.runnables import RunnableGenerator
+from pydantic import BaseModel
+
+from src.common.llm import ChainRegistry
+from src.common.streaming import (
+    NDJSON_MEDIA_TYPE,
+    SSE_MEDIA_TYPE,
+    StreamEvent,
+    complete_fields,
+    complete_items,
+    format_event,
+)
+
+
+class Answer(BaseModel):
+    items: list[str]
+    summary: str
+
+
+def streaming_llm(chunks: list[str]) -> RunnableGenerator:
+    async def generate(prompts):
+        async for _ in prompts:
+            pass
+        for chunk in chunks:
+            yield AIMessageChunk(content=chunk)
+
+    return RunnableGenerator(generate)
+
+
+def test_format_event():
+    event = StreamEvent(event="item", data={"name": "á"})
+    assert format_event(event, SSE_MEDIA_TYPE) == 'event: item\ndata: {"name": "á"}\n\n'
+    assert format_event(event, NDJSON_MEDIA_TYPE) == '{"event": "item", "data": {"name": "á"}}\n'
+
+
+def test_complete_items_and_fields():
+    partial = {"a": {"rules": [{"x": 1}, {"x": 2}, {"x"}]}, "b": "incomplete"}
+    assert complete_items(partial, ("a", "rules")) == [{"x": 1}, {"x": 2}]
+    assert complete_items(partial, ("b", "rules")) == []
+    assert complete_items(None, ("a",)) == []
+    assert complete_fields(partial) == {"a": partial["a"]}
+
+
+@pytest.mark.asyncio
+async def test_chain_registry_streams_partial_output_and_result():
+    registry = ChainRegistry()
+    registry.register(
+        "test", PromptTemplate.from_template("List {what}."), PydanticOutputParser(pydantic_object=Answer)
+    )
+    llm = streaming_llm(['```json\n{"items": ["a",', ' "b"', '], "summary": "two ', 'items"}\n```'])
+
+    events = [event async for event in registry.astream("test", llm, {"what": "letters"})]
+
+    partials = [payload for kind, payload in events if kind == "partial"]
+    assert partials[0] == {"items": ["a"]}
+    assert {"items": ["a", "b"], "summary": "two"} in partials
+    assert events[-1] == ("result", Answer(items=["a", "b"], summary="two items"))
+
+
+@pytest.mark.asyncio
+async def test_chain_registry_reuses_retry_parser():
+    registry = ChainRegistry()
+    registry.register(
+        "test", PromptTemplate.from_template("List {what}."), PydanticOutputParser(pydantic_object=Answer)
+    )
+    llm = streaming_llm(['{"items": [], "summary": "none"}'])
+
+    with patch.object(RetryWithErrorOutputParser, "from_llm", wraps=RetryWithErrorOutputParser.from_llm) as from_llm:
+        for _ in range(2):
+            events = [event async for event in registry.astream("test", llm, {"what": "letters"})]
+            assert events[-1] == ("result", Answer(items=[], summary="none"))
+
+    assert from_llm.call_count == 1
@@ -0,0 +1,120 @@
+# Copyright (c) 2010-2025 Evolveum and contributors
+#
+# Licensed under the EUPL-1.2 or later.
+
+from typing import Any, List, Optional
+
+import httpx
+import openai
+import pytest
+from langchain.prompts import PromptTemplate
+from langchain_core.messages import AIMessage
+from langchain_core.output_parsers import PydanticOutputParser
+from langchain_core.runnables import Runnable, RunnableConfig
+from pydantic import BaseModel
+
+from src.common.llm import ChainRegistry
+from src.common.structured import (
+    STRUCTURED_FORMAT_INSTRUCTIONS,
+    StructuredOutputSupport,
+    format_variable,
+    is_unsupported_error,
+    response_format,
+    response_schema,
+)
+
+
+class Pair(BaseModel):
+    MidPoint: str
+    Resource: List[str]
+
+
+class Pairs(BaseModel):
+    pairs: List[Pair]
+
+
+parser: PydanticOutputParser = PydanticOutputParser(pydantic_object=Pairs)
+prompt = PromptTemplate(
+    template="Match {schema}.\n{format_instructions}",
+    input_variables=["schema"],
+    partial_variables={"format_instructions": parser.get_format_instructions()},
+)
+OUTPUT = '{"pairs": [{"MidPoint": "c:name", "Resource": ["ri:login"]}]}'
+
+
+class FakeLLM(Runnable):
+    """
+    LLM recording prompts and `response_format`, optionally rejecting structured output.
+    """
+
+    def __init__(self, reject: bool = False):
+        self.reject = reject
+        self.calls: list[tuple[str, Optional[dict]]] = []
+
+    def invoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> AIMessage:
+        raise NotImplementedError
+
+    async def ainvoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> AIMessage:
+        fmt = kwargs.get("response_format")
+        self.calls.append((input.to_string(), fmt))
+        if fmt is not None and self.reject:
+            request = httpx.Request("POST", "http://llm.invalid/v1/chat/completions")
+            raise openai.BadRequestError(
+                "response_format json_schema is not supported",
+                response=httpx.Response(400, request=request),
+                body=None,
+            )
+        return AIMessage(content=OUTPUT)
+
+
+def test_response_schema_applies_enums():
+    schema = response_schema(Pairs, {"MidPoint": ["c:name", "c:name"], "Resource": ["ri:login"], "other": ["x"]})
+    pair = schema["$defs"]["Pair"]["properties"]
+    assert pair["MidPoint"]["enum"] == ["c:name"]
+    assert pair["Resource"]["items"]["enum"] == ["ri:login"]
+    # the model schema itself is not modified
+    assert "enum" not in Pairs.model_json_schema()["$defs"]["Pair"]["properties"]["MidPoint"]
+
+
+def test_response_format():
+    fmt = response_format("matching", Pairs)
+    assert fmt["type"] == "json_schema"
+    assert fmt["json_schema"]["name"] == "matching"
+    assert fmt["json_schema"]["schema"] == Pairs.model_json_schema()
+
+
+def test_format_variable_and_unsupported_errors():
+    assert format_variable(prompt) == "format_instructions"
+    assert format_variable(PromptTemplate.from_template("{x}")) is None
+    assert not is_unsupported_error(ValueError("response_format"))
+
+
+@pytest.mark.asyncio
+async def test_structured_invocation_replaces_format_instructions():
+    registry = ChainRegistry(structured=StructuredOutputSupport(True))
+    registry.register("test", prompt, parser)
+    llm = FakeLLM()
+
+    result = await registry.ainvoke("test", llm, {"schema": "users"}, enums={"MidPoint": ["c:name"]})
+
+    assert result.pairs[0].MidPoint == "c:name"
+    text, fmt = llm.calls[0]
+    assert STRUCTURED_FORMAT_INSTRUCTIONS in text and "properties" not in text
+    assert fmt["json_schema"]["schema"]["$defs"]["Pair"]["properties"]["MidPoint"]["enum"] == ["c:name"]
+
+
+@pytest.mark.asyncio
+async def test_unsupported_model_falls_back_to_text_parsing():
+    support = StructuredOutputSupport(True)
+    registry = ChainRegistry(structured=support)
+    registry.register("test", prompt, parser)
+    llm = FakeLLM(reject=True)
+
+    result = await registry.ainvoke("test", llm, {"schema": "users"})
+    assert result.pairs[0].Resource == ["ri:login"]
+    assert [fmt is not None for _, fmt in llm.calls] == [True, False]
+    assert "properties" in llm.calls[1][0]
+
+    # the model is remembered as unsupported
+    await registry.ainvoke("test", llm, {"schema": "groups"})
+    assert llm.calls[-1][1] is None and len(llm.calls) == 3
@@ -0,0 +1,17 @@
+# Copyright (c) 2010-2025 Evolveum and contributors
+#
+# Licensed under the EUPL-1.2 or later.
+
+from typing import Dict, Optional
+
+import httpx
+import openai
+
+
+def rate_limit_error(headers: Optional[Dict[str, str]] = None) -> openai.RateLimitError:
+    """
+    Returns the rate limit error raised by the OpenAI client, optionally with response headers.
+    """
+    request = httpx.Request("POST", "https://llm.example/v1/chat/completions")
+    response = httpx.Response(429, headers=headers or {}, request=request)
+    return openai.RateLimitError("rate limited", response=response, body=None)
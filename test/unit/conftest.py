@@ -13,3 +13,5 @@ patch.setenv("LLM__MODEL_NAME", "invalid")
 patch.setenv("LLM__MODEL_NAME", "invalid")
 # also don't want to use langfuse tracing
 patch.setenv("LANGFUSE__TRACING_ENABLED", "false")
+# responses of mocked llm must not leak between tests through the result cache
+patch.setenv("CACHE__ENABLED", "false")
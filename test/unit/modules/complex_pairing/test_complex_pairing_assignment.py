@@ -0,0 +1,57 @@
+# Copyright (c) 2010-2025 Evolveum and contributors
+#
+# Licensed under the EUPL-1.2 or later.
+
+import itertools
+import random
+
+from src.modules.complex_pairing.assignment import linear_assignment
+from src.modules.complex_pairing.prematching import resolve_pair
+from src.modules.complex_pairing.schema import AttributeValue, Pair, Record
+
+
+def record(identifier: str, *values: str) -> Record:
+    return Record(identifier=identifier, content=[AttributeValue(attribute="c:email[*]/value", value=list(values))])
+
+
+def test_linear_assignment_maximizes_total_score():
+    scores = [[1.0, 0.9], [0.9, 0.0]]
+    assert linear_assignment(scores) == [(0, 1), (1, 0)]
+
+
+def test_linear_assignment_matches_brute_force_on_rectangular_matrices():
+    rng = random.Random(7)
+    for rows, columns in [(1, 1), (2, 3), (4, 2), (5, 5)]:
+        scores = [[round(rng.random(), 2) for _ in range(columns)] for _ in range(rows)]
+        pairs = linear_assignment(scores)
+        candidates = (
+            list(zip(range(rows), permutation)) for permutation in itertools.permutations(range(columns), rows)
+        )
+        if rows > columns:
+            candidates = (
+                list(zip(permutation, range(columns))) for permutation in itertools.permutations(range(rows), columns)
+            )
+        best = max(sum(scores[i][j] for i, j in candidate) for candidate in candidates)
+        assert len(pairs) == min(rows, columns)
+        assert len({i for i, _ in pairs}) == len({j for _, j in pairs}) == len(pairs)
+        assert abs(sum(scores[i][j] for i, j in pairs) - best) < 1e-9
+
+
+def test_resolve_pair_does_not_force_mismatches():
+    pair = Pair(
+        midPoint=[record("1", "anna@x.com"), record("2", "bob@x.com"), record("3", "carl@x.com")],
+        application=[record("A", "bob@x.com"), record("B", "ANNA@x.com")],
+    )
+
+    resolution = resolve_pair(pair)
+
+    assert [(m.midPointIdentifier, m.applicationIdentifier) for m in resolution.mappings] == [("1", "B"), ("2", "A")]
+    assert resolution.residual is None
+
+
+def test_resolve_pair_min_score_leaves_partial_matches_to_the_llm():
+    pair = Pair(midPoint=[record("1", "anna@x.com")], application=[record("A", "anna@y.com")])
+
+    assert resolve_pair(pair).mappings == []
+    assert resolve_pair(pair).residual == pair
+    assert [m.applicationIdentifier for m in resolve_pair(pair, min_score=0.5).mappings] == ["A"]
@@ -0,0 +1,70 @@
+# Copyright (c) 2010-2025 Evolveum and contributors
+#
+# Licensed under the EUPL-1.2 or later.
+
+from src.modules.complex_pairing.blocking import BlockingIndex, blocking_keys, components
+from src.modules.complex_pairing.normalization import record_key
+from src.modules.complex_pairing.prematching import resolve_pair, score
+from src.modules.complex_pairing.schema import AttributeValue, Pair, Record
+
+
+def record(identifier: str, value: str, category: str = "") -> Record:
+    content = [AttributeValue(attribute="c:contact[*]/value", value=[value])]
+    if category:
+        content.append(AttributeValue(attribute="c:contact[*]/category", value=[category]))
+    return Record(identifier=identifier, content=content)
+
+
+def test_blocking_keys():
+    assert blocking_keys(record_key(record("1", "Jana.Nova+crm@Firma.sk", "Business"))) == {
+        ("email", "jana.nova@firma.sk"),
+        ("local", "jana.nova"),
+        ("prefix", "jana"),
+        ("domain", "firma.sk"),
+        ("category", "work"),
+    }
+    assert blocking_keys(record_key(record("2", "+421 905 123 456"))) == {("phone", "905123456"), ("phone", "3456")}
+
+
+def test_blocking_index_compares_records_sharing_a_block():
+    names = ("anna", "bob", "carl")
+    midpoints = [record_key(record(str(i), f"{name}@x.com")) for i, name in enumerate(names)]
+    applications = [record_key(record(f"A{i}", f"{name}@y.com")) for i, name in enumerate(names)]
+
+    # the domains differ, only the local-part blocks are shared with the counterparts
+    assert BlockingIndex(midpoints, applications).candidates() == {(0, 0), (1, 1), (2, 2)}
+
+
+def test_blocking_index_keeps_short_shared_tokens():
+    midpoints = [record_key(record("1", "IT Ops"))]
+    applications = [record_key(record("A", "IT Dev"))]
+
+    assert score(midpoints[0], applications[0]) > 0
+    assert BlockingIndex(midpoints, applications).candidates() == {(0, 0)}
+
+
+def test_blocking_index_purges_large_blocks():
+    midpoints = [record_key(record(str(i), f"user{i}@x.com")) for i in range(3)]
+    applications = [record_key(record(f"A{i}", f"other{i}@x.com")) for i in range(3)]
+
+    assert len(BlockingIndex(midpoints, applications).candidates()) == 9
+    assert BlockingIndex(midpoints, applications, max_block_size=2).candidates() == set()
+
+
+def test_components():
+    assert components([(0, 1), (2, 1), (1, 0), (3, 2)]) == [([0, 2], [1]), ([1], [0]), ([3], [2])]
+
+
+def test_resolve_pair_groups_residual_records_by_kind():
+    pair = Pair(
+        midPoint=[record("1", "anna@x.com"), record("2", "+421 905 123 456"), record("3", "+421 905 999 888")],
+        application=[record("A", "bob@z.com"), record("B", "0905 111 222")],
+    )
+
+    resolution = resolve_pair(pair)
+
+    assert resolution.mappings == []
+    assert [([r.identifier for r in g.midPoint], [r.identifier for r in g.application]) for g in resolution.groups] == [
+        (["1"], ["A"]),
+        (["2", "3"], ["B"]),
+    ]
@@ -0,0 +1,153 @@
+# Copyright (c) 2010-2025 Evolveum and contributors
+#
+# Licensed under the EUPL-1.2 or later.
+
+import json
+from unittest.mock import Mock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+from langchain_core.runnables import RunnableLambda
+
+from src.app import api
+from src.config import config
+from src.modules.complex_pairing import service as svc
+from src.modules.complex_pairing.early_stopping import evaluation_order, majority_decision, sample_status
+from src.modules.complex_pairing.prematching import resolve_pair
+from src.modules.complex_pairing.schema import AttributeValue, ComplexPairingRequest, Pair, Record
+from test.unit.modules.utils import ResponseMock
+
+
+def record(identifier: str, address: str) -> Record:
+    return Record(identifier=identifier, content=[AttributeValue(attribute="c:email[*]/value", value=[address])])
+
+
+def sample(identifier: str, domain: str = "example.org") -> Pair:
+    return Pair(
+        midPoint=[record(identifier, f"user{identifier}@example.com")],
+        application=[record(f"A{identifier}", f"user{identifier}@{domain}")],
+    )
+
+
+def test_sample_status_from_prematching():
+    partial = Pair(
+        midPoint=[record("1", "a@x.com"), record("2", "b@x.com"), record("3", "c@x.com")],
+        application=[record("A", "a@x.com"), record("B", "b@y.com"), record("C", "c@y.com")],
+    )
+    hopeless = Pair(
+        midPoint=[record("1", "a@x.com"), record("2", "b@x.com"), record("3", "c@x.com")],
+        application=[record("A", "+421 905 111 222"), record("B", "0905 222 333"), record("C", "r@y.com")],
+    )
+
+    assert sample_status(sample("1", "example.com"), resolve_pair(sample("1", "example.com"))) is True
+    assert sample_status(partial, resolve_pair(partial)) is None
+    assert sample_status(hopeless, resolve_pair(hopeless)) is False
+
+
+def test_majority_decision_is_exact_by_default():
+    assert majority_decision([True, True, None, None]) is None
+    assert majority_decision([True, True, True, None, None]) is True
+    assert majority_decision([False, False, None, None]) is False
+    assert majority_decision([True, False, None, None], [True, False], confidence=1.0) is None
+
+
+def test_majority_decision_with_confidence():
+    statuses = [True] * 10 + [None] * 30
+    judged = [True] * 10
+
+    assert majority_decision(statuses, judged) is None
+    assert majority_decision(statuses, judged, confidence=0.9) is True
+    assert majority_decision([False] * 10 + [None] * 30, [False] * 10, confidence=0.9) is False
+    assert majority_decision([True] * 2 + [None] * 38, [True, False], confidence=0.9) is None
+
+
+def test_evaluation_order_is_reproducible():
+    assert evaluation_order(5, "request") == [0, 1, 2, 3, 4]
+    assert evaluation_order(20, "random") == evaluation_order(20, "random") != list(range(20))
+    assert sorted(evaluation_order(20, "random")) == list(range(20))
+    with pytest.raises(ValueError):
+        evaluation_order(3, "largest")
+
+
+@pytest.mark.asyncio
+async def test_complex_pairing_stops_when_majority_is_decided(monkeypatch):
+    monkeypatch.setattr(config.complex_pairing, "early_stopping", True)
+    monkeypatch.setattr(config.complex_pairing, "batch_size", 1)
+    monkeypatch.setattr(config.complex_pairing, "evaluation_order", "request")
+    prompts = []
+
+    def respond(prompt, *args, **kwargs):
+        text = prompt.to_string()
+        prompts.append(text)
+        identifier = next(i for i in "12345" if f"user{i}@" in text)
+        mappings = [{"midPointIdentifier": identifier, "applicationIdentifier": f"A{identifier}"}]
+        return ResponseMock(json.dumps({"similar": True, "rationale": "Same local part.", "mappings": mappings}))
+
+    # different domains: every sample needs the LLM
+    req = ComplexPairingRequest(pairs=[sample(i) for i in "12345"])
+
+    with patch("src.modules.complex_pairing.service.get_default_llm", Mock(return_value=RunnableLambda(respond))):
+        resp = await svc.complex_pairing(req)
+
+    assert len(prompts) == 3
+    assert resp.similar is True
+    assert resp.evaluatedSamples == 3
+    assert [m.midPointIdentifier for m in resp.mappings] == ["1", "2", "3"]
+    assert resp.rationale == "3 of 3 evaluated samples match (5 samples in total). Same local part."
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("fill, expected", [(True, ["1", "2", "7"]), (False, ["1", "2"])])
+@patch("src.modules.complex_pairing.service.get_default_llm", Mock(side_effect=AssertionError("LLM called")))
+async def test_complex_pairing_fills_mappings_of_unevaluated_samples(monkeypatch, fill, expected):
+    monkeypatch.setattr(config.complex_pairing, "early_stopping", True)
+    partial = Pair(
+        midPoint=[record("7", "a@x.com"), record("8", "b@x.com"), record("9", "c@x.com")],
+        application=[record("A", "a@x.com"), record("B", "b@y.com"), record("C", "c@y.com")],
+    )
+    req = ComplexPairingRequest(
+        pairs=[sample("1", "example.com"), sample("2", "example.com"), partial], fillMappings=fill
+    )
+
+    resp = await svc.complex_pairing(req)
+
+    assert resp.similar is True
+    assert resp.evaluatedSamples == 2
+    assert [m.midPointIdentifier for m in resp.mappings] == expected
+
+
+@pytest.mark.parametrize("early_stopping", [False, True])
+@patch("src.modules.complex_pairing.service.get_default_llm", Mock(side_effect=AssertionError("LLM called")))
+def test_evaluated_samples_are_reported_only_with_early_stopping(monkeypatch, early_stopping):
+    monkeypatch.setattr(config.complex_pairing, "early_stopping", early_stopping)
+    req = ComplexPairingRequest(pairs=[sample(i, "example.com") for i in "123"])
+
+    response = TestClient(api).post(
+        f"{config.app.api_base_url}/complexPairing/complexPairing", json=req.model_dump(exclude_none=True)
+    )
+
+    assert response.status_code == 200
+    assert ("evaluatedSamples" in response.json()) is early_stopping
+
+
+@patch("src.modules.complex_pairing.service.get_default_llm", Mock(side_effect=AssertionError("LLM called")))
+def test_locally_decided_dissimilar_verdict_has_no_mappings(monkeypatch):
+    monkeypatch.setattr(config.complex_pairing, "early_stopping", True)
+    phone = AttributeValue(attribute="c:telephoneNumber", value=["+421 905 111 222"])
+    req = ComplexPairingRequest(
+        pairs=[
+            Pair(
+                midPoint=[record(i, f"user{i}@example.com")], application=[Record(identifier=f"A{i}", content=[phone])]
+            )
+            for i in "123"
+        ]
+    )
+
+    response = TestClient(api).post(
+        f"{config.app.api_base_url}/complexPairing/complexPairing", json=req.model_dump(exclude_none=True)
+    )
+
+    assert response.status_code == 200
+    assert response.json()["similar"] is False
+    assert response.json()["mappings"] == []
+    assert response.json()["evaluatedSamples"] == 3
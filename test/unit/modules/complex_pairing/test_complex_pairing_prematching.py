@@ -0,0 +1,199 @@
+# Copyright (c) 2010-2025 Evolveum and contributors
+#
+# Licensed under the EUPL-1.2 or later.
+
+import json
+from unittest.mock import Mock, patch
+
+import pytest
+from langchain_core.runnables import RunnableLambda
+
+from src.modules.complex_pairing import service as svc
+from src.modules.complex_pairing.normalization import classify, record_key
+from src.modules.complex_pairing.prematching import merge_verdict, resolve_pair
+from src.modules.complex_pairing.schema import AttributeValue, ComplexPairingRequest, IdMapping, Pair, Record
+from test.unit.modules.utils import ResponseMock, response_mock
+
+
+def email(identifier: str, address: str, category: str = "") -> Record:
+    content = [AttributeValue(attribute="c:email[*]/value", value=[address])]
+    if category:
+        content.append(AttributeValue(attribute="c:email[*]/type", value=[category]))
+    return Record(identifier=identifier, content=content)
+
+
+def test_classify_normalizes_values():
+    assert classify("Marcela.Nemcova30+news@GoogleMail.com") == ("email", "marcelanemcova30@gmail.com")
+    assert classify("jana.nova+sales@evolveum.com") == ("email", "jana.nova@evolveum.com")
+    assert classify("+421 905 123 456") == classify("0905/123-456") == ("phone", "905123456")
+    assert classify("https://www.Evolveum.com/") == ("url", "evolveum.com")
+    assert classify("  Šťastná  Ulica ") == ("text", "stastna ulica")
+
+
+def test_record_key_maps_category_synonyms():
+    key = record_key(email("1", "anna@example.com", "Business"))
+    assert key.values == {("email", "anna@example.com")}
+    assert key.categories == {"work"}
+
+
+def test_resolve_pair_leaves_ambiguous_records():
+    pair = Pair(
+        midPoint=[
+            email("1", "anna@example.com", "work"),
+            email("2", "bob@example.com", "home"),
+            email("3", "carl@example.com"),
+        ],
+        application=[
+            email("A", "ANNA@example.com", "office"),
+            email("B", "bob@example.com", "work"),
+            email("C", "c.novak@example.com"),
+        ],
+    )
+
+    resolution = resolve_pair(pair)
+
+    assert [(m.midPointIdentifier, m.applicationIdentifier) for m in resolution.mappings] == [("1", "A")]
+    assert resolution.residual is not None
+    # conflicting categories leave bob undecided, carl differs from c.novak but is an email as well
+    assert [r.identifier for r in resolution.residual.midPoint] == ["2", "3"]
+    assert [r.identifier for r in resolution.residual.application] == ["B", "C"]
+
+
+def test_merge_verdict_applies_strict_majority():
+    pairs = [
+        Pair(midPoint=[email("1", "a@x.com")], application=[email("A", "a@x.com")]),
+        Pair(midPoint=[email("2", "b@x.com")], application=[email("B", "b@y.com")]),
+        Pair(midPoint=[email("3", "c@x.com")], application=[email("C", "d@y.com")]),
+    ]
+    resolutions = [resolve_pair(pair) for pair in pairs]
+
+    verdict = merge_verdict(
+        pairs,
+        resolutions,
+        [[IdMapping(midPointIdentifier="2", applicationIdentifier="B")]],
+        ["Sample 2 matches by the local part."],
+    )
+
+    assert verdict.similar is True
+    assert [m.midPointIdentifier for m in verdict.mappings] == ["1", "2"]
+    assert verdict.rationale.startswith("2 of 3 samples match")
+    assert verdict.rationale.endswith("Sample 2 matches by the local part.")
+
+
+@pytest.mark.asyncio
+@patch("src.modules.complex_pairing.service.get_default_llm", Mock(side_effect=AssertionError("LLM called")))
+async def test_complex_pairing_resolves_clear_samples_locally():
+    req = ComplexPairingRequest(
+        pairs=[
+            Pair(
+                midPoint=[email("1", "anna.n@gmail.com", "home")],
+                application=[email("A", "annan@gmail.com", "private")],
+            ),
+            Pair(midPoint=[email("2", "bob@example.com")], application=[email("B", "BOB@example.com")]),
+        ]
+    )
+
+    resp = await svc.complex_pairing(req)
+
+    assert resp.similar is True
+    assert [(m.midPointIdentifier, m.applicationIdentifier) for m in resp.mappings] == [("1", "A"), ("2", "B")]
+
+
+@pytest.mark.asyncio
+async def test_complex_pairing_sends_only_residual_records():
+    prompts = []
+
+    def respond(prompt, *args, **kwargs):
+        prompts.append(prompt.to_string())
+        return ResponseMock(
+            json.dumps(
+                {
+                    "similar": False,
+                    "rationale": "The remaining records do not correspond.",
+                    "mappings": [],
+                }
+            )
+        )
+
+    req = ComplexPairingRequest(
+        pairs=[
+            Pair(midPoint=[email("1", "anna@example.com")], application=[email("A", "anna@example.com")]),
+            Pair(midPoint=[email("2", "bob@example.com")], application=[email("B", "bob@example.org")]),
+        ]
+    )
+
+    with patch("src.modules.complex_pairing.service.get_default_llm", Mock(return_value=RunnableLambda(respond))):
+        resp = await svc.complex_pairing(req)
+
+    assert len(prompts) == 1
+    assert "bob@example.com" in prompts[0] and "anna@example.com" not in prompts[0]
+    assert resp.similar is False
+    assert [m.midPointIdentifier for m in resp.mappings] == ["1"]
+    assert resp.rationale.endswith("The remaining records do not correspond.")
+
+
+@pytest.mark.asyncio
+@patch(
+    "src.modules.complex_pairing.service.get_default_llm",
+    response_mock(
+        json.dumps(
+            {
+                "similar": True,
+                "rationale": "Same local part at another domain.",
+                "mappings": [{"midPointIdentifier": "1", "applicationIdentifier": "A"}],
+            }
+        )
+    ),
+)
+async def test_complex_pairing_without_local_matches_returns_llm_verdict():
+    req = ComplexPairingRequest(
+        pairs=[Pair(midPoint=[email("1", "anna@example.com")], application=[email("A", "anna@example.org")])]
+    )
+
+    resp = await svc.complex_pairing(req)
+
+    assert resp.similar is True
+    assert resp.rationale == "Same local part at another domain."
+    assert [m.applicationIdentifier for m in resp.mappings] == ["A"]
+
+
+@pytest.mark.asyncio
+async def test_complex_pairing_sends_same_kind_records_with_different_values():
+    prompts = []
+
+    def respond(prompt, *args, **kwargs):
+        prompts.append(prompt.to_string())
+        return ResponseMock(
+            json.dumps(
+                {
+                    "similar": True,
+                    "rationale": "The remaining emails are same-kind value-edges.",
+                    "mappings": [
+                        {"midPointIdentifier": "2", "applicationIdentifier": "B"},
+                        {"midPointIdentifier": "3", "applicationIdentifier": "C"},
+                    ],
+                }
+            )
+        )
+
+    req = ComplexPairingRequest(
+        pairs=[
+            Pair(midPoint=[email("1", "anna@acme.com")], application=[email("A", "anna@acme.com")]),
+            Pair(midPoint=[email("2", "john.smith@acme.com")], application=[email("B", "jsmith@acme.com")]),
+            Pair(midPoint=[email("3", "mary@acme.com")], application=[email("C", "mbrown@acme.com")]),
+        ]
+    )
+
+    with patch("src.modules.complex_pairing.service.get_default_llm", Mock(return_value=RunnableLambda(respond))):
+        resp = await svc.complex_pairing(req)
+
+    assert prompts and all("anna@acme.com" not in prompt for prompt in prompts)
+    assert any("jsmith@acme.com" in prompt for prompt in prompts)
+    assert any("mbrown@acme.com" in prompt for prompt in prompts)
+    # without the LLM mappings only one of three samples would match
+    assert resp.similar is True
+    assert [(m.midPointIdentifier, m.applicationIdentifier) for m in resp.mappings] == [
+        ("1", "A"),
+        ("2", "B"),
+        ("3", "C"),
+    ]
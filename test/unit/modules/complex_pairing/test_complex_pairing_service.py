@@ -3,13 +3,17 @@
 # Licensed under the EUPL-1.2 or later.
 
 import json
-from unittest.mock import patch
+from unittest.mock import Mock, patch
 
 import pytest
+from fastapi.testclient import TestClient
+from langchain_core.runnables import RunnableLambda
 
+from src.app import api
+from src.config import config
 from src.modules.complex_pairing import service as svc
 from src.modules.complex_pairing.schema import AttributeValue, ComplexPairingRequest, Pair, Record
-from test.unit.modules.utils import response_mock
+from test.unit.modules.utils import ResponseMock, response_mock
 
 # ---------- Helper tests: _pairs_json ----------
 
@@ -87,7 +91,9 @@ def test_pairs_json_builds_expected_structure():
         )
     ),
 )
-async def test_complex_pairing_parses_llm_output():
+async def test_complex_pairing_parses_llm_output(monkeypatch):
+    # the sample would be paired locally without asking the LLM
+    monkeypatch.setattr(config.complex_pairing, "prematching", False)
     req = ComplexPairingRequest(
         pairs=[
             Pair(
@@ -120,3 +126,72 @@ async def test_complex_pairing_parses_llm_output():
     assert resp.mappings and len(resp.mappings) == 2
     assert resp.mappings[0].midPointIdentifier == "1"
     assert resp.mappings[0].applicationIdentifier == "A1"
+
+
+# ---------- Sharding ----------
+
+
+def _sample(identifier: str, midpoint: str, application: str) -> Pair:
+    return Pair(
+        midPoint=[
+            Record(identifier=identifier, content=[AttributeValue(attribute="c:email[*]/value", value=[midpoint])])
+        ],
+        application=[
+            Record(
+                identifier=f"A{identifier}", content=[AttributeValue(attribute="c:email/address", value=[application])]
+            )
+        ],
+    )
+
+
+def test_shard_pairs_respects_token_limit():
+    pairs = [_sample(str(i), f"user{i}@example.com", f"user{i}@example.org") for i in range(6)]
+
+    shards = svc.shard_pairs(pairs, 1)
+    assert [len(shard) for shard in shards] == [1] * 6
+    assert svc.shard_pairs(pairs, 100000) == [pairs]
+
+
+@pytest.mark.asyncio
+async def test_complex_pairing_judges_shards_and_decides_majority(monkeypatch):
+    monkeypatch.setattr(config.complex_pairing, "shard_tokens", 1)
+    prompts = []
+
+    def respond(prompt, *args, **kwargs):
+        text = prompt.to_string()
+        prompts.append(text)
+        identifier = next(i for i in "1234" if f"user{i}@" in text)
+        matching = identifier in "12"
+        mappings = [{"midPointIdentifier": identifier, "applicationIdentifier": f"A{identifier}"}] if matching else []
+        return ResponseMock(
+            json.dumps({"similar": matching, "rationale": f"Sample {identifier}.", "mappings": mappings})
+        )
+
+    # different domains: nothing is paired locally, every sample is left for the LLM
+    req = ComplexPairingRequest(pairs=[_sample(i, f"user{i}@example.com", f"user{i}@example.org") for i in "1234"])
+
+    with patch("src.modules.complex_pairing.service.get_default_llm", Mock(return_value=RunnableLambda(respond))):
+        resp = await svc.complex_pairing(req)
+
+    assert len(prompts) == 4
+    assert resp.similar is False
+    assert [(m.midPointIdentifier, m.applicationIdentifier) for m in resp.mappings] == [("1", "A1"), ("2", "A2")]
+    assert resp.rationale == "2 of 4 samples match. Sample 1. Sample 2. Sample 3. Sample 4."
+
+
+@pytest.mark.parametrize("shard_tokens", [1, 100000])
+@patch(
+    "src.modules.complex_pairing.service.get_default_llm",
+    response_mock(json.dumps({"similar": False, "rationale": "No records correspond.", "mappings": []})),
+)
+def test_complex_pairing_accepts_llm_verdict_without_mappings(monkeypatch, shard_tokens):
+    monkeypatch.setattr(config.complex_pairing, "shard_tokens", shard_tokens)
+    req = ComplexPairingRequest(pairs=[_sample(i, f"user{i}@example.com", f"user{i}@example.org") for i in "123"])
+
+    response = TestClient(api).post(
+        f"{config.app.api_base_url}/complexPairing/complexPairing", json=req.model_dump(exclude_none=True)
+    )
+
+    assert response.status_code == 200
+    assert response.json()["similar"] is False
+    assert response.json()["mappings"] == []
@@ -0,0 +1,105 @@
+# Copyright (c) 2010-2025 Evolveum and contributors
+#
+# Licensed under the EUPL-1.2 or later.
+
+import time
+from datetime import datetime, timezone
+
+import pytest
+
+from src.modules.mapping.groovy import GroovyError, GroovyUnsupportedError, evaluate
+
+
+@pytest.mark.parametrize(
+    "script, variables, expected",
+    [
+        ("// Uppercase input\ninput.toUpperCase()", {"input": "John"}, "JOHN"),
+        ("input?.trim()?.toLowerCase()", {"input": None}, None),
+        ("(input instanceof String ? input.trim().toLowerCase() : null)", {"input": " A "}, "a"),
+        ("input != null && input != ''", {"input": None}, False),
+        ("input ?: 'n/a'", {"input": ""}, "n/a"),
+        ("def parts = input.split('@')\nreturn parts[1]", {"input": "a@b.com"}, "b.com"),
+        ("input.split(/\\s+/).collect { it.capitalize() }.join(' ')", {"input": "john  smith"}, "John Smith"),
+        ("input.tokenize(',')*.trim().unique().sort()", {"input": "b, a,b"}, ["a", "b"]),
+        ("input.findAll { x -> x > 2 }.size()", {"input": [1, 2, 3, 4]}, 2),
+        ('"${givenName} ${familyName}".trim()', {"givenName": "Ann", "familyName": "Lee"}, "Ann Lee"),
+        ("input.replaceAll(/(\\w+)@(\\w+)/, '$2:$1')", {"input": "joe@corp"}, "corp:joe"),
+        ("def m = input =~ /(\\d+)/\nm ? m[0][1] : null", {"input": "abc123"}, "123"),
+        ("String s = input\ns.size() > 2 ? s[0..2] : s", {"input": "abcdef"}, "abc"),
+        ("input\n    ?.toUpperCase()", {"input": "x"}, "X"),
+        ("if (input == null) {\n    return null\n} else {\n    input.toInteger() + 1\n}", {"input": "41"}, 42),
+    ],
+)
+def test_evaluate(script, variables, expected):
+    assert evaluate(script, variables) == expected
+
+
+def test_evaluate_dates_and_static_helpers():
+    assert evaluate("Date.parse('yyyy-MM-dd', input).format('dd.MM.yyyy')", {"input": "2024-01-31"}) == "31.01.2024"
+    assert evaluate(
+        "input.format('yyyyMMdd HH:mm', TimeZone.getTimeZone('UTC'))",
+        {"input": datetime(2024, 1, 31, 23, 30, tzinfo=timezone.utc)},
+    ) == ("20240131 23:30")
+    assert evaluate(
+        "java.text.Normalizer.normalize(input, java.text.Normalizer.Form.NFD)"
+        ".replaceAll(/\\p{InCombiningDiacriticalMarks}+/, '')",
+        {"input": "Čáp"},
+    ) == ("Cap")
+    assert evaluate("org.apache.commons.lang3.StringUtils.stripAccents(input)", {"input": "Ján"}) == "Jan"
+    assert evaluate("try { Date.parse('dd.MM.yyyy', input) } catch (Exception e) { null }", {"input": "x"}) is None
+
+
+@pytest.mark.parametrize(
+    "script, error",
+    [
+        ("input.substring(0, 3)", "StringIndexOutOfBoundsException"),
+        ("firstName.toUpperCase()", "MissingPropertyException"),
+        ("input.foo.toUpperCase()", "MissingPropertyException"),
+        ("input.toInteger()", "NumberFormatException"),
+        ("input.toUpperCase().minus(1).size().toUpperCase()", "MissingMethodException"),
+    ],
+)
+def test_evaluate_runtime_errors(script, error):
+    with pytest.raises(GroovyError, match=error):
+        evaluate(script, {"input": "ab"})
+
+
+def test_null_dereference_fails():
+    with pytest.raises(GroovyError, match="NullPointerException"):
+        evaluate("input.toUpperCase()", {"input": None})
+
+
+@pytest.mark.parametrize(
+    "script",
+    ["while (true) {}", "basic.stringify(input)", "input.someExoticMethod()", "println(input)", "input.each {"],
+)
+def test_unsupported_scripts(script):
+    with pytest.raises(GroovyUnsupportedError):
+        evaluate(script, {"input": "a"})
+
+
+@pytest.mark.parametrize(
+    "script",
+    [
+        "input * 1000000000",
+        "(1..100000000).toList()",
+        "10 ** 100000",
+        "input.padLeft(1000000000)",
+        "def s = input\nfor (i in 0..<100) { s = s + s }\ns",
+    ],
+)
+def test_oversized_values_are_unsupported(script):
+    with pytest.raises(GroovyUnsupportedError, match="size limit"):
+        evaluate(script, {"input": "ab"})
+
+
+def test_evaluation_stops_at_deadline():
+    with pytest.raises(GroovyUnsupportedError, match="time limit"):
+        evaluate("for (i in 0..<50000) { input.size() }", {"input": "a"}, max_steps=10**9, deadline=time.monotonic())
+
+
+def test_backtracking_regex_stops_at_deadline():
+    started = time.monotonic()
+    with pytest.raises(GroovyUnsupportedError, match="time limit"):
+        evaluate("input =~ /(a|a)+b/ ? 'yes' : 'no'", {"input": "a" * 28}, deadline=started + 0.2)
+    assert time.monotonic() - started < 2
@@ -2,10 +2,14 @@
 #
 # Licensed under the EUPL-1.2 or later.
 
+import time
 from unittest.mock import patch
 
 import pytest
+from fastapi.testclient import TestClient
 
+from src.app import api
+from src.config import config
 from src.modules.mapping.schema import (
     IOExample,
     MappingSchemaAttribute,
@@ -209,6 +213,7 @@ async def test_suggest_mapping_script_inbound(monkeypatch):
     ),
 )
 async def test_suggest_mapping_script_outbound(monkeypatch):
+    monkeypatch.setattr(config.correction, "enabled", False)
     req = SuggestMappingRequest(
         applicationAttribute=[MappingSchemaAttribute(name="firstName", type="xsd:string", minOccurs=1, maxOccurs=1)],
         midPointAttribute=[MappingSchemaAttribute(name="givenName", type="xsd:string", minOccurs=0, maxOccurs=1)],
@@ -265,6 +270,7 @@ async def test_suggest_mapping_script_has_manager_single(monkeypatch):
     ),
 )
 async def test_suggest_mapping_script_previous_without_errorlog(monkeypatch):
+    monkeypatch.setattr(config.correction, "enabled", False)
     req = SuggestMappingRequest(
         applicationAttribute=[MappingSchemaAttribute(name="email", type="xsd:string", minOccurs=1, maxOccurs=1)],
         midPointAttribute=[MappingSchemaAttribute(name="normalizedEmail", type="xsd:string", minOccurs=0, maxOccurs=1)],
@@ -282,3 +288,81 @@ async def test_suggest_mapping_script_previous_without_errorlog(monkeypatch):
         description="Normalize email",
         transformationScript="// Normalize email\n(email instanceof String ? email.trim().toLowerCase() : null)",
     )
+
+
+@patch(
+    "src.modules.mapping.service.get_default_llm",
+    response_mock(
+        '{"description":"Uppercase input","transformationScript":"// Uppercase input\\ninput.toUpperCase()"}'
+    ),
+)
+def test_suggest_mapping_script_streams_server_sent_events(monkeypatch):
+    monkeypatch.setattr(config.mapping, "local_synthesis", False)
+    req = SuggestMappingRequest(
+        applicationAttribute=[MappingSchemaAttribute(name="firstName", type="xsd:string", minOccurs=1, maxOccurs=1)],
+        midPointAttribute=[MappingSchemaAttribute(name="givenName", type="xsd:string", minOccurs=0, maxOccurs=1)],
+        inbound=True,
+        example=[
+            IOExample(
+                application=[ValueExample(name="firstName", value=["John"])],
+                midPoint=[ValueExample(name="givenName", value=["JOHN"])],
+            )
+        ],
+    )
+    client = TestClient(api)
+    response = client.post(
+        f"{config.app.api_base_url}/mapping/suggestMapping",
+        json=req.model_dump(exclude_none=True),
+        headers={"Accept": "text/event-stream"},
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    messages = [m for m in response.text.split("\n\n") if m]
+    assert messages[0].startswith("event: progress")
+    assert messages[1] == 'event: partial\ndata: {"description": "Uppercase input"}'
+    assert messages[-1] == (
+        'event: result\ndata: {"description": "Uppercase input", '
+        '"transformationScript": "// Uppercase input\\ninput.toUpperCase()"}'
+    )
+
+
+@patch(
+    "src.modules.mapping.service.get_default_llm",
+    response_mock(
+        '{"description":"Uppercase input","transformationScript":"// Uppercase input\\ninput.toUpperCase()"}'
+    ),
+)
+def test_suggest_mapping_script_job_is_polled_through_observed_routes(monkeypatch):
+    monkeypatch.setattr(config.mapping, "local_synthesis", False)
+    req = SuggestMappingRequest(
+        applicationAttribute=[MappingSchemaAttribute(name="firstName", type="xsd:string", minOccurs=1, maxOccurs=1)],
+        midPointAttribute=[MappingSchemaAttribute(name="givenName", type="xsd:string", minOccurs=0, maxOccurs=1)],
+        inbound=True,
+        example=[
+            IOExample(
+                application=[ValueExample(name="firstName", value=["John"])],
+                midPoint=[ValueExample(name="givenName", value=["JOHN"])],
+            )
+        ],
+    )
+    with TestClient(api) as client:
+        response = client.post(
+            f"{config.app.api_base_url}/mapping/suggestMapping/jobs", json=req.model_dump(exclude_none=True)
+        )
+        assert response.status_code == 202
+        location = response.headers["Location"]
+
+        for _ in range(100):
+            polled = client.get(location)
+            assert polled.status_code == 200
+            if polled.json()["status"] not in ("pending", "running"):
+                break
+            time.sleep(0.01)
+
+        assert polled.json()["status"] == "succeeded"
+        assert polled.json()["result"] == {
+            "description": "Uppercase input",
+            "transformationScript": "// Uppercase input\ninput.toUpperCase()",
+        }
+        assert client.delete(location).status_code == 200
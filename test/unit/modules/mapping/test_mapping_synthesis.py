@@ -0,0 +1,159 @@
+# Copyright (c) 2010-2025 Evolveum and contributors
+#
+# Licensed under the EUPL-1.2 or later.
+
+import time
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+import pytest
+
+from src.modules.mapping.schema import IOExample, MappingSchemaAttribute, SuggestMappingRequest, ValueExample
+from src.modules.mapping.service import suggest_mapping_script
+from src.modules.mapping.synthesis import MAX_SOURCE_LENGTH, java_split, synthesis_results, synthesize
+from test.unit.modules.utils import response_mock
+
+
+def script(examples, variable="input"):
+    program = synthesize(examples)
+    return program.script(variable) if program else None
+
+
+def test_synthesize_case_conversion():
+    assert script([("John", "JOHN"), ("jane", "JANE"), (None, None)]) == (
+        "// Convert to upper case\ninput?.toUpperCase()"
+    )
+    assert script([("John", "John")]) == "// Copy input unchanged\ninput"
+
+
+def test_synthesize_split_and_affix():
+    assert script([("john@example.com", "john"), ("alice.b@corp.org", "alice.b")]) == (
+        "// Take part 1 split by '@'\ninput?.split('@')?.toList()?.getAt(0)"
+    )
+    assert script([("jsmith", "CN=jsmith,OU=Users"), ("ab", "CN=ab,OU=Users")], "uid") == (
+        "// Add prefix 'CN=' and suffix ',OU=Users'\n(uid == null ? null : 'CN=' + uid + ',OU=Users')"
+    )
+    assert script([("Smith", "S"), ("doe", "D")]) == (
+        "// Take the first character, then convert to upper case\ninput?.take(1)?.toUpperCase()"
+    )
+
+
+def test_synthesize_typed_conversions():
+    assert script([(True, False), (False, True)]) == "// Invert boolean\n(input == null ? null : !input)"
+    assert script([("31.01.2024", "2024-01-31"), ("01.12.2023", "2023-12-01")]) == (
+        "// Reformat date from dd.MM.yyyy to yyyy-MM-dd\n"
+        "(input == null ? null : Date.parse('dd.MM.yyyy', input).format('yyyy-MM-dd'))"
+    )
+    assert script([(datetime(2024, 1, 31, 10, tzinfo=timezone.utc), "20240131")]) == (
+        "// Format date as yyyyMMdd\ninput?.format('yyyyMMdd', TimeZone.getTimeZone('UTC'))"
+    )
+    assert script([("Alice", True), (None, False)]) == "// Check input presence\ninput != null && input != ''"
+
+
+def test_synthesize_constant_requires_distinct_inputs():
+    assert script([("a", "employee"), ("b", "employee")]) == "// Set constant value 'employee'\n'employee'"
+    assert script([("a", "employee")]) is None
+    assert script([("John", "Doe"), ("Jane", "Roe")]) is None
+    assert script([(None, "x")]) is None
+
+
+def test_synthesize_trims_padded_input():
+    assert synthesize([("john", "john")], trim=True).script("input") == "// Trim surrounding whitespace\ninput?.trim()"
+    assert synthesize([("John", "JOHN")], trim=True).script("input") == (
+        "// Trim surrounding whitespace, then convert to upper case\ninput?.trim()?.toUpperCase()"
+    )
+
+
+def test_synthesize_skips_long_sources():
+    name = "a" * MAX_SOURCE_LENGTH
+    assert script([(name[6:] + "@x.com", name[6:])]) == (
+        "// Take part 1 split by '@'\ninput?.split('@')?.toList()?.getAt(0)"
+    )
+    started = time.monotonic()
+    assert script([(name + "@x.com", name)]) is None
+    assert script([("x" * 5000, "X" * 5000)]) is None
+    assert time.monotonic() - started < 0.5
+
+
+def test_java_split_drops_trailing_empty_parts():
+    assert java_split("a,b,,", ",") == ["a", "b"]
+    assert java_split(",a", ",") == ["", "a"]
+    assert java_split("abc", ",") == ["abc"]
+
+
+def mapping_request(**kwargs) -> SuggestMappingRequest:
+    return SuggestMappingRequest(
+        applicationAttribute=[MappingSchemaAttribute(name="firstName", type="xsd:string", minOccurs=1, maxOccurs=1)],
+        midPointAttribute=[MappingSchemaAttribute(name="c:givenName", type="xsd:string", minOccurs=0, maxOccurs=1)],
+        example=[
+            IOExample(
+                application=[ValueExample(name="firstName", value=["john"])],
+                midPoint=[ValueExample(name="c:givenName", value=["JOHN"])],
+            )
+        ],
+        **kwargs,
+    )
+
+
+@pytest.mark.asyncio
+@patch("src.modules.mapping.service.get_default_llm", response_mock("not called"))
+async def test_suggest_mapping_script_synthesized_locally():
+    before = synthesis_results.value(result="hit")
+    resp = await suggest_mapping_script(mapping_request(inbound=False))
+    assert resp.synthesized
+    assert resp.transformationScript == "// Convert to lower case\ngivenName?.toLowerCase()"
+    assert synthesis_results.value(result="hit") - before == 1
+
+
+@pytest.mark.asyncio
+@patch("src.modules.mapping.service.get_default_llm", response_mock("not called"))
+async def test_suggest_mapping_script_synthesized_locally_trims_padded_input():
+    req = mapping_request(inbound=True)
+    req.example = [
+        IOExample(
+            application=[ValueExample(name="firstName", value=["  John "])],
+            midPoint=[ValueExample(name="c:givenName", value=["John"])],
+        ),
+        IOExample(
+            application=[ValueExample(name="firstName", value=["Jane"])],
+            midPoint=[ValueExample(name="c:givenName", value=["Jane"])],
+        ),
+    ]
+    resp = await suggest_mapping_script(req)
+    assert resp.synthesized
+    assert resp.transformationScript == "// Trim surrounding whitespace\ninput?.trim()"
+
+
+@pytest.mark.asyncio
+@patch(
+    "src.modules.mapping.service.get_default_llm",
+    response_mock(
+        '{"description":"Uppercase input","transformationScript":"// Uppercase input\\ninput.toUpperCase()"}'
+    ),
+)
+async def test_suggest_mapping_script_correction_uses_llm():
+    before = synthesis_results.value(result="skipped")
+    resp = await suggest_mapping_script(mapping_request(inbound=True, errorLog="NullPointerException"))
+    assert resp.synthesized is None
+    assert resp.description == "Uppercase input"
+    assert synthesis_results.value(result="skipped") - before == 1
+
+
+@pytest.mark.asyncio
+@patch(
+    "src.modules.mapping.service.get_default_llm",
+    response_mock('{"description":"Copy input","transformationScript":"// Copy input\\ninput"}'),
+)
+async def test_suggest_mapping_script_long_values_use_llm():
+    req = mapping_request(inbound=True)
+    req.example = [
+        IOExample(
+            application=[ValueExample(name="firstName", value=["j" * 5000])],
+            midPoint=[ValueExample(name="c:givenName", value=["j" * 5000])],
+        )
+    ]
+    started = time.monotonic()
+    resp = await suggest_mapping_script(req)
+    assert resp.synthesized is None
+    assert resp.description == "Copy input"
+    assert time.monotonic() - started < 2
@@ -0,0 +1,122 @@
+# Copyright (c) 2010-2025 Evolveum and contributors
+#
+# Licensed under the EUPL-1.2 or later.
+
+import time
+from unittest.mock import Mock
+
+import pytest
+from langchain_core.runnables import RunnableLambda
+
+from src.config import config
+from src.modules.mapping.schema import IOExample, MappingSchemaAttribute, SuggestMappingRequest, ValueExample
+from src.modules.mapping.service import suggest_mapping_script, verify_mapping_script
+from src.modules.mapping.synthesis import synthesize
+from src.modules.mapping.verification import VerificationStatus, values_match, verify_script
+from test.unit.modules.utils import ResponseMock
+
+
+def test_verify_script_reports_mismatches():
+    examples = [("john", "JOHN"), ("Ann", "ANN"), (None, None)]
+
+    assert verify_script("input?.toUpperCase()", examples, ["input"]).status == VerificationStatus.PASSED
+
+    verification = verify_script("input.capitalize()", examples, ["input"])
+    assert verification.status == VerificationStatus.FAILED
+    assert [m.index for m in verification.mismatches] == [1, 2, 3]
+    assert verification.mismatches[0].actual == "John"
+    assert "NullPointerException" in verification.mismatches[2].error
+    assert verification.error_log().splitlines()[1] == (
+        'Example 1: for input "john" the script returned "John", expected "JOHN"'
+    )
+
+    assert verify_script("basic.norm(input)", examples, ["input"]).status == VerificationStatus.UNSUPPORTED
+
+
+def test_verify_script_over_time_limit_is_unsupported():
+    verification = verify_script("for (i in 0..<50000) { input.size() }\ninput", [("a", "a")], ["input"], timeout=0.0)
+    assert verification.status == VerificationStatus.UNSUPPORTED
+    assert "time limit" in verification.reason
+
+
+@pytest.mark.asyncio
+async def test_verify_mapping_script_bounds_backtracking_regex(monkeypatch):
+    monkeypatch.setattr(config.mapping, "verify_timeout", 0.2)
+    req = SuggestMappingRequest(
+        applicationAttribute=[MappingSchemaAttribute(name="uid", type="xsd:string", minOccurs=1, maxOccurs=1)],
+        midPointAttribute=[MappingSchemaAttribute(name="name", type="xsd:string", minOccurs=0, maxOccurs=1)],
+        inbound=True,
+        example=[
+            IOExample(
+                application=[ValueExample(name="uid", value=["a" * 28])],
+                midPoint=[ValueExample(name="name", value=["no"])],
+            )
+        ],
+    )
+    started = time.monotonic()
+
+    verification = await verify_mapping_script(req, "input ==~ /(a|a)+b/ ? 'yes' : 'no'")
+
+    assert verification.status == VerificationStatus.UNSUPPORTED
+    assert "time limit" in verification.reason
+    assert time.monotonic() - started < 2
+
+
+def test_values_match():
+    assert values_match(["a"], "a")
+    assert values_match(["b", "a"], ["a", "b"])
+    assert values_match([], None)
+    assert values_match(5, "5")
+    assert values_match(5.0, 5)
+    assert not values_match("true", True)
+    assert not values_match("", None)
+
+
+@pytest.mark.parametrize(
+    "examples",
+    [
+        [("John", "JOHN"), ("jane", "JANE")],
+        [("john@example.com", "john"), ("a.b@corp.org", "a.b")],
+        [("jsmith", "CN=jsmith,OU=Users")],
+        [("31.01.2024", "2024-01-31")],
+        [(True, False), (False, True)],
+        [("Alice", True), (None, False)],
+    ],
+)
+def test_synthesized_scripts_pass_verification(examples):
+    program = synthesize(examples)
+    assert verify_script(program.script("input"), examples, ["input"]).status == VerificationStatus.PASSED
+
+
+def llm_responses(*contents: str) -> Mock:
+    remaining = list(contents)
+    return Mock(return_value=RunnableLambda(lambda *a, **k: ResponseMock(remaining.pop(0))))
+
+
+@pytest.mark.asyncio
+async def test_failing_script_is_corrected(monkeypatch):
+    monkeypatch.setattr(config.mapping, "local_synthesis", False)
+    monkeypatch.setattr(config.correction, "enabled", True)
+    llm = llm_responses(
+        '{"description":"Capitalize","transformationScript":"// Capitalize\\ninput.capitalize()"}',
+        '{"description":"Uppercase","transformationScript":"// Uppercase\\ninput?.toUpperCase()"}',
+    )
+    monkeypatch.setattr("src.modules.mapping.service.get_default_llm", llm)
+    req = SuggestMappingRequest(
+        applicationAttribute=[MappingSchemaAttribute(name="firstName", type="xsd:string", minOccurs=1, maxOccurs=1)],
+        midPointAttribute=[MappingSchemaAttribute(name="givenName", type="xsd:string", minOccurs=0, maxOccurs=1)],
+        inbound=True,
+        example=[
+            IOExample(
+                application=[ValueExample(name="firstName", value=["john"])],
+                midPoint=[ValueExample(name="givenName", value=["JOHN"])],
+            )
+        ],
+    )
+
+    resp = await suggest_mapping_script(req)
+
+    assert resp.transformationScript == "// Uppercase\ninput?.toUpperCase()"
+    assert llm.call_count == 2
+    assert resp.correction.attempts == 2
+    assert resp.correction.valid
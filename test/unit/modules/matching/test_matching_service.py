@@ -3,14 +3,16 @@
 # Licensed under the EUPL-1.2 or later.
 
 import json
-from unittest.mock import patch
+from unittest.mock import Mock, patch
 
 import pytest
+from langchain_core.runnables import RunnableLambda
 
 from src.common.errors import LLMResponseValidationException
+from src.config import config
 from src.modules.matching.schema import MatchSchemaRequest, SchemaAttributeMatch
-from src.modules.matching.service import build_match_schema_prompt_data, match_midpoint_schema
-from test.unit.modules.utils import response_mock
+from src.modules.matching.service import build_match_schema_prompt_data, match_midpoint_schema, shard_schema
+from test.unit.modules.utils import ResponseMock, response_mock
 
 # IGA (Active Directory ↔ MidPoint) base schemas
 _AD_JSON_SCHEMA = {
@@ -164,3 +166,40 @@ async def test_full_grouped_example():
 async def test_invalid_json_response():
     with pytest.raises(LLMResponseValidationException):
         await match_midpoint_schema(basic_req)
+
+
+def test_shard_schema_bounds_tokens_and_keeps_order():
+    schema = build_match_schema_prompt_data(basic_req)["Resource_schema"]
+    shards = shard_schema(schema, 40)
+    assert len(shards) > 1
+    assert [name for shard in shards for name in shard] == list(_AD_JSON_SCHEMA)
+    assert shard_schema({}, 40) == [{}]
+    assert shard_schema(schema, 100_000) == [schema]
+
+
+@pytest.mark.asyncio
+async def test_sharded_matching_merges_results_in_schema_order(monkeypatch):
+    monkeypatch.setattr(config.matching, "sharding_enabled", True)
+    monkeypatch.setattr(config.matching, "shard_tokens", 40)
+    prompts = []
+
+    def llm(prompt_value, *args, **kwargs):
+        text = prompt_value.to_string()
+        prompts.append(text)
+        # every shard matches the resource attributes it was given
+        pairs = [
+            {"MidPoint": mid, "Resource": [res]}
+            for mid, res in [("c:telephoneNumber", "mobile"), ("c:telephoneNumber", "telephoneNumber"), ("c:uid", "cn")]
+            if f'"{res}"' in text
+        ]
+        return ResponseMock(json.dumps({"pairs": pairs}))
+
+    with patch("src.modules.matching.service.get_default_llm", Mock(return_value=RunnableLambda(llm))):
+        resp = await match_midpoint_schema(basic_req)
+
+    assert len(prompts) == len(shard_schema(build_match_schema_prompt_data(basic_req)["Resource_schema"], 40))
+    assert [(m.midPointAttribute, m.applicationAttribute) for m in resp.attributeMatch] == [
+        ("c:uid", "cn"),
+        ("c:telephoneNumber", "telephoneNumber"),
+        ("c:telephoneNumber", "mobile"),
+    ]
@@ -0,0 +1,203 @@
+# Copyright (c) 2010-2025 Evolveum and contributors
+#
+# Licensed under the EUPL-1.2 or later.
+
+import json
+from unittest.mock import Mock
+
+import pytest
+from langchain_core.runnables import RunnableLambda
+
+from src.config import config
+from src.modules.object_type.evaluation import estimate_delineation
+from src.modules.object_type.schema import ObjectTypeSuggestion, Statistics, SuggestObjectTypeRequest
+from src.modules.object_type.service import suggest_delineation
+from src.modules.object_type.validation import overlap_feedback
+from test.unit.modules.utils import ResponseMock
+
+STATISTICS = {
+    "attribute": [
+        {
+            "ref": "c:attributes/ri:uid",
+            "uniqueValueCount": 100,
+            "missingValueCount": 0,
+            "valuePatternCount": [
+                {"value": "adm", "type": "prefix", "count": 10},
+                {"value": "svc", "type": "prefix", "count": 20},
+            ],
+        },
+        {"ref": "c:attributes/ri:employeeNumber", "uniqueValueCount": 60, "missingValueCount": 40},
+        {
+            "ref": "c:attributes/ri:groupType",
+            "uniqueValueCount": 3,
+            "missingValueCount": 0,
+            "valueCount": [{"value": "8.0", "count": 60}, {"value": "-2.0", "count": 30}],
+        },
+        {
+            "ref": "c:attributes/ri:dn",
+            "uniqueValueCount": 100,
+            "missingValueCount": 0,
+            "valuePatternCount": [
+                {"value": "ou=people,dc=example,dc=com", "type": "DNsuffix", "count": 70},
+                {"value": "ou=service,dc=example,dc=com", "type": "DNsuffix", "count": 30},
+            ],
+        },
+        {
+            "ref": "c:attributes/ri:type",
+            "uniqueValueCount": 2,
+            "missingValueCount": 0,
+            "valueCount": [{"value": "user", "count": 70}, {"value": "robot", "count": 30}],
+        },
+    ],
+    "attributeTuple": [
+        {
+            "ref": ["c:attributes/ri:type", "c:attributes/ri:groupType"],
+            "tupleCount": [
+                {"value": ["user", "8.0"], "count": 60},
+                {"value": ["user", "-2.0"], "count": 10},
+                {"value": ["robot", "-2.0"], "count": 20},
+                {"value": ["robot", "1.0"], "count": 10},
+            ],
+        }
+    ],
+    "size": 100,
+    "coverage": 1.0,
+}
+statistics = Statistics(**STATISTICS)
+
+
+def suggestion(intent: str, *filters: str, base=None) -> ObjectTypeSuggestion:
+    return ObjectTypeSuggestion(
+        kind="account",
+        intent=intent,
+        displayName=intent,
+        description=intent,
+        filter=list(filters),
+        baseContextFilter=base,
+    )
+
+
+def counts(estimate) -> dict:
+    return {e.intent: (e.minCount, e.maxCount) for e in estimate.objectTypes}
+
+
+def test_hierarchical_rules_are_exclusive_and_exhaustive():
+    estimate = estimate_delineation(
+        [
+            suggestion("admin", 'uid startsWith "adm"'),
+            suggestion("service", 'uid startsWith "svc"'),
+            suggestion("default", 'not (uid startsWith "adm")', 'not (uid startsWith "svc")'),
+        ],
+        statistics,
+    )
+    assert counts(estimate) == {"admin": (10, 10), "service": (20, 20), "default": (70, 70)}
+    assert estimate.overlaps == []
+    assert (estimate.minUncovered, estimate.maxUncovered) == (0, 0)
+
+
+def test_top_values_and_missing_values():
+    estimate = estimate_delineation(
+        [
+            suggestion("a", "groupType = 8.0"),
+            suggestion("b", "groupType = -2.0"),
+            suggestion("c", "employeeNumber exists"),
+        ],
+        statistics,
+    )
+    assert counts(estimate) == {"a": (60, 60), "b": (30, 30), "c": (60, 60)}
+    # the joint values of attributes without a crosstab are unknown, only the Fréchet bounds are certain
+    assert [(o.objectTypes, o.minCount, o.maxCount) for o in estimate.overlaps] == [
+        (("account/a", "account/c"), 20, 60),
+        (("account/b", "account/c"), 0, 30),
+    ]
+    # 10 objects have a group type outside of the top-N, any of them may lack the employee number
+    assert (estimate.minUncovered, estimate.maxUncovered) == (0, 10)
+
+
+def test_independent_attributes_are_not_certainly_overlapping():
+    suggestions = [suggestion("employee", "employeeNumber exists"), suggestion("admin", 'uid startsWith "adm"')]
+    estimate = estimate_delineation(suggestions, statistics)
+    assert [(o.minCount, o.maxCount) for o in estimate.overlaps] == [(0, 10)]
+    assert overlap_feedback(suggestions, estimate, threshold=0.01) == []
+
+
+def test_anti_conditions_on_the_same_attribute_exclude_overlaps():
+    estimate = estimate_delineation(
+        [
+            suggestion("admin", 'uid startsWith "adm"'),
+            suggestion("employee", "employeeNumber exists", 'not (uid startsWith "adm")'),
+        ],
+        statistics,
+    )
+    assert counts(estimate) == {"admin": (10, 10), "employee": (50, 60)}
+    assert estimate.overlaps == []
+    assert (estimate.minUncovered, estimate.maxUncovered) == (30, 50)
+
+
+def test_crosstab_is_the_joint_distribution():
+    estimate = estimate_delineation(
+        [suggestion("user", 'type = "user"'), suggestion("other", "groupType = -2.0")], statistics
+    )
+    assert [(o.objectTypes, o.minCount, o.maxCount) for o in estimate.overlaps] == [
+        (("account/user", "account/other"), 10, 10)
+    ]
+
+
+def test_base_context_filters():
+    estimate = estimate_delineation(
+        [
+            suggestion("people", base='c:attributes/ri:dn = "ou=people,dc=example,dc=com"'),
+            suggestion("service", base='c:attributes/ri:dn = "ou=service,dc=example,dc=com"'),
+        ],
+        statistics,
+    )
+    assert counts(estimate) == {"people": (70, 70), "service": (30, 30)}
+    assert estimate.overlaps == []
+
+
+def test_unknown_values_give_ranges():
+    estimate = estimate_delineation([suggestion("x", 'uid endsWith "x"'), suggestion("y", 'mail = "a"')], statistics)
+    assert counts(estimate) == {"x": (0, 100), "y": (0, 100)}
+
+
+def test_invalid_filter_is_not_evaluated():
+    assert estimate_delineation([suggestion("x", "uid = ")], statistics) is None
+
+
+def delineation(*rules) -> str:
+    items = [
+        {"kind": "account", "intent": intent, "displayName": intent, "description": intent, "filter": list(filters)}
+        for intent, *filters in rules
+    ]
+    return json.dumps({"object_class": {"name": "ri:account", "rules": items}})
+
+
+@pytest.mark.asyncio
+async def test_overlapping_rules_are_corrected(monkeypatch):
+    monkeypatch.setattr(config.correction, "enabled", True)
+    responses = [
+        delineation(("user", 'type = "user"'), ("other", "groupType = -2.0")),
+        delineation(("user", 'type = "user"'), ("other", "groupType = -2.0", 'not (type = "user")')),
+    ]
+    llm = Mock(return_value=RunnableLambda(lambda *a, **k: ResponseMock(responses.pop(0))))
+    monkeypatch.setattr("src.modules.object_type.service.get_default_llm", llm)
+    req = SuggestObjectTypeRequest(
+        **{
+            "schema": {
+                "name": "ri:account",
+                "attribute": [
+                    {"name": "c:attributes/ri:type", "type": "xsd:string", "minOccurs": 1, "maxOccurs": 1},
+                    {"name": "c:attributes/ri:groupType", "type": "xsd:double", "minOccurs": 1, "maxOccurs": 1},
+                ],
+            },
+            "statistics": STATISTICS,
+        }
+    )
+
+    resp = await suggest_delineation(req)
+
+    assert llm.call_count == 2
+    assert resp.correction.attempts == 2
+    assert "also matched by object type 'account/user'" in resp.correction.errors[0]
+    assert counts(resp.estimate) == {"user": (70, 70), "other": (20, 20)}
+    assert resp.estimate.overlaps == []
@@ -0,0 +1,95 @@
+# Copyright (c) 2010-2025 Evolveum and contributors
+#
+# Licensed under the EUPL-1.2 or later.
+
+import pytest
+
+from src.common.schema import BaseSchemaAttribute
+from src.modules.object_type.mql import (
+    And,
+    Comparison,
+    Exists,
+    MqlSyntaxError,
+    Not,
+    Or,
+    SchemaPaths,
+    base_context_errors,
+    filter_errors,
+    parse_filter,
+)
+
+schema = SchemaPaths(
+    [
+        BaseSchemaAttribute(name="c:attributes/ri:uid", type="xsd:string", minOccurs=1, maxOccurs=1),
+        BaseSchemaAttribute(name="c:attributes/ri:groupType", type="xsd:double", minOccurs=0, maxOccurs=1),
+        BaseSchemaAttribute(name="c:attributes/ri:employeeNumber", type="xsd:string", minOccurs=0, maxOccurs=1),
+        BaseSchemaAttribute(name="c:activation/c:administrativeStatus", type="xsd:string", minOccurs=0, maxOccurs=1),
+    ]
+)
+
+
+def test_parse_precedence_and_negation():
+    assert parse_filter('not (uid startsWith "adm") and groupType = 8.0 or employeeNumber not exists') == Or(
+        (
+            And((Not(Comparison("uid", "startsWith", "adm", True)), Comparison("groupType", "=", 8.0, False))),
+            Exists("employeeNumber", negated=True),
+        )
+    )
+
+
+def test_parse_matching_rule_and_negated_operator():
+    assert parse_filter("c:attributes/ri:uid not endsWith[stringIgnoreCase] 'SVC'") == Comparison(
+        "c:attributes/ri:uid", "endsWith", "SVC", True, "stringIgnoreCase", negated=True
+    )
+
+
+@pytest.mark.parametrize(
+    "source, message",
+    [
+        ('uid startsWith "adm', "Unterminated string literal at position 16"),
+        ("uid = adm", "String value 'adm' must be quoted at position 7"),
+        ('(uid = "a"', "Expected ), found end of filter at position 11"),
+        ('uid like "a"', "Expected operator after 'uid', found 'like' at position 5"),
+        ('uid = "a" uid = "b"', "Unexpected 'uid', expected 'and', 'or' or end of filter at position 11"),
+        ('uid startsWith[fuzzy] "a"', "Unknown matching rule 'fuzzy' at position 16"),
+        ('uid = ""a""', "Unexpected 'a', expected 'and', 'or' or end of filter at position 9"),
+    ],
+)
+def test_syntax_errors(source, message):
+    with pytest.raises(MqlSyntaxError) as exc:
+        parse_filter(source)
+    assert str(exc.value) == message
+
+
+@pytest.mark.parametrize(
+    "source",
+    [
+        'c:attributes/ri:uid startsWith "adm"',
+        "attributes/groupType = -2147483646.0",
+        'employeeNumber exists and not (uid endsWith[stringIgnoreCase] "svc")',
+        'c:activation/c:administrativeStatus = "enabled"',
+    ],
+)
+def test_valid_filters(source):
+    assert filter_errors(source, schema) == []
+
+
+def test_filter_errors_against_schema():
+    assert filter_errors('mail endsWith "@example.com" and groupType = "8.0" and uid = 5', schema) == [
+        "Unknown attribute 'mail', it is not in the schema of the object class",
+        "Numeric attribute 'groupType' must be compared with a bare number, not a quoted string",
+        "Value of string attribute 'uid' must be quoted",
+    ]
+    assert filter_errors('intent = "admin"', schema) == ["Attribute 'intent' must not be used in delineation filters"]
+    assert filter_errors("uid startsWith 5") == ["Operator startsWith of 'uid' requires a quoted string value"]
+
+
+def test_base_context_errors():
+    assert base_context_errors('c:attributes/ri:dn = "ou=people,dc=example,dc=com"') == []
+    expected = 'expected c:attributes/ri:dn = "<DN>"'
+    assert base_context_errors('c:attributes/ri:dn endsWith "ou=people"') == [
+        f"Invalid baseContextFilter 'c:attributes/ri:dn endsWith \"ou=people\"', {expected}"
+    ]
+    assert base_context_errors('uid = "x" and c:attributes/ri:dn = "ou=a"') == [
+        f'Invalid baseContextFilter \'uid = "x" and c:attributes/ri:dn = "ou=a"\', {expected}'
+    ]
@@ -6,8 +6,11 @@ import json
 from unittest.mock import patch
 
 import pytest
+from fastapi.testclient import TestClient
 
+from src.app import api
 from src.common.errors import LLMResponseValidationException
+from src.config import config
 from src.modules.object_type.schema import (
     ObjectTypeSuggestion,
     SuggestObjectTypeRequest,
@@ -15,6 +18,7 @@ from src.modules.object_type.schema import (
 )
 from src.modules.object_type.service import (
     build_object_type_prompt_data,
+    stream_delineation,
     suggest_delineation,
 )
 from test.unit.modules.utils import response_mock
@@ -149,7 +153,9 @@ _INVALID_JSON = "not valid json"
 
 @pytest.mark.asyncio
 @patch("src.modules.object_type.service.get_default_llm", response_mock(_SINGLE_RULE_JSON))
-async def test_suggest_delineation_single_rule():
+async def test_suggest_delineation_single_rule(monkeypatch):
+    # placeholder filters are not valid MQL
+    monkeypatch.setattr(config.correction, "enabled", False)
     resp = await suggest_delineation(request)
     assert resp == SuggestObjectTypeResponse(
         objectType=[
@@ -182,7 +188,9 @@ async def test_suggest_delineation_bad_json_raises():
 
 @pytest.mark.asyncio
 @patch("src.modules.object_type.service.get_default_llm", response_mock(_SINGLE_RULE_JSON))
-async def test_suggest_delineation_with_feedback():
+async def test_suggest_delineation_with_feedback(monkeypatch):
+    # placeholder filters are not valid MQL
+    monkeypatch.setattr(config.correction, "enabled", False)
     # Construct a request identical to the basic one and include empty validationErrorFeedback to exercise feedback handling
     req = SuggestObjectTypeRequest(
         **{
@@ -204,3 +212,62 @@ async def test_suggest_delineation_with_feedback():
             )
         ]
     )
+
+
+_TWO_RULES_JSON = json.dumps(
+    {
+        "object_class": {
+            "name": "ri:group",
+            "rules": [
+                {
+                    "kind": "entitlement",
+                    "intent": "security",
+                    "displayName": "Security Entitlement",
+                    "description": "Security groups.",
+                    "filter": ["ruleA"],
+                },
+                {
+                    "kind": "entitlement",
+                    "intent": "distribution",
+                    "displayName": "Distribution Entitlement",
+                    "description": "Distribution groups.",
+                    "filter": ["ruleB"],
+                },
+            ],
+        }
+    }
+)
+
+
+@pytest.mark.asyncio
+@patch("src.modules.object_type.service.get_default_llm", response_mock(_TWO_RULES_JSON))
+async def test_stream_delineation_emits_items_and_result(monkeypatch):
+    # placeholder filters are not valid MQL
+    monkeypatch.setattr(config.correction, "enabled", False)
+    events = [event async for event in stream_delineation(request)]
+
+    assert [e.event for e in events] == ["progress", "item", "result"]
+    assert events[1].data == {
+        "kind": "entitlement",
+        "intent": "security",
+        "displayName": "Security Entitlement",
+        "description": "Security groups.",
+        "filter": ["ruleA"],
+    }
+    assert [s["intent"] for s in events[2].data["objectType"]] == ["security", "distribution"]
+
+
+@patch("src.modules.object_type.service.get_default_llm", response_mock(_INVALID_JSON))
+def test_stream_delineation_reports_error_event():
+    client = TestClient(api)
+    response = client.post(
+        f"{config.app.api_base_url}/objectType/suggestObjectType",
+        json=_BASIC_REQ,
+        headers={"Accept": "application/x-ndjson"},
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    events = [json.loads(line) for line in response.text.splitlines()]
+    assert events[0]["event"] == "progress"
+    assert events[-1] == {"event": "error", "data": {"status": 550, "detail": "LLM Response Validation Error"}}
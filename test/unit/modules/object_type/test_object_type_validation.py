@@ -0,0 +1,106 @@
+# Copyright (c) 2010-2025 Evolveum and contributors
+#
+# Licensed under the EUPL-1.2 or later.
+
+import json
+from unittest.mock import Mock
+
+import pytest
+from langchain_core.runnables import RunnableLambda
+
+from src.config import config
+from src.modules.object_type.schema import ObjectTypeSuggestion, SuggestObjectTypeRequest
+from src.modules.object_type.service import suggest_delineation
+from src.modules.object_type.validation import validate_suggestions
+from test.unit.modules.utils import ResponseMock
+
+
+def suggestion(kind="account", intent="default", **kwargs) -> ObjectTypeSuggestion:
+    return ObjectTypeSuggestion(kind=kind, intent=intent, displayName=intent, description=intent, **kwargs)
+
+
+def errors(*suggestions: ObjectTypeSuggestion) -> dict:
+    return {
+        f"{entry.objectType.kind}/{entry.objectType.intent}": entry.filterErrors
+        for entry in validate_suggestions(suggestions)
+    }
+
+
+def test_valid_suggestions_have_no_feedback():
+    assert not errors(
+        suggestion(intent="admin", filter=['c:attributes/ri:uid startsWith "adm"']),
+        suggestion(intent="default", filter=['not (c:attributes/ri:uid startsWith "adm")']),
+        suggestion("generic", "projects", baseContextFilter='c:attributes/ri:dn = "ou=projects,dc=example,dc=com"'),
+    )
+
+
+def test_single_suggestion_without_filter_is_valid():
+    assert not errors(suggestion())
+
+
+def test_invalid_suggestions_are_reported():
+    assert errors(
+        suggestion("user", "default", filter=["a = 1"]),
+        suggestion("account", "admin", filter=['c:attributes/ri:uid startsWith "adm']),
+        suggestion("account", "admin", filter=["(a = 1"]),
+        suggestion("generic", "projects", baseContextFilter='c:attributes/ri:dn endsWith "ou=projects"'),
+        suggestion("account", "service", filter=["a = 1"]),
+        suggestion("account", "rest"),
+    ) == {
+        "user/default": ["Unknown kind 'user', expected one of account, entitlement, generic"],
+        "account/admin": [
+            "Kind and intent 'account/admin' are already used by another object type",
+            "Invalid MQL filter '(a = 1': Expected ), found end of filter at position 7",
+        ],
+        "generic/projects": [
+            "Invalid baseContextFilter 'c:attributes/ri:dn endsWith \"ou=projects\"', "
+            'expected c:attributes/ri:dn = "<DN>"'
+        ],
+        "account/service": ["Same filter as object type 'user/default', the object types are not mutually exclusive"],
+        "account/rest": [
+            "Object type without filter and baseContextFilter matches all objects and overlaps the others"
+        ],
+    }
+
+
+def delineation(*filters: str) -> str:
+    rules = [
+        {"kind": "account", "intent": f"i{i}", "displayName": "D", "description": "D", "filter": [f]}
+        for i, f in enumerate(filters)
+    ]
+    return json.dumps({"object_class": {"name": "ri:account", "rules": rules}})
+
+
+@pytest.mark.asyncio
+async def test_invalid_suggestions_are_corrected(monkeypatch):
+    monkeypatch.setattr(config.correction, "enabled", True)
+    prompts = []
+    responses = [delineation("a = 1", "a = 1"), delineation("a = 1", "a = 2")]
+
+    def respond(prompt, *args, **kwargs):
+        prompts.append(prompt.to_string())
+        return ResponseMock(responses.pop(0))
+
+    monkeypatch.setattr("src.modules.object_type.service.get_default_llm", Mock(return_value=RunnableLambda(respond)))
+    req = SuggestObjectTypeRequest(
+        **{
+            "schema": {"name": "ri:account", "attribute": []},
+            "statistics": {"attribute": [], "size": 2, "coverage": 1.0},
+            "validationErrorFeedback": [
+                {
+                    "objectType": suggestion(intent="legacy", filter=["b = 1"]).model_dump(),
+                    "filterErrors": ["Attribute 'b' is not indexed"],
+                }
+            ],
+        }
+    )
+
+    resp = await suggest_delineation(req)
+
+    assert [s.filter for s in resp.objectType] == [["a = 1"], ["a = 2"]]
+    assert resp.correction.attempts == 2
+    assert resp.correction.valid
+    assert "structured_validation_feedback" in prompts[1]
+    assert "Same filter as object type 'account/i0'" in prompts[1]
+    # the feedback of the client is kept next to the generated one
+    assert "Attribute 'b' is not indexed" in prompts[0] and "Attribute 'b' is not indexed" in prompts[1]